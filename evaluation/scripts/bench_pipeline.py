@@ -0,0 +1,1429 @@
+"""
+Offline Pipeline Benchmark
+==========================
+Times the ingest, retrieval, writing-chat and research paths without Postgres,
+GPUs or LLM providers, so changes that add sequential LLM calls or slow down
+retrieval show up before they ship:
+
+- LLM calls go through the real ModelDispatcher to a scripted provider (or a
+  recorded cassette) that sleeps according to a latency profile and counts
+  calls, tokens and how much of the run was spent waiting on the LLM,
+- BGE-M3 and the reranker are replaced by deterministic hashing models with
+  per-batch / per-pair latency, behind the real TextEmbedder/TextReranker code,
+- pgvector is replaced by an in-process store with the same query interface,
+- the corpus, questions and chat prompts are generated from a fixed seed.
+
+The research scenario runs a whole mission through the real AgentController,
+from the initial questions to the cited report; only the mission database is
+replaced, by a store that serializes each write and sleeps per the profile.
+
+Usage: python evaluation/scripts/bench_pipeline.py --label main
+       python evaluation/scripts/bench_pipeline.py --label my-branch --compare evaluation/results/bench_main_<timestamp>.json
+       python evaluation/scripts/bench_pipeline.py --profile zero --scenarios retrieval,writing_chat
+
+       Inside the container: docker cp bench_pipeline.py maestro-backend:/app/bench_pipeline.py
+                             docker exec maestro-backend python /app/bench_pipeline.py
+
+       Record real responses once (needs a user settings JSON with ai_endpoints),
+       then replay them offline:
+       python evaluation/scripts/bench_pipeline.py --record cassette.json --user-settings settings.json
+       python evaluation/scripts/bench_pipeline.py --cassette cassette.json
+
+Output: evaluation/results/bench_<label>_<timestamp>.json
+"""
+
+import os, sys, asyncio, time, logging, json, datetime, random, re, zlib, hashlib, uuid, io
+import argparse, contextlib, statistics, subprocess, tempfile, threading
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import List, Dict, Any, Optional, Tuple
+
+# Progress bars from the embedder/reranker loops would swamp the output
+os.environ.setdefault("TQDM_DISABLE", "1")
+# The fake models must not land in the real capability registry, and leftover
+# records from earlier runs must not change this one
+os.environ["MODEL_CAPABILITIES_PATH"] = os.path.join(
+    tempfile.mkdtemp(prefix="bench_capabilities_"), "model_capabilities.json")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
+if os.path.isdir(os.path.join(REPO_ROOT, "maestro_backend")):
+    BACKEND_DIR = os.path.join(REPO_ROOT, "maestro_backend")
+    RESULTS_DIR = os.path.join(REPO_ROOT, "evaluation", "results")
+else:
+    BACKEND_DIR = "/app"
+    RESULTS_DIR = "/app/evaluation/results"
+sys.path.insert(0, BACKEND_DIR)
+
+# ResearchAgent reads full documents from the same path logic as in production
+IS_DOCKER = (os.path.exists('/.dockerenv') or os.environ.get('DOCKER_CONTAINER') == 'true'
+             or os.path.exists('/app/ai_researcher'))
+if IS_DOCKER:
+    MARKDOWN_DIR = "/app/ai_researcher/data/processed/markdown"
+else:
+    # The relative path the agent uses resolves against the backend directory
+    os.chdir(BACKEND_DIR)
+    MARKDOWN_DIR = os.path.join(BACKEND_DIR, "ai_researcher", "data", "processed", "markdown")
+
+import numpy as np
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice, ChoiceDelta
+from openai.types.chat.chat_completion_message import ChatCompletionMessage
+from openai.types.completion_usage import CompletionUsage
+
+# Same order as main.py: crud has to finish loading before the agent modules
+# import it through the context manager
+from database import crud, models  # noqa: F401
+from ai_researcher import config
+from ai_researcher.user_context import set_current_user
+from ai_researcher.agentic_layer import async_context_manager
+from ai_researcher.agentic_layer.async_context_manager import AsyncContextManager
+from ai_researcher.agentic_layer.agent_controller import AgentController
+from ai_researcher.agentic_layer.model_dispatcher import ModelDispatcher
+from ai_researcher.agentic_layer.model_capabilities import estimate_prompt_tokens
+from ai_researcher.agentic_layer.tool_registry import ToolRegistry, ToolDefinition
+from ai_researcher.agentic_layer.tools.document_search import DocumentSearchTool
+from ai_researcher.agentic_layer.agents.simplified_writing_agent import SimplifiedWritingAgent
+from ai_researcher.agentic_layer.controller.core_controller import MaybeSemaphore
+from ai_researcher.agentic_layer.controller.utils.mission_trace import analyze_trace
+from ai_researcher.core_rag.chunker import Chunker
+from ai_researcher.core_rag.embedder import TextEmbedder
+from ai_researcher.core_rag.reranker import TextReranker
+from ai_researcher.core_rag.retriever import Retriever
+from ai_researcher.core_rag.query_preparer import QueryPreparer
+from ai_researcher.core_rag.query_strategist import QueryStrategist
+from ai_researcher.core_rag.vector_store_singleton import VectorStoreSingleton
+from ai_researcher.core_rag.model_cache import model_cache
+from ai_researcher.dynamic_config import (
+    get_initial_research_max_depth, get_initial_research_max_questions, get_max_concurrent_requests
+)
+from database import async_crud, crud_research_reports, database
+from services.document_code_resolver import document_code_resolver
+
+logger = logging.getLogger("bench_pipeline")
+
+SCENARIOS = ["ingest", "retrieval", "writing_chat", "research"]
+CHAT_ID = "bench-chat"
+DOCUMENT_GROUP_ID = "bench-document-group"
+OFFLINE_BASE_URL = "http://benchmark.invalid/v1"
+
+
+# ── Latency profiles ───────────────────────────────────────────────
+# Seconds per operation. The LLM takes ttft plus completion_tokens / tokens_per_sec
+# (0 tokens_per_sec means instant generation); the embedder pays per batch plus
+# per text, the reranker per query-document pair, the store per call and the
+# mission database per write.
+PROFILES = {
+    # No simulated latency: call counts and pure Python overhead only
+    "zero": dict(llm_ttft=0.0, llm_tokens_per_sec=0, embed_batch=0.0, embed_per_text=0.0,
+                 rerank_per_pair=0.0, store_query=0.0, store_insert_per_chunk=0.0, db_write=0.0),
+    # Local GPU embedder/reranker and an OpenAI-compatible server on the same host
+    "local": dict(llm_ttft=0.25, llm_tokens_per_sec=60, embed_batch=0.015, embed_per_text=0.004,
+                  rerank_per_pair=0.003, store_query=0.008, store_insert_per_chunk=0.0004, db_write=0.004),
+    # Local GPU embedder/reranker and a hosted LLM provider
+    "hosted": dict(llm_ttft=0.7, llm_tokens_per_sec=90, embed_batch=0.015, embed_per_text=0.004,
+                   rerank_per_pair=0.003, store_query=0.008, store_insert_per_chunk=0.0004, db_write=0.004),
+}
+
+
+class LatencyProfile:
+    def __init__(self, name: str, time_scale: float = 1.0):
+        self.name = name
+        self.time_scale = time_scale
+        for key, value in PROFILES[name].items():
+            setattr(self, key, value)
+
+    def seconds(self, value: float) -> float:
+        return value * self.time_scale
+
+    def llm_generation(self, completion_tokens: int) -> float:
+        if not self.llm_tokens_per_sec:
+            return 0.0
+        return self.seconds(completion_tokens / self.llm_tokens_per_sec)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "time_scale": self.time_scale, **PROFILES[self.name]}
+
+
+def _block(seconds: float):
+    """Simulated model/database time on a worker thread (blocks it, like the real call)."""
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+# ── Synthetic corpus ───────────────────────────────────────────────
+TOPICS = [
+    "lithium-ion battery degradation", "pumped hydro storage", "grid frequency regulation",
+    "renewable curtailment", "vanadium flow batteries", "thermal energy storage",
+    "capacity market design", "green hydrogen electrolysis", "demand response programmes",
+    "transmission congestion", "storage cost trends", "battery recycling",
+]
+METRICS = [
+    "round-trip efficiency", "levelised cost of storage", "peak demand", "curtailment rates",
+    "frequency deviation", "cycle life", "capital cost", "emissions intensity",
+]
+REGIONS = ["California", "South Australia", "Germany", "Texas", "the United Kingdom", "Japan", "Chile"]
+FINDINGS = [
+    "reduced {metric} by {n}%", "increased {metric} by {n}%", "had no measurable effect on {metric}",
+    "lowered {metric} by roughly {n}% compared with the baseline", "improved {metric} by {n}% over {years} years",
+]
+METHODS = ["a field trial", "a techno-economic model", "a survey of operators", "a simulation study", "a meta-analysis"]
+AUTHORS = ["Okafor", "Lindqvist", "Moreau", "Tanaka", "Ribeiro", "Novak", "Haddad", "Castillo", "Brennan", "Iyer"]
+JOURNALS = ["Energy Policy", "Applied Energy", "Joule", "Nature Energy", "IEEE Transactions on Power Systems"]
+
+MISSION_REQUEST = "How does grid-scale energy storage support the integration of renewable generation?"
+WRITING_PROMPTS = [
+    "Summarise what the documents say about lithium-ion battery degradation and cycle life.",
+    "Compare pumped hydro storage with vanadium flow batteries in terms of cost and efficiency.",
+    "Write a paragraph on how storage reduces renewable curtailment, with citations.",
+]
+
+STOPWORDS = set("a an the of and or in on to for by with from at as is are was were be been it its this that these those "
+                "how what which why when does do did can could should would into over than about their there".split())
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in re.findall(r"[a-z0-9]+", (text or "").lower()) if t not in STOPWORDS]
+
+
+class SyntheticCorpus:
+    """Deterministic markdown documents about energy storage, with catalogue metadata."""
+
+    def __init__(self, num_docs: int, seed: int):
+        rng = random.Random(seed)
+        self.documents: List[Dict[str, Any]] = []
+        for index in range(num_docs):
+            doc_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            topic = TOPICS[index % len(TOPICS)]
+            second = rng.choice([t for t in TOPICS if t != topic])
+            title = f"{topic.capitalize()} and {second}: evidence from {rng.choice(REGIONS)}"
+            authors = rng.sample(AUTHORS, rng.randint(1, 3))
+            year = rng.randint(2012, 2025)
+            sections = []
+            for _ in range(rng.randint(3, 7)):
+                heading = f"## {rng.choice(METRICS).capitalize()} and {rng.choice([topic, second])}"
+                paragraphs = [self._paragraph(rng, rng.choice([topic, topic, second])) for _ in range(rng.randint(2, 5))]
+                sections.append(heading + "\n\n" + "\n\n".join(paragraphs))
+            markdown = f"# {title}\n\n" + "\n\n".join(sections) + "\n"
+            self.documents.append({
+                "doc_id": doc_id,
+                "markdown": markdown,
+                "metadata": {
+                    "original_filename": f"{re.sub(r'[^a-z0-9]+', '_', title.lower())[:60]}.pdf",
+                    "title": title,
+                    "authors": authors,
+                    "publication_year": year,
+                    "journal_or_source": rng.choice(JOURNALS),
+                },
+            })
+
+    @staticmethod
+    def _paragraph(rng: random.Random, topic: str) -> str:
+        sentences = []
+        for _ in range(rng.randint(3, 6)):
+            finding = rng.choice(FINDINGS).format(metric=rng.choice(METRICS), n=rng.randint(3, 45), years=rng.randint(2, 15))
+            sentences.append(f"{rng.choice(METHODS).capitalize()} in {rng.choice(REGIONS)} found that {topic} {finding}.")
+        return " ".join(sentences)
+
+    def catalog(self) -> Dict[str, Dict[str, Any]]:
+        """doc_id -> the fields DocumentSearchTool copies from the documents table."""
+        return {
+            doc["doc_id"]: {
+                "original_filename": doc["metadata"]["original_filename"],
+                "filename": doc["metadata"]["original_filename"],
+                "title": doc["metadata"]["title"],
+                "authors": doc["metadata"]["authors"],
+                "year": doc["metadata"]["publication_year"],
+                "journal": doc["metadata"]["journal_or_source"],
+                "processing_status": "completed",
+            }
+            for doc in self.documents
+        }
+
+    def retrieval_queries(self, count: int, seed: int) -> List[str]:
+        rng = random.Random(seed + 1)
+        return [f"How does {rng.choice(TOPICS)} affect {rng.choice(METRICS)}?" for _ in range(count)]
+
+
+# ── Scripted LLM ───────────────────────────────────────────────────
+def _last(pattern: str, text: str, default: str = "") -> str:
+    matches = re.findall(pattern, text)
+    return matches[-1].strip().strip('"').strip() if matches else default
+
+
+def _message_text(messages: List[Dict[str, Any]]) -> str:
+    return "\n".join(m["content"] for m in messages if isinstance(m.get("content"), str))
+
+
+def _seeded(text: str) -> random.Random:
+    return random.Random(zlib.crc32(text.encode("utf-8")))
+
+
+class ScriptedResponder:
+    """
+    Answers each prompt the pipeline sends with a plausible, deterministic reply.
+    ``classify`` recognises the call from markers in its prompt; the kinds are
+    also what the report counts calls by.
+    """
+
+    # (kind, marker) in priority order; the first marker found in the prompt wins
+    MARKERS = [
+        ("router", "You are a routing agent"),
+        ("query_enrichment", "query enrichment specialist"),
+        ("writing_decompose", "query decomposition specialist"),
+        ("quality_assessment", "content quality assessor"),
+        ("query_strategy", "comma-separated list of the chosen technique names"),
+        ("sub_queries", "Output *only* the sub-queries"),
+        ("step_back", "Output *only* the step-back question"),
+        ("query_rewrite", "rewrite it to be clearer"),
+        ("initial_questions", "expert research strategist"),
+        ("synthesis", '"sub_questions"'),
+        ("chunk_sufficiency", "NEED_FULL"),
+        ("note", "Content reviewed, but not relevant"),
+        ("request_analysis", "RequestAnalysisOutput schema"),
+        ("outline", "expert research planner"),
+        ("note_assignment", "You are the NoteAssignmentAgent"),
+        ("writing_reflection", "WritingReflectionOutput schema"),
+        ("section_draft", "expert academic writer"),
+        ("report_title", "compelling title for a research report"),
+        ("writing_response", "User Request:"),
+    ]
+
+    def classify(self, messages: List[Dict[str, Any]]) -> str:
+        text = _message_text(messages)
+        for kind, marker in self.MARKERS:
+            if marker in text:
+                return kind
+        return "other"
+
+    def respond(self, kind: str, messages: List[Dict[str, Any]]) -> str:
+        text = _message_text(messages)
+        handler = getattr(self, f"_{kind}", None)
+        return handler(text) if handler else self._prose(text, 80)
+
+    def _router(self, text: str) -> str:
+        options = re.findall(r"'(search|documents|both|none)'", _last(r"Output ONLY[^\n]*", text))
+        for preferred in ("documents", "both", "search"):
+            if preferred in options:
+                return preferred
+        return "none"
+
+    def _query_enrichment(self, text: str) -> str:
+        return _last(r"Raw User Message: (.+)", text, "energy storage")
+
+    def _writing_decompose(self, text: str) -> str:
+        query = _last(r"Query to decompose: (.+)", text, "energy storage")
+        core = query.rstrip("?.")
+        return json.dumps([f"{core} evidence", f"{core} limitations"])
+
+    def _quality_assessment(self, text: str) -> str:
+        return json.dumps({"quality_score": 8, "is_sufficient": True, "missing_aspects": [], "refined_query_suggestion": ""})
+
+    def _query_strategy(self, text: str) -> str:
+        return "sub_query"
+
+    def _sub_queries(self, text: str) -> str:
+        core = _last(r"Original Query: (.+)", text, "energy storage").rstrip("?.")
+        return f"{core} definitions and scope\n{core} measured outcomes\n{core} open problems"
+
+    def _step_back(self, text: str) -> str:
+        query = _last(r"Specific User Query: (.+)", text, "energy storage")
+        topic = " ".join(_tokens(query)[:4]) or "energy storage"
+        return f"What general principles govern {topic}?"
+
+    def _query_rewrite(self, text: str) -> str:
+        return _last(r"Original Query: (.+)", text, "energy storage")
+
+    def _initial_questions(self, text: str) -> str:
+        rng = _seeded(_last(r'\*\*User\'s Research Request:\*\*\s*"(.+)"', text, text[-200:]))
+        topics = rng.sample(TOPICS, 4)
+        return json.dumps({"questions": [
+            f"How does {topics[0]} affect {rng.choice(METRICS)} on grids with high renewable shares?",
+            f"What role does {topics[1]} play in balancing variable renewable generation?",
+            f"Which policies and market designs make {topics[2]} economically viable?",
+            f"What are the main technical limits of {topics[3]} at grid scale?",
+        ]})
+
+    def _synthesis(self, text: str) -> str:
+        question = _last(r'You are exploring the question: "(.+)" \(Depth', text, "energy storage")
+        rng = _seeded(question)
+        first, second = rng.sample(TOPICS, 2)
+        metric = rng.choice(METRICS)
+        # Paraphrased pairs give the novelty queue near-duplicates to drop
+        sub_questions = [f"How does {first} influence {metric}?", f"What is the effect of {first} on {metric}?",
+                         f"How is {second} evaluated in recent studies?"]
+        return json.dumps({
+            "synthesis": f"The sources connect {first} and {second} with changes in {metric}.",
+            "sub_questions": sub_questions[:rng.randint(1, 3)],
+            "updated_scratchpad": f"Explored: {question[:120]}",
+        })
+
+    def _chunk_sufficiency(self, text: str) -> str:
+        return "NEED_FULL"
+
+    def _note(self, text: str) -> str:
+        question = _last(r'specific research question: "(.+)"', text)
+        content = text.split("Content to Analyze", 1)[-1].split("---", 1)[-1].split("Task:", 1)[0]
+        content = " ".join(line for line in content.splitlines() if line.strip() and not line.startswith(("#", "---")))
+        keywords = set(_tokens(question))
+        sentences = [s.strip() for s in re.split(r"(?<=\.)\s+", content) if len(keywords & set(_tokens(s))) >= 2]
+        if not sentences:
+            return "Content reviewed, but not relevant to the question."
+        return "The source reports that " + " ".join(sentences[:4])
+
+    def _request_analysis(self, text: str) -> str:
+        return json.dumps({
+            "request_type": "Research Report", "target_tone": "Formal Academic",
+            "target_audience": "Researchers/Experts", "requested_length": "Comprehensive Report",
+            "requested_format": "Full Paper", "preferred_source_types": "",
+            "analysis_reasoning": "The request asks for an evidence-based overview.",
+        })
+
+    def _outline(self, text: str) -> str:
+        request = _last(r"Research Request: (.+)", text, MISSION_REQUEST)
+        note_ids = list(dict.fromkeys(re.findall(r"\bnote_[0-9a-f]{8}\b", text)))
+        topics = _seeded(request).sample(TOPICS, 3)
+        # The same request always gets the same outline, so revisions keep its sections
+        sections = [{"title": "Introduction", "description": "Scope of the report and the questions it answers.",
+                     "research_strategy": "content_based", "associated_note_ids": [], "subsections": []}]
+        sections += [{"title": topic.capitalize(), "description": f"What the evidence says about {topic}.",
+                      "research_strategy": "research_based", "associated_note_ids": note_ids[index::len(topics)],
+                      "subsections": []} for index, topic in enumerate(topics)]
+        sections.append({"title": "Conclusion", "description": "The main findings and open questions.",
+                         "research_strategy": "content_based", "associated_note_ids": [], "subsections": []})
+        return json.dumps({"mission_goal": request, "generated_thought": f"{len(note_ids)} notes over {len(topics)} sections.",
+                           "report_outline": sections})
+
+    def _note_assignment(self, text: str) -> str:
+        section_id = _last(r"Section ID: (\S+)", text, "section")
+        keywords = set(_tokens(_last(r"Section Title: (.+)", text)))
+        notes = re.findall(r"Note ID: (note_[0-9a-f]{8})\nContent Snippet: (.+)", text)
+        relevant = [note_id for note_id, snippet in notes if keywords & set(_tokens(snippet))]
+        return json.dumps({"section_id": section_id, "relevant_note_ids": relevant or [note_id for note_id, _ in notes[:5]],
+                           "reasoning": f"{len(relevant)} notes mention the section topic."})
+
+    def _writing_reflection(self, text: str) -> str:
+        section_ids = re.findall(r"Section ID: (\S+)", text) or re.findall(r"### Section: (\S+)", text)
+        suggestions = [{"section_id": section_ids[0], "issue_description": "The transition into this section is abrupt.",
+                        "suggested_change": "Open with a sentence linking it to the previous section.", "priority": 2}] if section_ids else []
+        return json.dumps({"overall_assessment": "The draft follows the outline and cites its sources.",
+                           "change_suggestions": suggestions, "scratchpad_update": "Reviewed the draft."})
+
+    def _section_draft(self, text: str) -> str:
+        citations = list(dict.fromkeys(re.findall(r"Use `\[(\w+)\]` for citations", text)))[:4]
+        return self._prose(_last(r"Section Title: (.+)", text, text[-300:]), 160, citations)
+
+    def _report_title(self, text: str) -> str:
+        return "Grid-Scale Energy Storage and the Integration of Renewable Generation"
+
+    def _writing_response(self, text: str) -> str:
+        citations = list(dict.fromkeys(re.findall(r"Citation ID: \[([a-f0-9]{8})\]", text)))[:4]
+        return self._prose(_last(r"User Request: (.+)", text, text[-300:]), 220, citations)
+
+    @staticmethod
+    def _prose(seed_text: str, words: int, citations: Optional[List[str]] = None) -> str:
+        rng = _seeded(seed_text)
+        sentences, count = [], 0
+        while count < words:
+            sentence = (f"{rng.choice(METHODS).capitalize()} indicates that {rng.choice(TOPICS)} "
+                        f"{rng.choice(FINDINGS).format(metric=rng.choice(METRICS), n=rng.randint(3, 45), years=rng.randint(2, 15))}")
+            if citations:
+                sentence += f" [{citations[len(sentences) % len(citations)]}]"
+            sentences.append(sentence + ".")
+            count += len(sentence.split())
+        return " ".join(sentences)
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text or "") // 4)
+
+
+# Timestamps in prompts would make every recording unique
+_VOLATILE_PATTERNS = [re.compile(r"\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?"),
+                      re.compile(r"Current Date: [^\n]*")]
+
+
+def cassette_key(messages: List[Dict[str, Any]]) -> str:
+    normalized = []
+    for message in messages:
+        content = message.get("content") if isinstance(message.get("content"), str) else json.dumps(message.get("content"))
+        for pattern in _VOLATILE_PATTERNS:
+            content = pattern.sub("<ts>", content or "")
+        normalized.append([message.get("role"), content])
+    return hashlib.sha1(json.dumps(normalized).encode("utf-8")).hexdigest()
+
+
+class BenchmarkLLM:
+    """
+    The provider behind every dispatcher client. Replies come from the cassette
+    when it has the prompt, otherwise from the scripted responder, or from the
+    real provider when recording. Every call is timed for the report.
+    """
+
+    def __init__(self, profile: LatencyProfile, cassette: Optional[Dict[str, Dict[str, Any]]] = None, recording: bool = False):
+        self.profile = profile
+        self.responder = ScriptedResponder()
+        self.cassette = cassette if cassette is not None else {}
+        self.recording = recording
+        self.calls: List[Dict[str, Any]] = []
+        self.cassette_hits = 0
+        self.cassette_misses = 0
+        self._in_flight = 0
+        self.max_in_flight = 0
+
+    def reset(self):
+        self.calls = []
+        self.cassette_hits = self.cassette_misses = 0
+        self._in_flight = self.max_in_flight = 0
+
+    def client(self, upstream=None):
+        """An object shaped like the parts of AsyncOpenAI the dispatcher uses."""
+        async def create(**params):
+            return await self.create(upstream, **params)
+
+        async def retrieve(model, **kwargs):
+            if upstream is not None:
+                return await upstream.models.retrieve(model, **kwargs)
+            return {"id": model, "context_length": 131072}
+
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)),
+                               models=SimpleNamespace(retrieve=retrieve))
+
+    def _begin(self, kind: str, prompt_tokens: int, stream: bool) -> Dict[str, Any]:
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        call = {"kind": kind, "stream": stream, "prompt_tokens": prompt_tokens, "completion_tokens": 0,
+                "start": time.perf_counter(), "end": None}
+        self.calls.append(call)
+        return call
+
+    def _end(self, call: Dict[str, Any]):
+        if call["end"] is None:
+            call["end"] = time.perf_counter()
+            self._in_flight -= 1
+
+    async def create(self, upstream, model: str, messages: List[Dict[str, Any]], stream: bool = False,
+                     stream_options: Optional[Dict[str, Any]] = None, **params):
+        kind = self.responder.classify(messages)
+        key = cassette_key(messages)
+        call = self._begin(kind, estimate_prompt_tokens(messages), stream)
+        if self.recording:
+            return await self._record(upstream, call, key, model, messages, stream, stream_options, params)
+
+        recorded = self.cassette.get(key)
+        if recorded is not None:
+            self.cassette_hits += 1
+            content = recorded["content"]
+        else:
+            self.cassette_misses += 1
+            content = self.responder.respond(kind, messages)
+        call["completion_tokens"] = _count_tokens(content)
+        usage = CompletionUsage(prompt_tokens=call["prompt_tokens"], completion_tokens=call["completion_tokens"],
+                                total_tokens=call["prompt_tokens"] + call["completion_tokens"])
+        if stream:
+            include_usage = bool(stream_options and stream_options.get("include_usage"))
+            return ScriptedStream(self, call, model, content, usage, include_usage)
+        try:
+            await asyncio.sleep(self.profile.seconds(self.profile.llm_ttft) + self.profile.llm_generation(call["completion_tokens"]))
+        finally:
+            self._end(call)
+        return ChatCompletion(
+            id=f"bench-{len(self.calls)}", object="chat.completion", created=int(time.time()), model=model, usage=usage,
+            choices=[Choice(index=0, finish_reason="stop", message=ChatCompletionMessage(role="assistant", content=content))]
+        )
+
+    async def _record(self, upstream, call, key, model, messages, stream, stream_options, params):
+        if upstream is None:
+            self._end(call)
+            raise RuntimeError("Recording needs a configured provider (--user-settings)")
+        try:
+            response = await upstream.chat.completions.create(
+                model=model, messages=messages, stream=stream,
+                **({"stream_options": stream_options} if stream_options else {}), **params
+            )
+        except BaseException:
+            self._end(call)
+            raise
+        if stream:
+            return RecordingStream(self, call, key, response)
+        self._end(call)
+        content = (response.choices[0].message.content or "") if response.choices else ""
+        call["completion_tokens"] = response.usage.completion_tokens if response.usage else _count_tokens(content)
+        self.cassette[key] = {"kind": call["kind"], "content": content}
+        return response
+
+    def summary(self) -> Dict[str, Any]:
+        by_kind: Dict[str, int] = {}
+        for call in self.calls:
+            by_kind[call["kind"]] = by_kind.get(call["kind"], 0) + 1
+        intervals = sorted((c["start"], c["end"]) for c in self.calls if c["end"] is not None)
+        busy, serial, cursor = 0.0, 0.0, None
+        for start, end in intervals:
+            serial += end - start
+            if cursor is None or start > cursor:
+                busy += end - start
+                cursor = end
+            elif end > cursor:
+                busy += end - cursor
+                cursor = end
+        summary = {
+            "calls": len(self.calls),
+            "calls_by_kind": dict(sorted(by_kind.items())),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in self.calls),
+            "completion_tokens": sum(c["completion_tokens"] for c in self.calls),
+            # Wall time with at least one call in flight; sequential calls add to it, parallel ones overlap
+            "busy_sec": round(busy, 3),
+            "serial_sec": round(serial, 3),
+            "max_in_flight": self.max_in_flight,
+        }
+        if self.cassette:
+            summary["cassette_hits"] = self.cassette_hits
+            summary["cassette_misses"] = self.cassette_misses
+        return summary
+
+
+class ScriptedStream:
+    """Async iterator of ChatCompletionChunks with ``close()``, like openai's AsyncStream."""
+
+    def __init__(self, llm: BenchmarkLLM, call: Dict[str, Any], model: str, content: str,
+                 usage: CompletionUsage, include_usage: bool):
+        self._llm = llm
+        self._call = call
+        self._model = model
+        self._pieces = re.findall(r"\S+\s*", content) or [""]
+        self._usage = usage
+        self._include_usage = include_usage
+        self._iterator = self._iterate()
+
+    def __aiter__(self):
+        return self._iterator
+
+    def _chunk(self, choices, usage=None) -> ChatCompletionChunk:
+        return ChatCompletionChunk(id="bench-stream", object="chat.completion.chunk", created=int(time.time()),
+                                   model=self._model, choices=choices, usage=usage)
+
+    async def _iterate(self):
+        profile = self._llm.profile
+        per_piece = profile.llm_generation(self._usage.completion_tokens) / len(self._pieces)
+        try:
+            await asyncio.sleep(profile.seconds(profile.llm_ttft))
+            for index, piece in enumerate(self._pieces):
+                if index:
+                    await asyncio.sleep(per_piece)
+                yield self._chunk([ChunkChoice(index=0, delta=ChoiceDelta(content=piece), finish_reason=None)])
+            yield self._chunk([ChunkChoice(index=0, delta=ChoiceDelta(), finish_reason="stop")])
+            if self._include_usage:
+                yield self._chunk([], usage=self._usage)
+        finally:
+            self._llm._end(self._call)
+
+    async def close(self):
+        await self._iterator.aclose()
+        self._llm._end(self._call)
+
+
+class RecordingStream:
+    """Passes a real provider stream through and stores the streamed text in the cassette."""
+
+    def __init__(self, llm: BenchmarkLLM, call: Dict[str, Any], key: str, upstream_stream):
+        self._llm = llm
+        self._call = call
+        self._key = key
+        self._stream = upstream_stream
+        self._parts: List[str] = []
+        self._iterator = self._iterate()
+
+    def __aiter__(self):
+        return self._iterator
+
+    async def _iterate(self):
+        try:
+            async for chunk in self._stream:
+                if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                    self._parts.append(chunk.choices[0].delta.content)
+                if getattr(chunk, "usage", None):
+                    self._call["completion_tokens"] = chunk.usage.completion_tokens
+                yield chunk
+            self._llm.cassette[self._key] = {"kind": self._call["kind"], "content": "".join(self._parts)}
+        finally:
+            self._call["completion_tokens"] = self._call["completion_tokens"] or _count_tokens("".join(self._parts))
+            self._llm._end(self._call)
+
+    async def close(self):
+        await self._iterator.aclose()
+        await self._stream.close()
+        self._llm._end(self._call)
+
+
+class BenchmarkDispatcher(ModelDispatcher):
+    """ModelDispatcher whose provider clients are the benchmark LLM."""
+
+    def __init__(self, llm: BenchmarkLLM, **kwargs):
+        self.llm = llm
+        super().__init__(**kwargs)
+
+    def _get_or_create_client(self, provider_name, current_user_settings):
+        if not self.llm.recording:
+            return self.llm.client()
+        upstream = super()._get_or_create_client(provider_name, current_user_settings)
+        return self.llm.client(upstream) if upstream else None
+
+
+def offline_user_settings(research_parameters: Dict[str, Any]) -> Dict[str, Any]:
+    advanced_models = {
+        model_type: {"provider": "custom", "model_name": f"bench-{model_type}", "base_url": OFFLINE_BASE_URL}
+        for model_type in ("fast", "mid", "intelligent", "verifier")
+    }
+    return {
+        "ai_endpoints": {
+            "providers": {"custom": {"enabled": True, "base_url": OFFLINE_BASE_URL, "api_key": ""}},
+            "advanced_models": advanced_models,
+        },
+        "research_parameters": research_parameters,
+    }
+
+
+# ── Offline embedder, reranker and vector store ────────────────────
+class CallCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.items = 0
+        self.busy_sec = 0.0
+
+    def add(self, items: int, seconds: float):
+        with self._lock:
+            self.calls += 1
+            self.items += items
+            self.busy_sec += seconds
+
+    def as_dict(self, items_name: str) -> Dict[str, Any]:
+        return {"calls": self.calls, items_name: self.items, "busy_sec": round(self.busy_sec, 3)}
+
+
+class HashingBGEM3:
+    """Stands in for BGEM3FlagModel: hashed bag-of-words dense vectors and token-count lexical weights."""
+
+    DIMENSIONS = 1024
+
+    def __init__(self, profile: LatencyProfile, counter: CallCounter):
+        self.profile = profile
+        self.counter = counter
+
+    def encode(self, texts, batch_size=None, max_length=None, return_dense=True, return_sparse=True, return_colbert_vecs=False):
+        started = time.perf_counter()
+        _block(self.profile.seconds(self.profile.embed_batch + self.profile.embed_per_text * len(texts)))
+        dense, sparse = [], []
+        for text in texts:
+            vector = np.zeros(self.DIMENSIONS, dtype=np.float32)
+            weights: Dict[str, float] = {}
+            for token in _tokens(text):
+                token_hash = zlib.crc32(token.encode("utf-8"))
+                vector[token_hash % self.DIMENSIONS] += 1.0 if token_hash & 0x80000000 else -1.0
+                token_id = str(token_hash % 250002)
+                weights[token_id] = weights.get(token_id, 0.0) + 0.1
+            norm = float(np.linalg.norm(vector))
+            dense.append(vector / norm if norm > 0 else vector)
+            sparse.append(weights)
+        self.counter.add(len(texts), time.perf_counter() - started)
+        return {"dense_vecs": np.stack(dense) if dense else np.zeros((0, self.DIMENSIONS)), "lexical_weights": sparse}
+
+
+class OfflineEmbedder(TextEmbedder):
+    """TextEmbedder running its usual batching and locking around HashingBGEM3."""
+
+    def __init__(self, profile: LatencyProfile, batch_size: int = 16):
+        self.device = "cpu"
+        self.model_name = "bench/hashing-bge-m3"
+        self.batch_size = batch_size
+        self.max_length = 8192
+        self.enable_memory_management = False
+        self._model_lock = threading.Lock()
+        self._memory_cleanup_threshold = 0.85
+        self._queries_since_cleanup = 0
+        self._cleanup_frequency = 10
+        self.counter = CallCounter()
+        self.model = HashingBGEM3(profile, self.counter)
+
+
+class OverlapCrossEncoder:
+    """Stands in for FlagReranker: scores pairs by query-term coverage."""
+
+    def __init__(self, profile: LatencyProfile, counter: CallCounter):
+        self.profile = profile
+        self.counter = counter
+
+    def compute_score(self, pairs, normalize=True):
+        started = time.perf_counter()
+        _block(self.profile.seconds(self.profile.rerank_per_pair * len(pairs)))
+        scores = []
+        for query, document in pairs:
+            query_terms, document_terms = set(_tokens(query)), set(_tokens(document))
+            coverage = len(query_terms & document_terms) / len(query_terms) if query_terms else 0.0
+            scores.append(round(1 / (1 + np.exp(-8 * (coverage - 0.5))), 6) if normalize else coverage)
+        self.counter.add(len(pairs), time.perf_counter() - started)
+        return scores
+
+
+class OfflineReranker(TextReranker):
+    def __init__(self, profile: LatencyProfile, batch_size: int = 16):
+        self.device = "cpu"
+        self.model_name = "bench/overlap-reranker"
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self.counter = CallCounter()
+        self.model = OverlapCrossEncoder(profile, self.counter)
+
+
+class InMemoryVectorStore:
+    """PGVectorStore's interface over in-process arrays: dense top-2n, sparse cosine, weighted merge."""
+
+    def __init__(self, profile: LatencyProfile):
+        self.profile = profile
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.query_counter = CallCounter()
+        self.insert_counter = CallCounter()
+
+    def add_chunks(self, doc_id, chunks, dense_embeddings, sparse_embeddings, batch_size=100) -> Tuple[int, int]:
+        added = 0
+        for batch_start in range(0, len(chunks), batch_size):
+            batch_end = min(batch_start + batch_size, len(chunks))
+            started = time.perf_counter()
+            _block(self.profile.seconds(self.profile.store_insert_per_chunk * (batch_end - batch_start)))
+            with self._lock:
+                for i in range(batch_start, batch_end):
+                    chunk = chunks[i]
+                    metadata = dict(chunk.get("metadata", {}))
+                    dense = np.asarray(dense_embeddings[i], dtype=np.float32)
+                    norm = float(np.linalg.norm(dense))
+                    self._rows[f"{doc_id}_{metadata.get('chunk_index', i)}"] = {
+                        "doc_id": str(doc_id),
+                        "text": chunk["text"],
+                        "metadata": metadata,
+                        "dense": dense / norm if norm > 0 else dense,
+                        "sparse": {int(k): float(v) for k, v in (sparse_embeddings[i] or {}).items()},
+                    }
+                    added += 1
+            self.insert_counter.add(batch_end - batch_start, time.perf_counter() - started)
+        return added, added
+
+    @staticmethod
+    def _sparse_similarity(query: Dict[int, float], stored: Dict[int, float]) -> float:
+        common = query.keys() & stored.keys()
+        if not common:
+            return 0.0
+        dot = sum(query[k] * stored[k] for k in common)
+        query_norm = np.sqrt(sum(v * v for v in query.values()))
+        stored_norm = np.sqrt(sum(v * v for v in stored.values()))
+        return float(dot / (query_norm * stored_norm)) if query_norm and stored_norm else 0.0
+
+    def query(self, query_dense_embedding, query_sparse_embedding_dict, n_results=10, filter_metadata=None,
+              dense_weight=0.5, sparse_weight=0.5) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        _block(self.profile.seconds(self.profile.store_query))
+        total_weight = dense_weight + sparse_weight
+        if total_weight > 0:
+            dense_weight, sparse_weight = dense_weight / total_weight, sparse_weight / total_weight
+        else:
+            dense_weight = sparse_weight = 0.5
+
+        allowed = None
+        if filter_metadata and "doc_id" in filter_metadata:
+            doc_filter = filter_metadata["doc_id"]
+            allowed = set(map(str, doc_filter["$in"])) if isinstance(doc_filter, dict) and "$in" in doc_filter else {str(doc_filter)}
+        with self._lock:
+            rows = [(row_id, row) for row_id, row in self._rows.items() if allowed is None or row["doc_id"] in allowed]
+
+        def result(row_id, row, score):
+            return {"id": row_id, "doc_id": row["doc_id"], "text": row["text"], "metadata": dict(row["metadata"]), "score": score}
+
+        query_dense = np.asarray(query_dense_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query_dense))
+        query_dense = query_dense / norm if norm > 0 else query_dense
+        dense_scored = sorted(((float(row["dense"] @ query_dense), row_id, row) for row_id, row in rows),
+                              key=lambda item: item[0], reverse=True)[:n_results * 2]
+        merged = {row_id: result(row_id, row, similarity * dense_weight) for similarity, row_id, row in dense_scored[:n_results]}
+
+        if sparse_weight > 0 and query_sparse_embedding_dict:
+            query_sparse = {int(k): float(v) for k, v in query_sparse_embedding_dict.items()}
+            sparse_scored = sorted(((self._sparse_similarity(query_sparse, row["sparse"]), row_id, row) for row_id, row in rows),
+                                   key=lambda item: item[0], reverse=True)[:n_results]
+            for similarity, row_id, row in sparse_scored:
+                if row_id in merged:
+                    merged[row_id]["score"] += similarity * sparse_weight
+                else:
+                    merged[row_id] = result(row_id, row, similarity * sparse_weight)
+        results = sorted(merged.values(), key=lambda r: r["score"], reverse=True)[:n_results]
+        self.query_counter.add(1, time.perf_counter() - started)
+        return results
+
+    def delete_document(self, doc_id: str) -> Tuple[int, int]:
+        with self._lock:
+            row_ids = [row_id for row_id, row in self._rows.items() if row["doc_id"] == str(doc_id)]
+            for row_id in row_ids:
+                del self._rows[row_id]
+        return len(row_ids), len(row_ids)
+
+    def get_document_chunk_count(self, doc_id: str) -> int:
+        with self._lock:
+            return sum(1 for row in self._rows.values() if row["doc_id"] == str(doc_id))
+
+    def get_all_document_ids(self) -> set:
+        with self._lock:
+            return {row["doc_id"] for row in self._rows.values()}
+
+    def healthcheck(self) -> bool:
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"total_chunks": len(self._rows), "total_documents": len(self.get_all_document_ids()), "backend": "in-memory"}
+
+
+class OfflineDocumentSearchTool(DocumentSearchTool):
+    """DocumentSearchTool with the document group and metadata lookups served from the corpus catalogue."""
+
+    def __init__(self, retriever, query_preparer, query_strategist, catalog: Dict[str, Dict[str, Any]], controller=None):
+        super().__init__(retriever=retriever, query_preparer=query_preparer, query_strategist=query_strategist,
+                         controller=controller)
+        self.catalog = catalog
+
+    async def _get_document_ids_from_group(self, document_group_id: str) -> List[str]:
+        return list(self.catalog) if document_group_id == DOCUMENT_GROUP_ID else []
+
+    async def _enrich_chunks_with_document_metadata(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for chunk in chunks:
+            doc_id = chunk.get("metadata", {}).get("doc_id")
+            if doc_id in self.catalog:
+                chunk["metadata"].update(self.catalog[doc_id])
+        return chunks
+
+
+# ── Offline mission persistence ────────────────────────────────────
+class OfflineMissionStore:
+    """
+    Takes the place of async_crud inside AsyncContextManager. Every write is
+    counted with the size of its JSON payload and takes the profile's database
+    time; reads find the benchmark mission. The last written trace is kept for
+    the per-phase report.
+    """
+
+    def __init__(self, profile: LatencyProfile):
+        self.profile = profile
+        self.writes = CallCounter()
+        self.writes_by_operation: Dict[str, int] = {}
+        self.traces: Dict[str, Tuple[Any, Dict[str, Any]]] = {}
+
+    def __getattr__(self, name):
+        target = getattr(async_crud, name)
+        if not callable(target):
+            return target  # Constants such as ROUND_START_PHASE
+
+        async def write(db, *args, **kwargs):
+            await self._write(name, [args, kwargs])
+        return write
+
+    async def _write(self, operation: str, payload: Any):
+        started = time.perf_counter()
+        size = len(json.dumps(payload, default=str))
+        await asyncio.sleep(self.profile.seconds(self.profile.db_write))
+        self.writes_by_operation[operation] = self.writes_by_operation.get(operation, 0) + 1
+        self.writes.add(size, time.perf_counter() - started)
+
+    async def get_mission(self, db, mission_id: str, **kwargs):
+        return SimpleNamespace(id=mission_id, chat_id=CHAT_ID)
+
+    async def get_chat(self, db, chat_id: str, user_id: Optional[int] = None, **kwargs):
+        return SimpleNamespace(id=chat_id, user_id=user_id)
+
+    async def get_missions_by_status(self, db, statuses):
+        return []
+
+    async def get_mission_summary(self, db, mission_id: str):
+        return None
+
+    async def append_mission_trace(self, db, mission_id: str, started_at, trace: Dict[str, Any]):
+        stored = self.traces.get(mission_id, (started_at, {"spans": []}))[1]
+        self.traces[mission_id] = (started_at, {**trace, "spans": stored["spans"] + trace["spans"]})
+        await self._write("append_mission_trace", trace)
+
+    def create_research_report(self, db, mission_id: str, content: str, *args, **kwargs):
+        self.writes_by_operation["create_research_report"] = self.writes_by_operation.get("create_research_report", 0) + 1
+        self.writes.add(len(content or ""), 0.0)
+
+    @contextlib.contextmanager
+    def installed(self):
+        """Routes the context manager's database access here for the duration of a run."""
+        @contextlib.asynccontextmanager
+        async def no_database():
+            yield None
+
+        with mock.patch.object(async_context_manager, "crud", self), \
+                mock.patch.object(async_context_manager, "get_async_db", no_database), \
+                mock.patch.object(crud_research_reports, "create_research_report", self.create_research_report):
+            yield self
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**self.writes.as_dict("bytes"), "by_operation": dict(sorted(self.writes_by_operation.items()))}
+
+
+class OfflineDocumentSession:
+    """The Session the report generator gets from get_db to look up a cited document, answered from the corpus."""
+
+    def __init__(self, corpus: SyntheticCorpus):
+        self.documents = {doc["doc_id"]: doc["metadata"] for doc in corpus.documents}
+        self._doc_id = None
+
+    def query(self, model):
+        return self
+
+    def filter(self, condition):
+        self._doc_id = condition.right.value  # Document.id == doc_id
+        return self
+
+    def first(self):
+        metadata = self.documents.get(self._doc_id)
+        if metadata is None:
+            return None
+        return SimpleNamespace(id=self._doc_id, metadata_=metadata, original_filename=metadata["original_filename"],
+                               filename=metadata["original_filename"])
+
+    def close(self):
+        pass
+
+
+class BenchmarkController(AgentController):
+    """AgentController whose document search reads the in-memory store and the corpus catalogue."""
+
+    def __init__(self, catalog: Dict[str, Dict[str, Any]], **kwargs):
+        self.catalog = catalog
+        super().__init__(**kwargs)
+
+    def _register_document_search_tool(self):
+        tool = OfflineDocumentSearchTool(self.retriever, None, None, self.catalog, controller=self)
+        self.tool_registry.register_tool(ToolDefinition(name=tool.name, description=tool.description,
+                                                        parameters_schema=tool.parameters_schema,
+                                                        implementation=tool.execute))
+
+
+# ── Scenarios ──────────────────────────────────────────────────────
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 4)
+    return {"p50_sec": pick(0.5), "p95_sec": pick(0.95), "max_sec": round(ordered[-1], 4)}
+
+
+class Bench:
+    """Shared components; each scenario starts from reset counters."""
+
+    def __init__(self, args, profile: LatencyProfile, llm: BenchmarkLLM, user_settings: Dict[str, Any]):
+        self.args = args
+        self.profile = profile
+        self.llm = llm
+        self.corpus = SyntheticCorpus(args.docs, args.seed)
+        self.embedder = OfflineEmbedder(profile)
+        self.reranker = OfflineReranker(profile)
+        self.store = InMemoryVectorStore(profile)
+        self.chunker = Chunker()
+        self.user_settings = user_settings
+        self.dispatcher: Optional[BenchmarkDispatcher] = None
+        self._markdown_files: List[str] = []
+        # The writing agent looks these up itself
+        VectorStoreSingleton._instance = self.store
+        model_cache._embedder = self.embedder
+        model_cache._reranker = self.reranker
+        # Notes sent to the UI name their documents through this cache
+        document_code_resolver._store({code: doc["metadata"]["original_filename"] for doc in self.corpus.documents
+                                       for code in (doc["doc_id"], doc["doc_id"][:8])}, [])
+
+    def reset_counters(self):
+        self.llm.reset()
+        for counter in (self.embedder.counter, self.reranker.counter, self.store.query_counter, self.store.insert_counter):
+            counter.reset()
+
+    def counters(self) -> Dict[str, Any]:
+        return {
+            "llm": self.llm.summary(),
+            "embedder": self.embedder.counter.as_dict("texts"),
+            "reranker": self.reranker.counter.as_dict("pairs"),
+            "vector_store": {"queries": self.store.query_counter.as_dict("calls")["calls"],
+                             "query_busy_sec": round(self.store.query_counter.busy_sec, 3),
+                             "chunks_inserted": self.store.insert_counter.items},
+        }
+
+    def new_dispatcher(self, context_manager: Optional[AsyncContextManager] = None) -> BenchmarkDispatcher:
+        # A fresh semaphore per run, since each one is bound to the running loop
+        return BenchmarkDispatcher(self.llm, user_settings=self.user_settings,
+                                   semaphore=asyncio.Semaphore(get_max_concurrent_requests()),
+                                   context_manager=context_manager)
+
+    def document_search_tool(self, dispatcher) -> OfflineDocumentSearchTool:
+        retriever = Retriever(embedder=self.embedder, vector_store=self.store, reranker=self.reranker)
+        return OfflineDocumentSearchTool(retriever, QueryPreparer(dispatcher), QueryStrategist(dispatcher), self.corpus.catalog())
+
+    def _ingest_document(self, doc: Dict[str, Any]) -> Tuple[int, float]:
+        """Chunk, embed and store one document the way DocumentProcessor does after conversion."""
+        started = time.perf_counter()
+        metadata = {"doc_id": doc["doc_id"], **doc["metadata"]}
+        chunks = self.chunker.chunk(doc["markdown"], doc_metadata=metadata)
+        chunks = self.embedder.embed_chunks(chunks)
+        self.store.add_chunks(
+            doc_id=doc["doc_id"], chunks=chunks,
+            dense_embeddings=[chunk["embeddings"]["dense"] for chunk in chunks],
+            sparse_embeddings=[chunk["embeddings"]["sparse"] for chunk in chunks],
+            batch_size=50
+        )
+        return len(chunks), time.perf_counter() - started
+
+    def ensure_ingested(self):
+        """Later scenarios need the corpus in the store even when ingest is not benchmarked."""
+        if not self.store.get_all_document_ids():
+            for doc in self.corpus.documents:
+                self._ingest_document(doc)
+
+    def write_markdown(self):
+        """Full-document reads during research load <doc_id>.md from the processed markdown directory."""
+        os.makedirs(MARKDOWN_DIR, exist_ok=True)
+        for doc in self.corpus.documents:
+            path = os.path.join(MARKDOWN_DIR, f"{doc['doc_id']}.md")
+            if not os.path.exists(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(doc["markdown"])
+                self._markdown_files.append(path)
+
+    def remove_markdown(self):
+        for path in self._markdown_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._markdown_files = []
+
+    async def run_ingest(self) -> Dict[str, Any]:
+        for doc_id in list(self.store.get_all_document_ids()):
+            self.store.delete_document(doc_id)
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=self.args.ingest_workers) as pool:
+            results = await asyncio.gather(*(loop.run_in_executor(pool, self._ingest_document, doc) for doc in self.corpus.documents))
+        return {
+            "documents": len(results),
+            "chunks": sum(chunks for chunks, _ in results),
+            "workers": self.args.ingest_workers,
+            "per_document": _percentiles([seconds for _, seconds in results]),
+        }
+
+    async def run_retrieval(self) -> Dict[str, Any]:
+        self.ensure_ingested()
+        tool = self.document_search_tool(self.new_dispatcher())
+        queries = self.corpus.retrieval_queries(self.args.queries, self.args.seed)
+
+        async def search(query):
+            started = time.perf_counter()
+            results = await tool.execute(query=query, n_results=5, document_group_id=DOCUMENT_GROUP_ID, use_reranker=True)
+            return len(results), time.perf_counter() - started
+
+        sequential = [await search(query) for query in queries]
+        concurrent_started = time.perf_counter()
+        concurrent = await asyncio.gather(*(search(query) for query in queries))
+        return {
+            "queries": len(queries),
+            "sequential": _percentiles([seconds for _, seconds in sequential]),
+            # All queries at once: per-query latency under contention for the embedder, store and reranker
+            "concurrent": _percentiles([seconds for _, seconds in concurrent]),
+            "concurrent_wall_sec": round(time.perf_counter() - concurrent_started, 4),
+            "mean_results": round(statistics.mean(count for count, _ in sequential), 2) if sequential else 0,
+        }
+
+    async def run_writing_chat(self) -> Dict[str, Any]:
+        self.ensure_ingested()
+        dispatcher = self.new_dispatcher()
+        agent = SimplifiedWritingAgent(dispatcher)
+        agent._document_search_tool = self.document_search_tool(dispatcher)
+        agent._retriever = agent._document_search_tool.retriever
+        context_info = {
+            "document_group_id": DOCUMENT_GROUP_ID,
+            "document_group_name": "Benchmark corpus",
+            "use_web_search": False,
+        }
+
+        ttfts, totals, citations = [], [], 0
+        for prompt in WRITING_PROMPTS:
+            started = time.perf_counter()
+            first_token: List[float] = []
+
+            async def on_stream(text):
+                if text and not first_token:
+                    first_token.append(time.perf_counter() - started)
+
+            result = await agent.run(prompt, draft_content="", chat_history=[], context_info=dict(context_info),
+                                     stream_callback=on_stream)
+            totals.append(time.perf_counter() - started)
+            if first_token:
+                ttfts.append(first_token[0])
+            citations += len(result.get("sources") or [])
+        return {
+            "prompts": len(WRITING_PROMPTS),
+            "response": _percentiles(totals),
+            "ttft": _percentiles(ttfts),
+            "sources": citations,
+        }
+
+    async def run_research(self) -> Dict[str, Any]:
+        """
+        A full mission through AgentController, as the CLI runs one: initial
+        questions, confirmation, then run_mission from the initial research to
+        the cited report. The mission database is the only offline part.
+        """
+        self.ensure_ingested()
+        self.write_markdown()
+        store = OfflineMissionStore(self.profile)
+
+        def document_sessions():
+            yield OfflineDocumentSession(self.corpus)
+
+        # The trace splits the wall time per phase, whatever the deployment sets
+        with store.installed(), mock.patch.object(database, "get_db", document_sessions), \
+                mock.patch.object(config, "MISSION_TRACE_ENABLED", True):
+            context_manager = AsyncContextManager()
+            dispatcher = self.new_dispatcher(context_manager)
+            retriever = Retriever(embedder=self.embedder, vector_store=self.store, reranker=self.reranker)
+            controller = BenchmarkController(self.corpus.catalog(), model_dispatcher=dispatcher, context_manager=context_manager,
+                                             tool_registry=ToolRegistry(), retriever=retriever, reranker=self.reranker)
+            # Like API missions, concurrency is limited by the dispatcher's semaphore only
+            controller.semaphore = None
+            controller.maybe_semaphore = MaybeSemaphore(None)
+
+            mission = await context_manager.start_mission(MISSION_REQUEST, CHAT_ID, document_group_id=DOCUMENT_GROUP_ID,
+                                                          document_group_name="Benchmark corpus", use_web_search=False)
+            mission_id = mission.mission_id
+            await context_manager.update_mission_metadata(mission_id, {"document_group_id": DOCUMENT_GROUP_ID})
+            questions, _ = await controller.research_agent.generate_initial_questions(mission_id, MISSION_REQUEST)
+            await controller.confirm_questions_and_run(mission_id, questions, {"local_rag": True, "web_search": False})
+            await controller.run_mission(mission_id)
+
+            mission = context_manager.get_mission_context(mission_id)
+            trace = analyze_trace([store.traces[mission_id]], limit=0) if mission_id in store.traces else None
+            return {
+                "status": mission.status,
+                "error": mission.error_info,
+                "initial_questions": len(questions),
+                "notes": len(mission.notes),
+                "report_sections": len(mission.plan.report_outline) if mission.plan else 0,
+                "report_chars": len(mission.final_report or ""),
+                "phases": {phase["name"]: round(phase["duration_ms"] / 1000, 3) for phase in trace["phases"]} if trace else {},
+                "critical_path_ms": trace["critical_path"]["by_kind_ms"] if trace else {},
+                "db_writes": store.as_dict(),
+                "max_depth": get_initial_research_max_depth(mission_id),
+                "max_questions": get_initial_research_max_questions(mission_id),
+            }
+
+
+async def run_scenarios(bench: Bench, scenarios: List[str], repeat: int, verbose: bool) -> Dict[str, Any]:
+    report: Dict[str, Any] = {}
+    try:
+        for name in scenarios:
+            runs = []
+            for _ in range(repeat):
+                bench.reset_counters()
+                started = time.perf_counter()
+                # The agents print progress; keep the benchmark output readable
+                output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+                with output:
+                    metrics = await getattr(bench, f"run_{name}")()
+                wall = time.perf_counter() - started
+                runs.append({"wall_sec": round(wall, 4), "metrics": metrics, **bench.counters()})
+            runs.sort(key=lambda run: run["wall_sec"])
+            median = runs[len(runs) // 2]
+            report[name] = {**median, "wall_sec_runs": [run["wall_sec"] for run in runs]}
+            llm = median["llm"]
+            print(f"  {name:<13} {median['wall_sec']:>8.3f}s  llm calls {llm['calls']:>4}  "
+                  f"llm busy {llm['busy_sec']:>7.3f}s  max in flight {llm['max_in_flight']}")
+    finally:
+        bench.remove_markdown()
+    return report
+
+
+# ── Comparison ─────────────────────────────────────────────────────
+# (path in a scenario report, exact) — exact metrics regress on any increase,
+# the others when they grow by more than --max-regression
+COMPARED_METRICS = [
+    ("wall_sec", False),
+    ("llm.calls", True),
+    ("llm.busy_sec", False),
+    ("llm.prompt_tokens", False),
+    ("llm.completion_tokens", False),
+    ("embedder.calls", False),
+    ("reranker.pairs", False),
+    ("vector_store.queries", False),
+    ("metrics.sequential.p95_sec", False),
+    ("metrics.ttft.p50_sec", False),
+    ("metrics.concurrent.p95_sec", False),
+    ("metrics.phases.initial_research", False),
+    ("metrics.phases.structured_research", False),
+    ("metrics.phases.writing", False),
+    ("metrics.db_writes.calls", False),
+    ("metrics.db_writes.bytes", False),
+]
+
+
+def _lookup(data: Dict[str, Any], path: str):
+    for part in path.split("."):
+        if not isinstance(data, dict) or part not in data:
+            return None
+        data = data[part]
+    return data
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: float) -> List[str]:
+    """Prints a delta table and returns the regressions."""
+    regressions = []
+    if baseline.get("config", {}).get("profile") != current.get("config", {}).get("profile"):
+        print("Warning: baseline was recorded with a different latency profile; timings are not comparable.")
+    print(f"\n{'scenario':<13} {'metric':<34} {'baseline':>10} {'current':>10} {'change':>8}")
+    for scenario, result in current.get("scenarios", {}).items():
+        base = baseline.get("scenarios", {}).get(scenario)
+        if base is None:
+            continue
+        for path, exact in COMPARED_METRICS:
+            before, after = _lookup(base, path), _lookup(result, path)
+            if not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+                continue
+            change = (after - before) / before if before else (0.0 if after == before else float("inf"))
+            regressed = after > before if exact else change > max_regression
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{scenario:<13} {path:<34} {before:>10.3f} {after:>10.3f} {change:>+7.1%}{flag}")
+            if regressed:
+                regressions.append(f"{scenario} {path}: {before} -> {after}")
+    return regressions
+
+
+# ── Main ───────────────────────────────────────────────────────────
+class MockUser:
+    def __init__(self, uid, uname, settings):
+        self.id = uid; self.username = uname; self.settings = settings
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the ingest, retrieval, writing-chat and research paths.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="local", help="Simulated latency profile")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiplier applied to every simulated latency")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the median run is reported")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--docs", type=int, default=24, help="Synthetic documents in the corpus")
+    parser.add_argument("--queries", type=int, default=12, help="Queries in the retrieval scenario")
+    parser.add_argument("--ingest-workers", type=int, default=2)
+    parser.add_argument("--research-questions", type=int, default=None, help="Override initial_research_max_questions")
+    parser.add_argument("--research-depth", type=int, default=None, help="Override initial_research_max_depth")
+    parser.add_argument("--cassette", help="Replay LLM responses recorded with --record (scripted replies fill the gaps)")
+    parser.add_argument("--record", metavar="PATH", help="Call the real providers from --user-settings and save their replies")
+    parser.add_argument("--user-settings", help="User settings JSON (with ai_endpoints) for --record")
+    parser.add_argument("--label", default="local", help="Name used in the report file name")
+    parser.add_argument("--output", help="Report path (default: evaluation/results/bench_<label>_<timestamp>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Report to compare against; exits 1 on regressions")
+    parser.add_argument("--max-regression", type=float, default=0.15, help="Allowed relative growth before a metric regresses")
+    parser.add_argument("--verbose", action="store_true", help="Show agent output and INFO logs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {unknown} (choose from {SCENARIOS})")
+        return 2
+    if args.record and not args.user_settings:
+        print("--record needs --user-settings with the providers to record from")
+        return 2
+
+    research_parameters: Dict[str, Any] = {}
+    if args.research_questions is not None:
+        research_parameters["initial_research_max_questions"] = args.research_questions
+    if args.research_depth is not None:
+        research_parameters["initial_research_max_depth"] = args.research_depth
+    if args.user_settings:
+        with open(args.user_settings) as f:
+            user_settings = json.load(f)
+        user_settings.setdefault("research_parameters", {}).update(research_parameters)
+    else:
+        user_settings = offline_user_settings(research_parameters)
+    set_current_user(MockUser(1, "benchmark", user_settings))
+
+    cassette = None
+    if args.cassette:
+        with open(args.cassette) as f:
+            cassette = json.load(f)
+    profile = LatencyProfile(args.profile, args.time_scale)
+    llm = BenchmarkLLM(profile, cassette=cassette, recording=bool(args.record))
+    bench = Bench(args, profile, llm, user_settings)
+
+    llm_source = "recording" if args.record else ("cassette" if cassette is not None else "scripted")
+    print(f"Running {', '.join(scenarios)} with the '{args.profile}' profile (x{args.time_scale}), "
+          f"{args.docs} documents, {llm_source} LLM")
+    scenario_results = asyncio.run(run_scenarios(bench, scenarios, max(1, args.repeat), args.verbose))
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    report = {
+        "benchmark": "pipeline",
+        "label": args.label,
+        "timestamp": timestamp,
+        "git_commit": _git_commit(),
+        "config": {
+            "profile": args.profile,
+            "latency": profile.as_dict(),
+            "seed": args.seed,
+            "docs": args.docs,
+            "queries": args.queries,
+            "ingest_workers": args.ingest_workers,
+            "repeat": args.repeat,
+            "llm_source": llm_source,
+            "research_parameters": research_parameters,
+        },
+        "scenarios": scenario_results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{args.label}_{timestamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {output}")
+
+    if args.record:
+        with open(args.record, "w") as f:
+            json.dump(llm.cassette, f, indent=1, sort_keys=True)
+        print(f"Recorded {len(llm.cassette)} LLM responses to {args.record}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.max_regression)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -79,7 +79,7 @@ Commands:
   list-groups [--user <username>]
     List document groups
 
-  ingest <username> <document_directory> [--group <group_id>] [--force-reembed] [--device <device>] [--delete-after-success] [--batch-size <num>]
+  ingest <username> <document_directory> [--group <group_id>] [--force-reembed] [--device <device>] [--delete-after-success] [--batch-size <num>] [--worker-rss-budget-mb <mb>]
     DIRECTLY process documents with live feedback (PDF, Word, Markdown)
     - Supports PDF, Word (docx, doc), and Markdown (md, markdown) files
     - Shows real-time progress for each document
@@ -204,7 +204,7 @@ case "$1" in
         
         if [ $# -lt 2 ]; then
             print_error "ingest requires username and document_directory"
-            echo "Usage: $0 ingest <username> <document_directory> [--group <group_id>] [--force-reembed] [--device <device>] [--delete-after-success] [--batch-size <num>]"
+            echo "Usage: $0 ingest <username> <document_directory> [--group <group_id>] [--force-reembed] [--device <device>] [--delete-after-success] [--batch-size <num>] [--worker-rss-budget-mb <mb>]"
             exit 1
         fi
         
@@ -1,13 +1,39 @@
 import asyncio
 import inspect # <-- Import inspect
+import json
+import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Type, Callable
 from pathlib import Path
 import datetime # <--- ADDED IMPORT
 
+from pydantic import BaseModel, ValidationError
+
 # Use absolute imports starting from the top-level package 'ai_researcher'
+from ai_researcher import config
 from ai_researcher.agentic_layer.model_dispatcher import ModelDispatcher
 from ai_researcher.agentic_layer.tool_registry import ToolRegistry
+from ai_researcher.agentic_layer.controller.utils.mission_trace import trace_span
+from ai_researcher.agentic_layer.controller.utils.research_prefetch import take_prefetched_result
+from ai_researcher.agentic_layer.utils.json_format_helper import (
+    get_json_schema_format,
+    get_json_object_format,
+    get_schema_instructions,
+    should_retry_with_json_object
+)
+from ai_researcher.agentic_layer.utils.structured_output import (
+    IncrementalJSONValidator,
+    JSONStreamDivergence,
+    StructuredResult,
+    correction_prompt,
+    json_schema_supported,
+    merge_call_details,
+    parse_structured_output,
+    record_json_schema_support
+)
+
+logger = logging.getLogger(__name__)
 
 # Define the standard output structure for agent run methods
 # result_dict: The primary output data (e.g., plan, notes, text content, messenger response dict)
@@ -41,9 +67,9 @@ class BaseAgent(ABC):
 
         print(f"Initialized {self.agent_name} (Model: {self.model_name or 'Default'})")
 
-    def _create_messages(self, user_prompt: str, history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+    def _create_messages(self, user_prompt: str, history: Optional[List[Dict[str, str]]] = None, system_prompt: Optional[str] = None) -> List[Dict[str, str]]:
         """Helper method to construct the message list for the LLM."""
-        messages = [{"role": "system", "content": self.system_prompt}]
+        messages = [{"role": "system", "content": system_prompt or self.system_prompt}]
         if history:
             # Ensure history items are valid dictionaries
             valid_history = [msg for msg in history if isinstance(msg, dict) and "role" in msg and "content" in msg]
@@ -62,6 +88,8 @@ class BaseAgent(ABC):
         log_queue: Optional[Any] = None, # <-- Add log_queue parameter for UI updates
         update_callback: Optional[Any] = None, # <-- Add update_callback parameter for UI updates
         log_llm_call: bool = True, # <-- Add parameter to control LLM call logging
+        system_prompt: Optional[str] = None, # Overrides self.system_prompt for this call
+        raise_on_error: bool = False, # Re-raise dispatch errors (after logging) instead of returning (None, None)
         **kwargs: Any # Accept arbitrary keyword arguments
     ) -> Tuple[Optional[Any], Optional[Dict[str, Any]]]: # Return type: (ChatCompletion, model_details_dict) or (None, None)
         """
@@ -76,10 +104,10 @@ class BaseAgent(ABC):
              print(f"{self.agent_name} Error: ModelDispatcher is not initialized.")
              return None, None
 
-        messages = self._create_messages(user_prompt, history)
+        messages = self._create_messages(user_prompt, history, system_prompt)
         try:
             # Determine the model to use: prioritize kwargs, then agent's default
-            model_to_use = kwargs.pop('model', self.model_name) # Get 'model' from kwargs, default to self.model_name, and remove it from kwargs
+            model_to_use = kwargs.pop('model', getattr(self, 'model_name', None)) # Get 'model' from kwargs, default to self.model_name, and remove it from kwargs
 
             # Get mission_id from agent context if available
             mission_id = getattr(self, 'mission_id', None)
@@ -269,38 +297,7 @@ class BaseAgent(ABC):
 
             # Update mission stats if model_call_details is available
             # This ensures all agents update stats after LLM calls
-            if hasattr(self, 'mission_id') and self.mission_id and model_call_details:
-                # Import here to avoid circular imports
-                from ai_researcher.agentic_layer.agent_controller import AgentController
-                # Get the controller instance if available
-                controller = getattr(self, 'controller', None)
-                # If controller is available and has a context_manager, update stats via context_manager
-                if controller and hasattr(controller, 'context_manager'):
-                    # Call the update_mission_stats method on the context_manager
-                    # The context_manager.update_mission_stats method uses the queue and callback
-                    # passed *to it*, not the ones from the agent's context.
-                    # Since update_mission_stats is now async, schedule it
-                    import asyncio
-                    try:
-                        loop = asyncio.get_running_loop()
-                        asyncio.create_task(controller.context_manager.update_mission_stats(
-                            self.mission_id,
-                            model_call_details,
-                            log_queue,  # Pass these now that we have them
-                            update_callback
-                        ))
-                    except RuntimeError:
-                        # We're in a sync context, run in a thread
-                        import threading
-                        def run_async_stats():
-                            asyncio.run(controller.context_manager.update_mission_stats(
-                                self.mission_id,
-                                model_call_details,
-                                log_queue,
-                                update_callback
-                            ))
-                        thread = threading.Thread(target=run_async_stats, daemon=True)
-                        thread.start()
+            self._update_mission_stats(model_call_details, log_queue, update_callback)
 
             return response, model_call_details # Return the tuple
         except Exception as e:
@@ -328,8 +325,236 @@ class BaseAgent(ABC):
                         update_callback=update_callback
                     )
             # --- END CONDITIONAL ERROR LOGGING ---
+            if raise_on_error:
+                raise
             return None, None # Return None for both parts of the tuple on error
 
+    def _update_mission_stats(self, model_call_details: Optional[Dict[str, Any]], log_queue: Optional[Any], update_callback: Optional[Any]) -> None:
+        """Schedule a mission stats update for an LLM call made on behalf of ``self.mission_id``."""
+        if hasattr(self, 'mission_id') and self.mission_id and model_call_details:
+            # Get the controller instance if available
+            controller = getattr(self, 'controller', None)
+            # If controller is available and has a context_manager, update stats via context_manager
+            if controller and hasattr(controller, 'context_manager'):
+                # The context_manager.update_mission_stats method uses the queue and callback
+                # passed *to it*, not the ones from the agent's context.
+                # Since update_mission_stats is now async, schedule it
+                try:
+                    asyncio.get_running_loop()
+                    asyncio.create_task(controller.context_manager.update_mission_stats(
+                        self.mission_id,
+                        model_call_details,
+                        log_queue,
+                        update_callback
+                    ))
+                except RuntimeError:
+                    # We're in a sync context, run in a thread
+                    import threading
+                    def run_async_stats():
+                        asyncio.run(controller.context_manager.update_mission_stats(
+                            self.mission_id,
+                            model_call_details,
+                            log_queue,
+                            update_callback
+                        ))
+                    thread = threading.Thread(target=run_async_stats, daemon=True)
+                    thread.start()
+
+    async def _call_llm_structured(
+        self,
+        user_prompt: str,
+        output_model: Type[BaseModel],
+        history: Optional[List[Dict[str, str]]] = None,
+        schema_name: str = "response",
+        schema_format: Optional[Dict[str, Any]] = None,
+        agent_mode: Optional[str] = None,
+        log_queue: Optional[Any] = None,
+        update_callback: Optional[Any] = None,
+        log_llm_call: bool = True,
+        system_prompt: Optional[str] = None,
+        prepare: Optional[Callable[[Any], Any]] = None,
+        max_attempts: Optional[int] = None,
+        **kwargs: Any
+    ) -> StructuredResult:
+        """
+        Request a JSON object matching ``output_model`` and return it validated.
+
+        Uses a ``json_schema`` response format (``schema_format`` overrides the
+        one generated from the model) unless the resolved model is known not
+        to support it; a schema rejection is recorded and the request is
+        repeated with ``json_object`` plus schema instructions, without
+        counting as an attempt. Malformed output is repaired locally; only if
+        it still fails to parse or validate is the model re-queried, with the
+        error appended to the prompt. ``prepare`` can reshape the decoded data
+        before validation. Token and cost totals cover every attempt.
+        """
+        max_attempts = max_attempts or config.STRUCTURED_OUTPUT_MAX_ATTEMPTS
+        model = kwargs.pop("model", getattr(self, "model_name", None))
+        provider_name, model_name, base_url = self.model_dispatcher.resolve_endpoint(model, agent_mode)
+        use_schema = json_schema_supported(provider_name, model_name, base_url) is not False
+        result = StructuredResult()
+        feedback = ""
+
+        while result.attempts < max_attempts:
+            if use_schema:
+                response_format = schema_format or get_json_schema_format(output_model, schema_name)
+                prompt = user_prompt + feedback
+            else:
+                response_format = get_json_object_format()
+                prompt = user_prompt + get_schema_instructions(output_model) + feedback
+
+            content = None
+            try:
+                if config.STRUCTURED_OUTPUT_STREAMING and not kwargs:
+                    content, details = await self._stream_structured_llm(
+                        prompt, history, system_prompt, response_format, model, agent_mode,
+                        log_queue, update_callback, log_llm_call
+                    )
+                else:
+                    response, details = await self._call_llm(
+                        user_prompt=prompt,
+                        history=history,
+                        response_format=response_format,
+                        agent_mode=agent_mode,
+                        log_queue=log_queue,
+                        update_callback=update_callback,
+                        log_llm_call=log_llm_call,
+                        system_prompt=system_prompt,
+                        raise_on_error=True,
+                        model=model,
+                        **kwargs
+                    )
+                    if response and response.choices and response.choices[0].message:
+                        content = response.choices[0].message.content
+            except JSONStreamDivergence as e:
+                result.attempts += 1
+                result.error = e
+                feedback = correction_prompt(e)
+                logger.warning(f"{self.agent_name}: structured stream diverged ({e}), attempt {result.attempts}/{max_attempts}")
+                continue
+            except Exception as e:
+                if use_schema and should_retry_with_json_object(e):
+                    record_json_schema_support(provider_name, model_name, False, base_url)
+                    use_schema = False
+                    logger.info(f"{self.agent_name}: json_schema rejected by {model_name}, retrying with json_object")
+                    continue
+                result.attempts += 1
+                result.error = e
+                logger.error(f"{self.agent_name}: structured LLM call failed (attempt {result.attempts}/{max_attempts}): {e}")
+                if getattr(e, "status_code", None) == 400:
+                    # Configuration errors will not succeed on retry
+                    break
+                continue
+
+            result.attempts += 1
+            result.model_call_details = merge_call_details(result.model_call_details, details)
+            if not content or not content.strip():
+                result.error = "Empty response from LLM"
+                logger.warning(f"{self.agent_name}: empty structured response (attempt {result.attempts}/{max_attempts})")
+                continue
+            if use_schema:
+                record_json_schema_support(provider_name, model_name, True, base_url)
+            try:
+                result.output, result.extra_fields = parse_structured_output(content, output_model, prepare)
+                result.error = None
+                return result
+            except (json.JSONDecodeError, ValueError, ValidationError) as e:
+                result.error = e
+                feedback = correction_prompt(e)
+                logger.warning(
+                    f"{self.agent_name}: could not parse/validate {output_model.__name__} "
+                    f"(attempt {result.attempts}/{max_attempts}): {e}\nRaw output: {content[:1000]}"
+                )
+        return result
+
+    async def _stream_structured_llm(
+        self,
+        user_prompt: str,
+        history: Optional[List[Dict[str, str]]],
+        system_prompt: Optional[str],
+        response_format: Dict[str, Any],
+        model: Optional[str],
+        agent_mode: Optional[str],
+        log_queue: Optional[Any],
+        update_callback: Optional[Any],
+        log_llm_call: bool = True
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Stream a structured response, validating it as it arrives.
+
+        The stream is closed as soon as the root JSON value is complete, or
+        when it diverges (``JSONStreamDivergence`` is raised after the partial
+        call has been accounted for and logged).
+        """
+        messages = self._create_messages(user_prompt, history, system_prompt)
+        provider_name, model_name = self.model_dispatcher.resolve_model(model, agent_mode)
+        validator = IncrementalJSONValidator()
+        usage = None
+        divergence = None
+        start_time = time.time()
+        stream = self.model_dispatcher.dispatch_stream(
+            messages=messages,
+            model=model,
+            agent_mode=agent_mode,
+            response_format=response_format,
+            mission_id=getattr(self, "mission_id", None),
+            include_usage=True
+        )
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if not chunk.choices or not chunk.choices[0].delta:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta and validator.feed(delta):
+                    break
+        except JSONStreamDivergence as e:
+            divergence = e
+        finally:
+            await stream.aclose()
+
+        text = validator.json_text if validator.complete else validator.text
+        if usage:
+            prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        else:
+            # Closed early or the provider sent no usage: estimate at ~4 characters per token
+            prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+            completion_tokens = len(validator.text) // 4
+        model_call_details = {
+            "provider": provider_name,
+            "model_name": model_name,
+            "duration_sec": round(time.time() - start_time, 2),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cost": await self.model_dispatcher.calculate_cost(provider_name, model_name, prompt_tokens, completion_tokens)
+                    if provider_name and model_name else 0.0,
+            "usage_estimated": usage is None,
+        }
+        self._update_mission_stats(model_call_details, log_queue, update_callback)
+
+        # Same UI log entry _call_llm writes for a non-streamed call
+        mission_id = getattr(self, "mission_id", None)
+        context_manager = getattr(getattr(self, "controller", None), "context_manager", None)
+        if log_llm_call and context_manager and mission_id and log_queue and update_callback:
+            await context_manager.log_execution_step(
+                mission_id=mission_id,
+                agent_name=self.agent_name,
+                action=f"LLM Call ({agent_mode or 'general'})",
+                input_summary=f"Prompt: {user_prompt[:150]}...",
+                output_summary=f"Stream diverged: {divergence}" if divergence else f"Response received ({len(text)} chars)",
+                status="failure" if divergence else "success",
+                error_message=str(divergence) if divergence else None,
+                model_details=model_call_details,
+                log_queue=log_queue,
+                update_callback=update_callback
+            )
+        if divergence:
+            raise divergence
+        return text, model_call_details
+
     async def _execute_tool(
         self,
         tool_name: str,
@@ -403,12 +628,13 @@ class BaseAgent(ABC):
                     print(f"{self.agent_name}: Detected arXiv URL, using specialized arXiv fetcher for: {url} (ID: {arxiv_id})")
                     # Create and execute the arXiv fetcher
                     arxiv_fetcher = ArXivFetcherTool()
-                    result = await arxiv_fetcher.execute(
-                        url=url,
-                        update_callback=update_callback,
-                        log_queue=log_queue,
-                        mission_id=getattr(self, 'mission_id', None)
-                    )
+                    async with trace_span(getattr(self, 'mission_id', None), "tool", "fetch_arxiv_paper", agent=self.agent_name):
+                        result = await arxiv_fetcher.execute(
+                            url=url,
+                            update_callback=update_callback,
+                            log_queue=log_queue,
+                            mission_id=getattr(self, 'mission_id', None)
+                        )
                     # Log the arXiv fetch as a successful tool execution
                     if log_queue and update_callback and hasattr(self, 'mission_id') and self.mission_id:
                         context_manager = None
@@ -462,8 +688,13 @@ class BaseAgent(ABC):
                         print(f"DEBUG ({self.agent_name}): Context arg '{param_name}' already present in LLM args for tool '{tool_name}'. Skipping.")
 
 
-            # Await the registry's async execute method using the determined registry and final arguments
-            result = await registry_to_use.execute_tool(tool_name, final_args) # Pass the augmented args
+            # Results prefetched while the user reviewed the questions were already counted
+            result = take_prefetched_result(getattr(self, 'mission_id', None), tool_name, tool_arguments)
+            prefetched = result is not None
+            if not prefetched:
+                # Await the registry's async execute method using the determined registry and final arguments
+                async with trace_span(getattr(self, 'mission_id', None), "tool", tool_name, agent=self.agent_name):
+                    result = await registry_to_use.execute_tool(tool_name, final_args) # Pass the augmented args
 
             # --- ADD Logging and Stats Update ---
             log_status = "success"
@@ -568,7 +799,7 @@ class BaseAgent(ABC):
 
             # --- Moved Web Search Count Update (Independent of UI Callbacks) ---
             if context_manager and hasattr(self, 'mission_id') and self.mission_id:
-                if tool_name == "web_search" and log_status == "success":
+                if tool_name == "web_search" and log_status == "success" and not prefetched:
                     # Call increment directly, passing None for queue/callback if they are missing
                     context_manager.increment_web_search_count(
                         self.mission_id,
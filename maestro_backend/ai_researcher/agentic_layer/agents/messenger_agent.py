@@ -3,13 +3,7 @@ import json
 import os
 from typing import Dict, Any, Optional, List, Tuple, Awaitable, Literal
 from datetime import datetime
-from pydantic import BaseModel, Field, ValidationError
-
-# Import the JSON utilities
-from ai_researcher.agentic_layer.utils.json_utils import (
-    parse_llm_json_response,
-    sanitize_json_string
-)
+from pydantic import BaseModel, Field
 
 from ai_researcher.agentic_layer.agents.base_agent import BaseAgent, AgentOutput
 from ai_researcher.agentic_layer.model_dispatcher import ModelDispatcher
@@ -440,7 +434,6 @@ Output:
         # Add the current user message to the messages list
         messages.append({"role": "user", "content": current_user_content})
 
-        llm_response_content = None
         model_details = None
         parsed_output = None
         final_response = "Sorry, I couldn't process that request."
@@ -473,433 +466,64 @@ Output:
                     logger.info(f"Content preview: {msg['content'][:100]}...")
             logger.info("=" * 80)
         
-        # Retry logic for schema validation failures
-        max_retries = 3
-        retry_count = 0
-        last_error = None
-        
-        while retry_count < max_retries:
-            try:
-                # Using a simple model suitable for intent detection/chat
-                # Send the properly structured messages with Pydantic schema
-                # Get the schema and ensure it has the required fields properly set
-                schema = MessengerIntentResponse.model_json_schema()
-                # Ensure the required fields are properly set for OpenAI
-                # Only intent, response_to_user, and thoughts are truly required
-                schema["required"] = ["intent", "response_to_user", "thoughts", "extracted_content", "formatting_preferences"]
-                
-                response, model_details = await self.model_dispatcher.dispatch(
-                    messages=messages,
-                    agent_mode="messenger", # Use the configured messenger role
-                    response_format={
-                        "type": "json_schema",
-                        "json_schema": {
-                            "name": "messenger_intent_response",
-                            "schema": schema,
-                            "strict": True
-                        }
-                    },  # Use Pydantic schema for structured output
-                    mission_id=mission_id, # Pass mission_id for cost tracking
-                    log_queue=log_queue, # Pass log_queue for UI updates
-                    update_callback=update_callback # Pass update_callback for UI updates
-                )
-
-                if response and response.choices and response.choices[0].message.content:
-                    llm_response_content = response.choices[0].message.content.strip()
-                    
-                    # Handle thinking models that might have special tokens or markers
-                    # Look for common patterns that indicate the end of thinking
-                    thinking_end_markers = [
-                        "```json",  # JSON code block start
-                        "Output:",  # Explicit output marker
-                        "Response:",  # Response marker
-                        "Result:",  # Result marker
-                        "{\n",  # Direct JSON start
-                        '{"',  # JSON object start
-                    ]
-                
-                    # Check if response might contain thinking tokens
-                    for marker in thinking_end_markers:
-                        if marker in llm_response_content:
-                            # Extract content after the marker
-                            marker_pos = llm_response_content.rfind(marker)  # Use rfind to get last occurrence
-                            if marker_pos != -1:
-                                potential_json = llm_response_content[marker_pos:]
-                                if DEBUG_MESSENGER:
-                                    logger.info(f"Found potential marker '{marker}' at position {marker_pos}")
-                                    logger.info(f"Extracting content from that point...")
-                                llm_response_content = potential_json
-                                break
-                
-                    # DEBUG: Log the full raw response
-                    if DEBUG_MESSENGER:
-                        logger.info("=" * 80)
-                        logger.info("MESSENGER AGENT DEBUG - RAW LLM RESPONSE (after marker extraction):")
-                        logger.info("-" * 80)
-                        logger.info(f"Response length: {len(llm_response_content)} characters")
-                        logger.info(f"First 500 chars: {llm_response_content[:500]}")
-                        if len(llm_response_content) <= 2000:
-                            logger.info(f"Full response:\n{llm_response_content}")
-                        else:
-                            logger.info(f"Response too long, showing first 2000 chars:\n{llm_response_content[:2000]}")
-                        logger.info("=" * 80)
-                
-                    # Extract JSON block
-                    json_match = llm_response_content.find('{')
-                    if json_match != -1:
-                        json_str = llm_response_content[json_match:]
-                        # Clean up potential markdown fences using our centralized utility
-                        json_str = sanitize_json_string(json_str)
-                    
-                        # DEBUG: Log the extracted JSON string
-                        if DEBUG_MESSENGER:
-                            logger.info("MESSENGER AGENT DEBUG - EXTRACTED JSON:")
-                            logger.info("-" * 80)
-                            logger.info(f"JSON string (after sanitization):\n{json_str[:1000]}")
-                            logger.info("-" * 80)
-
-                        try:
-                            # Parse and validate using Pydantic model
-                            json_data = json.loads(json_str)
-                            parsed_response = MessengerIntentResponse(**json_data)
-                        
-                            # DEBUG: Log successfully parsed JSON
-                            if DEBUG_MESSENGER:
-                                logger.info("MESSENGER AGENT DEBUG - PARSED JSON DATA:")
-                                logger.info("-" * 80)
-                                logger.info(f"Validated Pydantic model: {parsed_response.model_dump_json(indent=2)}")
-                                logger.info("-" * 80)
-                        
-                            # Extract data from validated Pydantic model
-                            intent = parsed_response.intent
-                            extracted_content = parsed_response.extracted_content
-                            formatting_preferences = parsed_response.formatting_preferences
-                            response_to_user = parsed_response.response_to_user
-                            thoughts = parsed_response.thoughts
-                            
-                            # Set the response to show to the user
-                            final_response = response_to_user
-                        
-                            # Successfully parsed - break out of retry loop
-                            break
-                        
-                        except (json.JSONDecodeError, ValueError, ValidationError) as parse_error:
-                            # Store the error for retry
-                            last_error = parse_error
-                            retry_count += 1
-                            logger.warning(f"JSON parsing or Pydantic validation failed (attempt {retry_count}/{max_retries}): {parse_error}")
-                            
-                            # Try to fix common JSON issues
-                            if isinstance(parse_error, json.JSONDecodeError):
-                                    logger.info(f"Detected formatting preferences with start_research: '{formatting_preferences}'")
-                                    # Store formatting preferences to be added as a goal later
-                                    if self.controller and self.mission_id:
-                                        try:
-                                            # Add formatting preferences as a separate goal
-                                            goal_id = await self.controller.context_manager.add_goal(
-                                                mission_id=self.mission_id,
-                                                text=formatting_preferences,
-                                                source_agent=self.agent_name
-                                            )
-                                            if goal_id:
-                                                logger.info(f"Added formatting preferences as goal '{goal_id}': '{formatting_preferences}'")
-                                        except Exception as e:
-                                            logger.error(f"Failed to add formatting preferences as goal: {e}")
-                                
-                            elif intent == "refine_questions" and extracted_content:
-                                final_action = "refine_questions"
-                                final_request = extracted_content
-                                logger.info(f"Detected refine_questions intent. Feedback: '{final_request}'")
-                            
-                                # Handle formatting preferences if present with refine_questions
-                                if formatting_preferences and self.controller and self.mission_id:
-                                    logger.info(f"Detected formatting preferences with refine_questions: '{formatting_preferences}'")
-                                    try:
-                                        # Add formatting preferences as a separate goal
-                                        goal_id = await self.controller.context_manager.add_goal(
-                                            mission_id=self.mission_id,
-                                            text=formatting_preferences,
-                                            source_agent=self.agent_name
-                                        )
-                                        if goal_id:
-                                            logger.info(f"Added formatting preferences as goal '{goal_id}': '{formatting_preferences}'")
-                                    except Exception as e:
-                                        logger.error(f"Failed to add formatting preferences as goal: {e}")
-                                
-                            elif intent == "refine_goal" and extracted_content:
-                                final_action = "refine_goal"
-                                final_request = extracted_content
-                                logger.info(f"Detected refine_goal intent. Goal: '{final_request}'")
-                            
-                                # For refine_goal, the extracted_content already contains the formatting preferences
-                                # But if there are additional formatting preferences, handle them too
-                                if formatting_preferences and formatting_preferences != extracted_content and self.controller and self.mission_id:
-                                    logger.info(f"Detected additional formatting preferences with refine_goal: '{formatting_preferences}'")
-                                    try:
-                                        # Add additional formatting preferences as a separate goal
-                                        goal_id = await self.controller.context_manager.add_goal(
-                                            mission_id=self.mission_id,
-                                            text=formatting_preferences,
-                                            source_agent=self.agent_name
-                                        )
-                                        if goal_id:
-                                            logger.info(f"Added additional formatting preferences as goal '{goal_id}': '{formatting_preferences}'")
-                                    except Exception as e:
-                                        logger.error(f"Failed to add additional formatting preferences as goal: {e}")
-                                
-                            elif intent == "approve_questions":
-                                final_action = "approve_questions"
-                                final_request = None
-                                logger.info("Detected approve_questions intent.")
-                            
-                                # Handle formatting preferences if present with approve_questions
-                                if formatting_preferences and self.controller and self.mission_id:
-                                    logger.info(f"Detected formatting preferences with approve_questions: '{formatting_preferences}'")
-                                    try:
-                                        # Add formatting preferences as a separate goal
-                                        goal_id = await self.controller.context_manager.add_goal(
-                                            mission_id=self.mission_id,
-                                            text=formatting_preferences,
-                                            source_agent=self.agent_name
-                                        )
-                                        if goal_id:
-                                            logger.info(f"Added formatting preferences as goal '{goal_id}': '{formatting_preferences}'")
-                                    except Exception as e:
-                                        logger.error(f"Failed to add formatting preferences as goal: {e}")
-                                
-                            else:
-                                logger.info(f"Detected {intent} intent or failed to extract content.")
-                                if DEBUG_MESSENGER:
-                                    logger.info("MESSENGER AGENT DEBUG - UNRECOGNIZED/NONE INTENT:")
-                                    logger.info("-" * 80)
-                                    logger.info(f"Intent value: {intent!r}")
-                                    logger.info(f"Extracted content: {extracted_content!r}")
-                                    logger.info(f"This means either intent is None or not a recognized action")
-                                    logger.info("-" * 80)
-                            
-                                # Handle formatting preferences for chat intent too
-                                if formatting_preferences and self.controller and self.mission_id:
-                                    logger.info(f"Detected formatting preferences with {intent} intent: '{formatting_preferences}'")
-                                    try:
-                                        # Add formatting preferences as a separate goal
-                                        goal_id = await self.controller.context_manager.add_goal(
-                                            mission_id=self.mission_id,
-                                            text=formatting_preferences,
-                                            source_agent=self.agent_name
-                                        )
-                                        if goal_id:
-                                            logger.info(f"Added formatting preferences as goal '{goal_id}': '{formatting_preferences}'")
-                                    except Exception as e:
-                                        logger.error(f"Failed to add formatting preferences as goal: {e}")
-                            
-                            # Store thoughts in scratchpad if available
-                            if thoughts:
-                                # Format the scratchpad entry with timestamp
-                                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            
-                                # Combine with existing scratchpad if available
-                                if agent_scratchpad:
-                                    scratchpad_update = f"{agent_scratchpad}\n\n[{timestamp}] {thoughts}"
-                                else:
-                                    scratchpad_update = f"[{timestamp}] {thoughts}"
-
-                        except (json.JSONDecodeError, ValueError, ValidationError) as parse_error:
-                            # Store the error for retry
-                            last_error = parse_error
-                            retry_count += 1
-                            logger.warning(f"JSON parsing or Pydantic validation failed (attempt {retry_count}/{max_retries}): {parse_error}")
-                        
-                            # Try to fix common JSON issues
-                            if isinstance(parse_error, json.JSONDecodeError):
-                                # Attempt simple fix: Insert comma before last '}' if likely missing
-                                fixed_json_str = json_str.strip()
-                                if "Expecting ',' delimiter" in str(parse_error) and fixed_json_str.endswith('}'):
-                                    insertion_point = len(fixed_json_str) - 1
-                                    char_before_brace = fixed_json_str[insertion_point - 1].strip() if insertion_point > 0 else ''
-                                    if char_before_brace in ('"', ']', '}') or char_before_brace.isdigit():
-                                        fixed_json_str = fixed_json_str[:insertion_point] + ',' + fixed_json_str[insertion_point:]
-                                        logger.info("Attempting re-parse with added comma before final '}'.")
-                                        try:
-                                            # Re-attempt parsing with the fix
-                                            json_data = json.loads(fixed_json_str)
-                                            parsed_response = MessengerIntentResponse(**json_data)
-                                        
-                                            # Extract data from validated Pydantic model
-                                            intent = parsed_response.intent
-                                            extracted_content = parsed_response.extracted_content
-                                            formatting_preferences = parsed_response.formatting_preferences
-                                            response_to_user = parsed_response.response_to_user
-                                            thoughts = parsed_response.thoughts
-                                        
-                                            # Ensure final_response is never None
-                                            final_response = response_to_user if response_to_user is not None else "Sorry, I couldn't generate a proper response."
-
-                                            if intent == "start_research" and extracted_content:
-                                                final_action = "start_research"
-                                                final_request = extracted_content
-                                                logger.info(f"Detected start_research intent. Request: '{final_request}'")
-                                            
-                                                # Handle formatting preferences if present
-                                                if formatting_preferences:
-                                                    logger.info(f"Detected formatting preferences with start_research: '{formatting_preferences}'")
-                                                    # Store formatting preferences to be added as a goal later
-                                                    if self.controller and self.mission_id:
-                                                      try:
-                                                          # Add formatting preferences as a separate goal
-                                                          goal_id = await self.controller.context_manager.add_goal(
-                                                              mission_id=self.mission_id,
-                                                              text=formatting_preferences,
-                                                              source_agent=self.agent_name
-                                                          )
-                                                          if goal_id:
-                                                              logger.info(f"Added formatting preferences as goal '{goal_id}': '{formatting_preferences}'")
-                                                      except Exception as e:
-                                                          logger.error(f"Failed to add formatting preferences as goal: {e}")
-                                              
-                                            elif intent == "refine_questions" and extracted_content:
-                                                final_action = "refine_questions"
-                                                final_request = extracted_content
-                                                logger.info(f"Detected refine_questions intent. Feedback: '{final_request}'")
-                                            
-                                                # Handle formatting preferences if present with refine_questions
-                                                if formatting_preferences and self.controller and self.mission_id:
-                                                    logger.info(f"Detected formatting preferences with refine_questions: '{formatting_preferences}'")
-                                                    try:
-                                                        # Add formatting preferences as a separate goal
-                                                        goal_id = await self.controller.context_manager.add_goal(
-                                                            mission_id=self.mission_id,
-                                                            text=formatting_preferences,
-                                                            source_agent=self.agent_name
-                                                        )
-                                                        if goal_id:
-                                                            logger.info(f"Added formatting preferences as goal '{goal_id}': '{formatting_preferences}'")
-                                                    except Exception as e:
-                                                        logger.error(f"Failed to add formatting preferences as goal: {e}")
-                                                
-                                            elif intent == "refine_goal" and extracted_content:
-                                                final_action = "refine_goal"
-                                                final_request = extracted_content
-                                                logger.info(f"Detected refine_goal intent. Goal: '{final_request}'")
-                                            
-                                                # For refine_goal, the extracted_content already contains the formatting preferences
-                                                # But if there are additional formatting preferences, handle them too
-                                                if formatting_preferences and formatting_preferences != extracted_content and self.controller and self.mission_id:
-                                                    logger.info(f"Detected additional formatting preferences with refine_goal: '{formatting_preferences}'")
-                                                    try:
-                                                        # Add additional formatting preferences as a separate goal
-                                                        goal_id = await self.controller.context_manager.add_goal(
-                                                            mission_id=self.mission_id,
-                                                            text=formatting_preferences,
-                                                            source_agent=self.agent_name
-                                                        )
-                                                        if goal_id:
-                                                            logger.info(f"Added additional formatting preferences as goal '{goal_id}': '{formatting_preferences}'")
-                                                    except Exception as e:
-                                                        logger.error(f"Failed to add additional formatting preferences as goal: {e}")
-                                                
-                                            elif intent == "approve_questions":
-                                                final_action = "approve_questions"
-                                                final_request = None
-                                                logger.info("Detected approve_questions intent.")
-                                            
-                                                # Handle formatting preferences if present with approve_questions
-                                                if formatting_preferences and self.controller and self.mission_id:
-                                                    logger.info(f"Detected formatting preferences with approve_questions: '{formatting_preferences}'")
-                                                    try:
-                                                        # Add formatting preferences as a separate goal
-                                                        goal_id = await self.controller.context_manager.add_goal(
-                                                            mission_id=self.mission_id,
-                                                            text=formatting_preferences,
-                                                            source_agent=self.agent_name
-                                                        )
-                                                        if goal_id:
-                                                            logger.info(f"Added formatting preferences as goal '{goal_id}': '{formatting_preferences}'")
-                                                    except Exception as e:
-                                                        logger.error(f"Failed to add formatting preferences as goal: {e}")
-                                                
-                                            else:
-                                                logger.info(f"Detected {intent} intent or failed to extract content.")
-                                            
-                                                # Handle formatting preferences for chat intent too
-                                                if formatting_preferences and self.controller and self.mission_id:
-                                                    logger.info(f"Detected formatting preferences with {intent} intent: '{formatting_preferences}'")
-                                                    try:
-                                                        # Add formatting preferences as a separate goal
-                                                        goal_id = await self.controller.context_manager.add_goal(
-                                                            mission_id=self.mission_id,
-                                                            text=formatting_preferences,
-                                                            source_agent=self.agent_name
-                                                        )
-                                                        if goal_id:
-                                                            logger.info(f"Added formatting preferences as goal '{goal_id}': '{formatting_preferences}'")
-                                                    except Exception as e:
-                                                        logger.error(f"Failed to add formatting preferences as goal: {e}")
-                                        
-                                            if thoughts:
-                                                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                                                if agent_scratchpad:
-                                                    scratchpad_update = f"{agent_scratchpad}\n\n[{timestamp}] {thoughts}"
-                                                else:
-                                                    scratchpad_update = f"[{timestamp}] {thoughts}"
-                                        
-                                            # If we reached here, the fix worked, skip the original error handling
-                                            logger.info("JSON parsing successful after simple fix.")
-                                        except Exception as retry_e:
-                                            logger.error(f"Failed to parse JSON even after fix: {retry_e}")
-                                            final_response = "Sorry, I had trouble understanding the format of my own thoughts."
-                                    else:
-                                        logger.error(f"JSON parsing failed and simple fix not applicable: {parse_error}")
-                                        final_response = "Sorry, I had trouble understanding the format of my own thoughts."
-                                else:
-                                    logger.error(f"JSON parsing failed: {parse_error}")
-                                    final_response = "Sorry, I had trouble understanding the format of my own thoughts."
-                    else:
-                        logger.error(f"Could not find JSON block in LLM response (attempt {retry_count + 1}/{max_retries})")
-                        if DEBUG_MESSENGER:
-                            logger.info("MESSENGER AGENT DEBUG - NO JSON FOUND:")
-                            logger.info("-" * 80)
-                            logger.info(f"Full response that failed to contain JSON:\n{llm_response_content}")
-                            logger.info("-" * 80)
-                        last_error = "No JSON found in response"
-                        retry_count += 1
-                else:
-                    logger.error(f"LLM response was empty or invalid (attempt {retry_count + 1}/{max_retries}).")
-                    if DEBUG_MESSENGER:
-                        logger.info("MESSENGER AGENT DEBUG - EMPTY/INVALID RESPONSE:")
-                        logger.info("-" * 80)
-                        logger.info(f"Response object: {response}")
-                        if response:
-                            logger.info(f"Response choices: {response.choices}")
-                            if response.choices:
-                                logger.info(f"First choice: {response.choices[0]}")
-                                if response.choices[0]:
-                                    logger.info(f"Message: {response.choices[0].message}")
-                        logger.info("-" * 80)
-                    last_error = "Empty or invalid response from LLM"
-                    retry_count += 1
-            except Exception as e:
-                # Handle authentication and other API errors
-                from ai_researcher.agentic_layer.utils.error_messages import handle_api_error
-                
-                logger.error(f"Error during MessengerAgent LLM call (attempt {retry_count + 1}/{max_retries}): {e}", exc_info=True)
-                last_error = e
-                retry_count += 1
-                
-                # If it's an API configuration error (400), don't retry
-                if hasattr(e, 'status_code') and e.status_code == 400:
-                    final_response = handle_api_error(e)
-                    break
-        
-        # If we exhausted all retries without success, provide error message
-        if retry_count >= max_retries and not final_response:
-            logger.error(f"Failed to get valid response after {max_retries} attempts. Last error: {last_error}")
+        # Strict schema: every field must be listed as required for OpenAI
+        schema = MessengerIntentResponse.model_json_schema()
+        schema["required"] = ["intent", "response_to_user", "thoughts", "extracted_content", "formatting_preferences"]
+        thoughts = None
+
+        # Schema/json_object fallback, local JSON repair and corrective
+        # re-queries are handled by the shared structured-output path
+        result = await self._call_llm_structured(
+            user_prompt=messages[-1]["content"],
+            output_model=MessengerIntentResponse,
+            history=messages[1:-1],
+            schema_name="messenger_intent_response",
+            schema_format={
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "messenger_intent_response",
+                    "schema": schema,
+                    "strict": True
+                }
+            },
+            system_prompt=messages[0]["content"],
+            agent_mode="messenger", # Use the configured messenger role
+            log_queue=log_queue, # Pass log_queue for UI updates
+            update_callback=update_callback, # Pass update_callback for UI updates
+            log_llm_call=False
+        )
+        model_details = result.model_call_details
+        parsed_response = result.output
+
+        if parsed_response:
+            if DEBUG_MESSENGER:
+                logger.info("MESSENGER AGENT DEBUG - PARSED JSON DATA:")
+                logger.info("-" * 80)
+                logger.info(f"Validated Pydantic model: {parsed_response.model_dump_json(indent=2)}")
+                logger.info("-" * 80)
+
+            # Extract data from validated Pydantic model
+            intent = parsed_response.intent
+            extracted_content = parsed_response.extracted_content
+            formatting_preferences = parsed_response.formatting_preferences
+            response_to_user = parsed_response.response_to_user
+            thoughts = parsed_response.thoughts
+
+            # Set the response to show to the user
+            final_response = response_to_user
+        elif getattr(result.error, "status_code", None) == 400:
+            # API configuration errors (authentication, unsupported parameters, ...)
+            from ai_researcher.agentic_layer.utils.error_messages import handle_api_error
+            final_response = handle_api_error(result.error)
+        else:
+            logger.error(f"Failed to get valid response after {result.attempts} attempts. Last error: {result.error}")
             final_response = (
                 "The current language model is unable to generate properly structured responses. "
                 "This usually means the model doesn't support structured outputs or isn't following instructions correctly. "
                 "Please try using a different model (such as GPT-4, Claude, or other models that support JSON schemas) "
-                "in your AI settings. Last error: " + str(last_error)
+                "in your AI settings. Last error: " + str(result.error)
             )
-        
+
         # Process the intent and map to actions (only if we got a valid response)
         if final_response and intent:
             # Map intents to actions
@@ -1,13 +1,7 @@
 # ai_researcher/agentic_layer/agents/note_assignment_agent.py
 import logging
 from typing import List, Dict, Any, Optional, Tuple, Set # <-- Import Set
-from pydantic import BaseModel, Field, ValidationError # <-- Import ValidationError
-
-# Import the JSON utilities
-from ai_researcher.agentic_layer.utils.json_utils import (
-    parse_llm_json_response,
-    prepare_for_pydantic_validation
-)
+from pydantic import BaseModel, Field
 
 # Use absolute imports
 from ai_researcher.agentic_layer.agents.base_agent import BaseAgent
@@ -112,36 +106,25 @@ class NoteAssignmentAgent(BaseAgent):
 
         output_model = AssignedNotes
 
-        # Call the LLM using the base agent's method
-        raw_response, model_details = await self._call_llm(
+        # Call the LLM through the shared structured-output path (schema format,
+        # local repair and corrective re-query are handled there)
+        result = await self._call_llm_structured(
             user_prompt=prompt,
+            output_model=output_model,
+            schema_name="assigned_notes",
             agent_mode="note_assignment", # Use dedicated mode for note assignment
-            response_format={"type": "json_object"}, # Pass response_format directly
             log_queue=log_queue, # Pass log_queue for UI updates
             update_callback=update_callback, # Pass update_callback for UI updates
             log_llm_call=False # Disable duplicate LLM call logging since the overall operation is logged by the research manager
-            # history=... if needed,
-            # agent_scratchpad is not directly handled by _call_llm, manage separately if needed
         )
-
-        parsed_output = None
+        parsed_output = result.output
+        model_details = result.model_call_details
         updated_scratchpad = agent_scratchpad # Assume scratchpad isn't modified by this specific call for now
 
-        # Parse the response
-        if raw_response and raw_response.choices and raw_response.choices[0].message and raw_response.choices[0].message.content:
-            json_content = raw_response.choices[0].message.content
-            try:
-                # Parse the JSON content using our centralized utilities
-                parsed_json = parse_llm_json_response(json_content)
-                # Prepare the data for Pydantic validation
-                prepared_data = prepare_for_pydantic_validation(parsed_json, AssignedNotes)
-                # Validate using the Pydantic model
-                parsed_output = AssignedNotes(**prepared_data)
-                logger.info(f"Successfully parsed LLM response for section {section.section_id}.")
-            except Exception as e:
-                logger.error(f"Failed to parse/validate response for section {section.section_id}: {e}\nRaw Content Snippet: {json_content[:500]}...", exc_info=True)
+        if parsed_output:
+            logger.info(f"Successfully parsed LLM response for section {section.section_id}.")
         else:
-            logger.error(f"LLM call failed or returned empty/invalid response structure for section {section.section_id}.")
+            logger.error(f"Failed to get a valid response for section {section.section_id} after {result.attempts} attempt(s): {result.error}")
 
 
         if parsed_output:
@@ -1,20 +1,10 @@
-import json
 import os
 import re
 from typing import Optional, List, Dict, Any, Tuple, Callable
 from pydantic import ValidationError
 
 # Import the JSON utilities
-from ai_researcher.agentic_layer.utils.json_utils import (
-    parse_llm_json_response,
-    prepare_for_pydantic_validation
-)
-from ai_researcher.agentic_layer.utils.json_format_helper import (
-    get_json_schema_format,
-    get_json_object_format,
-    enhance_messages_for_json_object,
-    should_retry_with_json_object
-)
+from ai_researcher.agentic_layer.utils.json_utils import parse_llm_json_response
 from ai_researcher.agentic_layer.schemas.thought import ThoughtEntry # Import ThoughtEntry
 
 # Use absolute imports starting from the top-level package 'ai_researcher'
@@ -588,12 +578,6 @@ Available Research Tools:
         # Final instruction
         user_prompt += f"\n\nGenerate the JSON response following the Phase {planning_phase} format."
 
-        # Start with json_schema format, with fallback to json_object
-        response_format_pydantic = get_json_schema_format(
-            pydantic_model=response_schema,
-            schema_name=f"phase_{planning_phase}_plan"
-        )
-
         # DEBUG: Log the prompts and schema being sent
         if DEBUG_PLANNING:
             logger.info("=" * 80)
@@ -605,152 +589,41 @@ Available Research Tools:
             logger.info(f"User prompt length: {len(user_prompt)} characters")
             logger.info(f"User prompt:\n{user_prompt}")
             logger.info("-" * 40)
-            logger.info("Schema being requested:")
-            import pprint
-            logger.info(pprint.pformat(response_format_pydantic))
+            logger.info(f"Schema being requested: {response_schema.__name__}")
             logger.info("=" * 80)
 
         # Update system prompt for the agent
         self.system_prompt = system_prompt
 
-        # Try with json_schema first, with fallback to json_object if needed
-        use_json_object = False
-        max_format_attempts = 2  # Try json_schema, then json_object
-        
-        for format_attempt in range(max_format_attempts):
-            try:
-                # Use json_object format if this is a retry
-                if use_json_object:
-                    from ai_researcher.agentic_layer.utils.json_format_helper import (
-                        get_json_object_format,
-                        enhance_messages_for_json_object
-                    )
-                    response_format_pydantic = get_json_object_format()
-                    # Enhance the prompts with schema instructions
-                    messages = [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ]
-                    messages = enhance_messages_for_json_object(messages, response_schema)
-                    # Extract the enhanced prompts and update BOTH local and instance variables
-                    system_prompt = messages[0]["content"]
-                    user_prompt = messages[1]["content"]
-                    # CRITICAL: Update the instance variable so _call_llm uses the enhanced system prompt
-                    self.system_prompt = system_prompt
-                    logger.info(f"{self.agent_name}: Retrying with json_object format due to schema compatibility issue")
-                
-                # Call the LLM - it now returns a tuple
-                llm_response, model_call_details = await self._call_llm( # Add await here
-                    user_prompt=user_prompt,
-                    response_format=response_format_pydantic,
-                    agent_mode="planning", # <-- Pass agent_mode
-                    log_queue=log_queue, # Pass log_queue for UI updates
-                    update_callback=update_callback, # Pass update_callback for UI updates
-                    log_llm_call=False # Disable duplicate LLM call logging since planning operations are logged by the research manager
-                    # max_tokens is now handled by ModelDispatcher based on agent_mode ('planning')
-                    # Use the planning model specified during init or the default planning model
-                )
-                
-                # If we got a response, break out of the retry loop
-                if llm_response and llm_response.choices:
-                    break
-                    
-            except Exception as e:
-                # Check if we should retry with json_object format
-                from ai_researcher.agentic_layer.utils.json_format_helper import should_retry_with_json_object
-                
-                if not use_json_object and should_retry_with_json_object(e):
-                    logger.info(f"{self.agent_name}: Detected json_schema compatibility issue: {str(e)[:200]}")
-                    use_json_object = True
-                    continue  # Retry with json_object format
-                else:
-                    # Not a schema issue or already tried json_object, propagate the error
-                    logger.error(f"{self.agent_name} Error during LLM call: {e}", exc_info=True)
-                    return None, None, scratchpad_update
-
-        if not llm_response or not llm_response.choices:
-            logger.error(f"{self.agent_name} Error: Failed to get response from LLM.")
-            return None, model_call_details, scratchpad_update # Return details even on LLM failure if available
-
-        raw_response_content = llm_response.choices[0].message.content
-        if not raw_response_content:
-             logger.error(f"{self.agent_name} Error: LLM returned empty content.")
-             return None, model_call_details, scratchpad_update # Return details even on empty content
-
-        logger.info(f"{self.agent_name}: Received raw plan response from LLM.")
-        
-        # DEBUG: Log the raw response
-        if DEBUG_PLANNING:
-            logger.info("=" * 80)
-            logger.info("PLANNING AGENT DEBUG - RAW LLM RESPONSE:")
-            logger.info("-" * 80)
-            logger.info(f"Response length: {len(raw_response_content)} characters")
-            # Always show full response for debugging, no truncation
-            logger.info(f"Full response:\n{raw_response_content}")
-            logger.info("=" * 80)
-        else:
-            logger.debug(f"Raw content:\n{raw_response_content}") # Debugging: Log raw response before parsing
+        # json_schema with json_object fallback, local JSON repair and
+        # corrective re-queries are handled by the shared structured-output path
+        result = await self._call_llm_structured(
+            user_prompt=user_prompt,
+            output_model=response_schema,
+            schema_name=f"phase_{planning_phase}_plan",
+            agent_mode="planning", # <-- Pass agent_mode
+            log_queue=log_queue, # Pass log_queue for UI updates
+            update_callback=update_callback, # Pass update_callback for UI updates
+            log_llm_call=False # Disable duplicate LLM call logging since planning operations are logged by the research manager
+        )
+        model_call_details = result.model_call_details
+        if not result.output:
+            logger.error(f"{self.agent_name} Error: Failed to get a valid Phase {planning_phase} plan after {result.attempts} attempt(s): {result.error}")
+            return None, model_call_details, scratchpad_update # Return details even on failure if available
 
-        # Parse and validate the response using the Pydantic schema
         try:
-            # --- Robust JSON Extraction ---
-            # Find the start and end of the main JSON object ({...})
-            # This handles potential leading/trailing text or markdown fences.
-            json_start = raw_response_content.find('{')
-            json_end = raw_response_content.rfind('}')
-
-            if json_start != -1 and json_end != -1 and json_end > json_start:
-                json_str = raw_response_content[json_start:json_end+1]
-                
-                # DEBUG: Log extracted JSON
-                if DEBUG_PLANNING:
-                    logger.info("PLANNING AGENT DEBUG - EXTRACTED JSON:")
-                    logger.info("-" * 80)
-                    if len(json_str) <= 2000:
-                        logger.info(f"Extracted JSON:\n{json_str}")
-                    else:
-                        logger.info(f"Extracted JSON (first 1000 chars):\n{json_str[:1000]}")
-                    logger.info("-" * 80)
-            else:
-                # Fallback or error if no valid JSON object markers found
-                logger.error(f"{self.agent_name} Error: Could not find valid JSON object markers '{{' and '}}' in the response.")
-                if DEBUG_PLANNING:
-                    logger.error(f"Raw response was:\n{raw_response_content}")
-                return None, model_call_details, scratchpad_update
+            plan_response = result.output
+            logger.info(f"{self.agent_name}: Successfully parsed Phase {planning_phase} response")
+            if DEBUG_PLANNING:
+                logger.info(f"PLANNING AGENT DEBUG - PARSED PLAN:\n{plan_response.model_dump_json(indent=2)}")
 
-            # --- End Robust JSON Extraction ---
+            # Add section IDs programmatically
+            plan_response = self._add_section_ids(plan_response)
+
+            # Convert the phase-specific response to SimplifiedPlanResponse for backward compatibility
+            # This allows the rest of the system to work with the existing structure
+            plan_response = self._convert_to_simplified_response(plan_response, planning_phase)
 
-            # Use the centralized JSON utilities to parse the response
-            parsed_data = parse_llm_json_response(json_str)
-            
-            # Parse with the appropriate schema based on phase
-            try:
-                if planning_phase == 1:
-                    plan_response = Phase1PlanResponse(**parsed_data)
-                elif planning_phase == 2:
-                    plan_response = Phase2PlanResponse(**parsed_data)
-                else:  # Phase 3
-                    plan_response = Phase3PlanResponse(**parsed_data)
-                    
-                logger.info(f"{self.agent_name}: Successfully parsed Phase {planning_phase} response")
-                
-                # Add section IDs programmatically
-                plan_response = self._add_section_ids(plan_response)
-                
-                # Convert to SimplifiedPlanResponse for backward compatibility
-                # This allows the rest of the system to work with the existing structure
-                from ai_researcher.agentic_layer.schemas.planning import SimplifiedPlanResponse, ReportSection
-                
-                # Convert the phase-specific response to SimplifiedPlanResponse
-                unified_response = self._convert_to_simplified_response(plan_response, planning_phase)
-                plan_response = unified_response
-                
-            except ValidationError as e:
-                logger.error(f"{self.agent_name} Error: Failed to validate Phase {planning_phase} response: {e}")
-                if DEBUG_PLANNING:
-                    logger.error(f"Parsed data that failed validation:\n{json.dumps(parsed_data, indent=2)}")
-                return None, model_call_details, scratchpad_update
-            
             logger.info(f"{self.agent_name}: Successfully parsed and validated the plan.")
             
             # First apply programmatic strategy correction based on section characteristics
@@ -780,23 +653,15 @@ Available Research Tools:
 
             return plan_response, model_call_details, scratchpad_update # Return the validated plan, model details, and scratchpad update
 
-        except json.JSONDecodeError as e:
-            logger.error(f"{self.agent_name} Error: Failed to decode JSON response from LLM: {e}")
-            logger.error(f"Raw response was:\n{raw_response_content}") # Changed to error for debugging
-            return None, model_call_details, scratchpad_update # Return details even on JSON error
         except ValidationError as e:
             logger.error(f"{self.agent_name} Error: Plan validation failed against Pydantic schema: {e}")
-            logger.error(f"Raw response was:\n{raw_response_content}") # Changed to error for debugging
             return None, model_call_details, scratchpad_update # Return details even on validation error
         except Exception as e:
             logger.error(f"{self.agent_name} Error: An unexpected error occurred during plan processing: {e}", exc_info=True)
-            logger.error(f"Raw response was:\n{raw_response_content}") # Changed to error for debugging
             return None, model_call_details, scratchpad_update # Return details even on other errors
             
     def _add_section_ids(self, plan_response):
         """Add section IDs programmatically to the outline."""
-        import re
-        
         def generate_id(title):
             """Generate a clean ID from a title."""
             # Convert to lowercase, replace spaces with underscores, remove special chars
@@ -1,8 +1,6 @@
-import json
 import logging
 import os
 from typing import Optional, Dict, Tuple, Any, List
-from pydantic import ValidationError
 
 # Use absolute imports
 from ai_researcher.agentic_layer.agents.base_agent import BaseAgent
@@ -16,20 +14,7 @@ from ai_researcher.agentic_layer.schemas.notes import Note
 from ai_researcher.agentic_layer.schemas.goal import GoalEntry
 from ai_researcher.agentic_layer.schemas.thought import ThoughtEntry
 # Import the JSON utilities
-from ai_researcher.agentic_layer.utils.json_utils import (
-    parse_json_string_recursively,
-    sanitize_json_string,
-    parse_llm_json_response,
-    prepare_for_pydantic_validation,
-    extract_non_schema_fields,
-    filter_null_values_from_list
-)
-from ai_researcher.agentic_layer.utils.json_format_helper import (
-    get_json_schema_format,
-    get_json_object_format,
-    enhance_messages_for_json_object,
-    should_retry_with_json_object
-)
+from ai_researcher.agentic_layer.utils.json_utils import filter_null_values_from_list
 
 logger = logging.getLogger(__name__)
 
@@ -208,6 +193,39 @@ Provide ONLY a single JSON object conforming EXACTLY to the ReflectionOutput sch
     # Removed _format_summaries_for_prompt as it's not used
 
 
+    def _prepare_reflection_data(self, parsed_data: Any) -> Any:
+        """Normalize decoded reflection JSON before it is validated as ReflectionOutput."""
+        # Handle case where parsed_data might be a list
+        if isinstance(parsed_data, list):
+            logger.warning(f"Parsed data is a list, not a dict. Content: {parsed_data[:2] if len(parsed_data) > 2 else parsed_data}")
+            if len(parsed_data) > 0 and isinstance(parsed_data[0], dict):
+                parsed_data = parsed_data[0]
+                logger.info("Extracted first dict from list response")
+            else:
+                # The LLM returned just a list of questions, convert to proper format
+                logger.warning("LLM returned only a list of questions, converting to proper ReflectionOutput format")
+                parsed_data = {
+                    "overall_assessment": "The model returned a list of questions without proper formatting. These questions have been captured for further research.",
+                    "new_questions": parsed_data,
+                    "suggested_subsection_topics": [],
+                    "proposed_modifications": [],
+                    "sections_needing_review": [],
+                    "critical_issues_summary": None,
+                    "discard_note_ids": [],
+                    "generated_thought": "Model output was not properly formatted - questions extracted for continued research."
+                }
+                logger.info(f"Converted list to proper format with {len(parsed_data.get('new_questions', []))} questions")
+
+        # Special handling for suggested_subsection_topics
+        if isinstance(parsed_data, dict) and isinstance(parsed_data.get('suggested_subsection_topics'), list):
+            topics = filter_null_values_from_list(parsed_data['suggested_subsection_topics'])
+            # Check if the first item is a tuple (only if the list is not empty)
+            if topics and isinstance(topics[0], tuple):
+                topics = list(topics[0])
+                logger.info("Flattened tuple in suggested_subsection_topics")
+            parsed_data['suggested_subsection_topics'] = topics
+        return parsed_data
+
     async def run( # <-- Make method async
         self,
         mission_context: MissionContext,
@@ -264,175 +282,26 @@ Provide ONLY a single JSON object conforming EXACTLY to the ReflectionOutput sch
             agent_scratchpad=agent_scratchpad
         )
 
-        # Use system prompt if defined, otherwise just user prompt
-        messages = [{"role": "user", "content": prompt}]
-        if self.system_prompt:
-            messages.insert(0, {"role": "system", "content": self.system_prompt})
-
-        # Try json_schema format first, with fallback to json_object
-        response_format_pydantic = get_json_schema_format(
-            pydantic_model=ReflectionOutput,
-            schema_name="reflection_output"
+        # The shared structured-output path handles the schema/json_object
+        # fallback, local JSON repair and corrective re-queries
+        result = await self._call_llm_structured(
+            user_prompt=prompt,
+            output_model=ReflectionOutput,
+            schema_name="reflection_output",
+            agent_mode="reflection", # <-- Pass agent_mode
+            log_queue=log_queue, # Pass log_queue for UI updates
+            update_callback=update_callback, # Pass update_callback for UI updates
+            log_llm_call=False, # Disable logging here to prevent duplicate logs (handled by reflection_manager)
+            prepare=self._prepare_reflection_data,
+            model=self.model_name
         )
-        use_json_object = False
+        response_model = result.output
+        model_call_details = result.model_call_details
+        scratchpad_update = result.extra_fields.get("scratchpad_update")
+
+        if DEBUG_REFLECTION and response_model:
+            logger.info(f"Parsed reflection output: {response_model.model_dump_json(indent=2)}")
 
-        # Add retry logic similar to other agents
-        max_retries = 3
-        model_call_details = None
-        response_model = None # Initialize response_model
-        
-        for attempt in range(max_retries):
-            try:
-                logger.info(f"ReflectionAgent attempt {attempt + 1}/{max_retries} for section {section_id}")
-                
-                # Prepare messages based on format type
-                current_messages = messages
-                if use_json_object:
-                    current_messages = enhance_messages_for_json_object(
-                        messages=messages,
-                        pydantic_model=ReflectionOutput
-                    )
-                
-                # Use _call_llm for consistent logging
-                # Need to extract user prompt from messages for _call_llm
-                # Store mission_id as instance attribute so _call_llm can access it
-                self.mission_id = mission_id
-                user_prompt = current_messages[-1]["content"] if current_messages else ""
-                response, model_call_details = await self._call_llm(
-                    user_prompt=user_prompt,
-                    history=current_messages[:-1] if len(current_messages) > 1 else None,
-                    response_format=response_format_pydantic,
-                    model=self.model_name,
-                    agent_mode="reflection", # <-- Pass agent_mode
-                    # Don't pass mission_id - _call_llm gets it from self.mission_id
-                    log_queue=log_queue, # Pass log_queue for UI updates
-                    update_callback=update_callback, # Pass update_callback for UI updates
-                    log_llm_call=False # Disable logging here to prevent duplicate logs (handled by reflection_manager)
-                )
-
-                if response and response.choices and response.choices[0].message.content:
-                    raw_json_output = response.choices[0].message.content
-                    try:
-                        # Use the centralized JSON utilities to parse and prepare the response
-                        raw_json_output = response.choices[0].message.content
-                        
-                        # Log the raw response for debugging
-                        if DEBUG_REFLECTION:
-                            logger.info(f"Raw LLM response (first 1000 chars): {raw_json_output[:1000]}")
-                        
-                        # Parse the JSON response
-                        parsed_data = parse_llm_json_response(raw_json_output)
-                        
-                        # Log the parsed data type and content for debugging
-                        if DEBUG_REFLECTION:
-                            logger.info(f"Parsed data type: {type(parsed_data)}")
-                        
-                        # Handle case where parsed_data might be a list
-                        if isinstance(parsed_data, list):
-                            logger.warning(f"Parsed data is a list, not a dict. Content: {parsed_data[:2] if len(parsed_data) > 2 else parsed_data}")
-                            # If it's a list, try to find the dict inside or convert appropriately
-                            if len(parsed_data) > 0 and isinstance(parsed_data[0], dict):
-                                parsed_data = parsed_data[0]
-                                logger.info("Extracted first dict from list response")
-                            else:
-                                # The LLM returned just a list of questions, convert to proper format
-                                logger.warning("LLM returned only a list of questions, converting to proper ReflectionOutput format")
-                                parsed_data = {
-                                    "overall_assessment": "The model returned a list of questions without proper formatting. These questions have been captured for further research.",
-                                    "new_questions": parsed_data if isinstance(parsed_data, list) else [],
-                                    "suggested_subsection_topics": [],
-                                    "proposed_modifications": [],
-                                    "sections_needing_review": [],
-                                    "critical_issues_summary": None,
-                                    "discard_note_ids": [],
-                                    "generated_thought": "Model output was not properly formatted - questions extracted for continued research."
-                                }
-                                logger.info(f"Converted list to proper format with {len(parsed_data.get('new_questions', []))} questions")
-                        
-                        # Extract non-schema fields like scratchpad_update
-                        extra_fields = extract_non_schema_fields(parsed_data, ReflectionOutput)
-                        scratchpad_update = extra_fields.get("scratchpad_update")
-                        
-                        # Prepare the data for Pydantic validation
-                        prepared_data = prepare_for_pydantic_validation(parsed_data, ReflectionOutput)
-                        
-                        # Special handling for suggested_subsection_topics
-                        if 'suggested_subsection_topics' in prepared_data:
-                            # Filter out null values
-                            if prepared_data['suggested_subsection_topics'] is not None:
-                                prepared_data['suggested_subsection_topics'] = filter_null_values_from_list(prepared_data['suggested_subsection_topics'])
-                                logger.info(f"Filtered null values from suggested_subsection_topics, resulting in {len(prepared_data['suggested_subsection_topics'])} items")
-                                
-                                # Check if the first item is a tuple (only if the list is not empty)
-                                if len(prepared_data['suggested_subsection_topics']) > 0 and isinstance(prepared_data['suggested_subsection_topics'][0], tuple):
-                                    # Flatten the tuple into individual items
-                                    prepared_data['suggested_subsection_topics'] = list(prepared_data['suggested_subsection_topics'][0])
-                                    logger.info("Flattened tuple in suggested_subsection_topics")
-                        
-                        # Log the parsed data structure for debugging
-                        if DEBUG_REFLECTION:
-                            logger.info(f"Parsed data after processing: {json.dumps(prepared_data, indent=2)}")
-                        
-                        # Validate the rest of the data against the schema
-                        response_model = ReflectionOutput(**prepared_data)
-                        # If we successfully created response_model, break out of retry loop
-                        if response_model:
-                            break
-                            
-                    except (json.JSONDecodeError, ValidationError) as e:
-                        logger.error(f"Attempt {attempt + 1}/{max_retries}: Failed to parse/validate ReflectionOutput JSON for section {section_id}: {e}\nRaw output: {raw_json_output}", exc_info=True)
-                        
-                        # Enhanced debugging for validation errors
-                        if isinstance(e, ValidationError):
-                            logger.error("Validation error details:")
-                            for error in e.errors():
-                                logger.error(f"  Field: {error['loc']}, Error: {error['msg']}, Input: {error.get('input', 'N/A')}")
-                                
-                                # If the error is in suggested_subsection_topics, log more details
-                                if error['loc'] and error['loc'][0] == 'suggested_subsection_topics':
-                                    if 'suggested_subsection_topics' in parsed_data:
-                                        logger.error(f"  suggested_subsection_topics content: {parsed_data['suggested_subsection_topics']}")
-                                        
-                                        # Log the type of each item
-                                        for i, topic in enumerate(parsed_data['suggested_subsection_topics']):
-                                            logger.error(f"  Item {i} type: {type(topic)}, Value: {topic}")
-                        
-                        # If this was the last attempt, return None
-                        if attempt == max_retries - 1:
-                            logger.error(f"All {max_retries} attempts failed for section {section_id}")
-                            return None, model_call_details, scratchpad_update
-                        else:
-                            logger.warning(f"Attempt {attempt + 1} failed, retrying...")
-                            continue
-                            
-                else:
-                    logger.error(f"Attempt {attempt + 1}/{max_retries}: ReflectionAgent failed for section {section_id}: No valid response content received from model.")
-                    # If this was the last attempt, return None
-                    if attempt == max_retries - 1:
-                        logger.error(f"All {max_retries} attempts failed for section {section_id}")
-                        return None, model_call_details, scratchpad_update
-                    else:
-                        logger.warning(f"Attempt {attempt + 1} failed, retrying...")
-                        continue
-                    
-            except Exception as e:
-                # Check if we should retry with json_object format
-                if not use_json_object and should_retry_with_json_object(e):
-                    logger.info(f"Retrying with json_object format due to: {str(e)[:200]}")
-                    response_format_pydantic = get_json_object_format()
-                    use_json_object = True
-                    # Don't increment attempt counter, retry with new format
-                    continue
-                
-                logger.error(f"Attempt {attempt + 1}/{max_retries}: Error during ReflectionAgent execution for section {section_id}: {e}", exc_info=True)
-                # If this was the last attempt, return None
-                if attempt == max_retries - 1:
-                    logger.error(f"All {max_retries} attempts failed for section {section_id}")
-                    return None, model_call_details, scratchpad_update
-                else:
-                    logger.warning(f"Attempt {attempt + 1} failed, retrying...")
-                    continue
-        
         # Handle successful response outside the retry loop
         if response_model:
             # --- Force sections_needing_review to be empty ---
@@ -458,5 +327,5 @@ Provide ONLY a single JSON object conforming EXACTLY to the ReflectionOutput sch
             return response_model, model_call_details, scratchpad_update
         else:
             # This case means all retries failed
-            logger.error(f"ReflectionAgent failed: Could not create response model for section {section_id} after {max_retries} attempts.")
+            logger.error(f"ReflectionAgent failed: Could not create response model for section {section_id} after {result.attempts} attempts: {result.error}")
             return None, model_call_details, scratchpad_update
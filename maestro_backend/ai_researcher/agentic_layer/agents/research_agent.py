@@ -28,6 +28,7 @@ from ai_researcher.dynamic_config import (
     get_main_research_web_results
 )
 from ai_researcher.agentic_layer.tool_registry import ToolRegistry
+from ai_researcher.agentic_layer.controller.utils.research_prefetch import get_prefetched_queries
 from ai_researcher.core_rag.query_preparer import QueryPreparer, QueryRewritingTechnique # <-- Import QueryPreparer
 from ai_researcher.agentic_layer.schemas.planning import PlanStep, ActionType, ReportSection
 from ai_researcher.agentic_layer.schemas.research import ResearchFindings, ResearchResultResponse, Source
@@ -1531,7 +1532,13 @@ If no relevant sub-questions are identified, return an empty list for "sub_quest
             if not query_preparer and self.controller:
                 query_preparer = self.controller.query_preparer
                 
-            if not query_preparer:
+            # Queries prepared while the user reviewed the questions (cost already recorded)
+            prefetched_queries = get_prefetched_queries(self.mission_id, initial_query, domain_context_for_preparer, techniques)
+            if prefetched_queries:
+                logger.info(f"Using prefetched queries for section {section.section_id}.")
+                prepared_queries = prefetched_queries
+                model_details_list = []
+            elif not query_preparer:
                 logger.warning(f"Query preparer not available for section {section.section_id}. Using initial query without enhancement.")
                 prepared_queries = [initial_query]
                 model_details_list = []
@@ -1,6 +1,9 @@
 import asyncio
+import contextvars
 from datetime import datetime
 import logging
+import time
+import re
 from typing import Dict, Any, Optional, List
 
 from ai_researcher.agentic_layer.model_dispatcher import ModelDispatcher
@@ -8,6 +11,9 @@ from ai_researcher import config
 
 logger = logging.getLogger(__name__)
 
+# Citation placeholders emitted by the main LLM: [8-char-hex]
+CITATION_PATTERN = re.compile(r'\[([a-f0-9]{8})\]')
+
 
 class WritingStatsTracker:
     """
@@ -116,6 +122,103 @@ class WritingStatsTracker:
             logger.error(f"Error sending stats update for session {session_id}: {e}")
 
 
+class StreamingCitationResolver:
+    """
+    Resolves citation placeholders in a streamed completion chunk by chunk.
+
+    Numbers are assigned in order of first appearance, the same way
+    ``SimplifiedWritingAgent._process_citations_and_filter_sources`` numbers the
+    full text, so the streamed text matches the final message. A trailing
+    fragment that could still become a placeholder (e.g. ``[a3b4``) is held
+    back until the next chunk decides it.
+    """
+
+    _PARTIAL_CITATION = re.compile(r'\[[a-f0-9]{0,8}$')
+
+    def __init__(self, sources: List[Dict[str, Any]]):
+        self.ref_ids = {source.get("ref_id") for source in sources or [] if source.get("ref_id")}
+        self.numbers: Dict[str, int] = {}
+        self.pending = ""
+
+    def _replace(self, match) -> str:
+        ref_id = match.group(1)
+        if ref_id not in self.ref_ids:
+            return match.group(0)
+        if ref_id not in self.numbers:
+            self.numbers[ref_id] = len(self.numbers) + 1
+        return f"[{self.numbers[ref_id]}]"
+
+    def feed(self, text: str) -> str:
+        """Return the resolved text that is safe to send for this chunk."""
+        text = self.pending + text
+        partial = self._PARTIAL_CITATION.search(text)
+        if partial:
+            self.pending = text[partial.start():]
+            text = text[:partial.start()]
+        else:
+            self.pending = ""
+        return CITATION_PATTERN.sub(self._replace, text)
+
+    def flush(self) -> str:
+        """Return whatever is still held back at the end of the stream."""
+        text, self.pending = self.pending, ""
+        return CITATION_PATTERN.sub(self._replace, text)
+
+
+# Writing session the current run bills its retrieval LLM calls to
+_writing_session_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "writing_session_id", default=None
+)
+
+# Usage of the retrieval LLM calls made inside the current speculative branch
+_speculative_spend: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar(
+    "writing_speculative_spend", default=None
+)
+
+
+class SpeculativeBranch:
+    """
+    A retrieval branch started before the router has decided whether it is needed.
+
+    Status updates from the branch are held back until ``result()`` confirms
+    it, so a branch that ends up cancelled never shows up in the UI; the
+    latest held-back status is replayed on confirmation. The branch's
+    retrieval LLM calls are recorded in ``spend`` and billed to the session
+    once the branch is either confirmed or discarded.
+    """
+
+    def __init__(self, branch_factory: callable, status_callback: Optional[callable] = None):
+        self.status_callback = status_callback
+        self.confirmed = False
+        self._last_status = None
+        self.spend: List[Dict[str, Any]] = []
+        context = contextvars.copy_context()
+        context.run(_speculative_spend.set, self.spend)
+        self.task = asyncio.create_task(branch_factory(self._status), context=context)
+
+    async def _status(self, status: str, details: Any = ""):
+        if not self.status_callback:
+            return
+        if self.confirmed:
+            await self.status_callback(status, details)
+        else:
+            self._last_status = (status, details)
+
+    async def result(self):
+        """Confirm the branch and wait for its result."""
+        self.confirmed = True
+        if self._last_status and self.status_callback and not self.task.done():
+            await self.status_callback(*self._last_status)
+        return await self.task
+
+    def cancel(self):
+        if not self.task.done():
+            self.task.cancel()
+        elif not self.task.cancelled():
+            # Retrieve the exception of a discarded branch so asyncio does not log it
+            self.task.exception()
+
+
 class SimplifiedWritingAgent:
     """
     A stateless agent for handling writing tasks. It uses a two-step process:
@@ -134,9 +237,58 @@ class SimplifiedWritingAgent:
         self._retriever = None
         self._query_preparer = None
 
-    async def run(self, prompt: str, draft_content: str, chat_history: List[Dict[str, str]], context_info: Optional[Dict[str, Any]] = None, status_callback: Optional[callable] = None) -> Dict[str, Any]:
+    async def _dispatch_retrieval_llm(self, messages: List[Dict[str, str]], agent_mode: str):
+        """
+        Dispatches a retrieval helper call (query enrichment, decomposition, quality
+        and relevance checks) and bills it to the writing session. Inside a
+        speculative branch its usage is recorded in the branch's spend instead,
+        including an estimate if the branch is cancelled while the call is in flight.
+        """
+        spend = _speculative_spend.get()
+        if spend is None:
+            response, model_details = await self.model_dispatcher.dispatch(messages=messages, agent_mode=agent_mode)
+            await self.stats_tracker.track_llm_call(_writing_session_id.get(), model_details)
+            return response, model_details
+        try:
+            response, model_details = await self.model_dispatcher.dispatch(messages=messages, agent_mode=agent_mode)
+        except asyncio.CancelledError:
+            # The provider may still bill the prompt; estimate it at ~4 characters per token
+            spend.append({
+                "agent_mode": agent_mode,
+                "prompt_tokens": sum(len(str(m.get("content", ""))) for m in messages) // 4,
+                "completion_tokens": 0,
+                "usage_estimated": True,
+            })
+            raise
+        if model_details:
+            spend.append(model_details)
+        return response, model_details
+
+    async def _discard_speculative_branch(self, branch: SpeculativeBranch, session_id: Optional[str]):
+        """Cancels an unused speculative branch and bills the LLM calls it made to the session."""
+        branch.cancel()
+        await asyncio.gather(branch.task, return_exceptions=True)
+        await self._bill_speculative_spend(branch, session_id)
+
+    async def _bill_speculative_spend(self, branch: SpeculativeBranch, session_id: Optional[str]):
+        """Bills the retrieval LLM calls of a finished speculative branch to the session."""
+        if not session_id:
+            return
+        for details in branch.spend:
+            if details.get("cost") is None:
+                provider_name, model_name = self.model_dispatcher.resolve_model(agent_mode=details.get("agent_mode"))
+                details["cost"] = await self.model_dispatcher.calculate_cost(
+                    provider_name, model_name, details["prompt_tokens"], details["completion_tokens"]
+                ) if provider_name and model_name else 0.0
+            await self.stats_tracker.track_llm_call(session_id, details)
+
+    async def run(self, prompt: str, draft_content: str, chat_history: List[Dict[str, str]], context_info: Optional[Dict[str, Any]] = None, status_callback: Optional[callable] = None, stream_callback: Optional[callable] = None) -> Dict[str, Any]:
         """
         Executes the two-step writing process with optional context information and status updates.
+
+        When ``stream_callback`` is given, the main response is streamed to it as
+        it is generated, with citations already numbered; the returned
+        ``chat_response`` is the authoritative final text.
         """
         context_info = context_info or {}
         session_id = context_info.get("session_id")  # Extract session_id for stats tracking
@@ -153,6 +305,7 @@ class SimplifiedWritingAgent:
         document_group_info = f"{context_info.get('document_group_name', 'Unknown')} ({context_info.get('document_group_id')})" if context_info.get('document_group_id') else None
         logger.info(f"Available tools - Web search: {context_info.get('use_web_search', False)}, Document group: {document_group_info}")
         
+        session_token = _writing_session_id.set(session_id)
         try:
             # Send initial status
             if status_callback:
@@ -162,8 +315,43 @@ class SimplifiedWritingAgent:
             if status_callback:
                 await status_callback("router_thinking", "Router agent is deciding which tools to use...")
             
-            router_decision = await self._run_router(prompt, chat_history, context_info, status_callback)
+            def web_branch(callback):
+                return self._perform_iterative_web_search(
+                    prompt, chat_history, session_id, callback,
+                    max_attempts=max_search_iterations,
+                    max_decomposed_queries=max_decomposed_queries,
+                    max_search_results=max_search_results
+                )
+
+            def document_branch(callback):
+                return self._perform_iterative_document_search(
+                    prompt, context_info["document_group_id"], chat_history, session_id, callback,
+                    max_attempts=max_search_iterations,
+                    max_decomposed_queries=max_decomposed_queries,
+                    max_doc_results=max_doc_results
+                )
+
+            # Speculatively start document retrieval while the router decides and
+            # cancel it if the router does not pick it. Web search is never
+            # speculative: it is paid per query and has no result cache.
+            speculative: Dict[str, SpeculativeBranch] = {}
+            if config.WRITING_SPECULATIVE_RETRIEVAL and context_info.get("document_group_id"):
+                speculative["documents"] = SpeculativeBranch(document_branch, status_callback)
+                logger.info("Started speculative document retrieval")
+
+            try:
+                router_decision = await self._run_router(prompt, chat_history, context_info, status_callback)
+            except BaseException:
+                for branch in speculative.values():
+                    branch.cancel()
+                raise
             logger.info(f"Router decision: {router_decision}")
+
+            use_web = router_decision in ["search", "both"] and bool(context_info.get("use_web_search"))
+            use_documents = router_decision in ["documents", "both"] and bool(context_info.get("document_group_id"))
+            if "documents" in speculative and not use_documents:
+                await self._discard_speculative_branch(speculative.pop("documents"), session_id)
+                logger.info("Cancelled unused speculative document retrieval")
             
             # Send router decision feedback to frontend
             if status_callback:
@@ -175,41 +363,42 @@ class SimplifiedWritingAgent:
             tools_used = {"web_search": False, "document_search": False}
             sources = []  # Track sources for attribution
             
-            if router_decision in ["search", "both"] and context_info.get("use_web_search"):
-                if status_callback:
-                    search_mode = "deep web search" if use_deep_search else "web search"
-                    # Include the actual query in the status message
-                    query_preview = prompt[:80] + "..." if len(prompt) > 80 else prompt
-                    await status_callback("searching_web", f"Performing {search_mode} for: {query_preview}")
-                
-                logger.info(f"Performing iterative web search (deep={use_deep_search}, max_iterations={max_search_iterations})...")
-                web_results, web_sources = await self._perform_iterative_web_search(
-                    prompt, chat_history, session_id, status_callback, 
-                    max_attempts=max_search_iterations,
-                    max_decomposed_queries=max_decomposed_queries,
-                    max_search_results=max_search_results
-                )
-                external_context += web_results
-                sources.extend(web_sources)
-                tools_used["web_search"] = True
-            
-            if router_decision in ["documents", "both"] and context_info.get("document_group_id"):
-                if status_callback:
-                    search_mode = "deep document search" if use_deep_search else "document search"
-                    # Include the actual query in the status message
-                    query_preview = prompt[:80] + "..." if len(prompt) > 80 else prompt
-                    await status_callback("searching_documents", f"Performing {search_mode} in your collection for: {query_preview}")
+            try:
+                if use_web:
+                    if status_callback:
+                        search_mode = "deep web search" if use_deep_search else "web search"
+                        # Include the actual query in the status message
+                        query_preview = prompt[:80] + "..." if len(prompt) > 80 else prompt
+                        await status_callback("searching_web", f"Performing {search_mode} for: {query_preview}")
+                    
+                    logger.info(f"Performing iterative web search (deep={use_deep_search}, max_iterations={max_search_iterations})...")
+                    web_results, web_sources = await web_branch(status_callback)
+                    external_context += web_results
+                    sources.extend(web_sources)
+                    tools_used["web_search"] = True
                 
-                logger.info(f"Performing iterative document search in group: {context_info['document_group_id']} (deep={use_deep_search})")
-                doc_results, doc_sources = await self._perform_iterative_document_search(
-                    prompt, context_info["document_group_id"], chat_history, session_id, status_callback,
-                    max_attempts=max_search_iterations,
-                    max_decomposed_queries=max_decomposed_queries,
-                    max_doc_results=max_doc_results
-                )
-                external_context += doc_results
-                sources.extend(doc_sources)
-                tools_used["document_search"] = True
+                if use_documents:
+                    if status_callback:
+                        search_mode = "deep document search" if use_deep_search else "document search"
+                        # Include the actual query in the status message
+                        query_preview = prompt[:80] + "..." if len(prompt) > 80 else prompt
+                        await status_callback("searching_documents", f"Performing {search_mode} in your collection for: {query_preview}")
+                    
+                    logger.info(f"Performing iterative document search in group: {context_info['document_group_id']} (deep={use_deep_search})")
+                    if "documents" in speculative:
+                        branch = speculative.pop("documents")
+                        try:
+                            doc_results, doc_sources = await branch.result()
+                        finally:
+                            await self._bill_speculative_spend(branch, session_id)
+                    else:
+                        doc_results, doc_sources = await document_branch(status_callback)
+                    external_context += doc_results
+                    sources.extend(doc_sources)
+                    tools_used["document_search"] = True
+            finally:
+                for branch in speculative.values():
+                    branch.cancel()
             
             logger.info(f"External context gathered: {len(external_context)} characters")
             
@@ -217,7 +406,10 @@ class SimplifiedWritingAgent:
                 await status_callback("generating", "Generating response based on gathered information...")
             
             # Step 3: Main LLM call with all available context
-            main_response = await self._run_main_llm(prompt, draft_content, chat_history, external_context, context_info)
+            main_response = await self._run_main_llm(
+                prompt, draft_content, chat_history, external_context, context_info,
+                stream_callback=stream_callback, sources=sources
+            )
 
             # Process citations to replace ref IDs with numbers and filter sources
             used_sources = []
@@ -251,6 +443,8 @@ class SimplifiedWritingAgent:
                 "tools_used": {"web_search": False, "document_search": False},
                 "sources": []
             }
+        finally:
+            _writing_session_id.reset(session_token)
 
     def _get_router_decision_message(self, decision: str, context_info: Dict[str, Any]) -> str:
         """
@@ -585,7 +779,7 @@ class SimplifiedWritingAgent:
                 {"role": "user", "content": user_content}
             ]
             
-            response, _ = await self.model_dispatcher.dispatch(messages=messages, agent_mode="fast")
+            response, _ = await self._dispatch_retrieval_llm(messages, "fast")
             
             if response and response.choices and response.choices[0].message.content:
                 enhanced_query = response.choices[0].message.content.strip().strip('"')
@@ -659,35 +853,16 @@ class SimplifiedWritingAgent:
             if status_callback:
                 await status_callback("assessing_relevance", f"Evaluating relevance of {len(results)} search results...")
             
-            relevance_tasks = []
-            result_items = []
-            for i, result_item in enumerate(results, 1):
-                title = result_item.get("title", "No Title")
-                snippet = result_item.get("snippet", "No content available")
-                url = result_item.get("url", "#")
-                
-                # Create coroutine for parallel relevance assessment
-                task = self._assess_search_result_relevance(
-                    query=query,
-                    title=title,
-                    snippet=snippet,
-                    url=url
-                )
-                relevance_tasks.append(task)
-                result_items.append((i, result_item))
-            
-            # Execute all relevance assessments in parallel using asyncio.gather
-            relevance_assessments = await asyncio.gather(*relevance_tasks, return_exceptions=True)
-            
-            # Process results and handle any exceptions
-            relevance_results = []
-            for (i, result_item), is_relevant in zip(result_items, relevance_assessments):
-                if isinstance(is_relevant, Exception):
-                    logger.error(f"Error assessing relevance for result {i}: {is_relevant}")
-                    is_relevant = False  # Default to not relevant on error
-                relevance_results.append((i, result_item, is_relevant))
+            result_items = list(enumerate(results, 1))
+            relevance_assessments = await self._assess_search_results_relevance(
+                query, [result_item for _, result_item in result_items]
+            )
+            relevance_results = [
+                (i, result_item, is_relevant)
+                for (i, result_item), is_relevant in zip(result_items, relevance_assessments)
+            ]
             
-            logger.info(f"Completed parallel relevance assessment for {len(results)} results")
+            logger.info(f"Completed batched relevance assessment for {len(results)} results")
             
             # Filter relevant results for content fetching
             relevant_results = [(i, item) for i, item, is_relevant in relevance_results if is_relevant]
@@ -985,7 +1160,7 @@ class SimplifiedWritingAgent:
                 {"role": "user", "content": assessment_prompt}
             ]
             
-            response, _ = await self.model_dispatcher.dispatch(messages=messages, agent_mode="fast")
+            response, _ = await self._dispatch_retrieval_llm(messages, "fast")
             
             if response and response.choices and response.choices[0].message.content:
                 import json
@@ -1115,7 +1290,7 @@ class SimplifiedWritingAgent:
                 {"role": "user", "content": decomposition_prompt}
             ]
             
-            response, _ = await self.model_dispatcher.dispatch(messages=messages, agent_mode="fast")
+            response, _ = await self._dispatch_retrieval_llm(messages, "fast")
             
             if response and response.choices and response.choices[0].message.content:
                 import json
@@ -1384,35 +1559,17 @@ class SimplifiedWritingAgent:
                                         logger.debug(f"Filtered locally seen URL: {url[:60]}...")
                             
                             if unseen_results:
-                                # STEP 1: Assess relevance of all unseen results in parallel
+                                # STEP 1: Assess relevance of all unseen results in a single batched call
                                 if status_callback and len(unseen_results) > 1:
                                     await status_callback("assessing_relevance", f"[Search {search_number}/{total_searches}] Evaluating {len(unseen_results)} results...")
                                 
-                                relevance_tasks = []
-                                for i, result_item in unseen_results:
-                                    title = result_item.get("title", "No Title")
-                                    snippet = result_item.get("snippet", "No content available")
-                                    url = result_item.get("url", "#")
-                                    
-                                    task = self._assess_search_result_relevance(
-                                        query=original_query,
-                                        title=title,
-                                        snippet=snippet,
-                                        url=url
-                                    )
-                                    relevance_tasks.append((i, result_item, task))
-                                
-                                # Execute all relevance assessments in parallel
-                                all_relevance_coroutines = [task for _, _, task in relevance_tasks]
-                                relevance_assessments = await asyncio.gather(*all_relevance_coroutines, return_exceptions=True)
-                                
-                                # Process results
-                                relevance_results = []
-                                for (i, result_item, _), is_relevant in zip(relevance_tasks, relevance_assessments):
-                                    if isinstance(is_relevant, Exception):
-                                        logger.error(f"Error assessing relevance for result {i}: {is_relevant}")
-                                        is_relevant = False
-                                    relevance_results.append((i, result_item, is_relevant))
+                                relevance_assessments = await self._assess_search_results_relevance(
+                                    original_query, [result_item for _, result_item in unseen_results]
+                                )
+                                relevance_results = [
+                                    (i, result_item, is_relevant)
+                                    for (i, result_item), is_relevant in zip(unseen_results, relevance_assessments)
+                                ]
                                 
                                 # Filter relevant results
                                 relevant_for_fetch = [(i, item) for i, item, is_relevant in relevance_results if is_relevant]
@@ -1684,7 +1841,7 @@ class SimplifiedWritingAgent:
         
         return focused_results, focused_sources
 
-    async def _run_main_llm(self, prompt: str, draft_content: str, chat_history: List[Dict[str, str]], external_context: str = "", context_info: Dict[str, Any] = None) -> str:
+    async def _run_main_llm(self, prompt: str, draft_content: str, chat_history: List[Dict[str, str]], external_context: str = "", context_info: Dict[str, Any] = None, stream_callback: Optional[callable] = None, sources: Optional[List[Dict[str, Any]]] = None) -> str:
         """
         Generates the main response and document modifications with all available context.
         """
@@ -1857,6 +2014,12 @@ class SimplifiedWritingAgent:
         else:
             messages.append({"role": "user", "content": user_content})
 
+        if stream_callback:
+            streamed = await self._stream_main_llm(messages, context_info, sources or [], stream_callback)
+            if streamed:
+                return streamed
+            logger.warning("Streaming main LLM call produced no content; falling back to a non-streaming call")
+
         try:
             response, model_details = await self.model_dispatcher.dispatch(messages=messages, agent_mode="simplified_writing")
 
@@ -1877,6 +2040,64 @@ class SimplifiedWritingAgent:
             logger.error(f"Error in main LLM: {e}", exc_info=True)
             return handle_api_error(e)
 
+    async def _stream_main_llm(self, messages: List[Dict[str, str]], context_info: Dict[str, Any], sources: List[Dict[str, Any]], stream_callback: callable) -> Optional[str]:
+        """
+        Streams the main completion to ``stream_callback`` and returns the raw text.
+
+        Returns None if the stream fails or yields nothing, so the caller can
+        fall back to a regular call; anything already streamed is superseded by
+        the final message.
+        """
+        resolver = StreamingCitationResolver(sources)
+        parts: List[str] = []
+        usage = None
+        provider_name, model_name = self.model_dispatcher.resolve_model(agent_mode="simplified_writing")
+        start_time = time.time()
+        try:
+            async for chunk in self.model_dispatcher.dispatch_stream(
+                messages=messages, agent_mode="simplified_writing", include_usage=True
+            ):
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content if chunk.choices[0].delta else None
+                if not delta:
+                    continue
+                parts.append(delta)
+                resolved = resolver.feed(delta)
+                if resolved:
+                    await stream_callback(resolved)
+            remainder = resolver.flush()
+            if remainder:
+                await stream_callback(remainder)
+        except Exception as e:
+            logger.warning(f"Streaming main LLM call failed after {len(parts)} chunks: {e}")
+            return None
+
+        session_id = context_info.get("session_id")
+        if session_id:
+            if usage:
+                prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+                completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+            else:
+                # The provider sent no usage chunk: estimate at ~4 characters per token
+                prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+                completion_tokens = sum(len(part) for part in parts) // 4
+            await self.stats_tracker.track_llm_call(session_id, {
+                "provider": provider_name,
+                "model_name": model_name,
+                "duration_sec": round(time.time() - start_time, 2),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "cost": await self.model_dispatcher.calculate_cost(provider_name, model_name, prompt_tokens, completion_tokens)
+                        if provider_name and model_name else 0.0,
+                "usage_estimated": usage is None,
+            })
+
+        return "".join(parts) or None
+
     def _process_citations_and_filter_sources(self, content: str, sources: List[Dict[str, Any]]) -> tuple[str, List[Dict[str, Any]]]:
         """
         Process citation placeholders in the content, replace them with numbered references,
@@ -2015,6 +2236,82 @@ class SimplifiedWritingAgent:
         
         return formatted
     
+    async def _assess_search_results_relevance(self, query: str, results: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Assess which search results are relevant enough to fetch, in a single fast LLM call.
+
+        Falls back to one call per result if the batched answer cannot be parsed.
+
+        Args:
+            query: The original search query
+            results: Search result dicts with title, url and snippet
+
+        Returns:
+            One boolean per result, in order
+        """
+        if not results:
+            return []
+        if len(results) == 1:
+            item = results[0]
+            return [await self._assess_search_result_relevance(
+                query=query,
+                title=item.get("title", "No Title"),
+                snippet=item.get("snippet", "No content available"),
+                url=item.get("url", "#")
+            )]
+
+        listing = "\n\n".join(
+            f"[{i}] Title: {item.get('title', 'No Title')}\n"
+            f"URL: {item.get('url', '#')}\n"
+            f"Snippet: {item.get('snippet', 'No content available')}"
+            for i, item in enumerate(results, 1)
+        )
+        relevance_prompt = f"""Assess which of these search results are relevant to the query.
+
+Query: {query}
+
+Search Results:
+{listing}
+
+For each result, decide if it is relevant enough that we should fetch and read the full content of the page.
+Consider:
+- Does it relate to the query topic (even partially)?
+- Does the snippet suggest it might contain useful information?
+- Could it provide context or background information?
+
+Be inclusive - if there's any chance it could be useful, say YES.
+Respond with exactly one line per result in the form "<number>: YES" or "<number>: NO"."""
+
+        messages = [
+            {"role": "system", "content": "You are a relevance assessor. Respond with one '<number>: YES' or '<number>: NO' line per result."},
+            {"role": "user", "content": relevance_prompt}
+        ]
+
+        decisions: Dict[int, bool] = {}
+        try:
+            response, _ = await self._dispatch_retrieval_llm(messages, "router")
+            if response and response.choices and response.choices[0].message.content:
+                for match in re.finditer(r'\[?(\d+)\]?\s*[:.)-]\s*(YES|NO)\b', response.choices[0].message.content, re.IGNORECASE):
+                    decisions[int(match.group(1))] = match.group(2).upper() == "YES"
+        except Exception as e:
+            logger.error(f"Error assessing relevance in batch: {e}")
+
+        if all(i in decisions for i in range(1, len(results) + 1)):
+            logger.info(f"Batch relevance assessment: {sum(decisions.values())}/{len(results)} results will be fetched")
+            return [decisions[i] for i in range(1, len(results) + 1)]
+
+        logger.warning(f"Batch relevance answer covered {len(decisions)}/{len(results)} results; assessing individually")
+        assessments = await asyncio.gather(*[
+            self._assess_search_result_relevance(
+                query=query,
+                title=item.get("title", "No Title"),
+                snippet=item.get("snippet", "No content available"),
+                url=item.get("url", "#")
+            )
+            for item in results
+        ], return_exceptions=True)
+        return [assessment is True for assessment in assessments]
+
     async def _assess_search_result_relevance(self, query: str, title: str, snippet: str, url: str) -> bool:
         """
         Assess if a search result is relevant enough to warrant fetching full content.
@@ -2058,9 +2355,9 @@ Respond with only YES or NO."""
             
             # Use agent_mode to select the fast model type
             # The dispatcher will look up the appropriate model based on the mode
-            response, _ = await self.model_dispatcher.dispatch(
-                messages=messages,
-                agent_mode="router"  # Router mode uses the fast model
+            response, _ = await self._dispatch_retrieval_llm(
+                messages,
+                "router"  # Router mode uses the fast model
             )
             
             # Parse the response - response is a ChatCompletion object
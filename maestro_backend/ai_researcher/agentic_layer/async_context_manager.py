@@ -9,7 +9,9 @@ import queue
 import time 
 import json 
 import asyncio
+import contextlib
 import re
+from collections import OrderedDict
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import models
 from database import async_crud as crud  # Use async CRUD operations
@@ -22,6 +24,11 @@ from ai_researcher import config
 from ai_researcher.agentic_layer.schemas.planning import SimplifiedPlan, PlanStep, ReportSection # <-- Import ReportSection
 from ai_researcher.agentic_layer.schemas.research import ResearchResultResponse
 from ai_researcher.agentic_layer.schemas.notes import Note # <-- Import Note schema
+from ai_researcher.agentic_layer.context.note_index import NoteIndex
+from ai_researcher.agentic_layer.controller.utils.mission_trace import (
+    discard_mission_trace, get_mission_trace, trace_span
+)
+from ai_researcher.agentic_layer.controller.utils.research_prefetch import stop_prefetch
 from ai_researcher.agentic_layer.schemas.thought import ThoughtEntry 
 from ai_researcher.agentic_layer.schemas.goal import GoalEntry
 
@@ -38,6 +45,9 @@ logger = logging.getLogger(__name__)
 
 MissionStatus = Literal["planning", "running", "completed", "failed", "paused", "stopped"]
 
+# Missions in these states are never evicted from the in-memory context cache
+PINNED_MISSION_STATUSES = frozenset({"planning", "running", "paused"})
+
 # Global reference to the main event loop for WebSocket updates
 _main_event_loop = None
 
@@ -240,8 +250,11 @@ class AsyncContextManager:
     Manages the state and history for multiple research missions.
     Stores context in memory and persists it to the database asynchronously.
     """
-    def __init__(self):
-        self._missions: Dict[str, MissionContext] = {}
+    def __init__(self, max_cached_missions: Optional[int] = None):
+        # LRU of hydrated mission contexts. Active missions are pinned; idle ones
+        # are loaded on demand and evicted once the cache grows past its limit.
+        self._missions: "OrderedDict[str, MissionContext]" = OrderedDict()
+        self.max_cached_missions = max_cached_missions if max_cached_missions is not None else config.MISSION_CONTEXT_CACHE_SIZE
         # --- NEW: State for Tracking LLM Usage (Moved from AgentController) ---
         # Stores cumulative stats per mission
         self.mission_stats: Dict[str, Dict[str, float]] = {} # mission_id -> {"total_cost": float, "total_prompt_tokens": float, "total_completion_tokens": float, "total_native_tokens": float, "total_web_search_calls": int}
@@ -249,48 +262,95 @@ class AsyncContextManager:
         self._mission_semaphores: Dict[str, asyncio.Semaphore] = {}
         self.tracked_calls: Set[str] = set() # Track call IDs to prevent double counting
         # --- End NEW State ---
+        # Research round each mission's plan changes are snapshotted under (see store_plan)
+        self._outline_rounds: Dict[str, int] = {}
+        # Per-mission note deduplication indexes, rebuilt from mission.notes on demand
+        self._note_indexes: Dict[str, NoteIndex] = {}
+        self._note_locks: Dict[str, asyncio.Lock] = {}
+        self.note_embedder = None
         
-        logger.info("AsyncContextManager initialized. Call async_init() to load missions from database.")
+        logger.info("AsyncContextManager initialized. Call async_init() to load active missions from database.")
 
     async def async_init(self):
-        """Async initialization - load all missions from database."""
-        await self._load_all_missions_from_db()
+        """Async initialization - load active missions from database."""
+        await self._load_active_missions_from_db()
     
-    async def _load_all_missions_from_db(self):
-        """Loads all existing missions from the database into the in-memory cache on startup."""
+    async def _load_active_missions_from_db(self):
+        """
+        Loads only the missions that are still in flight (planning, running, paused)
+        on startup. Historical missions are hydrated lazily by get_mission_context.
+        """
         async with get_async_db() as db:
-            all_db_missions = await crud.get_all_missions(db)
+            active_db_missions = await crud.get_missions_by_status(db, list(PINNED_MISSION_STATUSES))
             loaded_count = 0
-            for db_mission in all_db_missions:
-                try:
-                    # The mission_context from DB is a dict, convert it back to Pydantic model
-                    if db_mission.mission_context:
-                        # Migrate notes to add missing timestamp fields before validation
-                        migrated_context = self._migrate_mission_context(db_mission.mission_context)
-                        mission_context_model = MissionContext(**migrated_context)
-                        self._missions[db_mission.id] = mission_context_model
-                        loaded_count += 1
-                    else:
-                        # Handle cases where a mission might exist in DB but with no context
-                        # This could be a fallback or recovery mechanism
-                        logger.warning(f"Mission '{db_mission.id}' found in DB but has no context. Creating a default.")
-                        mission_context_model = MissionContext(
-                            mission_id=db_mission.id,
-                            user_request=db_mission.user_request,
-                            status=db_mission.status,
-                            created_at=db_mission.created_at,
-                            updated_at=db_mission.updated_at,
-                            error_info=db_mission.error_info
-                        )
-                        self._missions[db_mission.id] = mission_context_model
-                        loaded_count += 1
-
-                except ValidationError as e:
-                    logger.error(f"Pydantic validation error loading mission '{db_mission.id}' from DB: {e}", exc_info=True)
-                except Exception as e:
-                    logger.error(f"Unexpected error loading mission '{db_mission.id}' from DB: {e}", exc_info=True)
+            for db_mission in active_db_missions:
+                mission_context_model = self._build_context_from_db_mission(db_mission)
+                if mission_context_model is not None:
+                    self._missions[db_mission.id] = mission_context_model
+                    loaded_count += 1
             
-            logger.info(f"Successfully loaded {loaded_count} missions from the database into memory.")
+            logger.info(f"Successfully loaded {loaded_count} active missions from the database into memory.")
+
+    def _build_context_from_db_mission(self, db_mission: models.Mission) -> Optional[MissionContext]:
+        """Converts a Mission row into a MissionContext, migrating older schemas."""
+        try:
+            # The mission_context from DB is a dict, convert it back to Pydantic model
+            if db_mission.mission_context:
+                # Migrate notes to add missing timestamp fields before validation
+                migrated_context = self._migrate_mission_context(db_mission.mission_context)
+                return MissionContext(**migrated_context)
+            # Handle cases where a mission might exist in DB but with no context
+            # This could be a fallback or recovery mechanism
+            logger.warning(f"Mission '{db_mission.id}' found in DB but has no context. Creating a default.")
+            return MissionContext(
+                mission_id=db_mission.id,
+                user_request=db_mission.user_request,
+                status=db_mission.status,
+                created_at=db_mission.created_at,
+                updated_at=db_mission.updated_at,
+                error_info=db_mission.error_info
+            )
+        except ValidationError as e:
+            logger.error(f"Pydantic validation error loading mission '{db_mission.id}' from DB: {e}", exc_info=True)
+        except Exception as e:
+            logger.error(f"Unexpected error loading mission '{db_mission.id}' from DB: {e}", exc_info=True)
+        return None
+
+    def _cache_mission(self, mission_id: str, mission: MissionContext) -> MissionContext:
+        """Inserts a mission into the LRU (or returns the copy already cached) and enforces the size limit."""
+        existing = self._missions.get(mission_id)
+        if existing is not None:
+            # Another caller hydrated it first; keep the copy everyone else already holds
+            self._missions.move_to_end(mission_id)
+            return existing
+        self._missions[mission_id] = mission
+        self._evict_idle_missions()
+        return mission
+
+    def _evict_idle_missions(self):
+        """Evicts least-recently-used idle missions until the cache is within its limit."""
+        idle_ids = [mid for mid, ctx in self._missions.items() if ctx.status not in PINNED_MISSION_STATUSES]
+        overflow = len(idle_ids) - max(self.max_cached_missions, 0)
+        for mission_id in idle_ids[:max(overflow, 0)]:
+            del self._missions[mission_id]
+            self._note_indexes.pop(mission_id, None)
+            self.cleanup_mission_document_cache(mission_id)
+            logger.debug(f"Evicted idle mission {mission_id} from context cache")
+
+    def _load_mission_from_db_sync(self, mission_id: str) -> Optional[MissionContext]:
+        """Blocking cold-load used by synchronous callers of get_mission_context."""
+        from database.database import SessionLocal
+        db = SessionLocal()
+        try:
+            db_mission = db.query(models.Mission).filter(models.Mission.id == mission_id).first()
+            if db_mission is None:
+                return None
+            return self._build_context_from_db_mission(db_mission)
+        except Exception as e:
+            logger.error(f"Failed to load mission {mission_id} from database: {e}", exc_info=True)
+            return None
+        finally:
+            db.close()
 
     def _migrate_mission_context(self, context_dict: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -425,14 +485,83 @@ class AsyncContextManager:
 
     def get_mission_context(self, mission_id: str) -> Optional[MissionContext]:
         """
-        Retrieves the context for a given mission ID primarily from the in-memory store.
-        Loading from disk should happen explicitly, e.g., during initialization if needed.
+        Retrieves the context for a given mission ID from the in-memory LRU,
+        hydrating it from the database on a miss. The cold path blocks; async
+        callers that may hit a cold mission should prefer load_mission_context.
         """
-        """Retrieves the context for a given mission ID from the in-memory cache."""
         mission = self._missions.get(mission_id)
-        if not mission:
-            logger.warning(f"Mission context not found in memory for ID: {mission_id}. Returning None.")
-        return mission
+        if mission is not None:
+            self._missions.move_to_end(mission_id)
+            return mission
+        if not mission_id:
+            return None
+        mission = self._load_mission_from_db_sync(mission_id)
+        if mission is None:
+            logger.warning(f"Mission context not found for ID: {mission_id}. Returning None.")
+            return None
+        return self._cache_mission(mission_id, mission)
+
+    async def load_mission_context(self, mission_id: str) -> Optional[MissionContext]:
+        """Async variant of get_mission_context that hydrates cold missions without blocking the loop."""
+        mission = self._missions.get(mission_id)
+        if mission is not None:
+            self._missions.move_to_end(mission_id)
+            return mission
+        async with get_async_db() as db:
+            db_mission = await crud.get_mission(db, mission_id)
+        if db_mission is None:
+            logger.warning(f"Mission context not found for ID: {mission_id}. Returning None.")
+            return None
+        mission = self._build_context_from_db_mission(db_mission)
+        if mission is None:
+            return None
+        return self._cache_mission(mission_id, mission)
+
+    def cache_mission_context(self, mission: MissionContext) -> MissionContext:
+        """Registers an externally restored mission context with the cache."""
+        self._missions.pop(mission.mission_id, None)
+        return self._cache_mission(mission.mission_id, mission)
+
+    def is_mission_loaded(self, mission_id: str) -> bool:
+        """True if the mission context is currently hydrated in memory."""
+        return mission_id in self._missions
+
+    async def get_mission_summary(self, mission_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns status, timestamps, error info and metadata for a mission.
+        Served from memory when the mission is hydrated, otherwise read from the
+        database without parsing the full context.
+        """
+        mission = self._missions.get(mission_id)
+        if mission is not None:
+            return {
+                "mission_id": mission_id,
+                "user_request": mission.user_request,
+                "status": mission.status,
+                "error_info": mission.error_info,
+                "created_at": mission.created_at,
+                "updated_at": mission.updated_at,
+                "metadata": mission.metadata,
+            }
+        async with get_async_db() as db:
+            row = await crud.get_mission_summary(db, mission_id)
+        if row is None:
+            return None
+        updated_at = row["updated_at"]
+        if row.get("context_updated_at"):
+            try:
+                updated_at = datetime.datetime.fromisoformat(row["context_updated_at"])
+            except ValueError:
+                pass
+        return {
+            "mission_id": mission_id,
+            "user_request": row["user_request"],
+            "status": row.get("context_status") or row["status"],
+            "error_info": row["error_info"],
+            "created_at": row["created_at"],
+            "updated_at": updated_at,
+            "metadata": row.get("metadata") or {},
+        }
     
     def remove_mission_from_memory(self, mission_id: str) -> bool:
         """
@@ -444,6 +573,8 @@ class AsyncContextManager:
             # First mark as stopped to prevent further operations
             mission = self._missions[mission_id]
             mission.status = "stopped"
+            from ai_researcher.agentic_layer.controller.utils.cancellation import cancel_mission_operations
+            cancel_mission_operations(mission_id, "stopped")
             
             # Remove from memory
             del self._missions[mission_id]
@@ -451,6 +582,10 @@ class AsyncContextManager:
             # Clean up semaphore if exists
             if mission_id in self._mission_semaphores:
                 del self._mission_semaphores[mission_id]
+            self._note_indexes.pop(mission_id, None)
+            self._note_locks.pop(mission_id, None)
+            discard_mission_trace(mission_id)
+            stop_prefetch(mission_id, discard=True)
             
             # Cancel any async tasks
             from ai_researcher.agentic_layer.controller.utils.async_task_manager import get_task_manager
@@ -467,6 +602,29 @@ class AsyncContextManager:
             return True
         return False
 
+    @contextlib.asynccontextmanager
+    async def _mission_db(self, mission_id: str, operation: str):
+        """A database session for persisting mission state, traced as a ``db`` span of the mission."""
+        async with trace_span(mission_id, "db", operation):
+            async with get_async_db() as db:
+                yield db
+
+    async def _flush_trace(self, mission_id: str, force: bool = False):
+        """
+        Appends the spans recorded since the last write to the mission's stored
+        trace, if it changed and the flush interval passed (or ``force``).
+        """
+        trace = get_mission_trace(mission_id, create=False)
+        if trace is None or not trace.needs_flush(force):
+            return
+        try:
+            delta, mark = trace.unflushed()
+            async with self._mission_db(mission_id, "flush_trace") as db:
+                await crud.append_mission_trace(db, mission_id=mission_id, started_at=trace.started_at, trace=delta)
+            trace.mark_flushed(mark)
+        except Exception as e:
+            logger.warning(f"Could not write the trace of mission {mission_id}: {e}")
+
     async def update_mission_status(self, mission_id: str, status: MissionStatus, error_info: Optional[str] = None):
         """Updates the status of a mission in memory and in the database, and sends WebSocket update."""
         mission = self.get_mission_context(mission_id)
@@ -482,7 +640,15 @@ class AsyncContextManager:
                 del self._mission_semaphores[mission_id]
                 logger.info(f"Cleaned up semaphore for {status} mission {mission_id}")
             
-            async with get_async_db() as db:
+            # Pausing/stopping interrupts in-flight operations; a resumed (or finished)
+            # mission starts with a fresh cancellation token
+            from ai_researcher.agentic_layer.controller.utils.cancellation import cancel_mission_operations, reset_cancellation
+            if status in ["paused", "stopped"]:
+                cancel_mission_operations(mission_id, status)
+            else:
+                reset_cancellation(mission_id)
+            
+            async with self._mission_db(mission_id, "update_mission_status") as db:
                 try:
                     await crud.update_mission_status(db, mission_id=mission_id, status=status, error_info=error_info)
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
@@ -506,6 +672,22 @@ class AsyncContextManager:
                         
                 except Exception as e:
                     logger.error(f"Database error updating mission status for {mission_id}: {e}", exc_info=True)
+            
+            # A pause or the end of the mission closes the open phase and writes the trace;
+            # finished missions drop it from memory (a resumed one starts a new run)
+            if status in ["paused", "stopped", "completed", "failed"]:
+                trace = get_mission_trace(mission_id, create=False)
+                if trace is not None:
+                    trace.end_phase()
+                    await self._flush_trace(mission_id, force=True)
+                    if status != "paused":
+                        discard_mission_trace(mission_id)
+                # Research prefetch stops too; its results are only kept for a resume
+                stop_prefetch(mission_id, discard=status != "paused")
+            
+            # The context is persisted now, so finished missions become evictable
+            if status not in PINNED_MISSION_STATUSES:
+                self._evict_idle_missions()
         else:
             logger.error(f"Cannot update status for non-existent mission ID: {mission_id}")
     
@@ -519,7 +701,7 @@ class AsyncContextManager:
             mission.update_timestamp()
             
             # Save to database
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "update_execution_phase") as db:
                 try:
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                     await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -536,7 +718,7 @@ class AsyncContextManager:
                 mission.update_timestamp()
                 
                 # Save to database
-                async with get_async_db() as db:
+                async with self._mission_db(mission_id, "mark_phase_completed") as db:
                     try:
                         sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                         await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -640,7 +822,7 @@ class AsyncContextManager:
             mission.phase_checkpoint[phase].update(checkpoint_data)
             mission.update_timestamp()
             
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "save_phase_checkpoint") as db:
                 try:
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                     await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -655,15 +837,37 @@ class AsyncContextManager:
             return mission.phase_checkpoint.get(phase)
         return None
 
-    async def store_plan(self, mission_id: str, plan: SimplifiedPlan):
-        """Stores the generated plan for a mission in memory and persists the context to the database."""
+    def _outline_round(self, mission: "MissionContext") -> int:
+        """The research round the mission is in; 0 before structured research starts."""
+        if mission.mission_id in self._outline_rounds:
+            return self._outline_rounds[mission.mission_id]
+        # After a restart, fall back to the round recorded in the research checkpoint
+        checkpoint = (mission.phase_checkpoint or {}).get('structured_research', {})
+        return int(checkpoint.get('current_round', 0) or 0)
+
+    async def _store_outline_snapshot(self, db: AsyncSession, mission_id: str, round_num: int, phase: str, outline: List[Dict[str, Any]]):
+        try:
+            await crud.upsert_outline_snapshot(db, mission_id, round_num, phase, outline, created_at=get_current_time())
+            logger.debug(f"Stored outline snapshot for mission {mission_id} (round {round_num}, {phase})")
+        except Exception as e:
+            logger.error(f"Failed to store outline snapshot for mission {mission_id}: {e}", exc_info=True)
+
+    async def store_plan(self, mission_id: str, plan: SimplifiedPlan, phase: str = "plan", round_num: Optional[int] = None):
+        """
+        Stores the generated plan for a mission in memory and persists the context to the database.
+        The outline is also snapshotted under ``round_num`` (default: the mission's current
+        research round) and ``phase`` so a resume can fetch it without scanning execution logs.
+        """
         mission = self.get_mission_context(mission_id)
         if mission:
             mission.plan = plan
             mission.status = "running"  # Typically moves to running after planning
             mission.update_timestamp()
+            if round_num is not None:
+                self._outline_rounds[mission_id] = round_num
+            snapshot_round = self._outline_round(mission)
             
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "store_plan") as db:
                 try:
                     # Persist the entire updated context
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
@@ -671,6 +875,10 @@ class AsyncContextManager:
                     # Also update the status explicitly in the main mission table
                     await crud.update_mission_status(db, mission_id=mission_id, status="running")
                     logger.info(f"Stored plan and updated context for mission '{mission_id}' in DB.")
+                    await self._store_outline_snapshot(
+                        db, mission_id, snapshot_round, phase,
+                        (sanitized_context.get("plan") or {}).get("report_outline") or []
+                    )
                     
                     # Send WebSocket update for plan
                     try:
@@ -684,6 +892,17 @@ class AsyncContextManager:
         else:
             logger.error(f"Cannot store plan for non-existent mission ID: {mission_id}")
 
+    async def record_round_start(self, mission_id: str, round_num: int):
+        """Snapshot the outline a research round starts with; the snapshot also marks when the round began."""
+        mission = self.get_mission_context(mission_id)
+        if not mission or not mission.plan:
+            logger.error(f"Cannot record start of round {round_num}: mission {mission_id} or its plan is missing")
+            return
+        self._outline_rounds[mission_id] = round_num
+        outline = sanitize_for_jsonb([section.model_dump(mode='json') for section in mission.plan.report_outline])
+        async with self._mission_db(mission_id, "record_round_start") as db:
+            await self._store_outline_snapshot(db, mission_id, round_num, crud.ROUND_START_PHASE, outline)
+
     async def store_step_result(self, mission_id: str, result: ResearchResultResponse):
         """Stores the result of a plan step and persists the updated context to the database."""
         mission = self.get_mission_context(mission_id)
@@ -692,7 +911,7 @@ class AsyncContextManager:
             mission.step_results[step_id] = result
             mission.update_timestamp()
             
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "store_step_result") as db:
                 try:
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                     await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -719,7 +938,7 @@ class AsyncContextManager:
             mission.report_content[section_id] = content
             mission.update_timestamp()
             
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "store_report_section") as db:
                 try:
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                     await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -747,7 +966,7 @@ class AsyncContextManager:
             mission.status = "completed"  # Mark as completed
             mission.update_timestamp()
             
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "store_final_report") as db:
                 try:
                     # Update mission status and context
                     await crud.update_mission_status(db, mission_id=mission_id, status="completed")
@@ -822,7 +1041,7 @@ class AsyncContextManager:
             mission.writing_suggestions = suggestions
             mission.update_timestamp()
             
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "update_writing_suggestions") as db:
                 try:
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                     await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -843,29 +1062,67 @@ class AsyncContextManager:
                 return []
         return []
 
-    async def add_note(self, mission_id: str, note: Note):
-        """Adds a single note and persists the updated context to the database."""
+    def set_note_embedder(self, embedder):
+        """Sets the embedder used to detect near-duplicate notes (None for exact matching only)."""
+        self.note_embedder = embedder
+        for index in self._note_indexes.values():
+            index.embedder = embedder
+
+    async def _index_notes(self, mission_id: str, mission: MissionContext, notes: List[Note]) -> List[Note]:
+        """
+        Appends the new notes among ``notes`` to the mission, merging duplicates of
+        notes it already has. Returns the stored note for each input note.
+        Must be called with the mission's note lock held.
+        """
+        from ai_researcher.dynamic_config import get_note_similarity_threshold
+
+        index = self._note_indexes.get(mission_id)
+        # Rebuild if the notes list was replaced or edited outside add_note(s)
+        if index is None or index.notes is not mission.notes or len(index) != len(mission.notes):
+            index = NoteIndex(mission.notes, embedder=self.note_embedder)
+            self._note_indexes[mission_id] = index
+
+        stored = await index.insert(notes, get_note_similarity_threshold(mission_id))
+        existing_ids = {note.note_id for note in mission.notes}
+        for note in stored:
+            if note.note_id not in existing_ids:
+                mission.notes.append(note)
+                existing_ids.add(note.note_id)
+        merged = sum(1 for note, kept in zip(notes, stored) if kept is not note)
+        if merged:
+            logger.info(f"Merged {merged} duplicate note(s) into existing notes for mission {mission_id}.")
+        return stored
+
+    async def add_note(self, mission_id: str, note: Note) -> Note:
+        """
+        Adds a single note and persists the updated context to the database.
+        Returns the stored note, which is an existing note if ``note`` duplicates it.
+        """
         mission = self.get_mission_context(mission_id)
         if mission:
-            mission.notes.append(note)
+            async with self._note_locks.setdefault(mission_id, asyncio.Lock()):
+                stored_note = (await self._index_notes(mission_id, mission, [note]))[0]
             mission.update_timestamp()
             
-            # Process note for auto-created document group if enabled
-            await self._process_note_for_document_group(mission_id, note)
+            if stored_note is note:
+                # Process note for auto-created document group if enabled
+                await self._process_note_for_document_group(mission_id, note)
             
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "add_note") as db:
                 try:
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                     await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
-                    logger.debug(f"Added note {note.note_id} to mission {mission_id} and updated DB.")
+                    logger.debug(f"Added note {stored_note.note_id} to mission {mission_id} and updated DB.")
                 except Exception as e:
                     logger.error(f"Database error adding note for mission {mission_id}: {e}", exc_info=True)
             
+            if stored_note is not note:
+                return stored_note
+            
             # Send WebSocket update for note
             try:
                 # Import and use the transformation function for consistency
                 from api.missions import transform_note_for_frontend
-                import asyncio
                 
                 # Check if we're in an async context or not
                 try:
@@ -888,14 +1145,24 @@ class AsyncContextManager:
                     logger.info(f"Sent note update via WebSocket for mission '{mission_id}' (1 note).")
             except Exception as ws_error:
                 logger.error(f"Failed to send note update via WebSocket for mission {mission_id}: {ws_error}")
+            return note
         else:
             logger.error(f"Cannot add note for non-existent mission ID: {mission_id}")
+            return note
 
-    async def add_notes(self, mission_id: str, notes: List[Note]):
-        """Adds a list of notes and persists the updated context to the database."""
+    async def add_notes(self, mission_id: str, notes: List[Note]) -> List[Note]:
+        """
+        Adds a list of notes and persists the updated context to the database.
+        Duplicates of existing notes are merged into them rather than added; returns
+        the distinct stored notes (new or existing) that the input notes map to.
+        """
         mission = self.get_mission_context(mission_id)
         if mission:
-            mission.notes.extend(notes)
+            async with self._note_locks.setdefault(mission_id, asyncio.Lock()):
+                stored = await self._index_notes(mission_id, mission, notes)
+            input_ids = {id(note) for note in notes}
+            stored_notes = list({note.note_id: note for note in stored}.values())
+            notes = [note for note in stored_notes if id(note) in input_ids]
             mission.update_timestamp()
             
             # Process notes for auto-created document group if enabled
@@ -912,7 +1179,7 @@ class AsyncContextManager:
                             logger.info(f"Processing web note {note.note_id}: fetched_full_content={has_full}, source={note.source_id if hasattr(note, 'source_id') else 'unknown'}")
                 await self._process_note_for_document_group(mission_id, note)
             
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "add_notes") as db:
                 try:
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                     await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -920,11 +1187,13 @@ class AsyncContextManager:
                 except Exception as e:
                     logger.error(f"Database error adding notes for mission {mission_id}: {e}", exc_info=True)
             
+            if not notes:
+                return stored_notes
+            
             # Send WebSocket update for notes
             try:
                 # Import and use the transformation function for consistency
                 from api.missions import transform_note_for_frontend
-                import asyncio
                 
                 # Check if we're in an async context or not
                 try:
@@ -952,8 +1221,10 @@ class AsyncContextManager:
                     logger.info(f"Sent notes update via WebSocket for mission '{mission_id}' ({len(notes)} notes).")
             except Exception as ws_error:
                 logger.error(f"Failed to send notes update via WebSocket for mission {mission_id}: {ws_error}")
+            return stored_notes
         else:
             logger.error(f"Cannot add notes for non-existent mission ID: {mission_id}")
+            return notes
 
     def get_notes(self, mission_id: str) -> List[Note]:
         """Retrieves all notes for a given mission ID."""
@@ -976,7 +1247,7 @@ class AsyncContextManager:
             
             if removed_count > 0:
                 mission.update_timestamp()
-                async with get_async_db() as db:
+                async with self._mission_db(mission_id, "remove_notes") as db:
                     try:
                         sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                         await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -998,7 +1269,7 @@ class AsyncContextManager:
                 mission.agent_scratchpad = scratchpad_content
                 mission.update_timestamp()
                 
-                async with get_async_db() as db:
+                async with self._mission_db(mission_id, "update_scratchpad") as db:
                     try:
                         sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                         await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -1040,7 +1311,7 @@ class AsyncContextManager:
             mission.metadata.update(metadata_update)
             mission.update_timestamp()
             
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "update_mission_metadata") as db:
                 try:
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                     await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -1136,7 +1407,7 @@ class AsyncContextManager:
             logger.info(f"Logged execution step for mission {mission_id}: Agent={agent_name}, Action={action}, Status={status}")
 
             # Persist the log entry to the database using the new execution logs table
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "log_execution_step") as db:
                 try:
                     # Get the mission without user constraint to get the user_id
                     mission_db = await crud.get_mission(db, mission_id=mission_id)
@@ -1208,7 +1479,10 @@ class AsyncContextManager:
                     await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
                 except Exception as e:
                     logger.error(f"Database error saving execution log for mission {mission_id}: {e}", exc_info=True)
-            
+
+            # Steps are logged throughout a run, so this keeps the stored trace at most one interval behind
+            await self._flush_trace(mission_id)
+
             # ALWAYS send WebSocket update for execution log
             # Even if callback is provided, we send the update directly to ensure it's not lost
             try:
@@ -1259,7 +1533,7 @@ class AsyncContextManager:
                 mission.goal_pad.append(new_goal)
                 mission.update_timestamp()
                 
-                async with get_async_db() as db:
+                async with self._mission_db(mission_id, "add_goal") as db:
                     try:
                         sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                         await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -1312,7 +1586,7 @@ class AsyncContextManager:
             return False
 
         if should_update_db:
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "update_goal_status") as db:
                 try:
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                     await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -1347,7 +1621,7 @@ class AsyncContextManager:
             return False
 
         if should_update_db:
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "edit_goal_text") as db:
                 try:
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                     await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -1388,7 +1662,7 @@ class AsyncContextManager:
                 mission.thought_pad.append(new_thought)
                 mission.update_timestamp()
 
-                async with get_async_db() as db:
+                async with self._mission_db(mission_id, "add_thought") as db:
                     try:
                         sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                         await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -1653,7 +1927,7 @@ class AsyncContextManager:
             # Persist to database asynchronously
             # logger.info(f"COST_DB_UPDATE: Saving stats to DB for mission {mission_id}: Cost=${stats['total_cost']:.6f}")
             async def save_stats_to_db():
-                async with get_async_db() as db:
+                async with self._mission_db(mission_id, "update_mission_stats") as db:
                     try:
                         sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                         await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -1972,7 +2246,7 @@ class AsyncContextManager:
                 logger.error(f"Failed to send phase update via WebSocket: {e}")
             
             # Also persist to database
-            async with get_async_db() as db:
+            async with self._mission_db(mission_id, "update_phase_display") as db:
                 try:
                     sanitized_context = sanitize_for_jsonb(mission.model_dump(mode='json'))
                     await crud.update_mission_context(db, mission_id=mission_id, mission_context=sanitized_context)
@@ -0,0 +1,147 @@
+"""
+Incremental deduplication index for mission notes.
+
+Notes reach ``MissionContext.notes`` from many concurrent research calls, and
+the same source passage often yields several near-identical notes across
+sections and rounds. Every later step (preliminary outline batching, note
+reassignment, writing context assembly) pays for each copy, so the index
+merges duplicates as they are inserted:
+
+- notes are bucketed by source (document id or normalised URL), and only
+  notes from the same source are compared,
+- identical text (ignoring case and whitespace) is always a duplicate,
+- otherwise the BGE-M3 embeddings of the new note and the notes in its bucket
+  are compared, and a cosine similarity at or above the threshold is a
+  duplicate. A note is only embedded once a second note from its source
+  arrives, and all embeddings for an insertion batch are computed in one call.
+
+A duplicate is not stored. The note it matched is returned in its place, with
+the duplicate's candidate sections merged in, so callers associate sections
+with the kept note.
+"""
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import numpy as np
+
+from ai_researcher.agentic_layer.schemas.notes import Note
+
+logger = logging.getLogger(__name__)
+
+
+def _source_key(note: Note) -> str:
+    source_id = note.source_id or ""
+    if note.source_type == "web":
+        try:
+            parts = urlsplit(source_id.strip())
+            source_id = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+        except ValueError:
+            pass
+    return f"{note.source_type}:{source_id}"
+
+
+def _content_digest(content: str) -> str:
+    normalized = " ".join((content or "").lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class NoteIndex:
+    def __init__(self, notes: List[Note], embedder=None):
+        # The mission's notes list this index was built from; new notes are appended by the caller
+        self.notes = notes
+        self.embedder = embedder
+        self._notes: Dict[str, Note] = {}
+        self._buckets: Dict[str, List[str]] = {}
+        self._digests: Dict[Tuple[str, str], str] = {}
+        # note_id -> unit-length dense embedding, None if embedding failed
+        self._vectors: Dict[str, Optional[np.ndarray]] = {}
+        for note in notes:
+            self._register(note)
+
+    def __len__(self) -> int:
+        return len(self._notes)
+
+    def _register(self, note: Note):
+        key = _source_key(note)
+        self._notes[note.note_id] = note
+        self._buckets.setdefault(key, []).append(note.note_id)
+        self._digests.setdefault((key, _content_digest(note.content)), note.note_id)
+
+    async def insert(self, notes: List[Note], similarity_threshold: float) -> List[Note]:
+        """
+        Indexes ``notes`` and returns the stored note for each one, in order:
+        the note itself if it is new, or the existing note it duplicates.
+        """
+        semantic = self.embedder is not None and similarity_threshold < 1.0
+        if semantic:
+            await self._embed_colliding(notes)
+
+        stored: List[Note] = []
+        for note in notes:
+            key = _source_key(note)
+            match_id = self._digests.get((key, _content_digest(note.content)))
+            if match_id is None and semantic:
+                match_id = self._most_similar(note, key, similarity_threshold)
+
+            if match_id is None or match_id == note.note_id:
+                if note.note_id not in self._notes:
+                    self._register(note)
+                stored.append(note)
+                continue
+
+            kept = self._notes[match_id]
+            for section_id in note.potential_sections:
+                if section_id not in kept.potential_sections:
+                    kept.potential_sections.append(section_id)
+            kept.updated_at = datetime.now()
+            self._vectors.pop(note.note_id, None)
+            logger.debug(f"Merged note {note.note_id} into duplicate {kept.note_id} from {key}")
+            stored.append(kept)
+        return stored
+
+    def _most_similar(self, note: Note, key: str, similarity_threshold: float) -> Optional[str]:
+        vector = self._vectors.get(note.note_id)
+        if vector is None:
+            return None
+        best_id, best = None, similarity_threshold
+        for note_id in self._buckets.get(key, []):
+            other = self._vectors.get(note_id)
+            if other is not None:
+                similarity = float(other @ vector)
+                if similarity >= best:
+                    best_id, best = note_id, similarity
+        return best_id
+
+    async def _embed_colliding(self, notes: List[Note]):
+        """Embeds, in one batch, the notes that share a source with another note."""
+        batch_keys: Dict[str, int] = {}
+        for note in notes:
+            key = _source_key(note)
+            batch_keys[key] = batch_keys.get(key, 0) + 1
+
+        pending: Dict[str, Note] = {}
+        for note in notes:
+            key = _source_key(note)
+            if (key, _content_digest(note.content)) in self._digests:
+                continue  # exact duplicate, no embedding needed
+            if batch_keys[key] > 1 or key in self._buckets:
+                pending[note.note_id] = note
+                for note_id in self._buckets.get(key, []):
+                    pending.setdefault(note_id, self._notes[note_id])
+        to_embed = [note for note_id, note in pending.items() if note_id not in self._vectors]
+        if not to_embed:
+            return
+
+        try:
+            chunks = await self.embedder.embed_chunks_async([{"text": note.content} for note in to_embed])
+        except Exception as e:
+            logger.warning(f"Could not embed notes for deduplication, using exact matching only: {e}")
+            return
+        for note, chunk in zip(to_embed, chunks):
+            dense = np.asarray((chunk.get("embeddings") or {}).get("dense") or [], dtype=np.float32)
+            norm = float(np.linalg.norm(dense)) if dense.size else 0.0
+            # Failed batches come back as zero placeholders
+            self._vectors[note.note_id] = dense / norm if norm > 0 else None
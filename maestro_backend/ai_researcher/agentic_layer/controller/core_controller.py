@@ -1,6 +1,7 @@
 import logging
 from typing import Dict, Any, Optional, List, Type, Callable, Tuple, Awaitable, Set
 import asyncio
+import datetime
 import queue
 from collections import deque
 
@@ -47,6 +48,8 @@ from pydantic import BaseModel, Field
 # Import managers from the controller package
 from ai_researcher.agentic_layer.controller.research_manager import ResearchManager
 from ai_researcher.agentic_layer.controller.writing_manager import WritingManager
+from ai_researcher.agentic_layer.controller.utils.mission_trace import start_phase
+from ai_researcher.agentic_layer.controller.utils.research_prefetch import stop_prefetch
 from ai_researcher.agentic_layer.controller.reflection_manager import ReflectionManager
 from ai_researcher.agentic_layer.controller.user_interaction import UserInteractionManager
 from ai_researcher.agentic_layer.controller.report_generator import ReportGenerator
@@ -57,6 +60,11 @@ logger = logging.getLogger(__name__)
 from ai_researcher.agentic_layer.schemas.assignments import FullNoteAssignments
 # SectionAssignment was incorrect, AssignedNotes is imported below where needed.
 
+
+def _as_aware(timestamp: datetime.datetime) -> datetime.datetime:
+    """Treat naive timestamps (e.g. note creation times) as server local time so they compare with aware ones."""
+    return timestamp if timestamp.tzinfo else timestamp.astimezone()
+
 # Semaphore Context Manager
 class MaybeSemaphore:
     def __init__(self, semaphore: Optional[asyncio.Semaphore]):
@@ -174,6 +182,9 @@ class AgentController:
         self.tool_registry = tool_registry
         self.retriever = retriever
         self.reranker = reranker
+        # Near-duplicate notes are detected with the retriever's embedder
+        if hasattr(self.context_manager, "set_note_embedder"):
+            self.context_manager.set_note_embedder(retriever.embedder if retriever else None)
         # Query components will be initialized per-mission to use user-specific models
         self.query_preparer = None
         self.query_strategist = None
@@ -340,117 +351,56 @@ class AgentController:
     async def get_outline_at_round_start(self, mission_id: str, round_num: int) -> Optional[List[Any]]:
         """
         Retrieve the outline that was active at the start of a specific research round.
-        This searches through execution logs to find the last valid outline before the specified round.
+        This is the latest outline snapshot written before the round started.
         
         Args:
             mission_id: The mission ID
-            round_num: The round number to resume from (we'll get the outline from round_num - 1)
+            round_num: The round number to resume from
             
         Returns:
-            The outline from the previous round, or None if not found
+            The outline the round started with, or None if not found
         """
         try:
             logger.info(f"Retrieving outline for mission {mission_id} at round {round_num}")
             
-            # Get execution logs from database to find the outline from previous rounds
-            from database.async_database import get_async_db_session
+            from database.async_database import get_async_db
             from database import async_crud
             
-            async_db = await get_async_db_session()
-            try:
-                # Get all execution logs for this mission
-                execution_logs = await async_crud.get_mission_execution_logs(
-                    async_db, mission_id, user_id=None, limit=1000
-                )
-                
-                # Look for outline revision or planning logs that contain the full outline
-                # We want the outline from BEFORE the requested round (so round_num - 1)
-                target_round = round_num - 1 if round_num > 1 else 1
-                
-                # Search for logs that contain outline information
-                outline_logs = []
-                for log in execution_logs:
-                    # Check if this log contains an outline (usually from PlanningAgent or outline revision)
-                    if log.agent_name in ["PlanningAgent", "ReflectionManager", "AgentController"]:
-                        if "outline" in log.action.lower() or "plan" in log.action.lower():
-                            # Check if full_output contains outline data
-                            if log.full_output and isinstance(log.full_output, dict):
-                                if "report_outline" in log.full_output:
-                                    outline_logs.append(log)
-                                elif "revised_outline" in log.full_output:
-                                    outline_logs.append(log)
-                                elif "outline" in log.full_output:
-                                    outline_logs.append(log)
-                
-                logger.info(f"Found {len(outline_logs)} logs with outline information")
-                
-                # Find the most recent outline before the target round
-                if outline_logs:
-                    # Sort by timestamp descending to get the most recent first
-                    outline_logs.sort(key=lambda x: x.timestamp, reverse=True)
-                    
-                    for log in outline_logs:
-                        # Extract the outline from the log
-                        outline_data = None
-                        if isinstance(log.full_output, dict):
-                            outline_data = (
-                                log.full_output.get("report_outline") or
-                                log.full_output.get("revised_outline") or
-                                log.full_output.get("outline")
-                            )
-                        
-                        if outline_data:
-                            logger.info(f"Found outline from {log.agent_name} at {log.timestamp}")
-                            
-                            # Parse the outline if it's a string (JSON)
-                            if isinstance(outline_data, str):
-                                import json
-                                try:
-                                    outline_data = json.loads(outline_data)
-                                except:
-                                    pass
-                            
-                            # Convert to ReportSection objects if needed
-                            if isinstance(outline_data, list) and len(outline_data) > 0:
-                                from ai_researcher.agentic_layer.schemas.planning import ReportSection
-                                
-                                # Check if this is a valid outline (not just request_outline)
-                                if len(outline_data) > 1 or (
-                                    len(outline_data) == 1 and 
-                                    outline_data[0].get("section_id") != "request_outline"
-                                ):
-                                    # Convert dict to ReportSection objects
-                                    try:
-                                        outline_sections = [
-                                            ReportSection(**section) if isinstance(section, dict) else section
-                                            for section in outline_data
-                                        ]
-                                        logger.info(f"Successfully retrieved outline with {len(outline_sections)} sections")
-                                        return outline_sections
-                                    except Exception as e:
-                                        logger.warning(f"Failed to parse outline: {e}")
-                                        continue
-                
-                # If no outline found in logs, fall back to current context
-                logger.warning(f"No valid outline found in execution logs for round {target_round}")
-                mission_context = self.context_manager.get_mission_context(mission_id)
-                if mission_context and mission_context.plan:
-                    current_outline = mission_context.plan.report_outline
-                    # Only return if it's a valid outline
-                    if len(current_outline) > 1 or (
-                        len(current_outline) == 1 and 
-                        current_outline[0].section_id != "request_outline"
-                    ):
-                        return current_outline
-                    
-            finally:
-                await async_db.close()
+            async with get_async_db() as db:
+                snapshot = await async_crud.get_outline_snapshot_before_round(db, mission_id, round_num)
+            
+            if snapshot and snapshot.outline:
+                logger.info(f"Found outline snapshot from round {snapshot.round} ({snapshot.phase}, version {snapshot.version})")
+                try:
+                    outline_sections = [ReportSection(**section) for section in snapshot.outline]
+                    if self._is_usable_outline(outline_sections):
+                        logger.info(f"Successfully retrieved outline with {len(outline_sections)} sections")
+                        return outline_sections
+                except Exception as e:
+                    logger.warning(f"Failed to parse outline snapshot: {e}")
+            
+            # If no snapshot found, fall back to current context
+            logger.warning(f"No valid outline snapshot found before round {round_num}")
+            mission_context = self.context_manager.get_mission_context(mission_id)
+            if mission_context and mission_context.plan:
+                current_outline = mission_context.plan.report_outline
+                # Only return if it's a valid outline
+                if self._is_usable_outline(current_outline):
+                    return current_outline
                 
         except Exception as e:
             logger.error(f"Error retrieving outline at round {round_num} for mission {mission_id}: {e}")
         
         return None
     
+    @staticmethod
+    def _is_usable_outline(outline: List[ReportSection]) -> bool:
+        """False for an empty outline or the planning agent's 'request_outline' placeholder."""
+        return len(outline) > 1 or (
+            len(outline) == 1 and
+            outline[0].section_id != "request_outline"
+        )
+    
     async def _truncate_data_after_round(
         self,
         mission_id: str,
@@ -469,22 +419,25 @@ class AgentController:
         try:
             logger.info(f"Truncating data for mission {mission_id} after round {round_num - 1}")
             
-            # Find the timestamp of when the specified round started
-            # We need to find logs that indicate the start of the round we're resuming from
-            round_start_timestamp = None
+            from database.async_database import get_async_db
+            from database import async_crud
             
-            # Search through execution logs to find when this round started
-            for log in mission_context.execution_log:
-                # Look for log indicating start of the round
-                if log.agent_name == "ResearchManager" and f"Round {round_num}:" in log.action:
-                    round_start_timestamp = log.timestamp
-                    break
+            # The round-start outline snapshot records when the round began
+            async with get_async_db() as db:
+                round_start_timestamp = await async_crud.get_round_start_time(db, mission_id, round_num)
+            
+            if not round_start_timestamp:
+                # Rounds run before snapshots existed: look for a log indicating start of the round
+                for log in mission_context.execution_log:
+                    if log.agent_name == "ResearchManager" and f"Round {round_num}:" in log.action:
+                        round_start_timestamp = _as_aware(log.timestamp)
+                        break
             
             if not round_start_timestamp:
                 # If we can't find exact round start, look for section processing in that round
                 for log in mission_context.execution_log:
                     if log.agent_name == "ResearchAgent" and f"[Round {round_num}]" in log.action:
-                        round_start_timestamp = log.timestamp
+                        round_start_timestamp = _as_aware(log.timestamp)
                         break
             
             if round_start_timestamp:
@@ -494,7 +447,7 @@ class AgentController:
                 original_log_count = len(mission_context.execution_log)
                 mission_context.execution_log = [
                     log for log in mission_context.execution_log 
-                    if log.timestamp < round_start_timestamp
+                    if _as_aware(log.timestamp) < round_start_timestamp
                 ]
                 truncated_logs = original_log_count - len(mission_context.execution_log)
                 logger.info(f"Truncated {truncated_logs} execution logs")
@@ -503,7 +456,7 @@ class AgentController:
                 original_note_count = len(mission_context.notes)
                 mission_context.notes = [
                     note for note in mission_context.notes 
-                    if note.created_at < round_start_timestamp
+                    if _as_aware(note.created_at) < round_start_timestamp
                 ]
                 truncated_notes = original_note_count - len(mission_context.notes)
                 logger.info(f"Truncated {truncated_notes} notes")
@@ -537,24 +490,11 @@ class AgentController:
                 # Update the mission context in the context manager
                 await self.context_manager.save_mission_context(mission_id)
                 
-                # Also truncate database logs
+                # Also truncate database logs and the outline snapshots of this and later rounds
                 async with get_async_db() as db:
-                    # Get all logs for this mission
-                    db_logs = await crud.get_mission_execution_logs(db, mission_id)
-                    
-                    if db_logs and round_start_timestamp:
-                        # Find logs to delete (those created after round_start_timestamp)
-                        logs_to_delete = [
-                            log for log in db_logs 
-                            if log.timestamp >= round_start_timestamp
-                        ]
-                        
-                        if logs_to_delete:
-                            # Delete the logs from database
-                            for log in logs_to_delete:
-                                await crud.delete_mission_execution_log(db, log.id)
-                            
-                            logger.info(f"Deleted {len(logs_to_delete)} execution logs from database")
+                    deleted_logs = await async_crud.delete_mission_execution_logs_since(db, mission_id, round_start_timestamp)
+                    deleted_snapshots = await async_crud.delete_outline_snapshots_from_round(db, mission_id, round_num)
+                logger.info(f"Deleted {deleted_logs} execution logs and {deleted_snapshots} outline snapshots from database")
                 
             else:
                 logger.warning(f"Could not find timestamp for round {round_num} start, keeping all data")
@@ -826,8 +766,9 @@ Make sure to address the user's specific concerns and suggestions."""
                 # Update the outline in mission context
                 mission_context.plan.report_outline = response.report_outline
                 
-                # Store the updated plan to persist it and send to frontend via websocket
-                await self.context_manager.store_plan(mission_id, mission_context.plan)
+                # Store the updated plan to persist it and send to frontend via websocket.
+                # Snapshot it under the previous round so resuming from round_num picks it up.
+                await self.context_manager.store_plan(mission_id, mission_context.plan, phase="user_edit", round_num=round_num - 1)
                 logger.info(f"Stored revised outline with {len(response.report_outline)} sections to database and sent to frontend")
                 
                 # Update scratchpad if provided
@@ -976,6 +917,7 @@ Make sure to address the user's specific concerns and suggestions."""
             
             # Step 1: Initial Request Analysis
             if "initial_analysis" not in mission_context.completed_phases:
+                start_phase(mission_id, "initial_analysis")
                 await self.context_manager.update_execution_phase(mission_id, "initial_analysis")
                 await self.context_manager.update_phase_display(mission_id, {
                     "phase": "Initial Analysis",
@@ -1062,6 +1004,7 @@ Make sure to address the user's specific concerns and suggestions."""
                     return
 
                 logger.info(f"Starting initial research phase for mission {mission_id} with {len(final_questions)} questions.")
+                start_phase(mission_id, "initial_research")
                 initial_notes, final_scratchpad = await self.research_manager.run_initial_research_phase(
                     mission_id=mission_id,
                     user_request=user_request,
@@ -1071,6 +1014,8 @@ Make sure to address the user's specific concerns and suggestions."""
                     initial_questions_override=final_questions,
                     tool_selection=tool_selection
                 )
+                # Later phases generate their own queries, so prefetched results are no longer useful
+                stop_prefetch(mission_id, discard=True)
                 
                 # Check if mission was stopped or paused during research
                 mission_context = self.context_manager.get_mission_context(mission_id)
@@ -1087,6 +1032,7 @@ Make sure to address the user's specific concerns and suggestions."""
                     logger.info(f"Mission {mission_id} was {mission_context.status} before outline generation. Aborting.")
                     return
 
+                start_phase(mission_id, "outline_generation")
                 active_goals = self.context_manager.get_active_goals(mission_id)
                 preliminary_plan = await self.research_manager.generate_preliminary_outline(
                     mission_id=mission_id,
@@ -1109,7 +1055,7 @@ Make sure to address the user's specific concerns and suggestions."""
                     await self.context_manager.update_mission_status(mission_id, "failed", "Preliminary outline generation failed.")
                     return
                 else:
-                    await self.context_manager.store_plan(mission_id, preliminary_plan)
+                    await self.context_manager.store_plan(mission_id, preliminary_plan, phase="planning", round_num=0)
                     logger.info(f"Successfully generated and stored preliminary outline for mission {mission_id}.")
             else:
                 # We're resuming from structured_research - use the existing plan (which may have been revised)
@@ -1155,6 +1101,7 @@ Make sure to address the user's specific concerns and suggestions."""
                 await self.context_manager.save_phase_checkpoint(mission_id, 'structured_research', initial_checkpoint)
 
             logger.info(f"[EXECUTION] Starting execute_research_plan for mission {mission_id}")
+            start_phase(mission_id, "structured_research")
             plan_execution_success = await self.research_manager.execute_research_plan(
                 mission_id=mission_id,
                 plan=preliminary_plan,
@@ -1178,6 +1125,7 @@ Make sure to address the user's specific concerns and suggestions."""
                 return
 
             # Phase 3: Prepare Notes for Writing (Conditional based on config) 
+            start_phase(mission_id, "note_preparation")
             active_goals = self.context_manager.get_active_goals(mission_id)
             full_note_assignments: Optional[FullNoteAssignments] = None
 
@@ -1407,6 +1355,7 @@ Make sure to address the user's specific concerns and suggestions."""
                 if writing_checkpoint and writing_checkpoint.get('phase') == 'writing':
                     logger.info(f"Found writing checkpoint for mission {mission_id}: {writing_checkpoint}")
 
+            start_phase(mission_id, "writing")
             writing_success = await self.writing_manager.run_writing_phase(
                 mission_id=mission_id,
                 assigned_notes=full_note_assignments,
@@ -1428,6 +1377,7 @@ Make sure to address the user's specific concerns and suggestions."""
                 return
 
             # Phase 5: Generate Report Title
+            start_phase(mission_id, "report_title")
             try:
                 active_goals = self.context_manager.get_active_goals(mission_id)
                 title_success = await self.report_generator.generate_report_title(
@@ -1453,6 +1403,7 @@ Make sure to address the user's specific concerns and suggestions."""
                 )
 
             # Phase 6: Citation Processing
+            start_phase(mission_id, "citations")
             citation_success = await self.report_generator.process_citations(
                 mission_id, 
                 log_queue, 
@@ -1606,14 +1557,22 @@ Make sure to address the user's specific concerns and suggestions."""
     #     )
     #     logger.info(f"Mission {mission_id} stopped and all tasks cancelled.")
 
-    async def pause_mission(self, mission_id: str):
-        """Pauses a running mission and cancels all async tasks."""
+    async def pause_mission(self, mission_id: str) -> Dict[str, int]:
+        """
+        Pauses a running mission and cancels all async tasks.
+        Returns how many in-flight operations (LLM calls, searches, fetches,
+        retrievals) were interrupted and how many tasks were cancelled.
+        """
         logger.info(f"[PAUSE] Pausing mission {mission_id}...")
         
         # Check current status before pausing
         mission_context = self.context_manager.get_mission_context(mission_id)
         logger.info(f"[PAUSE] Current status before pause: {mission_context.status if mission_context else 'NO_CONTEXT'}")
         
+        # Interrupt in-flight operations right away so they release their semaphores
+        from ai_researcher.agentic_layer.controller.utils.cancellation import cancel_mission_operations
+        interrupted_count = cancel_mission_operations(mission_id, "paused")
+        
         # First update status to prevent new tasks from starting
         await self.context_manager.update_mission_status(mission_id, "paused")
         
@@ -1639,9 +1598,10 @@ Make sure to address the user's specific concerns and suggestions."""
             agent_name="AgentController",
             action="Pause Mission",
             status="success",
-            output_summary=f"Paused mission and cancelled {cancelled_count} running tasks"
+            output_summary=f"Paused mission, interrupted {interrupted_count} in-flight operations and cancelled {cancelled_count} running tasks"
         )
-        logger.info(f"Mission {mission_id} paused.")
+        logger.info(f"Mission {mission_id} paused ({interrupted_count} in-flight operations interrupted, {cancelled_count} tasks cancelled).")
+        return {"interrupted_operations": interrupted_count, "cancelled_tasks": cancelled_count}
     
     async def delete_mission(self, mission_id: str):
         """Completely stops and deletes a mission."""
@@ -438,7 +438,7 @@ class ReflectionManager:
                             mission_goal=revised_plan_response.mission_goal,
                             report_outline=revised_plan_response.report_outline
                         )
-                        await self.controller.context_manager.store_plan(mission_id, updated_plan)
+                        await self.controller.context_manager.store_plan(mission_id, updated_plan, phase="revision")
                         logger.info("Revised outline and steps stored.")
                     except Exception as e:
                         logger.error(f"Failed to create/store updated SimplifiedPlan: {e}", exc_info=True)
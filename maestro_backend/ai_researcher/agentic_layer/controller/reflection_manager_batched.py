@@ -1,15 +1,34 @@
 """
 Enhanced reflection manager with batched Phase 3 processing.
 This module contains the improved implementation for handling large revision contexts.
+
+On large outlines the inter-pass reflection step used to be slower than the
+research itself: every batch was a sequential planning call and batches were
+sized by a character count unrelated to the planning model's limits. Here:
+
+- batches are packed by estimated tokens against a budget derived from the
+  planning context setting and the planning model's known context window,
+- subsection batches (which extend disjoint parent sections) and note
+  redistribution batches (which assign disjoint notes) run concurrently under
+  the mission's LLM semaphore, and their results are merged into the outline
+  in batch order so the final plan does not depend on completion order,
+- structural modifications stay sequential, since each batch may reshape the
+  outline the next one works on.
 """
 
+import asyncio
 import logging
 import json
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Callable
 import queue
 
 from ai_researcher.config import THOUGHT_PAD_CONTEXT_LIMIT, get_max_suggestions_per_batch
 from ai_researcher.dynamic_config import get_max_planning_context_chars
+from ai_researcher.agentic_layer.model_capabilities import (
+    capability_registry,
+    estimate_prompt_tokens,
+    MIN_OUTPUT_TOKENS
+)
 from ai_researcher.agentic_layer.schemas.planning import SimplifiedPlan, ReportSection
 from ai_researcher.agentic_layer.schemas.notes import Note
 from ai_researcher.agentic_layer.schemas.reflection import ReflectionOutput
@@ -18,6 +37,14 @@ from ai_researcher.agentic_layer.controller.utils import outline_utils
 
 logger = logging.getLogger(__name__)
 
+_CHARS_PER_TOKEN = 4
+# Planning agent instructions, scratchpad and thoughts sent alongside the revision context
+_PLANNING_PROMPT_OVERHEAD_TOKENS = 6000
+# Headroom kept when note sub-batches are packed next to the suggestions
+_CONTEXT_BUFFER_TOKENS = 250
+_SUBSECTION_PREVIEW_CHARS = 200
+_REDISTRIBUTION_PREVIEW_CHARS = 150
+
 
 def is_error_outline(outline: List[ReportSection]) -> bool:
     """
@@ -54,7 +81,9 @@ async def validate_single_section_intent(
     mission_id: str,
     new_outline: List[ReportSection],
     previous_outline: List[ReportSection],
-    mission_goal: str
+    mission_goal: str,
+    log_queue: Optional[queue.Queue] = None,
+    update_callback: Optional[Any] = None
 ) -> bool:
     """
     Use fast LLM to determine if a single-section outline is intentional.
@@ -65,6 +94,8 @@ async def validate_single_section_intent(
         new_outline: The new outline with single section
         previous_outline: The previous multi-section outline
         mission_goal: The mission goal/user request
+        log_queue: Optional queue for logging
+        update_callback: Optional callback for updates
         
     Returns:
         True if the single section is appropriate, False if it's likely an error
@@ -100,13 +131,18 @@ Respond with ONLY one word:
 - NO if this appears to be an error or placeholder
 """
         
-        # Use fast model for validation
-        response = await controller.model_dispatcher.generate_async(
-            prompt=validation_prompt,
-            max_tokens=10,
-            temperature=0.1,
-            model="claude-3-haiku-20240307"  # Use fast model
-        )
+        # The fast model with a small response cap (planning allows 20k tokens)
+        async with controller.maybe_semaphore:
+            response, model_details = await controller.model_dispatcher.dispatch(
+                messages=[{"role": "user", "content": validation_prompt}],
+                agent_mode="outline_validation",
+                mission_id=mission_id,
+                log_queue=log_queue,
+                update_callback=update_callback
+            )
+
+        if model_details:
+            await controller.context_manager.update_mission_stats(mission_id, model_details, log_queue, update_callback)
         
         if response and response.choices and response.choices[0].message.content:
             result = response.choices[0].message.content.strip().upper()
@@ -135,48 +171,49 @@ async def process_suggestions_and_update_plan_batched(
 ) -> bool:
     """
     Enhanced version of process_suggestions_and_update_plan that handles batching properly.
-    
+
     This method:
     1. Separates structural modifications from subsection suggestions
     2. Applies structural changes first (if they fit in context)
-    3. Batches subsection suggestions by parent sections
-    4. Ensures note context is included but within limits
-    
+    3. Batches subsection suggestions by parent sections and runs the batches concurrently
+    4. Redistributes unassigned notes in concurrent batches
+    5. Packs every batch by estimated tokens against the planning model's budget
+
     Args:
         reflection_manager: The ReflectionManager instance (self)
         mission_id: The mission ID
         reflection_data: List of tuples (section_id, ReflectionOutput)
         log_queue: Optional queue for logging
         update_callback: Optional callback for updates
-        
+
     Returns:
         True if successful, False otherwise
     """
     controller = reflection_manager.controller
     logger.info(f"--- Starting Batched Inter-Pass Suggestion Processing for mission {mission_id} ---")
-    
+
     # Get mission context
     mission_context = controller.context_manager.get_mission_context(mission_id)
     if not mission_context or not mission_context.plan:
         logger.error("Cannot process suggestions: Mission context or plan missing.")
         return False
-        
+
     if not reflection_data:
         logger.info("No reflection outputs collected. Proceeding with existing plan.")
         return True
-    
+
     # Get configuration
-    char_limit = get_max_planning_context_chars(mission_id)
+    token_budget = _planning_token_budget(controller, mission_id)
     max_suggestions_batch = get_max_suggestions_per_batch(mission_id)
-    
+
     # Get all notes and current outline
     all_notes = controller.context_manager.get_notes(mission_id)
     current_outline = mission_context.plan.report_outline
-    
+
     # Separate suggestions by type
     structural_modifications = []
     subsection_suggestions_by_parent = {}
-    
+
     for section_id, output in reflection_data:
         # Collect structural modifications
         if output.proposed_modifications:
@@ -185,213 +222,153 @@ async def process_suggestions_and_update_plan_batched(
                     'section_id': section_id,
                     'modification': mod
                 })
-        
+
         # Collect subsection suggestions
         if output.suggested_subsection_topics:
             if section_id not in subsection_suggestions_by_parent:
                 subsection_suggestions_by_parent[section_id] = []
             subsection_suggestions_by_parent[section_id].extend(output.suggested_subsection_topics)
-    
+
     logger.info(f"Collected {len(structural_modifications)} structural modifications and "
                f"{sum(len(s) for s in subsection_suggestions_by_parent.values())} subsection suggestions "
-               f"across {len(subsection_suggestions_by_parent)} parent sections")
-    
+               f"across {len(subsection_suggestions_by_parent)} parent sections "
+               f"(planning budget ~{token_budget} tokens)")
+
     # Keep track of the evolving outline
     working_outline = current_outline
-    overall_success = True
-    
+
     # Phase 3a: Apply structural modifications (if any)
+    # Each structural batch can move, merge or delete sections, so later
+    # batches must see the outline produced by earlier ones: these stay sequential.
     if structural_modifications:
         logger.info("Phase 3a: Processing structural modifications...")
-        
-        # Format structural context
-        structural_context = _format_structural_context(
-            mission_context.user_request,
-            working_outline,
-            structural_modifications
+
+        base_tokens = _estimate_tokens(_format_structural_context(mission_context.user_request, working_outline, []))
+        mod_batches = _pack_by_tokens(
+            structural_modifications,
+            _format_modification_entry,
+            token_budget - base_tokens
         )
-        
-        # Check if it fits in the limit
-        if len(structural_context) <= char_limit:
-            # Apply all structural changes at once
+        if len(mod_batches) > 1:
+            logger.info(f"Structural modifications exceed the planning budget, split into {len(mod_batches)} batches")
+
+        for i, batch in enumerate(mod_batches):
+            logger.info(f"Processing structural modification batch {i+1}/{len(mod_batches)}")
+            batch_context = _format_structural_context(
+                mission_context.user_request,
+                working_outline,
+                batch
+            )
+
             revised_outline = await _apply_structural_modifications(
                 controller,
                 mission_id,
                 mission_context.user_request,
-                structural_context,
+                batch_context,
                 log_queue,
                 update_callback,
                 previous_outline=working_outline  # Pass current working outline
             )
             if revised_outline:
                 working_outline = revised_outline
-                logger.info("Successfully applied structural modifications")
-            else:
-                logger.warning("Failed to apply structural modifications, continuing with original structure")
-        else:
-            # Batch structural modifications if needed
-            logger.info(f"Structural context too large ({len(structural_context)} chars), batching...")
-            mod_batches = _batch_structural_modifications(structural_modifications, char_limit)
-            
-            for i, batch in enumerate(mod_batches):
-                logger.info(f"Processing structural modification batch {i+1}/{len(mod_batches)}")
-                batch_context = _format_structural_context(
-                    mission_context.user_request,
-                    working_outline,
-                    batch
-                )
-                
-                revised_outline = await _apply_structural_modifications(
-                    controller,
-                    mission_id,
-                    mission_context.user_request,
-                    batch_context,
-                    log_queue,
-                    update_callback,
-                    previous_outline=working_outline  # Pass current working outline
-                )
-                if revised_outline:
-                    working_outline = revised_outline
-    
+
     # Phase 3b: Add subsections with notes (if any)
     if subsection_suggestions_by_parent:
         logger.info("Phase 3b: Processing subsection suggestions...")
-        
+
         # Batch parent sections based on configuration
+        parent_ids = list(subsection_suggestions_by_parent.keys())
         if max_suggestions_batch == -1:
             # Process all at once
-            parent_batches = [list(subsection_suggestions_by_parent.keys())]
+            parent_batches = [parent_ids]
         else:
             # Batch by configured size
-            parent_ids = list(subsection_suggestions_by_parent.keys())
             parent_batches = [
                 parent_ids[i:i + max_suggestions_batch]
                 for i in range(0, len(parent_ids), max_suggestions_batch)
             ]
-        
-        logger.info(f"Processing subsection suggestions in {len(parent_batches)} batches")
-        
-        for batch_num, parent_batch in enumerate(parent_batches, 1):
-            logger.info(f"Processing subsection batch {batch_num}/{len(parent_batches)} "
-                       f"({len(parent_batch)} parent sections)")
-            
-            # Collect suggestions and relevant notes for this batch
-            batch_suggestions = {}
-            batch_note_ids = set()
-            
-            for parent_id in parent_batch:
-                batch_suggestions[parent_id] = subsection_suggestions_by_parent[parent_id]
-                # Collect relevant note IDs from the suggestions
-                for suggestion in batch_suggestions[parent_id]:
-                    if suggestion.relevant_note_ids:
-                        batch_note_ids.update(suggestion.relevant_note_ids)
-            
-            # Get the actual notes
-            relevant_notes = [n for n in all_notes if n.note_id in batch_note_ids]
-            logger.info(f"Collected {len(relevant_notes)} relevant notes for this batch")
-            
-            # Format the context
-            subsection_context = _format_subsection_context(
+
+        logger.info(f"Processing subsection suggestions in {len(parent_batches)} concurrent batches")
+
+        # Parent batches touch disjoint sections, so they all revise the same
+        # base outline concurrently and their subtrees are merged back in batch order.
+        base_outline = working_outline
+        batch_outlines = await asyncio.gather(*[
+            _run_subsection_batch(
+                controller,
+                mission_id,
                 mission_context.user_request,
-                working_outline,
-                batch_suggestions,
-                relevant_notes
+                base_outline,
+                {parent_id: subsection_suggestions_by_parent[parent_id] for parent_id in parent_batch},
+                all_notes,
+                token_budget,
+                batch_num,
+                len(parent_batches),
+                log_queue,
+                update_callback
             )
-            
-            # Check if we need to batch the notes further
-            if len(subsection_context) > char_limit:
-                logger.info(f"Subsection context too large ({len(subsection_context)} chars), "
-                           f"batching notes...")
-                
-                # Calculate base context size (without notes)
-                base_context = _format_subsection_context(
-                    mission_context.user_request,
-                    working_outline,
-                    batch_suggestions,
-                    []  # No notes
-                )
-                base_size = len(base_context)
-                available_for_notes = char_limit - base_size - 1000  # Leave some buffer
-                
-                if available_for_notes > 0:
-                    # Batch notes while keeping suggestions together
-                    note_batches = _batch_notes_by_char_limit(
-                        relevant_notes,
-                        available_for_notes
-                    )
-                    
-                    for note_batch_num, note_batch in enumerate(note_batches, 1):
-                        logger.info(f"Processing note sub-batch {note_batch_num}/{len(note_batches)}")
-                        
-                        batch_context = _format_subsection_context(
-                            mission_context.user_request,
-                            working_outline,
-                            batch_suggestions,
-                            note_batch
-                        )
-                        
-                        revised_outline = await _apply_subsection_suggestions(
-                            controller,
-                            mission_id,
-                            batch_context,
-                            log_queue,
-                            update_callback,
-                            previous_outline=working_outline
-                        )
-                        
-                        if revised_outline:
-                            working_outline = revised_outline
-                else:
-                    logger.warning("Base context too large even without notes, skipping this batch")
-            else:
-                # Context fits, apply directly
-                revised_outline = await _apply_subsection_suggestions(
-                    controller,
-                    mission_id,
-                    subsection_context,
-                    log_queue,
-                    update_callback,
-                    previous_outline=working_outline
-                )
-                
-                if revised_outline:
-                    working_outline = revised_outline
-    
+            for batch_num, parent_batch in enumerate(parent_batches, 1)
+        ], return_exceptions=True)
+
+        for batch_num, (parent_batch, batch_outline) in enumerate(zip(parent_batches, batch_outlines), 1):
+            if isinstance(batch_outline, BaseException):
+                logger.error(f"Subsection batch {batch_num} failed: {batch_outline}", exc_info=batch_outline)
+                continue
+            if batch_outline and batch_outline is not base_outline:
+                working_outline = _merge_parent_subtrees(working_outline, batch_outline, parent_batch, base_outline)
+
     # Phase 3c: Final note redistribution (if needed)
     # Check if there are unassigned notes
     assigned_note_ids = set()
     for section in outline_utils.flatten_outline(working_outline):
         if section.associated_note_ids:
             assigned_note_ids.update(section.associated_note_ids)
-    
+
     unassigned_notes = [n for n in all_notes if n.note_id not in assigned_note_ids]
-    
+
     if unassigned_notes:
         logger.info(f"Phase 3c: Redistributing {len(unassigned_notes)} unassigned notes...")
-        
-        # Batch unassigned notes if needed
-        note_batches = _batch_notes_by_char_limit(unassigned_notes, char_limit)
-        
-        for batch_num, note_batch in enumerate(note_batches, 1):
+
+        # Batch unassigned notes to fit next to the outline
+        base_tokens = _estimate_tokens(_format_redistribution_context(mission_context.user_request, working_outline, []))
+        note_batches = _pack_by_tokens(
+            unassigned_notes,
+            lambda note: _format_note_entry(note, _REDISTRIBUTION_PREVIEW_CHARS),
+            token_budget - base_tokens
+        )
+
+        # Every batch assigns a different set of notes to the same outline,
+        # so they run concurrently and only their note assignments are merged.
+        redistribution_outline = working_outline
+
+        async def _redistribute(batch_num: int, note_batch: List[Note]):
             logger.info(f"Processing redistribution batch {batch_num}/{len(note_batches)}")
-            
             redistribution_context = _format_redistribution_context(
                 mission_context.user_request,
-                working_outline,
+                redistribution_outline,
                 note_batch
             )
-            
-            revised_outline = await _apply_note_redistribution(
+            return await _apply_note_redistribution(
                 controller,
                 mission_id,
                 redistribution_context,
                 log_queue,
                 update_callback
             )
-            
+
+        redistributed_outlines = await asyncio.gather(*[
+            _redistribute(batch_num, note_batch)
+            for batch_num, note_batch in enumerate(note_batches, 1)
+        ])
+
+        for note_batch, revised_outline in zip(note_batches, redistributed_outlines):
             if revised_outline:
-                working_outline = revised_outline
-    
+                working_outline = _merge_note_assignments(
+                    working_outline,
+                    revised_outline,
+                    {note.note_id for note in note_batch}
+                )
+
     # Store the final updated plan
     if working_outline != current_outline:
         try:
@@ -399,7 +376,7 @@ async def process_suggestions_and_update_plan_batched(
                 mission_goal=mission_context.user_request,
                 report_outline=working_outline
             )
-            await controller.context_manager.store_plan(mission_id, updated_plan)
+            await controller.context_manager.store_plan(mission_id, updated_plan, phase="revision")
             logger.info("Successfully stored revised outline")
             return True
         except Exception as e:
@@ -410,23 +387,154 @@ async def process_suggestions_and_update_plan_batched(
         return True
 
 
-def _format_structural_context(user_request: str, outline: List[ReportSection], 
+async def _run_subsection_batch(controller, mission_id: str, user_request: str,
+                                base_outline: List[ReportSection], batch_suggestions: Dict[str, List],
+                                all_notes: List[Note], token_budget: int, batch_num: int,
+                                total_batches: int, log_queue, update_callback) -> Optional[List[ReportSection]]:
+    """Apply one parent batch of subsection suggestions, splitting its notes by token budget if needed."""
+    logger.info(f"Processing subsection batch {batch_num}/{total_batches} "
+               f"({len(batch_suggestions)} parent sections)")
+
+    # Collect relevant note IDs from the suggestions
+    batch_note_ids = set()
+    for suggestion_list in batch_suggestions.values():
+        for suggestion in suggestion_list:
+            if suggestion.relevant_note_ids:
+                batch_note_ids.update(suggestion.relevant_note_ids)
+    relevant_notes = [n for n in all_notes if n.note_id in batch_note_ids]
+    logger.info(f"Collected {len(relevant_notes)} relevant notes for subsection batch {batch_num}")
+
+    full_context = _format_subsection_context(user_request, base_outline, batch_suggestions, relevant_notes)
+    if _estimate_tokens(full_context) <= token_budget:
+        note_batches = [relevant_notes]
+    else:
+        # Split the notes while keeping the batch's suggestions together
+        base_tokens = _estimate_tokens(_format_subsection_context(user_request, base_outline, batch_suggestions, []))
+        available_for_notes = token_budget - base_tokens - _CONTEXT_BUFFER_TOKENS
+        if available_for_notes <= 0:
+            logger.warning(f"Base context of subsection batch {batch_num} too large even without notes, skipping this batch")
+            return None
+        note_batches = _pack_by_tokens(
+            relevant_notes,
+            lambda note: _format_note_entry(note, _SUBSECTION_PREVIEW_CHARS),
+            available_for_notes
+        )
+        logger.info(f"Subsection batch {batch_num} context too large, split its notes into {len(note_batches)} sub-batches")
+
+    # Note sub-batches refine the same parents, so each builds on the previous result
+    working_outline = base_outline
+    for note_batch_num, note_batch in enumerate(note_batches, 1):
+        if len(note_batches) > 1:
+            logger.info(f"Processing note sub-batch {note_batch_num}/{len(note_batches)} of subsection batch {batch_num}")
+
+        batch_context = _format_subsection_context(
+            user_request,
+            working_outline,
+            batch_suggestions,
+            note_batch
+        )
+        revised_outline = await _apply_subsection_suggestions(
+            controller,
+            mission_id,
+            batch_context,
+            log_queue,
+            update_callback,
+            previous_outline=working_outline
+        )
+        if revised_outline:
+            working_outline = revised_outline
+
+    return working_outline
+
+
+def _normalize_title(title: str) -> str:
+    return " ".join((title or "").lower().split())
+
+
+def _find_matching_section(outline: List[ReportSection], section: ReportSection) -> Optional[ReportSection]:
+    """Find ``section`` in another version of the outline by ID, falling back to its title."""
+    match = outline_utils.find_section_recursive(outline, section.section_id)
+    if match:
+        return match
+    title = _normalize_title(section.title)
+    for candidate in outline_utils.flatten_outline(outline):
+        if _normalize_title(candidate.title) == title:
+            return candidate
+    return None
+
+
+def _merge_parent_subtrees(target: List[ReportSection], revised: List[ReportSection],
+                           parent_ids: List[str], base: List[ReportSection]) -> List[ReportSection]:
+    """
+    Copy the revised subtrees of ``parent_ids`` from a batch result into ``target``.
+
+    Only the parents the batch was asked to extend are taken from ``revised``;
+    anything else the planning agent changed in its copy of the outline is
+    ignored. Parents are located in the batch result by their ID or title in
+    ``base``, the outline the batch started from.
+    """
+    merged = [section.model_copy(deep=True) for section in target]
+    for parent_id in parent_ids:
+        base_parent = outline_utils.find_section_recursive(base, parent_id)
+        target_parent = outline_utils.find_section_recursive(merged, parent_id)
+        if not base_parent or not target_parent:
+            logger.warning(f"Parent section '{parent_id}' not found while merging subsection batch, skipping")
+            continue
+        revised_parent = _find_matching_section(revised, base_parent)
+        if not revised_parent:
+            logger.warning(f"Subsection batch dropped parent section '{parent_id}', keeping the previous version")
+            continue
+        target_parent.description = revised_parent.description
+        target_parent.subsections = [sub.model_copy(deep=True) for sub in revised_parent.subsections]
+        if revised_parent.associated_note_ids:
+            target_parent.associated_note_ids = _union_ids(target_parent.associated_note_ids, revised_parent.associated_note_ids)
+    return merged
+
+
+def _merge_note_assignments(target: List[ReportSection], revised: List[ReportSection],
+                            note_ids: set) -> List[ReportSection]:
+    """Add the assignments of ``note_ids`` made in ``revised`` to the matching sections of ``target``."""
+    merged = [section.model_copy(deep=True) for section in target]
+    for revised_section in outline_utils.flatten_outline(revised):
+        assigned = [note_id for note_id in (revised_section.associated_note_ids or []) if note_id in note_ids]
+        if not assigned:
+            continue
+        target_section = _find_matching_section(merged, revised_section)
+        if target_section:
+            target_section.associated_note_ids = _union_ids(target_section.associated_note_ids, assigned)
+        else:
+            logger.warning(f"Redistributed notes assigned to unknown section '{revised_section.section_id}', ignoring")
+    return merged
+
+
+def _union_ids(existing: Optional[List[str]], added: List[str]) -> List[str]:
+    result = list(existing or [])
+    result.extend(note_id for note_id in added if note_id not in result)
+    return result
+
+
+def _format_structural_context(user_request: str, outline: List[ReportSection],
                                modifications: List[Dict]) -> str:
     """Format context for structural modifications."""
     context = f"Original User Request:\n{user_request}\n\n"
     context += "Current Report Outline Structure:\n"
     context += "\n".join(outline_utils.format_outline_for_prompt(outline))
     context += "\n\nStructural Modifications to Apply:\n"
-    
+
     for mod_info in modifications:
-        mod = mod_info['modification']
-        context += f"- {mod.modification_type}: {mod.reasoning}\n"
-        if mod.details:
-            context += f"  Details: {json.dumps(mod.details.model_dump(), indent=2)}\n"
-    
+        context += _format_modification_entry(mod_info)
+
     return context
 
 
+def _format_modification_entry(mod_info: Dict) -> str:
+    mod = mod_info['modification']
+    entry = f"- {mod.modification_type}: {mod.reasoning}\n"
+    if mod.details:
+        entry += f"  Details: {json.dumps(mod.details.model_dump(), indent=2)}\n"
+    return entry
+
+
 def _format_subsection_context(user_request: str, outline: List[ReportSection],
                                suggestions: Dict[str, List], notes: List[Note]) -> str:
     """Format context for subsection additions."""
@@ -434,30 +542,23 @@ def _format_subsection_context(user_request: str, outline: List[ReportSection],
     context += "Current Report Outline Structure:\n"
     context += "\n".join(outline_utils.format_outline_for_prompt(outline))
     context += "\n\nSubsection Suggestions to Add:\n"
-    
+
     for parent_id, suggestion_list in suggestions.items():
         parent = outline_utils.find_section_recursive(outline, parent_id)
         parent_title = parent.title if parent else parent_id
         context += f"\nFor Parent Section '{parent_title}' (ID: {parent_id}):\n"
-        
+
         for suggestion in suggestion_list:
             context += f"  - {suggestion.title}: {suggestion.description}\n"
             context += f"    Reasoning: {suggestion.reasoning}\n"
             if suggestion.relevant_note_ids:
                 context += f"    Relevant Notes: {', '.join(suggestion.relevant_note_ids)}\n"
-    
+
     if notes:
         context += "\n\nRelevant Notes for Context:\n"
         for note in notes:
-            context += f"- Note ID: {note.note_id}\n"
-            # Include a preview of the note content
-            preview_length = 200
-            if len(note.content) > preview_length:
-                context += f"  Content: {note.content[:preview_length]}...\n"
-            else:
-                context += f"  Content: {note.content}\n"
-            context += f"  Source: {note.source_type} - {note.source_id}\n\n"
-    
+            context += _format_note_entry(note, _SUBSECTION_PREVIEW_CHARS)
+
     return context
 
 
@@ -468,64 +569,69 @@ def _format_redistribution_context(user_request: str, outline: List[ReportSectio
     context += "Current Report Outline Structure:\n"
     context += "\n".join(outline_utils.format_outline_for_prompt(outline))
     context += "\n\nUnassigned Notes to Distribute:\n"
-    
+
     for note in notes:
-        context += f"- Note ID: {note.note_id}\n"
-        # Include a preview
-        preview_length = 150
-        if len(note.content) > preview_length:
-            context += f"  Content: {note.content[:preview_length]}...\n"
-        else:
-            context += f"  Content: {note.content}\n"
-        context += f"  Source: {note.source_type} - {note.source_id}\n\n"
-    
+        context += _format_note_entry(note, _REDISTRIBUTION_PREVIEW_CHARS)
+
     return context
 
 
-def _batch_structural_modifications(modifications: List[Dict], char_limit: int) -> List[List[Dict]]:
-    """Batch structural modifications to fit within char limit."""
-    batches = []
-    current_batch = []
-    current_size = 0
-    base_size = 5000  # Estimate for base context
-    
-    for mod in modifications:
-        mod_size = len(json.dumps(mod))
-        if current_size + mod_size + base_size > char_limit and current_batch:
-            batches.append(current_batch)
-            current_batch = [mod]
-            current_size = mod_size
-        else:
-            current_batch.append(mod)
-            current_size += mod_size
-    
-    if current_batch:
-        batches.append(current_batch)
-    
-    return batches
+def _format_note_entry(note: Note, preview_length: int) -> str:
+    """A note as listed in a revision context: ID, content preview and source."""
+    entry = f"- Note ID: {note.note_id}\n"
+    if len(note.content) > preview_length:
+        entry += f"  Content: {note.content[:preview_length]}...\n"
+    else:
+        entry += f"  Content: {note.content}\n"
+    entry += f"  Source: {note.source_type} - {note.source_id}\n\n"
+    return entry
+
+
+def _estimate_tokens(text: str) -> int:
+    return estimate_prompt_tokens([{"role": "user", "content": text}])
+
+
+def _planning_token_budget(controller, mission_id: str) -> int:
+    """
+    Token budget for one planning revision context.
+
+    Derived from the mission's planning context setting (in characters) and,
+    when the planning model's context window is known, capped so the prompt,
+    the agent's own instructions and the response fit in it.
+    """
+    budget = max(1, get_max_planning_context_chars(mission_id) // _CHARS_PER_TOKEN)
+    provider, model, base_url = controller.model_dispatcher.resolve_endpoint(agent_mode="planning")
+    if provider and model:
+        context_window = capability_registry.get(provider, model, base_url).context_window
+        if context_window:
+            available = context_window - MIN_OUTPUT_TOKENS - _PLANNING_PROMPT_OVERHEAD_TOKENS
+            budget = min(budget, max(context_window // 2, available))
+    return budget
+
 
+def _pack_by_tokens(items: List[Any], render: Callable[[Any], str], budget_tokens: int) -> List[List[Any]]:
+    """
+    Split ``items`` into consecutive batches whose rendered text fits ``budget_tokens``.
 
-def _batch_notes_by_char_limit(notes: List[Note], char_limit: int) -> List[List[Note]]:
-    """Batch notes to fit within character limit."""
+    Order is preserved so batching is deterministic. An item larger than the
+    budget on its own gets a batch to itself.
+    """
     batches = []
     current_batch = []
-    current_size = 0
-    
-    for note in notes:
-        # Estimate note size in context (ID + preview + source)
-        note_size = len(note.note_id) + min(200, len(note.content)) + 100
-        
-        if current_size + note_size > char_limit and current_batch:
+    current_tokens = 0
+
+    for item in items:
+        item_tokens = _estimate_tokens(render(item))
+        if current_batch and current_tokens + item_tokens > budget_tokens:
             batches.append(current_batch)
-            current_batch = [note]
-            current_size = note_size
-        else:
-            current_batch.append(note)
-            current_size += note_size
-    
+            current_batch = []
+            current_tokens = 0
+        current_batch.append(item)
+        current_tokens += item_tokens
+
     if current_batch:
         batches.append(current_batch)
-    
+
     return batches
 
 
@@ -584,7 +690,8 @@ DO NOT request an outline or use placeholder text. Generate the actual revised o
                 # Check for single section reduction
                 if previous_outline and len(revised_outline) == 1 and len(previous_outline) > 1:
                     is_valid = await validate_single_section_intent(
-                        controller, mission_id, revised_outline, previous_outline, user_request
+                        controller, mission_id, revised_outline, previous_outline, user_request,
+                        log_queue, update_callback
                     )
                     if not is_valid:
                         logger.warning(f"Single section deemed unintentional (retry {retry + 1}/{MAX_RETRIES})")
@@ -663,8 +770,8 @@ DO NOT request an outline or use placeholder text. Generate the actual revised o
                 # Check for single section reduction
                 if previous_outline and len(revised_outline) == 1 and len(previous_outline) > 1:
                     is_valid = await validate_single_section_intent(
-                        controller, mission_id, revised_outline, previous_outline, 
-                        mission_context.user_request
+                        controller, mission_id, revised_outline, previous_outline,
+                        mission_context.user_request, log_queue, update_callback
                     )
                     if not is_valid:
                         logger.warning(f"Single section deemed unintentional (retry {retry + 1}/{MAX_RETRIES})")
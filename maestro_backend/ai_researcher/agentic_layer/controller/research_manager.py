@@ -3,7 +3,6 @@ from typing import Dict, Any, Optional, List, Callable, Tuple, Set
 import asyncio
 import queue
 import json
-from collections import deque
 
 from ai_researcher import config
 from ai_researcher.config import THOUGHT_PAD_CONTEXT_LIMIT
@@ -21,6 +20,7 @@ from ai_researcher.agentic_layer.agents.note_assignment_agent import AssignedNot
 
 # Import utilities
 from ai_researcher.agentic_layer.controller.utils import outline_utils
+from ai_researcher.agentic_layer.controller.utils.question_queue import NoveltyQuestionQueue
 from ai_researcher.agentic_layer.controller.utils.status_checks import acheck_mission_status, check_mission_status_async, MissionStoppedException
 from ai_researcher.agentic_layer.schemas.assignments import FullNoteAssignments
 
@@ -67,6 +67,7 @@ class ResearchManager:
         from ai_researcher.dynamic_config import (
             get_initial_research_max_depth, 
             get_initial_research_max_questions,
+            get_initial_question_similarity_threshold,
             get_initial_exploration_doc_results,
             get_initial_exploration_web_results
         )
@@ -155,14 +156,21 @@ class ResearchManager:
             return [], None
 
         # Initialize exploration state
-        question_queue = deque([(q, 0) for q in initial_questions])  # (question, depth)
+        # Near-duplicate questions are dropped and the most novel question is explored next
+        retriever = self.controller.retriever
+        question_queue = NoveltyQuestionQueue(
+            embedder=retriever.embedder if retriever else None,
+            similarity_threshold=get_initial_question_similarity_threshold(mission_id)
+        )
+        initial_added = await question_queue.add(initial_questions, 0)
         questions_explored_count = 0
         all_relevant_notes: List[Note] = []
+        relevant_note_ids: Set[str] = set()
         current_scratchpad: Optional[str] = self.controller.context_manager.get_scratchpad(mission_id)
         processed_questions = set()
         
         # Add counters for questions at each depth
-        questions_by_depth = {0: len(initial_questions)}
+        questions_by_depth = {0: initial_added}
         questions_processed_by_depth = {0: 0}
         sub_questions_generated_by_depth = {0: 0}
         
@@ -204,7 +212,7 @@ class ResearchManager:
 
             launch_counter_this_batch = 0
             while can_launch > 0 and question_queue and questions_explored_count < max_questions:
-                current_question, current_depth = question_queue.popleft()
+                current_question, current_depth = question_queue.pop()
 
                 if current_question in processed_questions:
                     logger.debug(f"Skipping already processed question: {current_question}")
@@ -317,8 +325,10 @@ class ResearchManager:
                     )
 
                     if actual_notes:
-                        all_relevant_notes.extend(actual_notes)
-                        await self.controller.context_manager.add_notes(mission_id, actual_notes)
+                        # Duplicates of earlier notes come back as the note they were merged into
+                        stored_notes = await self.controller.context_manager.add_notes(mission_id, actual_notes)
+                        all_relevant_notes.extend(note for note in stored_notes if note.note_id not in relevant_note_ids)
+                        relevant_note_ids.update(note.note_id for note in stored_notes)
 
                     if updated_scratchpad is not None:
                         last_scratchpad_update_in_batch = updated_scratchpad
@@ -329,10 +339,10 @@ class ResearchManager:
                         next_depth = original_depth + 1
                         added_to_queue = 0
                         if (questions_explored_count + len(question_queue) + len(running_tasks)) < max_questions:
-                            for sub_q in new_sub_questions:
-                                if sub_q not in processed_questions:
-                                    question_queue.append((sub_q, next_depth))
-                                    added_to_queue += 1
+                            added_to_queue = await question_queue.add(
+                                [sub_q for sub_q in new_sub_questions if sub_q not in processed_questions],
+                                next_depth
+                            )
                             
                             if added_to_queue > 0:
                                 questions_by_depth[next_depth] = questions_by_depth.get(next_depth, 0) + added_to_queue
@@ -360,8 +370,7 @@ class ResearchManager:
                 await self.controller.context_manager.update_scratchpad(mission_id, current_scratchpad)
 
             # Log Queue State
-            depth_counts = {}
-            for _, d in question_queue: depth_counts[d] = depth_counts.get(d, 0) + 1
+            depth_counts = question_queue.depth_counts()
             depth_info = ", ".join([f"Depth {d}: {count}" for d, count in sorted(depth_counts.items())])
             logger.info(f"Current queue: {len(question_queue)} questions ({depth_info}). Running tasks: {len(running_tasks)}.")
 
@@ -371,6 +380,7 @@ class ResearchManager:
         logger.info(f"Questions by depth: {questions_by_depth}")
         logger.info(f"Questions processed by depth: {questions_processed_by_depth}")
         logger.info(f"Sub-questions generated by depth: {sub_questions_generated_by_depth}")
+        logger.info(f"Near-duplicate questions skipped: {question_queue.duplicates_skipped}")
         logger.info(f"Termination reason: {'Max questions reached' if questions_explored_count >= max_questions else 'Queue empty'}")
         logger.info(f"Total relevant notes found: {len(all_relevant_notes)}")
         
@@ -859,6 +869,8 @@ Instructions:
 
         for round_num in range(start_round, num_rounds + 1):
             logger.info(f"--- Starting Research Round {round_num}/{num_rounds} ---")
+            # Snapshot the outline this round starts from (used to resume from this round)
+            await self.controller.context_manager.record_round_start(mission_id, round_num)
             
             # Update phase display for UI
             await self.controller.context_manager.update_phase_display(mission_id, {
@@ -1093,16 +1105,18 @@ Instructions:
                             # Add notes to context manager and associate with section
                             try:
                                 # First, add the generated notes to the context manager
+                                # (duplicates of existing notes are merged and returned as the existing note)
+                                stored_notes = generated_notes
                                 if generated_notes:
-                                    await self.controller.context_manager.add_notes(mission_id, generated_notes)
-                                    logger.info(f"  Added {len(generated_notes)} notes to context manager for mission {mission_id}.")
+                                    stored_notes = await self.controller.context_manager.add_notes(mission_id, generated_notes)
+                                    logger.info(f"  Added {len(generated_notes)} notes to context manager for mission {mission_id} ({len(stored_notes)} distinct).")
                                 
                                 # Then associate the note IDs with the section
                                 current_plan_for_update = self.controller.context_manager.get_mission_context(mission_id).plan
                                 if current_plan_for_update:
                                     section_obj_to_update = outline_utils.find_section_recursive(current_plan_for_update.report_outline, section_id)
                                     if section_obj_to_update:
-                                        new_note_ids = {note.note_id for note in generated_notes}
+                                        new_note_ids = {note.note_id for note in stored_notes}
                                         # Ensure associated_note_ids exists and is a list
                                         if not hasattr(section_obj_to_update, 'associated_note_ids') or section_obj_to_update.associated_note_ids is None:
                                             section_obj_to_update.associated_note_ids = []
@@ -1113,7 +1127,7 @@ Instructions:
                                         
                                         if len(updated_ids) > len(existing_ids):
                                             section_obj_to_update.associated_note_ids = sorted(list(updated_ids))
-                                            await self.controller.context_manager.store_plan(mission_id, current_plan_for_update)
+                                            await self.controller.context_manager.store_plan(mission_id, current_plan_for_update, phase="notes")
                                             logger.info(f"  Associated {len(new_note_ids)} new notes with section {section_id}. Total associated: {len(section_obj_to_update.associated_note_ids)}.")
                                             
                                             # Check if we've reached the max notes per section limit
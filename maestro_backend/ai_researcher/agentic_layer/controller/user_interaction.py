@@ -6,6 +6,7 @@ from datetime import datetime
 
 from ai_researcher.config import THOUGHT_PAD_CONTEXT_LIMIT
 from ai_researcher.agentic_layer.async_context_manager import ExecutionLogEntry
+from ai_researcher.agentic_layer.controller.utils.research_prefetch import schedule_prefetch, stop_prefetch
 from ai_researcher.agentic_layer.schemas.analysis import RequestAnalysisOutput
 from ai_researcher.agentic_layer.utils.json_format_helper import (
     get_json_schema_format,
@@ -511,6 +512,7 @@ Output ONLY a single JSON object conforming EXACTLY to the RequestAnalysisOutput
                             mission_id, 
                             {"initial_questions": questions}
                         )
+                        schedule_prefetch(self.controller, mission_id, questions)
                         
                         # Update mission stats
                         if model_details:
@@ -614,6 +616,7 @@ Output ONLY a single JSON object conforming EXACTLY to the RequestAnalysisOutput
                     "final_questions": final_questions,
                     "tool_selection": tool_selection
                 })
+                stop_prefetch(mission_id, keep_questions=final_questions)
                 
                 # Update mission status to indicate research is starting
                 await self.controller.context_manager.update_mission_status(mission_id, "planning")
@@ -901,6 +904,7 @@ Instructions:
                 
                 # Update the questions in the mission context
                 await self.controller.context_manager.update_mission_metadata(mission_id, {"refined_questions": refined_questions})
+                schedule_prefetch(self.controller, mission_id, refined_questions)
 
                 # Construct the response string for the user
                 response_string = "I've updated the questions based on your feedback:\n\n"
@@ -953,6 +957,7 @@ Instructions:
             "tool_selection": tool_selection
         })
         logger.info(f"Stored final questions and tool selection ({tool_selection}) for mission {mission_id}.")
+        stop_prefetch(mission_id, keep_questions=final_questions)
         
         # Log the confirmation step
         await self.controller.context_manager.log_execution_step(
@@ -0,0 +1,146 @@
+"""
+Per-mission cancellation tokens for cooperative pause and stop.
+
+Mission status is only checked at gather boundaries and loop heads, so a
+paused mission used to run its in-flight LLM calls, page fetches, searches and
+reranks to completion while holding semaphores and spending tokens. Pausing
+now cancels the mission's token, and the long awaits in the model dispatcher,
+the web search/fetch tools and the retriever race against it through
+``run_cancellable``:
+
+- the awaited operation is cancelled as soon as the token is, which releases
+  any semaphore acquired inside it,
+- the caller gets ``MissionStoppedException`` (the dispatcher and tools turn it
+  into their usual cancelled/error results),
+- ``cancel`` reports how many operations were interrupted.
+
+Missions run on their own event loop in a worker thread while pause requests
+arrive on the API loop, so tokens are thread-safe and wake waiters with
+``call_soon_threadsafe``. The token is reset when the mission is set running
+again (see ``AsyncContextManager.update_mission_status``).
+"""
+import asyncio
+import logging
+import threading
+from typing import Awaitable, Dict, Optional, Set, Tuple, TypeVar
+
+from ai_researcher.agentic_layer.controller.utils.status_checks import MissionStoppedException
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# How long an interrupted operation is given to unwind (release semaphores, close connections)
+_UNWIND_TIMEOUT_SECONDS = 1.0
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class CancellationToken:
+    def __init__(self, mission_id: str):
+        self.mission_id = mission_id
+        self.reason: Optional[str] = None
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def raise_if_cancelled(self):
+        if self.reason is not None:
+            raise MissionStoppedException(self.mission_id, self.reason)
+
+    def cancel(self, reason: str = "paused") -> int:
+        """Cancels the mission's in-flight operations; returns how many were interrupted."""
+        with self._lock:
+            self.reason = reason
+            waiters = list(self._waiters)
+            self._waiters.clear()
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                pass  # The mission's loop has already been closed
+        if waiters:
+            logger.info(f"Interrupted {len(waiters)} in-flight operations for mission {self.mission_id} ({reason})")
+        return len(waiters)
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        """Awaits ``awaitable`` unless the token is cancelled first, in which case it is cancelled too."""
+        if self.reason is not None:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            self.raise_if_cancelled()
+
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(awaitable)
+        waiter = loop.create_future()
+        entry = (loop, waiter)
+        with self._lock:
+            if self.reason is None:
+                self._waiters.add(entry)
+            else:
+                _wake(waiter)
+
+        try:
+            await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            with self._lock:
+                self._waiters.discard(entry)
+            if not waiter.done():
+                waiter.cancel()
+
+        if task.done():
+            return task.result()
+
+        task.cancel()
+        await asyncio.wait({task}, timeout=_UNWIND_TIMEOUT_SECONDS)
+        raise MissionStoppedException(self.mission_id, self.reason or "stopped")
+
+
+_tokens: Dict[str, CancellationToken] = {}
+_tokens_lock = threading.Lock()
+
+
+def get_cancellation_token(mission_id: str) -> CancellationToken:
+    with _tokens_lock:
+        token = _tokens.get(mission_id)
+        if token is None:
+            token = _tokens[mission_id] = CancellationToken(mission_id)
+        return token
+
+
+def cancel_mission_operations(mission_id: str, reason: str = "paused") -> int:
+    """Cancels every in-flight operation of a mission; returns how many were interrupted."""
+    return get_cancellation_token(mission_id).cancel(reason)
+
+
+def reset_cancellation(mission_id: str):
+    """Gives a resumed mission a fresh token."""
+    with _tokens_lock:
+        _tokens.pop(mission_id, None)
+
+
+def is_mission_cancelled(mission_id: Optional[str]) -> bool:
+    if not mission_id:
+        return False
+    with _tokens_lock:
+        token = _tokens.get(mission_id)
+    return token is not None and token.cancelled
+
+
+async def run_cancellable(mission_id: Optional[str], awaitable: Awaitable[T]) -> T:
+    """
+    Awaits ``awaitable``, abandoning it with ``MissionStoppedException`` as soon as
+    the mission is paused or stopped. Without a mission id it is awaited as is.
+    """
+    if not mission_id:
+        return await awaitable
+    return await get_cancellation_token(mission_id).run(awaitable)
@@ -0,0 +1,380 @@
+"""
+Per-mission performance traces and critical-path analysis.
+
+The only timing a finished mission used to leave behind was the
+``duration_sec`` of each LLM call in its execution log, which says nothing
+about where the wall-clock time went: waiting for a semaphore slot, the model
+itself, web fetches, retrieval or database writes. Missions now record timing
+spans:
+
+- ``trace_span`` wraps an operation (LLM semaphore wait and call, tool
+  execution, retrieval and its embed/vector/rerank steps, mission DB writes);
+  nesting follows the async call chain through a context variable, so a span
+  started inside a tool becomes that tool's child,
+- ``start_phase`` marks the controller's phases; the analysis splits the
+  critical path per phase,
+- spans are kept in memory as compact rows (``SPAN_FIELDS``), capped at
+  ``MISSION_TRACE_MAX_SPANS`` per mission, and written to ``mission_traces`` by
+  ``AsyncContextManager`` (one row per run of the mission in a process; each
+  flush appends only the spans recorded since the previous one),
+- ``analyze_trace`` turns stored rows into a waterfall, per-kind totals and the
+  critical path (the chain of spans that determined the end time), which shows
+  whether the mission waited on concurrency limits or on the models.
+
+Missions run on their own event loop in a worker thread while the API reads
+traces from its loop, so the buffers are guarded by a lock.
+"""
+import contextvars
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ai_researcher import config
+from ai_researcher.config import get_current_time
+
+logger = logging.getLogger(__name__)
+
+TRACE_FORMAT_VERSION = 1
+
+# Layout of a stored span row
+SPAN_FIELDS = ("id", "parent", "kind", "name", "start_ms", "duration_ms", "attrs")
+
+# Critical-path time not covered by any span (prompt building, parsing, websocket sends...)
+UNTRACED = "untraced"
+
+# Span of the current async task/thread: (mission_id, span_id)
+_current_span: contextvars.ContextVar[Optional[Tuple[str, int]]] = contextvars.ContextVar(
+    "mission_trace_span", default=None
+)
+
+
+class MissionTrace:
+    def __init__(self, mission_id: str, max_spans: int = 0):
+        self.mission_id = mission_id
+        self.started_at = get_current_time()
+        self.max_spans = max_spans or config.MISSION_TRACE_MAX_SPANS
+        self.spans: List[list] = []
+        # [name, start_ms, end_ms]; end_ms is None while the phase runs
+        self.phases: List[list] = []
+        self.dropped = 0
+        self.last_flush = time.monotonic()
+        self._origin = time.perf_counter()
+        self._next_id = 1
+        self._version = 0
+        self._flushed_version = 0
+        self._flushed_spans = 0
+        self._lock = threading.Lock()
+
+    def now_ms(self) -> int:
+        return int((time.perf_counter() - self._origin) * 1000)
+
+    def new_span_id(self) -> int:
+        with self._lock:
+            span_id = self._next_id
+            self._next_id += 1
+            return span_id
+
+    def record(self, span_id: int, parent: Optional[int], kind: str, name: str,
+               start_ms: int, end_ms: int, attrs: Optional[Dict[str, Any]]):
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped += 1
+                return
+            self.spans.append([span_id, parent, kind, name, start_ms, max(end_ms - start_ms, 0), attrs or None])
+            self._version += 1
+
+    def start_phase(self, name: str):
+        with self._lock:
+            now = self.now_ms()
+            if self.phases and self.phases[-1][2] is None:
+                if self.phases[-1][0] == name:
+                    return
+                self.phases[-1][2] = now
+            self.phases.append([name, now, None])
+            self._version += 1
+
+    def end_phase(self):
+        with self._lock:
+            if self.phases and self.phases[-1][2] is None:
+                self.phases[-1][2] = self.now_ms()
+                self._version += 1
+
+    def needs_flush(self, force: bool = False) -> bool:
+        if self._version == self._flushed_version:
+            return False
+        return force or time.monotonic() - self.last_flush >= config.MISSION_TRACE_FLUSH_INTERVAL
+
+    def _stored_form(self, first_span: int) -> Dict[str, Any]:
+        # Called with the lock held
+        return {
+            "v": TRACE_FORMAT_VERSION,
+            "duration_ms": self.now_ms(),
+            "spans": [list(span) for span in self.spans[first_span:]],
+            "phases": [list(phase) for phase in self.phases],
+            "dropped": self.dropped,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The whole trace as stored in ``mission_traces.trace``."""
+        with self._lock:
+            return self._stored_form(0)
+
+    def unflushed(self) -> Tuple[Dict[str, Any], Tuple[int, int]]:
+        """
+        The trace with only the spans recorded since the last flush, and the
+        mark to pass to ``mark_flushed`` once it is written.
+        """
+        with self._lock:
+            return self._stored_form(self._flushed_spans), (self._version, len(self.spans))
+
+    def mark_flushed(self, mark: Tuple[int, int]):
+        with self._lock:
+            self._flushed_version, self._flushed_spans = mark
+            self.last_flush = time.monotonic()
+
+
+_traces: Dict[str, MissionTrace] = {}
+_traces_lock = threading.Lock()
+
+
+def get_mission_trace(mission_id: Optional[str], create: bool = True) -> Optional[MissionTrace]:
+    if not mission_id or not config.MISSION_TRACE_ENABLED:
+        return None
+    with _traces_lock:
+        trace = _traces.get(mission_id)
+        if trace is None and create:
+            trace = _traces[mission_id] = MissionTrace(mission_id)
+        return trace
+
+
+def discard_mission_trace(mission_id: str):
+    """Drops a mission's in-memory trace (after it was written, or when the mission is evicted)."""
+    with _traces_lock:
+        _traces.pop(mission_id, None)
+
+
+def start_phase(mission_id: Optional[str], name: str):
+    """Marks the start of a controller phase; the previous phase ends here."""
+    trace = get_mission_trace(mission_id)
+    if trace is not None:
+        trace.start_phase(name)
+
+
+class Span:
+    def __init__(self, mission_id: Optional[str], kind: str, name: str, attrs: Dict[str, Any]):
+        self.mission_id = mission_id
+        self.kind = kind
+        self.name = name
+        # Callers may add attributes (token counts, result sizes) before the span ends
+        self.attrs = attrs
+        self._trace: Optional[MissionTrace] = None
+        self._token = None
+
+    def __enter__(self) -> "Span":
+        current = _current_span.get()
+        mission_id = self.mission_id or (current[0] if current else None)
+        self._trace = get_mission_trace(mission_id)
+        if self._trace is None:
+            return self
+        self.mission_id = mission_id
+        self._parent = current[1] if current and current[0] == mission_id else None
+        self._id = self._trace.new_span_id()
+        self._start = self._trace.now_ms()
+        self._token = _current_span.set((mission_id, self._id))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._trace is None:
+            return False
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            pass  # Exited in another context (e.g. an abandoned generator); the parent chain is unaffected
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self._trace.record(self._id, self._parent, self.kind, self.name,
+                           self._start, self._trace.now_ms(), self.attrs)
+        return False
+
+    async def __aenter__(self) -> "Span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+def trace_span(mission_id: Optional[str], kind: str, name: str, **attrs: Any) -> Span:
+    """
+    Times the enclosed block (``with`` or ``async with``) as a span of the
+    mission's trace. Without a mission id the mission of the enclosing span is
+    used; outside any mission the block is not traced.
+    """
+    return Span(mission_id, kind, name, attrs)
+
+
+# --- Analysis ---
+
+def _merge_runs(runs: List[Tuple[Any, Dict[str, Any]]]) -> Tuple[List[list], List[list], int, int]:
+    """Concatenates stored runs ``(started_at, trace)`` onto the first run's clock."""
+    spans: List[list] = []
+    phases: List[list] = []
+    dropped = 0
+    end_ms = 0
+    id_base = 0
+    first_start = runs[0][0] if runs else None
+    for started_at, trace in runs:
+        offset = int((started_at - first_start).total_seconds() * 1000) if first_start else 0
+        max_id = 0
+        for span_id, parent, kind, name, start, duration, attrs in trace.get("spans", []):
+            spans.append([span_id + id_base, parent + id_base if parent else None, kind, name,
+                          start + offset, duration, attrs])
+            max_id = max(max_id, span_id)
+            end_ms = max(end_ms, start + offset + duration)
+        run_end = offset + int(trace.get("duration_ms") or 0)
+        for name, start, end in trace.get("phases", []):
+            phases.append([name, start + offset, end + offset if end is not None else run_end])
+        end_ms = max(end_ms, run_end)
+        dropped += int(trace.get("dropped") or 0)
+        id_base += max_id
+    return spans, phases, dropped, end_ms
+
+
+def _union_ms(intervals: List[Tuple[int, int]]) -> int:
+    total, current_start, current_end = 0, None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+class _CriticalPath:
+    """
+    Walks back from the end of a window: the span that ends last is on the path,
+    then the one that ends last before it started, and so on; inside each span
+    the same walk runs over its children, and the remainder is its own time.
+    """
+
+    def __init__(self, spans: List[list]):
+        ids = {span[0] for span in spans}
+        self.children: Dict[Optional[int], List[list]] = {}
+        for span in spans:
+            parent = span[1] if span[1] in ids else None
+            self.children.setdefault(parent, []).append(span)
+        self.by_kind: Dict[str, int] = {}
+        self.by_span: Dict[Tuple[str, str], int] = {}
+
+    def _add(self, kind: str, name: str, ms: int):
+        if ms <= 0:
+            return
+        self.by_kind[kind] = self.by_kind.get(kind, 0) + ms
+        self.by_span[(kind, name)] = self.by_span.get((kind, name), 0) + ms
+
+    def walk(self, parent: Optional[int], window_start: int, window_end: int, kind: str, name: str):
+        candidates = sorted(
+            (s for s in self.children.get(parent, []) if s[4] < window_end and s[4] + s[5] > window_start),
+            key=lambda s: s[4] + s[5], reverse=True
+        )
+        cursor = window_end
+        for span in candidates:
+            if cursor <= window_start:
+                break
+            if span[4] >= cursor:
+                continue  # Started after the part of the window still to be explained
+            segment_end = min(span[4] + span[5], cursor)
+            segment_start = max(span[4], window_start)
+            self._add(kind, name, cursor - segment_end)
+            self.walk(span[0], segment_start, segment_end, span[2], span[3])
+            cursor = segment_start
+        self._add(kind, name, cursor - window_start)
+
+    def drain(self, top: int) -> Dict[str, Any]:
+        total = sum(self.by_kind.values())
+        by_kind = dict(sorted(self.by_kind.items(), key=lambda item: -item[1]))
+        traced = {kind: ms for kind, ms in by_kind.items() if kind != UNTRACED}
+        result = {
+            "total_ms": total,
+            "by_kind_ms": by_kind,
+            "share": {kind: round(ms / total, 3) for kind, ms in by_kind.items()} if total else {},
+            "bottleneck": next(iter(traced), None),
+            "top_spans": [
+                {"kind": kind, "name": name, "ms": ms}
+                for (kind, name), ms in sorted(self.by_span.items(), key=lambda item: -item[1])[:top]
+                if kind != UNTRACED
+            ],
+        }
+        self.by_kind, self.by_span = {}, {}
+        return result
+
+
+def analyze_trace(
+    runs: List[Tuple[Any, Dict[str, Any]]],
+    min_duration_ms: int = 0,
+    kinds: Optional[List[str]] = None,
+    limit: int = 2000,
+    top: int = 10
+) -> Dict[str, Any]:
+    """
+    Builds the waterfall and critical-path summary of a mission from its stored
+    runs, ``[(started_at, trace), ...]`` in start order.
+    """
+    spans, phases, dropped, end_ms = _merge_runs(runs)
+
+    totals: Dict[str, Dict[str, Any]] = {}
+    intervals: Dict[str, List[Tuple[int, int]]] = {}
+    for _, _, kind, _, start, duration, _ in spans:
+        entry = totals.setdefault(kind, {"count": 0, "total_ms": 0, "max_ms": 0})
+        entry["count"] += 1
+        entry["total_ms"] += duration
+        entry["max_ms"] = max(entry["max_ms"], duration)
+        intervals.setdefault(kind, []).append((start, start + duration))
+    for kind, entry in totals.items():
+        # Busy time counts overlapping spans once; total/busy is the average concurrency
+        entry["busy_ms"] = _union_ms(intervals[kind])
+        entry["avg_concurrency"] = round(entry["total_ms"] / entry["busy_ms"], 2) if entry["busy_ms"] else 0.0
+
+    path = _CriticalPath(spans)
+    phase_reports = []
+    windows = [(name, start, end) for name, start, end in phases] or [("mission", 0, end_ms)]
+    if phases and phases[0][1] > 0:
+        # Question generation and setup before the first marked phase
+        windows.insert(0, ("setup", 0, phases[0][1]))
+    overall: Dict[str, int] = {}
+    overall_spans: Dict[Tuple[str, str], int] = {}
+    for name, start, end in windows:
+        path.walk(None, start, end, UNTRACED, UNTRACED)
+        for key, ms in path.by_span.items():
+            overall_spans[key] = overall_spans.get(key, 0) + ms
+        for kind, ms in path.by_kind.items():
+            overall[kind] = overall.get(kind, 0) + ms
+        phase_reports.append({"name": name, "start_ms": start, "end_ms": end,
+                              "duration_ms": end - start, "critical_path": path.drain(top)})
+    path.by_kind, path.by_span = overall, overall_spans
+    critical_path = path.drain(top)
+
+    depth: Dict[int, int] = {}
+    waterfall = []
+    for span_id, parent, kind, name, start, duration, attrs in sorted(spans, key=lambda s: (s[4], s[0])):
+        depth[span_id] = depth.get(parent, -1) + 1 if parent is not None else 0
+        if duration < min_duration_ms or (kinds and kind not in kinds):
+            continue
+        waterfall.append({"id": span_id, "parent": parent, "depth": depth[span_id], "kind": kind,
+                          "name": name, "start_ms": start, "duration_ms": duration, "attrs": attrs or {}})
+
+    return {
+        "started_at": runs[0][0].isoformat() if runs else None,
+        "duration_ms": end_ms,
+        "span_count": len(spans),
+        "dropped_spans": dropped,
+        "totals": totals,
+        "critical_path": critical_path,
+        "phases": phase_reports,
+        "waterfall": waterfall[:limit],
+        "waterfall_truncated": len(waterfall) > limit,
+    }
@@ -0,0 +1,133 @@
+"""
+Novelty-ordered question queue for the initial research phase.
+
+The initial phase explores a tree of LLM-generated questions, and every
+exploration costs several searches, page fetches and LLM calls. Sub-questions
+at depth 1-2 are often paraphrases of each other or of questions already
+explored, which exact string matching does not catch. This queue:
+
+- embeds questions with the retriever's BGE-M3 ``TextEmbedder`` (dense
+  vectors, one batched call per set of sub-questions),
+- drops a question whose cosine similarity to an explored or queued question
+  reaches ``similarity_threshold``,
+- hands out the pending question least similar to everything explored so far,
+  so ``max_questions`` is spent on distinct ground; ties keep FIFO order.
+
+Without an embedder (or with a threshold of 1.0 or more) it behaves like the
+previous FIFO queue with exact-match deduplication.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingQuestion:
+    question: str
+    depth: int
+    seq: int
+    vector: Optional[np.ndarray]
+    # Highest similarity to any explored question; lower means more novel
+    max_similarity: float = 0.0
+
+
+class NoveltyQuestionQueue:
+    def __init__(self, embedder=None, similarity_threshold: float = 0.9):
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.duplicates_skipped = 0
+        self._pending: List[_PendingQuestion] = []
+        self._explored_vectors: List[np.ndarray] = []
+        self._seen = set()
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @property
+    def semantic(self) -> bool:
+        """Whether near-duplicates are detected by embedding similarity."""
+        return self.embedder is not None and self.similarity_threshold < 1.0
+
+    def depth_counts(self) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for pending in self._pending:
+            counts[pending.depth] = counts.get(pending.depth, 0) + 1
+        return counts
+
+    async def add(self, questions: List[str], depth: int) -> int:
+        """Queue ``questions`` at ``depth``, dropping duplicates; returns how many were added."""
+        candidates = [q for q in dict.fromkeys(questions) if q and q not in self._seen]
+        if not candidates:
+            return 0
+        vectors = await self._embed(candidates)
+
+        added = 0
+        for question, vector in zip(candidates, vectors):
+            if vector is not None:
+                similarity, match = self._most_similar(vector)
+                if similarity >= self.similarity_threshold:
+                    self.duplicates_skipped += 1
+                    logger.info(f"Skipping near-duplicate question (similarity {similarity:.2f} to '{match}'): {question}")
+                    continue
+            self._seen.add(question)
+            self._pending.append(_PendingQuestion(
+                question=question,
+                depth=depth,
+                seq=self._seq,
+                vector=vector,
+                max_similarity=self._similarity_to_explored(vector)
+            ))
+            self._seq += 1
+            added += 1
+        return added
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """Remove and return the most novel pending ``(question, depth)``, or None when empty."""
+        if not self._pending:
+            return None
+        best = min(self._pending, key=lambda p: (p.max_similarity, p.seq))
+        self._pending.remove(best)
+        if best.vector is not None:
+            self._explored_vectors.append(best.vector)
+            for pending in self._pending:
+                if pending.vector is not None:
+                    pending.max_similarity = max(pending.max_similarity, float(pending.vector @ best.vector))
+        return best.question, best.depth
+
+    def _similarity_to_explored(self, vector: Optional[np.ndarray]) -> float:
+        if vector is None or not self._explored_vectors:
+            return 0.0
+        return float(np.max(np.stack(self._explored_vectors) @ vector))
+
+    def _most_similar(self, vector: np.ndarray) -> Tuple[float, Optional[str]]:
+        """Highest similarity to an explored or pending question, and the pending question it matched (if any)."""
+        best, match = self._similarity_to_explored(vector), "an explored question"
+        for pending in self._pending:
+            if pending.vector is not None:
+                similarity = float(pending.vector @ vector)
+                if similarity > best:
+                    best, match = similarity, pending.question
+        return best, match
+
+    async def _embed(self, questions: List[str]) -> List[Optional[np.ndarray]]:
+        """Unit-length dense embeddings of ``questions``; None where unavailable."""
+        if not self.semantic:
+            return [None] * len(questions)
+        try:
+            chunks = await self.embedder.embed_chunks_async([{"text": q} for q in questions])
+        except Exception as e:
+            logger.warning(f"Could not embed exploration questions, falling back to exact matching: {e}")
+            return [None] * len(questions)
+
+        vectors: List[Optional[np.ndarray]] = []
+        for chunk in chunks:
+            dense = np.asarray((chunk.get("embeddings") or {}).get("dense") or [], dtype=np.float32)
+            norm = float(np.linalg.norm(dense)) if dense.size else 0.0
+            # Failed batches come back as zero placeholders
+            vectors.append(dense / norm if norm > 0 else None)
+        return vectors
@@ -0,0 +1,374 @@
+"""
+Speculative research prefetch while the user reviews the question set.
+
+After the initial questions are generated the mission sits idle until the user
+has refined and approved them, and only then does initial research prepare its
+queries, search the web and the documents and fetch pages, one question at a
+time. When ``research_prefetch`` is enabled (per mission, in the research
+parameters or via ``RESEARCH_PREFETCH``) that work is started in the
+background as soon as a question set is stored:
+
+- for each question the exploration queries are prepared exactly as
+  ``ResearchAgent.explore_question`` would, then the document and web searches
+  it would issue are run and the returned pages fetched,
+- results are kept per mission, keyed by tool name and arguments, and handed
+  out (as copies) by ``BaseAgent._execute_tool``; prepared queries are reused by
+  ``ResearchAgent._generate_section_queries``,
+- every query preparation, search and fetch costs one unit of a per-user
+  rolling-hour budget (``research_prefetch_budget``); the job stops when it is
+  spent,
+- a refined question set cancels the running job and drops what was fetched
+  for questions that changed; unchanged questions keep their results,
+- approval stops the job but keeps its results for the mission, which discards
+  them once initial research is done or the mission ends.
+
+Question review happens on the API event loop while the mission later runs on
+its own loop in a worker thread, so the store is guarded by a lock and jobs are
+cancelled through their own loop.
+"""
+import asyncio
+import copy
+import inspect
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from ai_researcher import config
+from ai_researcher.dynamic_config import (
+    get_max_query_length, get_research_prefetch_budget, get_research_prefetch_enabled
+)
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_TOOLS = ("document_search", "web_search", "fetch_web_page_content")
+
+# Same techniques explore_question asks the query preparer for
+EXPLORATION_TECHNIQUES = ["simple", "sub_query", "step_back"]
+
+# Per-call arguments that do not change a tool's result
+_CONTEXT_ARGS = {"update_callback", "log_queue", "mission_id", "agent_controller", "agent_name"}
+
+_BUDGET_WINDOW_SECONDS = 3600.0
+
+
+def normalize_question(question: str) -> str:
+    """Case, punctuation and whitespace differences do not change a question materially."""
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+
+def exploration_domain_context(question: str, mission_goal: Optional[str]) -> str:
+    """The domain context ``_generate_section_queries`` builds for an exploration question."""
+    title = f"Exploration: {question[:30]}..."
+    return f"Overall Mission Goal: {mission_goal or 'Not specified'}\nActive Goals:\nNone\nCurrent Section Focus: '{title}' - {question}"
+
+
+def _query_key(domain_context: str, techniques: List[str]) -> Tuple[str, Tuple[str, ...]]:
+    return normalize_question(domain_context), tuple(techniques)
+
+
+def tool_cache_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    args = {k: v for k, v in arguments.items() if k not in _CONTEXT_ARGS}
+    return f"{tool_name}:{json.dumps(args, sort_keys=True, default=str)}"
+
+
+class _MissionPrefetch:
+    def __init__(self):
+        self.generation = 0
+        # normalized question -> {"query_key": ..., "queries": [...], "keys": set of tool keys}
+        self.questions: Dict[str, Dict[str, Any]] = {}
+        # tool key -> (result, stored_at)
+        self.results: Dict[str, Tuple[Any, float]] = {}
+        self.job: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Task]] = None
+        self.hits = 0
+
+
+_lock = threading.Lock()
+_missions: Dict[str, _MissionPrefetch] = {}
+_user_usage: Dict[str, Deque[float]] = {}
+
+
+def _take_budget(user_key: str, limit: int) -> bool:
+    now = time.monotonic()
+    with _lock:
+        usage = _user_usage.setdefault(user_key, deque())
+        while usage and now - usage[0] > _BUDGET_WINDOW_SECONDS:
+            usage.popleft()
+        if len(usage) >= limit:
+            return False
+        usage.append(now)
+        return True
+
+
+def _cancel_job(state: _MissionPrefetch):
+    if state.job is None:
+        return
+    loop, task = state.job
+    state.job = None
+    if task.done():
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        task.cancel()
+    elif not loop.is_closed():
+        loop.call_soon_threadsafe(task.cancel)
+
+
+def _drop_questions(state: _MissionPrefetch, keep: Set[str]):
+    for norm in [q for q in state.questions if q not in keep]:
+        del state.questions[norm]
+    live_keys: Set[str] = set()
+    for entry in state.questions.values():
+        live_keys.update(entry["keys"])
+    for key in [k for k in state.results if k not in live_keys]:
+        del state.results[key]
+
+
+def schedule_prefetch(controller, mission_id: str, questions: List[str]) -> bool:
+    """
+    Starts (or restarts) prefetching for the mission's current question set.
+    Must be called from a running event loop. Returns False when prefetch is off.
+    """
+    if not questions or not get_research_prefetch_enabled(mission_id):
+        return False
+
+    from ai_researcher.user_context import get_current_user
+    user = get_current_user()
+    user_key = str(user.id) if user else "anonymous"
+    budget = get_research_prefetch_budget(mission_id)
+
+    wanted = {normalize_question(q): q for q in questions if q and q.strip()}
+    with _lock:
+        state = _missions.setdefault(mission_id, _MissionPrefetch())
+        _cancel_job(state)
+        state.generation += 1
+        dropped = len([q for q in state.questions if q not in wanted])
+        _drop_questions(state, set(wanted))
+        pending = [q for norm, q in wanted.items() if norm not in state.questions]
+        generation = state.generation
+        if pending:
+            task = asyncio.get_running_loop().create_task(
+                _run_prefetch(controller, mission_id, pending, generation, user_key, budget),
+                name=f"research_prefetch_{mission_id}"
+            )
+            state.job = (asyncio.get_running_loop(), task)
+
+    logger.info(
+        f"Research prefetch for mission {mission_id}: {len(pending)} new question(s), "
+        f"{len(wanted) - len(pending)} kept, {dropped} dropped."
+    )
+    return True
+
+
+def stop_prefetch(mission_id: str, keep_questions: Optional[List[str]] = None, discard: bool = False):
+    """
+    Cancels the mission's running prefetch job. ``keep_questions`` drops results
+    of questions not in the final set; ``discard`` drops all results.
+    """
+    with _lock:
+        state = _missions.get(mission_id)
+        if state is None:
+            return
+        _cancel_job(state)
+        state.generation += 1
+        if keep_questions is not None:
+            _drop_questions(state, {normalize_question(q) for q in keep_questions})
+        if discard:
+            del _missions[mission_id]
+            if state.questions:
+                logger.info(
+                    f"Discarded research prefetch for mission {mission_id} "
+                    f"({len(state.results)} results, {state.hits} used)."
+                )
+
+
+def get_prefetched_queries(mission_id: Optional[str], question: str, domain_context: str,
+                           techniques: List[str]) -> Optional[List[str]]:
+    if not mission_id:
+        return None
+    with _lock:
+        state = _missions.get(mission_id)
+        if state is None:
+            return None
+        entry = state.questions.get(normalize_question(question))
+        if not entry or entry["query_key"] != _query_key(domain_context, techniques) or not entry["queries"]:
+            return None
+        state.hits += 1
+        return list(entry["queries"])
+
+
+def take_prefetched_result(mission_id: Optional[str], tool_name: str, arguments: Dict[str, Any]) -> Optional[Any]:
+    """Returns a copy of a prefetched tool result for these arguments, or None."""
+    if not mission_id or tool_name not in PREFETCH_TOOLS:
+        return None
+    key = tool_cache_key(tool_name, arguments)
+    with _lock:
+        state = _missions.get(mission_id)
+        if state is None:
+            return None
+        cached = state.results.get(key)
+        if cached is None:
+            return None
+        result, stored_at = cached
+        if time.monotonic() - stored_at > config.RESEARCH_PREFETCH_TTL_SECONDS:
+            del state.results[key]
+            return None
+        state.hits += 1
+    return copy.deepcopy(result)
+
+
+def _store(mission_id: str, generation: int, norm: str, entry: Dict[str, Any],
+           results: Dict[str, Any]) -> bool:
+    with _lock:
+        state = _missions.get(mission_id)
+        if state is None or state.generation != generation:
+            return False
+        now = time.monotonic()
+        for key, result in results.items():
+            state.results[key] = (copy.deepcopy(result), now)
+        entry["keys"] = set(results)
+        state.questions[norm] = entry
+        return True
+
+
+def _preferred_source_type(active_goals) -> Optional[str]:
+    for goal in active_goals or []:
+        text = getattr(goal, "text", "") or ""
+        if "Preferred Source Types:" in text:
+            match = re.search(r"Preferred Source Types:?\s*([^\n]+)", text, re.IGNORECASE)
+            if match:
+                return match.group(1).strip()
+    return None
+
+
+async def _run_tool(controller, mission_id: str, tool_name: str, arguments: Dict[str, Any]) -> Optional[Any]:
+    tool = controller.tool_registry.get_tool(tool_name)
+    if not tool:
+        return None
+    call_args = dict(arguments)
+    if "mission_id" in inspect.signature(tool.implementation).parameters:
+        call_args["mission_id"] = mission_id
+    try:
+        result = await controller.tool_registry.execute_tool(tool_name, call_args)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.debug(f"Prefetch {tool_name} failed for mission {mission_id}: {e}")
+        return None
+    if result is None or (isinstance(result, dict) and "error" in result):
+        return None
+    return result
+
+
+async def _prefetch_question(controller, mission_id: str, question: str, mission_goal: str,
+                             metadata: Dict[str, Any], preferred: Optional[str],
+                             take_unit) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    domain_context = exploration_domain_context(question, mission_goal)
+    if not take_unit():
+        return None
+    queries, _ = await controller.query_preparer.prepare_queries(
+        original_query=question,
+        techniques=EXPLORATION_TECHNIQUES,
+        domain_context=domain_context,
+        mission_id=mission_id
+    )
+    queries = queries or [question]
+    entry = {"query_key": _query_key(domain_context, EXPLORATION_TECHNIQUES), "queries": list(queries), "keys": set()}
+
+    tool_selection = metadata.get("tool_selection") or {}
+    use_docs = tool_selection.get("local_rag", True)
+    use_web = tool_selection.get("web_search", True)
+    document_group_id = metadata.get("document_group_id")
+    max_query_len = get_max_query_length(mission_id)
+
+    calls: List[Tuple[str, Dict[str, Any]]] = []
+    for query in queries:
+        if preferred and preferred.lower() not in query.lower():
+            query = f"{query} {preferred}"
+        if use_docs:
+            doc_args = {
+                "query": query,
+                "n_results": config.INITIAL_EXPLORATION_DOC_RESULTS,
+                "use_reranker": config.INITIAL_EXPLORATION_USE_RERANKER
+            }
+            if document_group_id:
+                doc_args["document_group_id"] = str(document_group_id)
+            calls.append(("document_search", doc_args))
+        if use_web and len(query) <= max_query_len:
+            calls.append(("web_search", {"query": query, "max_results": config.INITIAL_EXPLORATION_WEB_RESULTS}))
+
+    calls = [call for call in calls if take_unit()]
+    results: Dict[str, Any] = {}
+    outcomes = await asyncio.gather(*(_run_tool(controller, mission_id, name, args) for name, args in calls))
+    urls: List[str] = []
+    for (name, args), result in zip(calls, outcomes):
+        if result is None:
+            continue
+        results[tool_cache_key(name, args)] = result
+        if name == "web_search":
+            controller.context_manager.increment_web_search_count(mission_id)
+            for item in result.get("results", []) if isinstance(result, dict) else []:
+                url = item.get("url") if isinstance(item, dict) else None
+                if url and url.startswith("http") and url not in urls:
+                    urls.append(url)
+
+    if urls:
+        from ai_researcher.agentic_layer.tools.arxiv_fetcher_tool import ArXivFetcherTool
+        # arXiv URLs are routed to a separate fetcher by BaseAgent and never hit the cache
+        urls = [url for url in urls if not ArXivFetcherTool.is_arxiv_url(url)[0]]
+        fetch_calls = [("fetch_web_page_content", {"url": url}) for url in urls if take_unit()]
+        fetched = await asyncio.gather(*(_run_tool(controller, mission_id, name, args) for name, args in fetch_calls))
+        for (name, args), result in zip(fetch_calls, fetched):
+            if isinstance(result, dict) and "text" in result:
+                results[tool_cache_key(name, args)] = result
+    return entry, results
+
+
+async def _run_prefetch(controller, mission_id: str, questions: List[str], generation: int,
+                        user_key: str, budget: int):
+    exhausted = False
+
+    def take_unit() -> bool:
+        nonlocal exhausted
+        if exhausted or not _take_budget(user_key, budget):
+            exhausted = True
+            return False
+        return True
+
+    mission_context = controller.context_manager.get_mission_context(mission_id)
+    if not mission_context:
+        return
+    mission_goal = mission_context.user_request
+    metadata = dict(mission_context.metadata or {})
+    preferred = _preferred_source_type(controller.context_manager.get_active_goals(mission_id))
+
+    stored = 0
+    try:
+        for question in questions:
+            if exhausted:
+                break
+            prefetched = await _prefetch_question(
+                controller, mission_id, question, mission_goal, metadata, preferred, take_unit
+            )
+            if prefetched is None:
+                continue
+            entry, results = prefetched
+            if not _store(mission_id, generation, normalize_question(question), entry, results):
+                return
+            stored += 1
+    except asyncio.CancelledError:
+        logger.info(f"Research prefetch for mission {mission_id} cancelled after {stored} question(s).")
+        raise
+    except Exception as e:
+        logger.warning(f"Research prefetch for mission {mission_id} failed: {e}", exc_info=True)
+        return
+    if exhausted:
+        logger.info(f"Research prefetch budget used up for user {user_key}; prefetched {stored}/{len(questions)} question(s) of mission {mission_id}.")
+    else:
+        logger.info(f"Research prefetch finished for mission {mission_id}: {stored} question(s).")
@@ -0,0 +1,416 @@
+"""
+Capability registry for the models ModelDispatcher talks to.
+
+Without it every call resolves its model from fresh settings and learns the
+model's limits by failing: an unsupported ``json_schema`` response format, a
+prompt larger than the context window, or a rate limit is only discovered
+when the provider rejects the request, which is then retried as-is.
+
+The registry keeps one ``ModelCapabilities`` record per (provider, base URL,
+model), so two custom endpoints serving the same model name are not mixed up:
+
+- static capabilities (context window, ``json_schema`` support) are probed
+  once, from OpenRouter's ``/models`` listing or the provider's
+  ``models.retrieve`` response, and re-probed after
+  ``MODEL_CAPABILITY_TTL_HOURS``; provider errors fill in whatever probing
+  could not (e.g. "maximum context length is 8192 tokens"),
+- observed behaviour (generation tokens/sec, an exponentially weighted error
+  rate) is updated after every call,
+- records are persisted to ``MODEL_CAPABILITIES_PATH`` so a restart does not
+  rediscover them; from the event loop the file is written in a worker thread.
+
+Rate-limit cooldowns belong to the account rather than the model, so they are
+kept in memory per (credential, model), where the credential is the provider
+plus a hash of the client's base URL and API key: one user hitting their quota
+does not cool down everyone else using the same model.
+
+The dispatcher uses it to trim prompts and clamp ``max_tokens`` to the
+context window, to send ``json_object`` instead of a schema the model is
+known to reject, and, with ``MODEL_SPILLOVER_ENABLED``, to spill requests to
+another configured model when the selected one is rate limited or too small
+for the prompt.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ai_researcher import config
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest observation in the moving error rate / throughput
+_EWMA_ALPHA = 0.2
+# Output tokens always left free when trimming a prompt
+MIN_OUTPUT_TOKENS = 1024
+# Cooldown applied after a rate limit when the provider gives no Retry-After
+DEFAULT_RATE_LIMIT_COOLDOWN = 30.0
+# Format of MODEL_CAPABILITIES_PATH; version 1 keyed records by (provider, model)
+_FILE_VERSION = 2
+
+_CONTEXT_OVERFLOW_MARKERS = (
+    "context_length_exceeded",
+    "maximum context length",
+    "context length",
+    "context window",
+    "prompt is too long",
+    "too many tokens",
+    "max_model_len",
+)
+_CONTEXT_WINDOW_PATTERNS = (
+    re.compile(r"maximum context length is (\d+)", re.I),
+    re.compile(r"context (?:length|window) (?:of|is) (\d+)", re.I),
+    re.compile(r"max_model_len[^\d]{0,20}(\d+)", re.I),
+    re.compile(r"(\d+) tokens? maximum", re.I),
+)
+# Attributes of a models.retrieve() response that carry the context window
+_CONTEXT_WINDOW_FIELDS = ("context_length", "context_window", "max_model_len", "max_context_length", "max_input_tokens")
+
+
+@dataclass
+class ModelCapabilities:
+    provider: str
+    model: str
+    # The endpoint serving the model (see ``endpoint_of``)
+    base_url: str = ""
+    context_window: Optional[int] = None
+    # None until the model has accepted or rejected a json_schema response format
+    json_schema: Optional[bool] = None
+    probed_at: Optional[float] = None
+    calls: int = 0
+    errors: int = 0
+    rate_limits: int = 0
+    context_overflows: int = 0
+    error_rate: float = 0.0
+    tokens_per_sec: Optional[float] = None
+
+    def fits(self, prompt_tokens: int) -> bool:
+        """Whether a prompt of ``prompt_tokens`` leaves room for a response (True when the window is unknown)."""
+        return not self.context_window or prompt_tokens + MIN_OUTPUT_TOKENS <= self.context_window
+
+
+def is_context_overflow_error(error: Any) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in _CONTEXT_OVERFLOW_MARKERS)
+
+
+def parse_context_window(error: Any) -> Optional[int]:
+    """Context window reported in a provider's overflow error, if it names one."""
+    message = str(error)
+    for pattern in _CONTEXT_WINDOW_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            value = int(match.group(1))
+            if value >= 512:
+                return value
+    return None
+
+
+def context_window_from_model_info(info: Any) -> Optional[int]:
+    """Context window from a models.retrieve() result (vLLM, LM Studio, OpenRouter-compatible servers)."""
+    data = {}
+    if info is not None:
+        data.update(getattr(info, "model_extra", None) or {})
+        if isinstance(info, dict):
+            data.update(info)
+    for key in _CONTEXT_WINDOW_FIELDS:
+        value = data.get(key)
+        if isinstance(value, int) and value > 0:
+            return value
+    return None
+
+
+def _content_length(content: Any) -> int:
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, list):
+        return sum(len(part.get("text", "")) if isinstance(part, dict) else len(str(part)) for part in content)
+    return len(str(content or ""))
+
+
+def estimate_prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Rough token count of a chat prompt (~4 characters per token plus per-message overhead)."""
+    return sum(_content_length(m.get("content")) // 4 + 4 for m in messages)
+
+
+def fit_messages_to_context(messages: List[Dict[str, Any]], budget_tokens: int) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Shrink ``messages`` to roughly ``budget_tokens``.
+
+    Drops the oldest history first (keeping the system prompt and the final
+    message, and never leaving a tool result without its call), then cuts
+    the middle out of the longest remaining message. Returns the new list
+    and whether anything was removed.
+    """
+    if budget_tokens <= 0 or estimate_prompt_tokens(messages) <= budget_tokens:
+        return messages, False
+    trimmed = [dict(m) for m in messages]
+    first = 1 if trimmed and trimmed[0].get("role") == "system" else 0
+    while len(trimmed) - first > 1 and estimate_prompt_tokens(trimmed) > budget_tokens:
+        del trimmed[first]
+        while len(trimmed) - first > 1 and trimmed[first].get("role") == "tool":
+            del trimmed[first]
+
+    excess = estimate_prompt_tokens(trimmed) - budget_tokens
+    if excess > 0:
+        longest = max(
+            (m for m in trimmed if isinstance(m.get("content"), str)),
+            key=lambda m: len(m["content"]),
+            default=None
+        )
+        if longest is not None:
+            content = longest["content"]
+            remove = min(len(content), excess * 4 + 200)
+            keep = len(content) - remove
+            head = content[:keep // 2]
+            tail = content[len(content) - (keep - keep // 2):]
+            longest["content"] = (
+                f"{head}\n\n[... {remove} characters omitted to fit the model's context window ...]\n\n{tail}"
+            )
+    return trimmed, True
+
+
+def endpoint_of(client: Any) -> str:
+    """The base URL of ``client``, normalised so it matches the configured one."""
+    return str(getattr(client, "base_url", "") or "").rstrip("/")
+
+
+def credential_key(provider: str, client: Any) -> str:
+    """The account behind ``client``: its provider and a hash of its base URL and API key."""
+    secret = f"{getattr(client, 'base_url', '')}|{getattr(client, 'api_key', '')}"
+    return f"{provider}:{hashlib.sha256(secret.encode()).hexdigest()[:16]}"
+
+
+def _retry_after_seconds(error: Any) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class CapabilityRegistry:
+    """Thread-safe, file-backed store of ``ModelCapabilities`` keyed by (provider, base URL, model)."""
+
+    def __init__(self, path: Path, ttl_seconds: float, save_interval: float = 30.0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.save_interval = save_interval
+        self._entries: Dict[Tuple[str, str, str], ModelCapabilities] = {}
+        # (credential_key, model) -> time the rate limit is expected to lift
+        self._cooldowns: Dict[Tuple[str, str], float] = {}
+        self._probing: set = set()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self._last_save = 0.0
+        # Snapshots are numbered so a slow writer never replaces a newer file
+        self._write_lock = threading.Lock()
+        self._snapshot_seq = 0
+        self._written_seq = 0
+        self._pending_writes: set = set()
+
+    def _load(self) -> None:
+        # Called with the lock held
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable model capability file {self.path}: {e}")
+            return
+        if data.get("version") != _FILE_VERSION:
+            # Older files have no base URLs; their records are simply rediscovered
+            logger.info(f"Ignoring model capability file {self.path} with version {data.get('version')}")
+            return
+        known = {f.name for f in fields(ModelCapabilities)}
+        for record in data.get("models", []):
+            try:
+                caps = ModelCapabilities(**{k: v for k, v in record.items() if k in known})
+            except TypeError:
+                continue
+            self._entries[(caps.provider, caps.base_url, caps.model)] = caps
+        logger.info(f"Loaded capabilities for {len(self._entries)} models from {self.path}")
+
+    def _entry(self, provider: str, model: str, base_url: Optional[str]) -> ModelCapabilities:
+        # Called with the lock held
+        self._load()
+        key = (provider, base_url or "", model)
+        caps = self._entries.get(key)
+        if caps is None:
+            caps = self._entries[key] = ModelCapabilities(provider=provider, model=model, base_url=base_url or "")
+        return caps
+
+    def get(self, provider: Optional[str], model: Optional[str], base_url: Optional[str] = None) -> ModelCapabilities:
+        """A snapshot of what is known about ``model`` at ``base_url`` (an empty record if nothing is)."""
+        if not provider or not model:
+            return ModelCapabilities(provider=provider or "", model=model or "", base_url=base_url or "")
+        with self._lock:
+            return replace(self._entry(provider, model, base_url))
+
+    def update(self, provider: Optional[str], model: Optional[str], base_url: Optional[str] = None, **values: Any) -> None:
+        """Set static capabilities; ``None`` values are ignored."""
+        if not provider or not model:
+            return
+        with self._lock:
+            caps = self._entry(provider, model, base_url)
+            changed = False
+            for name, value in values.items():
+                if value is not None and getattr(caps, name) != value:
+                    setattr(caps, name, value)
+                    changed = True
+            if changed:
+                self._dirty = True
+                logger.info(f"Model capabilities for {provider}/{model} updated: {values}")
+        self.save()
+
+    def claim_probe(self, provider: Optional[str], model: Optional[str], base_url: Optional[str] = None) -> bool:
+        """True if the caller should probe ``model`` now (never probed, or the probe is stale)."""
+        if not provider or not model:
+            return False
+        with self._lock:
+            caps = self._entry(provider, model, base_url)
+            key = (provider, base_url or "", model)
+            if key in self._probing:
+                return False
+            if caps.probed_at and time.time() - caps.probed_at < self.ttl_seconds:
+                return False
+            self._probing.add(key)
+            return True
+
+    def finish_probe(self, provider: str, model: str, base_url: Optional[str] = None, **values: Any) -> None:
+        with self._lock:
+            self._probing.discard((provider, base_url or "", model))
+            self._entry(provider, model, base_url).probed_at = time.time()
+            self._dirty = True
+        self.update(provider, model, base_url, **values)
+        self.save(force=True)
+
+    def record_success(
+        self, provider: Optional[str], model: Optional[str], duration: float, completion_tokens: Optional[int],
+        base_url: Optional[str] = None
+    ) -> None:
+        if not provider or not model:
+            return
+        with self._lock:
+            caps = self._entry(provider, model, base_url)
+            caps.calls += 1
+            caps.error_rate *= (1 - _EWMA_ALPHA)
+            if completion_tokens and duration > 0:
+                rate = completion_tokens / duration
+                caps.tokens_per_sec = rate if caps.tokens_per_sec is None else (
+                    (1 - _EWMA_ALPHA) * caps.tokens_per_sec + _EWMA_ALPHA * rate
+                )
+            self._dirty = True
+        self.save()
+
+    def cooling_down(self, credential: Optional[str], model: Optional[str]) -> bool:
+        """Whether ``credential`` was rate limited on ``model`` and the cooldown has not passed."""
+        with self._lock:
+            return self._cooldowns.get((credential, model), 0.0) > time.time()
+
+    def record_error(
+        self, provider: Optional[str], model: Optional[str], error: Any, credential: Optional[str] = None,
+        base_url: Optional[str] = None
+    ) -> None:
+        """
+        Count a failed call, learning a context window from it where possible.
+
+        A rate limit starts a cooldown for ``credential`` (see ``credential_key``)
+        on this model, from Retry-After when the provider sends one.
+        """
+        if not provider or not model:
+            return
+        status = getattr(error, "status_code", None)
+        is_rate_limit = status == 429 or type(error).__name__ == "RateLimitError"
+        overflow = not is_rate_limit and is_context_overflow_error(error)
+        with self._lock:
+            caps = self._entry(provider, model, base_url)
+            caps.calls += 1
+            caps.errors += 1
+            caps.error_rate = (1 - _EWMA_ALPHA) * caps.error_rate + _EWMA_ALPHA
+            if is_rate_limit:
+                caps.rate_limits += 1
+                if credential:
+                    cooldown = _retry_after_seconds(error) or DEFAULT_RATE_LIMIT_COOLDOWN
+                    key = (credential, model)
+                    self._cooldowns[key] = max(self._cooldowns.get(key, 0.0), time.time() + cooldown)
+            if overflow:
+                caps.context_overflows += 1
+                window = parse_context_window(error)
+                if window:
+                    caps.context_window = window
+            self._dirty = True
+        self.save()
+
+    def save(self, force: bool = False) -> None:
+        """
+        Write the registry if it changed (at most every ``save_interval`` seconds unless forced).
+
+        Called from the dispatcher's event loop, the file is written by
+        ``asyncio.to_thread`` so LLM calls never wait on disk I/O.
+        """
+        with self._lock:
+            if not self._dirty or (not force and time.time() - self._last_save < self.save_interval):
+                return
+            payload = {"version": _FILE_VERSION, "models": [asdict(c) for c in self._entries.values()]}
+            self._dirty = False
+            self._last_save = time.time()
+            self._snapshot_seq += 1
+            seq = self._snapshot_seq
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(payload, seq)
+            return
+        task = loop.create_task(asyncio.to_thread(self._write, payload, seq))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    def _write(self, payload: Dict[str, Any], seq: int) -> None:
+        with self._write_lock:
+            if seq < self._written_seq:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+                with open(temp_path, "w") as f:
+                    json.dump(payload, f, indent=2)
+                os.replace(temp_path, self.path)
+                self._written_seq = seq
+            except OSError as e:
+                logger.warning(f"Failed to persist model capabilities to {self.path}: {e}")
+
+
+capability_registry = CapabilityRegistry(
+    Path(config.MODEL_CAPABILITIES_PATH),
+    ttl_seconds=config.MODEL_CAPABILITY_TTL_HOURS * 3600,
+)
+
+
+def downgrade_json_schema_format(response_format: Dict[str, Any], messages: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Replace a ``json_schema`` response format with ``json_object`` plus the schema as a system instruction."""
+    schema = (response_format.get("json_schema") or {}).get("schema")
+    instruction = "Respond with a single JSON object"
+    instruction += f" that conforms to this JSON schema:\n{json.dumps(schema)}" if schema else "."
+    messages = [dict(m) for m in messages]
+    if messages and messages[0].get("role") == "system":
+        messages[0]["content"] = f"{messages[0]['content']}\n\n{instruction}"
+    else:
+        messages.insert(0, {"role": "system", "content": instruction})
+    return {"type": "json_object"}, messages
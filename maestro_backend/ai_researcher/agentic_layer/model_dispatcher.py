@@ -4,6 +4,7 @@ from typing import List, Dict, Any, Optional, Tuple
 import time
 import logging
 import asyncio
+import contextlib
 import random # <-- Import random for jitter
 import httpx # <-- Import httpx again for pricing fetch
 from decimal import Decimal, InvalidOperation # <-- Import Decimal for accurate cost calculation
@@ -14,6 +15,20 @@ from ai_researcher import config # Use absolute import
 from ai_researcher.dynamic_config import get_model_name
 from ai_researcher.user_context import get_user_settings
 from ai_researcher.global_semaphore import get_global_llm_semaphore
+from ai_researcher.agentic_layer.model_capabilities import (
+    MIN_OUTPUT_TOKENS,
+    capability_registry,
+    context_window_from_model_info,
+    credential_key,
+    downgrade_json_schema_format,
+    endpoint_of,
+    estimate_prompt_tokens,
+    fit_messages_to_context,
+    is_context_overflow_error
+)
+from ai_researcher.agentic_layer.controller.utils.cancellation import is_mission_cancelled, run_cancellable
+from ai_researcher.agentic_layer.controller.utils.mission_trace import trace_span
+from ai_researcher.agentic_layer.controller.utils.status_checks import MissionStoppedException
 
 # Configure logging - respect LOG_LEVEL environment variable
 logger = logging.getLogger(__name__)
@@ -32,6 +47,8 @@ class ModelDispatcher:
         self.context_manager = context_manager
         self.model_pricing_cache: Dict[str, Dict[str, Decimal]] = {}
         self.openai_pricing: Dict[str, Dict[str, Decimal]] = {}
+        # OpenRouter /models metadata (context_length, supported_parameters) used for capability probes
+        self.openrouter_model_info: Dict[str, Dict[str, Any]] = {}
         self.user_settings = user_settings
         
         # Load OpenAI pricing on initialization
@@ -295,6 +312,145 @@ class ModelDispatcher:
         # Ensure the return type matches the async client
         return client, model_name, provider_name
 
+    def resolve_model(self, requested_model: Optional[str] = None, agent_mode: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Return the ``(provider, model_name)`` a call would use, or ``(None, None)`` if none is configured."""
+        provider_name, model_name, _ = self.resolve_endpoint(requested_model, agent_mode)
+        return provider_name, model_name
+
+    def resolve_endpoint(self, requested_model: Optional[str] = None, agent_mode: Optional[str] = None) -> Tuple[Optional[str], Optional[str], str]:
+        """Like ``resolve_model``, plus the base URL the call would go to (the capability registry keys on it)."""
+        try:
+            client, model_name, provider_name = self._select_model_and_client(requested_model=requested_model, agent_mode=agent_mode)
+        except ValueError as e:
+            logger.warning(f"Could not resolve model for agent_mode '{agent_mode}': {e}")
+            return None, None, ""
+        return provider_name, model_name, endpoint_of(client)
+
+    async def calculate_cost(self, provider_name: str, model_name: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Cost in USD of a call with the given token counts; 0.0 when pricing is unknown."""
+        if provider_name == "openrouter":
+            await self._ensure_pricing_loaded() # Ensure pricing is loaded (lazy load)
+            model_pricing = self.model_pricing_cache.get(model_name)
+            if not model_pricing:
+                logger.warning(f"Pricing information not found in cache for model: {model_name}. Cost cannot be calculated.")
+                return 0.0
+        elif provider_name == "openai":
+            # Use loaded OpenAI pricing from configuration file
+            model_pricing = self.openai_pricing.get(model_name)
+            if not model_pricing:
+                logger.warning(f"OpenAI pricing not found for model: {model_name}. Cost set to $0.00. Please update openai_pricing.json")
+                return 0.0
+        else:
+            logger.info(f"Cost calculation skipped: Provider '{provider_name}' is not OpenRouter or OpenAI. Setting cost to $0.00.")
+            return 0.0
+        prompt_cost_per_token = model_pricing.get("prompt", Decimal("0"))
+        completion_cost_per_token = model_pricing.get("completion", Decimal("0"))
+        total_cost = (Decimal(prompt_tokens) * prompt_cost_per_token) + (Decimal(completion_tokens) * completion_cost_per_token)
+        return float(total_cost)
+
+    def _ensure_capabilities_probed(self, client: AsyncOpenAI, provider_name: str, model_name: str) -> None:
+        """Probe a model's static capabilities in the background the first time it is used (and after the TTL)."""
+        if not capability_registry.claim_probe(provider_name, model_name, endpoint_of(client)):
+            return
+        try:
+            asyncio.get_running_loop().create_task(self._probe_capabilities(client, provider_name, model_name))
+        except RuntimeError:
+            capability_registry.finish_probe(provider_name, model_name, endpoint_of(client))
+
+    async def _probe_capabilities(self, client: AsyncOpenAI, provider_name: str, model_name: str) -> None:
+        values: Dict[str, Any] = {}
+        try:
+            if provider_name == "openrouter":
+                await self._ensure_pricing_loaded() # The /models listing carries context length and parameters
+                info = self.openrouter_model_info.get(model_name) or {}
+                values["context_window"] = info.get("context_length")
+                # Observed behaviour wins over the listing
+                if info.get("supported_parameters") and capability_registry.get(provider_name, model_name, endpoint_of(client)).json_schema is None:
+                    values["json_schema"] = "structured_outputs" in info["supported_parameters"]
+            else:
+                info = await asyncio.wait_for(client.models.retrieve(model_name), timeout=10)
+                values["context_window"] = context_window_from_model_info(info)
+        except Exception as e:
+            logger.info(f"Capability probe for {provider_name}/{model_name} incomplete: {e}")
+        finally:
+            capability_registry.finish_probe(provider_name, model_name, endpoint_of(client), **values)
+
+    def _spillover_target(self, provider_name: str, model_name: str, prompt_tokens: int, require_window: bool) -> Optional[Tuple[AsyncOpenAI, str, str]]:
+        """
+        Another model from the user's configuration that can take the request now.
+
+        Candidates are tried in intelligent, mid, fast, verifier order and must
+        not be rate limited on the user's credentials; with ``require_window``
+        their context window must be known to fit the prompt.
+        """
+        current_user_settings = get_user_settings()
+        advanced_models = ((current_user_settings or {}).get("ai_endpoints") or {}).get("advanced_models") or {}
+        for model_type in ("intelligent", "mid", "fast", "verifier"):
+            model_config = advanced_models.get(model_type) or {}
+            candidate_provider, candidate_model = model_config.get("provider"), model_config.get("model_name")
+            if not candidate_provider or not candidate_model or (candidate_provider, candidate_model) == (provider_name, model_name):
+                continue
+            client = self._get_or_create_client(candidate_provider, current_user_settings)
+            if not client:
+                continue
+            capabilities = capability_registry.get(candidate_provider, candidate_model, endpoint_of(client))
+            if not capabilities.fits(prompt_tokens) or (require_window and not capabilities.context_window):
+                continue
+            if not capability_registry.cooling_down(credential_key(candidate_provider, client), candidate_model):
+                return client, candidate_model, candidate_provider
+        return None
+
+    def _fit_to_context(self, messages: List[Dict[str, Any]], max_tokens: int, context_window: int, model_name: str) -> Tuple[List[Dict[str, Any]], int]:
+        """Trim ``messages`` and clamp ``max_tokens`` so prompt and response fit ``context_window``."""
+        reserve = min(max_tokens, max(MIN_OUTPUT_TOKENS, context_window // 8))
+        fitted, trimmed = fit_messages_to_context(messages, context_window - reserve)
+        if trimmed:
+            logger.warning(
+                f"Trimmed prompt for {model_name} from ~{estimate_prompt_tokens(messages)} to "
+                f"~{estimate_prompt_tokens(fitted)} tokens to fit its {context_window}-token context window"
+            )
+        available = context_window - estimate_prompt_tokens(fitted)
+        if max_tokens > available:
+            max_tokens = max(available, min(max_tokens, MIN_OUTPUT_TOKENS))
+        return fitted, max_tokens
+
+    def _apply_capabilities(
+        self,
+        client: AsyncOpenAI,
+        model_name: str,
+        provider_name: str,
+        messages: List[Dict[str, Any]],
+        response_format: Optional[Dict[str, Any]],
+        max_tokens: int
+    ) -> Tuple[AsyncOpenAI, str, str, List[Dict[str, Any]], Optional[Dict[str, Any]], int]:
+        """
+        Adjust a request using what the capability registry knows about the selected model.
+
+        Spills to another configured model when this one is rate limited or
+        too small for the prompt, fits the prompt and ``max_tokens`` to the
+        context window, and downgrades ``json_schema`` for models known to
+        reject it.
+        """
+        self._ensure_capabilities_probed(client, provider_name, model_name)
+        capabilities = capability_registry.get(provider_name, model_name, endpoint_of(client))
+        prompt_tokens = estimate_prompt_tokens(messages)
+        too_small = not capabilities.fits(prompt_tokens)
+        if config.MODEL_SPILLOVER_ENABLED and (
+            too_small or capability_registry.cooling_down(credential_key(provider_name, client), model_name)
+        ):
+            target = self._spillover_target(provider_name, model_name, prompt_tokens, require_window=too_small)
+            if target:
+                reason = "context window too small" if too_small else "rate limited"
+                logger.warning(f"Spilling request from {provider_name}/{model_name} ({reason}) to {target[2]}/{target[1]}")
+                client, model_name, provider_name = target
+                capabilities = capability_registry.get(provider_name, model_name, endpoint_of(client))
+        if capabilities.context_window:
+            messages, max_tokens = self._fit_to_context(messages, max_tokens, capabilities.context_window, model_name)
+        if capabilities.json_schema is False and response_format and response_format.get("type") == "json_schema":
+            logger.info(f"{provider_name}/{model_name} does not support json_schema; sending json_object with schema instructions")
+            response_format, messages = downgrade_json_schema_format(response_format, messages)
+        return client, model_name, provider_name, messages, response_format, max_tokens
+
     def _load_openai_pricing(self):
         """
         Load OpenAI pricing from the JSON configuration file.
@@ -386,6 +542,11 @@ class ModelDispatcher:
                 for model_info in models_data["data"]:
                     model_id = model_info.get("id")
                     pricing = model_info.get("pricing")
+                    if model_id:
+                        self.openrouter_model_info[model_id] = {
+                            "context_length": model_info.get("context_length"),
+                            "supported_parameters": model_info.get("supported_parameters") or [],
+                        }
                     if model_id and isinstance(pricing, dict):
                         try:
                             # Use Decimal for precision, default to 0 if price is missing/invalid
@@ -419,7 +580,36 @@ class ModelDispatcher:
         # else: # Optional: Log cache hit
             # logger.debug("Pricing cache already populated.")
 
-    async def dispatch( # <-- Make method async
+    async def dispatch(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        agent_mode: Optional[str] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Any] = None,
+        response_format: Optional[Dict[str, str]] = None,
+        log_queue: Optional[Any] = None,
+        update_callback: Optional[Any] = None,
+        mission_id: Optional[str] = None,
+        **kwargs: Any
+    ) -> Tuple[Optional[Any], Optional[Dict[str, Any]]]:
+        """
+        Sends a chat completion request (see ``_dispatch``). The call, including
+        retries and semaphore waits, is abandoned as soon as the mission is paused
+        or stopped, returning the same ``cancelled`` details as a pre-call check.
+        """
+        call = self._dispatch(
+            messages, model=model, agent_mode=agent_mode, tools=tools, tool_choice=tool_choice,
+            response_format=response_format, log_queue=log_queue, update_callback=update_callback,
+            mission_id=mission_id, **kwargs
+        )
+        try:
+            return await run_cancellable(mission_id, call)
+        except MissionStoppedException as e:
+            logger.info(f"Cancelled in-flight LLM call for mission {mission_id}: mission {e.status}.")
+            return None, {"cancelled": True, "reason": f"Mission {e.status}"}
+
+    async def _dispatch( # <-- Make method async
         self,
         messages: List[Dict[str, str]],
         model: Optional[str] = None, # Specific model override
@@ -488,6 +678,11 @@ class ModelDispatcher:
         temperature_for_call = config.AGENT_ROLE_TEMPERATURE.get(effective_agent_mode, config.AGENT_ROLE_TEMPERATURE["default"])
         # --- END NEW ---
 
+        client, selected_model_name, provider_name, messages, response_format, max_tokens_for_call = self._apply_capabilities(
+            client, selected_model_name, provider_name, messages, response_format, max_tokens_for_call
+        )
+        context_refit_done = False
+
         # --- CRITICAL DEBUG LOGGING ---
         # print(f"🚀🚀🚀 DISPATCHING LLM REQUEST 🚀🚀🚀")
         # print(f"   Provider: {provider_name}")
@@ -602,22 +797,18 @@ class ModelDispatcher:
                 # User semaphore limits per-user concurrency, global limits total server load
                 global_semaphore = get_global_llm_semaphore()
                 
-                if self.semaphore and global_semaphore:
-                    # Acquire both semaphores - user limit AND global limit
-                    async with self.semaphore:
-                        async with global_semaphore:
-                            response = await client.chat.completions.create(**request_params)
-                elif self.semaphore:
-                    # Only user semaphore
-                    async with self.semaphore:
-                        response = await client.chat.completions.create(**request_params)
-                elif global_semaphore:
-                    # Only global semaphore
-                    async with global_semaphore:
+                async with contextlib.AsyncExitStack() as slots:
+                    # The wait for a slot is traced separately from the call itself
+                    async with trace_span(mission_id, "llm_queue", effective_agent_mode):
+                        if self.semaphore:
+                            await slots.enter_async_context(self.semaphore)
+                        if global_semaphore:
+                            await slots.enter_async_context(global_semaphore)
+                    async with trace_span(mission_id, "llm", effective_agent_mode,
+                                          model=selected_model_name, attempt=attempt + 1) as llm_span:
                         response = await client.chat.completions.create(**request_params)
-                else:
-                    # No semaphores
-                    response = await client.chat.completions.create(**request_params)
+                        if response is not None and getattr(response, "usage", None):
+                            llm_span.attrs["tokens"] = response.usage.total_tokens
                 end_time = time.time()
                 duration = end_time - start_time
                 
@@ -651,39 +842,9 @@ class ModelDispatcher:
                     model_call_details["total_tokens"] = total_tokens
                     logger.info(f"Usage - Prompt: {prompt_tokens}, Completion: {completion_tokens}, Total: {total_tokens}")
 
-                    # Calculate cost based on provider
-                    if provider_name == "openrouter":
-                        await self._ensure_pricing_loaded() # Ensure pricing is loaded (lazy load)
-                        model_pricing = self.model_pricing_cache.get(selected_model_name)
-                        if model_pricing:
-                            prompt_cost_per_token = model_pricing.get("prompt", Decimal("0"))
-                            completion_cost_per_token = model_pricing.get("completion", Decimal("0"))
-                            total_cost = (Decimal(prompt_tokens) * prompt_cost_per_token) + (Decimal(completion_tokens) * completion_cost_per_token)
-                            # Calculate cost only if tokens are non-zero to avoid potential issues
-                            if prompt_tokens > 0 or completion_tokens > 0:
-                                 total_cost = (Decimal(prompt_tokens) * prompt_cost_per_token) + (Decimal(completion_tokens) * completion_cost_per_token)
-                            # Store cost as float in details
-                            model_call_details["cost"] = float(total_cost)
-                            # Log here, inside the openrouter check, as cost is specific to it
-                            # logger.info(f"Calculated cost for {selected_model_name}: ${total_cost:.6f}") # MOVED logging below
-                        else:
-                            logger.warning(f"Pricing information not found in cache for model: {selected_model_name}. Cost cannot be calculated.")
-                            model_call_details["cost"] = 0.0 # Set cost to 0 if pricing not found
-                    elif provider_name == "openai":
-                        # Use loaded OpenAI pricing from configuration file
-                        model_pricing = self.openai_pricing.get(selected_model_name)
-                        if model_pricing:
-                            prompt_cost_per_token = model_pricing.get("prompt", Decimal("0"))
-                            completion_cost_per_token = model_pricing.get("completion", Decimal("0"))
-                            total_cost = (Decimal(prompt_tokens) * prompt_cost_per_token) + (Decimal(completion_tokens) * completion_cost_per_token)
-                            model_call_details["cost"] = float(total_cost)
-                            logger.info(f"Calculated OpenAI cost for {selected_model_name}: ${float(total_cost):.6f}")
-                        else:
-                            logger.warning(f"OpenAI pricing not found for model: {selected_model_name}. Cost set to $0.00. Please update openai_pricing.json")
-                            model_call_details["cost"] = 0.0
-                    else:
-                         logger.info(f"Cost calculation skipped: Provider '{provider_name}' is not OpenRouter or OpenAI. Setting cost to $0.00.")
-                         model_call_details["cost"] = 0.0 # Set cost to 0 for other providers
+                    model_call_details["cost"] = await self.calculate_cost(
+                        provider_name, selected_model_name, prompt_tokens, completion_tokens
+                    )
 
                     # --- COMPREHENSIVE COST TRACKING LOGS ---
                     # Log the calculated cost with detailed tracking info for analysis
@@ -714,6 +875,10 @@ class ModelDispatcher:
                     logger.info(f"Calculated cost for {selected_model_name}: $0.000000")
                 # --- END NEW ---
 
+                capability_registry.record_success(provider_name, selected_model_name, duration, completion_tokens, endpoint_of(client))
+                if response_format and response_format.get("type") == "json_schema":
+                    capability_registry.update(provider_name, selected_model_name, endpoint_of(client), json_schema=True)
+
                 # More robust check for valid response structure
                 if response and response.choices and response.choices[0].message: # Check message exists, content check below
                      # Check if content is non-empty string OR if there are tool calls
@@ -822,6 +987,7 @@ class ModelDispatcher:
                     f"API_ATTEMPT_END|attempt_id={attempt_id}|success=False|error=RateLimitError|"
                     f"timestamp={time.time()}"
                 )
+                capability_registry.record_error(provider_name, selected_model_name, e, credential_key(provider_name, client), endpoint_of(client))
                 
                 # Track estimated cost for failed attempt (OpenRouter still charges for rate limited calls)
                 # Estimate based on request size
@@ -850,6 +1016,7 @@ class ModelDispatcher:
                     f"API_ATTEMPT_END|attempt_id={attempt_id}|success=False|error=APIConnectionError|"
                     f"timestamp={time.time()}"
                 )
+                capability_registry.record_error(provider_name, selected_model_name, e, credential_key(provider_name, client), endpoint_of(client))
                 
                 # Track estimated cost for failed attempt
                 if provider_name == "openrouter":
@@ -877,6 +1044,7 @@ class ModelDispatcher:
                     f"API_ATTEMPT_END|attempt_id={attempt_id}|success=False|error=APIStatusError_{e.status_code}|"
                     f"timestamp={time.time()}"
                 )
+                capability_registry.record_error(provider_name, selected_model_name, e, credential_key(provider_name, client), endpoint_of(client))
                 
                 # Track actual cost if available in error response, or estimate
                 if provider_name == "openrouter":
@@ -959,10 +1127,24 @@ class ModelDispatcher:
                             request_params["temperature"] = 1
                         # Continue with retry logic below
                 
+                # A context overflow teaches us the window (record_error parses it): refit once and retry
+                if e.status_code in (400, 413) and is_context_overflow_error(e) and not context_refit_done:
+                    context_window = capability_registry.get(provider_name, selected_model_name, endpoint_of(client)).context_window
+                    if context_window:
+                        context_refit_done = True
+                        tokens_key = "max_completion_tokens" if "max_completion_tokens" in request_params else "max_tokens"
+                        request_params["messages"], request_params[tokens_key] = self._fit_to_context(
+                            request_params["messages"], request_params[tokens_key], context_window, selected_model_name
+                        )
+                        logger.warning(f"Context overflow on {selected_model_name}; retrying with the prompt fitted to {context_window} tokens")
+                        continue
+
                 # Check if this is a schema-related error that might be fixed by fallback
                 from ai_researcher.agentic_layer.utils.json_format_helper import should_retry_with_json_object
                 
                 if e.status_code == 400 and should_retry_with_json_object(e):
+                    if response_format and response_format.get("type") == "json_schema":
+                        capability_registry.update(provider_name, selected_model_name, endpoint_of(client), json_schema=False)
                     # This is likely a json_schema compatibility issue, re-raise so agent can handle fallback
                     logger.warning(f"API status error appears to be schema-related (Status=400): {str(e)[:200]}... Re-raising for potential fallback.")
                     raise e
@@ -976,6 +1158,7 @@ class ModelDispatcher:
                     f"API_ATTEMPT_END|attempt_id={attempt_id}|success=False|error={type(e).__name__}|"
                     f"timestamp={time.time()}"
                 )
+                capability_registry.record_error(provider_name, selected_model_name, e, credential_key(provider_name, client), endpoint_of(client))
                 
                 # Track estimated cost for failed attempt
                 if provider_name == "openrouter":
@@ -1043,7 +1226,8 @@ class ModelDispatcher:
         tools: Optional[List[Dict[str, Any]]] = None,
         tool_choice: Optional[Any] = None,
         response_format: Optional[Dict[str, str]] = None,
-        mission_id: Optional[str] = None
+        mission_id: Optional[str] = None,
+        include_usage: bool = False
     ):
         """
         Streams the LLM response using the appropriate client and model.
@@ -1056,9 +1240,11 @@ class ModelDispatcher:
             tool_choice: Optional tool choice constraint.
             response_format: Optional response format constraint.
             mission_id: Optional mission ID for status checking.
+            include_usage: Ask the provider for a final chunk carrying token usage.
 
         Yields:
-            Streaming response chunks from the LLM.
+            Streaming response chunks from the LLM. Closing the generator early
+            closes the HTTP stream, so the provider stops generating.
         """
         # Check mission status before proceeding with LLM call
         if self.context_manager and mission_id:
@@ -1083,6 +1269,10 @@ class ModelDispatcher:
         max_tokens_for_call = config.AGENT_ROLE_MAX_TOKENS.get(effective_agent_mode, config.AGENT_ROLE_MAX_TOKENS["default"])
         temperature_for_call = config.AGENT_ROLE_TEMPERATURE.get(effective_agent_mode, config.AGENT_ROLE_TEMPERATURE["default"])
 
+        client, selected_model_name, provider_name, messages, response_format, max_tokens_for_call = self._apply_capabilities(
+            client, selected_model_name, provider_name, messages, response_format, max_tokens_for_call
+        )
+
         logger.info(f"Dispatching streaming request via client for '{client.base_url}' to model: {selected_model_name} (Agent Mode: {effective_agent_mode}, Max Tokens: {max_tokens_for_call}, Temp: {temperature_for_call})")
 
         request_params = {
@@ -1105,6 +1295,8 @@ class ModelDispatcher:
             request_params["tool_choice"] = tool_choice
         if response_format:
             request_params["response_format"] = response_format
+        if include_usage:
+            request_params["stream_options"] = {"include_usage": True}
 
         try:
             start_time = time.time()
@@ -1116,37 +1308,54 @@ class ModelDispatcher:
                 # Acquire both semaphores for initial connection only
                 async with self.semaphore:
                     async with global_semaphore:
-                        stream = await client.chat.completions.create(**request_params)
+                        stream = await run_cancellable(mission_id, client.chat.completions.create(**request_params))
                 logger.info(f"Started streaming LLM call using model '{selected_model_name}' (both semaphores released)")
             elif self.semaphore:
                 async with self.semaphore:
-                    stream = await client.chat.completions.create(**request_params)
+                    stream = await run_cancellable(mission_id, client.chat.completions.create(**request_params))
                 logger.info(f"Started streaming LLM call using model '{selected_model_name}' (user semaphore released)")
             elif global_semaphore:
                 async with global_semaphore:
-                    stream = await client.chat.completions.create(**request_params)
+                    stream = await run_cancellable(mission_id, client.chat.completions.create(**request_params))
                 logger.info(f"Started streaming LLM call using model '{selected_model_name}' (global semaphore released)")
             else:
-                stream = await client.chat.completions.create(**request_params)
+                stream = await run_cancellable(mission_id, client.chat.completions.create(**request_params))
                 logger.info(f"Started streaming LLM call using model '{selected_model_name}')")
             
             # Yield each chunk from the stream (semaphore already released)
-            async for chunk in stream:
-                yield chunk
+            completion_tokens = None
+            try:
+                async for chunk in stream:
+                    if getattr(chunk, "usage", None):
+                        completion_tokens = chunk.usage.completion_tokens
+                    yield chunk
+                    if is_mission_cancelled(mission_id):
+                        logger.info(f"Mission {mission_id} was paused or stopped. Closing streaming LLM call.")
+                        return
+            finally:
+                await stream.close()
                 
             end_time = time.time()
             duration = end_time - start_time
             logger.info(f"Completed streaming LLM call using model '{selected_model_name}' in {duration:.2f}s")
+            capability_registry.record_success(provider_name, selected_model_name, duration, completion_tokens, endpoint_of(client))
             
+        except MissionStoppedException as e:
+            logger.info(f"Cancelled streaming LLM call for mission {mission_id}: mission {e.status}.")
+            return
         except openai.RateLimitError as e:
             logger.error(f"Rate limit error during streaming LLM call: {e}")
+            capability_registry.record_error(provider_name, selected_model_name, e, credential_key(provider_name, client), endpoint_of(client))
             raise e
         except openai.APIConnectionError as e:
             logger.error(f"API connection error during streaming LLM call: {e}")
+            capability_registry.record_error(provider_name, selected_model_name, e, credential_key(provider_name, client), endpoint_of(client))
             raise e
         except openai.APIStatusError as e:
             logger.error(f"API status error during streaming LLM call: Status={e.status_code}, Response={e.response}")
+            capability_registry.record_error(provider_name, selected_model_name, e, credential_key(provider_name, client), endpoint_of(client))
             raise e
         except Exception as e:
             logger.error(f"Unexpected error during streaming LLM call: {e}", exc_info=True)
+            capability_registry.record_error(provider_name, selected_model_name, e, credential_key(provider_name, client), endpoint_of(client))
             raise e
@@ -6,11 +6,19 @@ It detects arXiv URLs and uses various methods to get the best quality content:
 1. ar5iv HTML (best) - Clean HTML version with proper formatting
 2. LaTeX source - Original source that can be processed
 3. PDF fallback - When other methods fail
+
+The three are tried in parallel and the first to yield text wins. All
+requests share one pooled HTTP session per event loop, rate limited per
+arXiv's API terms; concurrent metadata lookups are batched into a single
+export.arxiv.org ``id_list`` request and parsed metadata is cached
+separately from full text.
 """
 
 import logging
 import re
 import asyncio
+import time
+import weakref
 import aiohttp
 import fitz  # PyMuPDF
 import xml.etree.ElementTree as ET
@@ -32,6 +40,197 @@ logger = logging.getLogger(__name__)
 # Cache directory for arXiv papers
 CACHE_DIR = pathlib.Path("ai_researcher/data/arxiv_cache/")
 
+# Parsed metadata is cached separately from full text and kept longer
+METADATA_CACHE_TTL = datetime.timedelta(days=30)
+CONTENT_CACHE_TTL = datetime.timedelta(days=7)
+
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+# arXiv API terms of use: no more than one request every three seconds
+ARXIV_API_MIN_INTERVAL = 3.0
+# Polite spacing for arxiv.org / ar5iv content downloads (at most 4 per second)
+ARXIV_CONTENT_MIN_INTERVAL = 0.25
+# Ids per export.arxiv.org request
+ARXIV_METADATA_BATCH_SIZE = 100
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+ATOM_NAMESPACES = {
+    'atom': 'http://www.w3.org/2005/Atom',
+    'arxiv': 'http://arxiv.org/schemas/atom'
+}
+
+
+def _normalize_arxiv_id(arxiv_id: str) -> str:
+    """Version-less, lowercase id; old-style ``cs.AI/0301234`` becomes ``cs/0301234`` as in API responses."""
+    normalized = re.sub(r'v\d+$', '', arxiv_id.strip().lower())
+    return re.sub(r'^([a-z\-]+)\.[a-z]{2}/', r'\1/', normalized)
+
+
+class _RateLimiter:
+    """Spaces out requests so that consecutive ones start at least ``min_interval`` seconds apart."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_slot = max(now, self._next_slot) + self.min_interval
+
+
+class _ArxivClient:
+    """
+    Pooled HTTP session, rate limiters and metadata request batcher for one event loop.
+
+    Concurrent metadata lookups are queued while the API rate limiter is
+    waiting and then sent as a single ``id_list`` request.
+    """
+
+    def __init__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=16, limit_per_host=4, ttl_dns_cache=300),
+            headers={'User-Agent': USER_AGENT}
+        )
+        self.api_limiter = _RateLimiter(ARXIV_API_MIN_INTERVAL)
+        self.content_limiter = _RateLimiter(ARXIV_CONTENT_MIN_INTERVAL)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def fetch_metadata(self, arxiv_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for arxiv_id in arxiv_ids:
+            future = self._pending.get(arxiv_id)
+            if future is None:
+                future = loop.create_future()
+                self._pending[arxiv_id] = future
+            futures[arxiv_id] = future
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+        # Shield the shared futures so one cancelled caller does not cancel the others
+        results = await asyncio.gather(*(asyncio.shield(f) for f in futures.values()))
+        return dict(zip(futures, results))
+
+    async def _flush(self):
+        while self._pending:
+            await self.api_limiter.wait()
+            batch_ids = list(self._pending)[:ARXIV_METADATA_BATCH_SIZE]
+            futures = {arxiv_id: self._pending.pop(arxiv_id) for arxiv_id in batch_ids}
+            try:
+                found = await self._query_metadata(batch_ids)
+            except Exception as e:
+                logger.error(f"Error fetching arXiv metadata for {len(batch_ids)} ids: {e}", exc_info=True)
+                found = {}
+            for arxiv_id, future in futures.items():
+                if not future.done():
+                    future.set_result(found.get(arxiv_id))
+
+    async def _query_metadata(self, arxiv_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        params = {"id_list": ",".join(arxiv_ids), "max_results": str(len(arxiv_ids))}
+        async with self.session.get(ARXIV_API_URL, params=params, timeout=aiohttp.ClientTimeout(total=30)) as response:
+            if response.status != 200:
+                logger.error(f"Failed to fetch arXiv metadata: HTTP {response.status}")
+                return {}
+            xml_content = await response.text()
+
+        root = ET.fromstring(xml_content)
+        requested = {_normalize_arxiv_id(arxiv_id): arxiv_id for arxiv_id in arxiv_ids}
+        results = {}
+        for entry in root.findall('atom:entry', ATOM_NAMESPACES):
+            entry_url = entry.findtext('atom:id', '', ATOM_NAMESPACES)
+            if '/abs/' not in entry_url:
+                continue  # error entries for invalid ids
+            arxiv_id = requested.get(_normalize_arxiv_id(entry_url.split('/abs/', 1)[1]))
+            if arxiv_id:
+                results[arxiv_id] = _parse_metadata_entry(entry, arxiv_id)
+        logger.info(f"Fetched arXiv metadata for {len(results)}/{len(arxiv_ids)} papers in one request")
+        return results
+
+    async def close(self):
+        if not self.session.closed:
+            await self.session.close()
+
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _ArxivClient]" = weakref.WeakKeyDictionary()
+
+
+def _get_client() -> _ArxivClient:
+    """Return the shared client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.session.closed:
+        client = _ArxivClient()
+        _clients[loop] = client
+    return client
+
+
+async def close_arxiv_client():
+    """Close the pooled arXiv session of the running event loop (call on shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client:
+        await client.close()
+
+
+def _parse_metadata_entry(entry: ET.Element, arxiv_id: str) -> Dict[str, Any]:
+    """Extract paper metadata from an arXiv API Atom entry."""
+    namespaces = ATOM_NAMESPACES
+    metadata = {
+        'arxiv_id': arxiv_id,
+        'title': entry.findtext('atom:title', '', namespaces).strip(),
+        'abstract': entry.findtext('atom:summary', '', namespaces).strip(),
+        'published': entry.findtext('atom:published', '', namespaces),
+        'updated': entry.findtext('atom:updated', '', namespaces),
+        'authors': [],
+        'categories': [],
+        'pdf_url': f"https://arxiv.org/pdf/{arxiv_id}.pdf",
+        'abs_url': f"https://arxiv.org/abs/{arxiv_id}"
+    }
+    
+    # Extract authors
+    for author in entry.findall('atom:author', namespaces):
+        name = author.findtext('atom:name', '', namespaces).strip()
+        if name:
+            metadata['authors'].append(name)
+    
+    # Extract categories
+    for category in entry.findall('atom:category', namespaces):
+        term = category.get('term')
+        if term:
+            metadata['categories'].append(term)
+    
+    # Extract comment (often contains conference info)
+    comment = entry.findtext('arxiv:comment', '', namespaces)
+    if comment:
+        metadata['comment'] = comment.strip()
+    
+    # Extract journal reference if available
+    journal_ref = entry.findtext('arxiv:journal_ref', '', namespaces)
+    if journal_ref:
+        metadata['journal_ref'] = journal_ref.strip()
+    
+    # Parse publication year from published date
+    if metadata['published']:
+        try:
+            pub_date = datetime.datetime.fromisoformat(metadata['published'].replace('Z', '+00:00'))
+            metadata['publication_year'] = pub_date.year
+        except:
+            pass
+    
+    return metadata
+
+
+def _cache_is_fresh(path: pathlib.Path, ttl: datetime.timedelta) -> bool:
+    if not path.exists():
+        return False
+    mod_time = datetime.datetime.fromtimestamp(os.path.getmtime(path), tz=datetime.timezone.utc)
+    return datetime.datetime.now(datetime.timezone.utc) - mod_time < ttl
+
+
 class ArXivFetcherTool:
     """
     Specialized tool for fetching arXiv papers.
@@ -78,91 +277,61 @@ class ArXivFetcherTool:
                 return True, base_id
         return False, None
     
+    def _metadata_cache_path(self, arxiv_id: str) -> pathlib.Path:
+        cache_key = hashlib.sha256(f"arxiv_metadata_{_normalize_arxiv_id(arxiv_id)}".encode()).hexdigest()
+        return CACHE_DIR / f"{cache_key}.arxiv_meta.json"
+    
     async def fetch_arxiv_metadata(self, arxiv_id: str) -> Optional[Dict[str, Any]]:
         """
         Fetch metadata from arXiv API.
         
+        Concurrent calls are batched into shared ``id_list`` requests.
+        
         Args:
             arxiv_id: The arXiv paper ID
             
         Returns:
             Dictionary with paper metadata or None if failed
         """
-        api_url = f"http://export.arxiv.org/api/query?id_list={arxiv_id}"
+        return (await self.fetch_arxiv_metadata_batch([arxiv_id])).get(arxiv_id)
+    
+    async def fetch_arxiv_metadata_batch(self, arxiv_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch metadata for many arXiv papers, using the metadata cache and as few API requests as possible.
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(api_url, timeout=30) as response:
-                    if response.status != 200:
-                        logger.error(f"Failed to fetch arXiv metadata: HTTP {response.status}")
-                        return None
-                    
-                    xml_content = await response.text()
-                    
-            # Parse XML response
-            root = ET.fromstring(xml_content)
-            
-            # Define namespaces
-            namespaces = {
-                'atom': 'http://www.w3.org/2005/Atom',
-                'arxiv': 'http://arxiv.org/schemas/atom'
-            }
-            
-            # Find the entry
-            entry = root.find('atom:entry', namespaces)
-            if entry is None:
-                logger.warning(f"No entry found for arXiv ID: {arxiv_id}")
-                return None
-            
-            # Extract metadata
-            metadata = {
-                'arxiv_id': arxiv_id,
-                'title': entry.findtext('atom:title', '', namespaces).strip(),
-                'abstract': entry.findtext('atom:summary', '', namespaces).strip(),
-                'published': entry.findtext('atom:published', '', namespaces),
-                'updated': entry.findtext('atom:updated', '', namespaces),
-                'authors': [],
-                'categories': [],
-                'pdf_url': f"https://arxiv.org/pdf/{arxiv_id}.pdf",
-                'abs_url': f"https://arxiv.org/abs/{arxiv_id}"
-            }
-            
-            # Extract authors
-            for author in entry.findall('atom:author', namespaces):
-                name = author.findtext('atom:name', '', namespaces).strip()
-                if name:
-                    metadata['authors'].append(name)
-            
-            # Extract categories
-            for category in entry.findall('atom:category', namespaces):
-                term = category.get('term')
-                if term:
-                    metadata['categories'].append(term)
-            
-            # Extract comment (often contains conference info)
-            comment = entry.findtext('arxiv:comment', '', namespaces)
-            if comment:
-                metadata['comment'] = comment.strip()
-            
-            # Extract journal reference if available
-            journal_ref = entry.findtext('arxiv:journal_ref', '', namespaces)
-            if journal_ref:
-                metadata['journal_ref'] = journal_ref.strip()
+        Args:
+            arxiv_ids: arXiv paper IDs
             
-            # Parse publication year from published date
-            if metadata['published']:
+        Returns:
+            Dictionary mapping each ID to its metadata, or None if it could not be fetched
+        """
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        missing = []
+        for arxiv_id in dict.fromkeys(arxiv_ids):
+            cache_path = self._metadata_cache_path(arxiv_id)
+            try:
+                if _cache_is_fresh(cache_path, METADATA_CACHE_TTL):
+                    with open(cache_path, 'r', encoding='utf-8') as f:
+                        results[arxiv_id] = json.load(f)
+                    continue
+            except Exception as e:
+                logger.warning(f"Error reading metadata cache for arXiv paper {arxiv_id}: {e}")
+            missing.append(arxiv_id)
+        
+        if missing:
+            fetched = await _get_client().fetch_metadata(missing)
+            for arxiv_id, metadata in fetched.items():
+                results[arxiv_id] = metadata
+                if metadata is None:
+                    logger.warning(f"No entry found for arXiv ID: {arxiv_id}")
+                    continue
                 try:
-                    pub_date = datetime.datetime.fromisoformat(metadata['published'].replace('Z', '+00:00'))
-                    metadata['publication_year'] = pub_date.year
-                except:
-                    pass
-            
-            logger.info(f"Successfully fetched metadata for arXiv paper: {metadata['title']}")
-            return metadata
-            
-        except Exception as e:
-            logger.error(f"Error fetching arXiv metadata for {arxiv_id}: {e}", exc_info=True)
-            return None
+                    with open(self._metadata_cache_path(arxiv_id), 'w', encoding='utf-8') as f:
+                        json.dump(metadata, f)
+                except Exception as e:
+                    logger.warning(f"Failed to cache metadata for arXiv paper {arxiv_id}: {e}")
+        
+        return results
     
     async def fetch_ar5iv_html(self, arxiv_id: str) -> Optional[str]:
         """
@@ -175,6 +344,7 @@ class ArXivFetcherTool:
         Returns:
             Extracted text from HTML or None if failed
         """
+        client = _get_client()
         # Try both ar5iv.labs.arxiv.org and arxiv.org/html (which redirects to ar5iv)
         ar5iv_urls = [
             f"https://ar5iv.labs.arxiv.org/html/{arxiv_id}",
@@ -183,61 +353,24 @@ class ArXivFetcherTool:
         
         for ar5iv_url in ar5iv_urls:
             try:
-                async with aiohttp.ClientSession() as session:
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    }
+                await client.content_limiter.wait()
+                async with client.session.get(ar5iv_url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                    if response.status != 200:
+                        logger.debug(f"ar5iv not available at {ar5iv_url}: HTTP {response.status}")
+                        continue
                     
-                    async with session.get(ar5iv_url, headers=headers, timeout=30) as response:
-                        if response.status != 200:
-                            logger.debug(f"ar5iv not available at {ar5iv_url}: HTTP {response.status}")
-                            continue
-                        
-                        html_content = await response.text()
-                        
-                        # Check if we got a real paper or an error/template page
-                        if "You will be analyzing" in html_content or "paper_summaries" in html_content:
-                            logger.warning(f"Got template/prompt content instead of paper from {ar5iv_url}")
-                            continue
-                        
-                        # Parse HTML and extract text
-                        soup = BeautifulSoup(html_content, 'html.parser')
-                        
-                        # Remove script, style, and navigation elements
-                        for element in soup(["script", "style", "nav", "header", "footer"]):
-                            element.decompose()
-                        
-                        # Try to find the main article content
-                        main_content = None
-                        
-                        # Look for specific ar5iv/arxiv HTML structure
-                        for selector in ['article', 'div.ltx_document', 'main', 'div#main-content']:
-                            main_content = soup.select_one(selector)
-                            if main_content:
-                                break
-                        
-                        if not main_content:
-                            main_content = soup.find('body')
-                        
-                        if main_content:
-                            # Convert to markdown for better formatting
-                            h = html2text.HTML2Text()
-                            h.ignore_links = False
-                            h.ignore_images = True
-                            h.body_width = 0  # Don't wrap lines
-                            h.skip_internal_links = True
-                            
-                            text = h.handle(str(main_content))
-                            
-                            # Sanity check - make sure we got real content
-                            if len(text) < 1000:
-                                logger.warning(f"Extracted text too short ({len(text)} chars) from {ar5iv_url}")
-                                continue
-                                
-                            logger.info(f"Successfully extracted text from ar5iv for {arxiv_id} ({len(text)} chars)")
-                            return text
-                        else:
-                            logger.warning(f"Could not find main content in HTML from {ar5iv_url}")
+                    html_content = await response.text()
+                
+                # Check if we got a real paper or an error/template page
+                if "You will be analyzing" in html_content or "paper_summaries" in html_content:
+                    logger.warning(f"Got template/prompt content instead of paper from {ar5iv_url}")
+                    continue
+                
+                # HTML parsing is CPU-bound; keep it off the event loop
+                text = await asyncio.to_thread(self._html_to_text, html_content, ar5iv_url)
+                if text:
+                    logger.info(f"Successfully extracted text from ar5iv for {arxiv_id} ({len(text)} chars)")
+                    return text
             except asyncio.TimeoutError:
                 logger.debug(f"Timeout while fetching {ar5iv_url}")
             except Exception as e:
@@ -245,6 +378,45 @@ class ArXivFetcherTool:
         
         return None
     
+    def _html_to_text(self, html_content: str, source_url: str) -> Optional[str]:
+        """Extract the article body of an ar5iv/arXiv HTML page as Markdown."""
+        soup = BeautifulSoup(html_content, 'html.parser')
+        
+        # Remove script, style, and navigation elements
+        for element in soup(["script", "style", "nav", "header", "footer"]):
+            element.decompose()
+        
+        # Try to find the main article content
+        main_content = None
+        
+        # Look for specific ar5iv/arxiv HTML structure
+        for selector in ['article', 'div.ltx_document', 'main', 'div#main-content']:
+            main_content = soup.select_one(selector)
+            if main_content:
+                break
+        
+        if not main_content:
+            main_content = soup.find('body')
+        
+        if not main_content:
+            logger.warning(f"Could not find main content in HTML from {source_url}")
+            return None
+        
+        # Convert to markdown for better formatting
+        h = html2text.HTML2Text()
+        h.ignore_links = False
+        h.ignore_images = True
+        h.body_width = 0  # Don't wrap lines
+        h.skip_internal_links = True
+        
+        text = h.handle(str(main_content))
+        
+        # Sanity check - make sure we got real content
+        if len(text) < 1000:
+            logger.warning(f"Extracted text too short ({len(text)} chars) from {source_url}")
+            return None
+        return text
+    
     async def fetch_arxiv_source(self, arxiv_id: str) -> Optional[str]:
         """
         Fetch the LaTeX/TeX source from arXiv.
@@ -256,66 +428,67 @@ class ArXivFetcherTool:
             Extracted text from source or None if failed
         """
         source_url = f"https://arxiv.org/e-print/{arxiv_id}"
+        client = _get_client()
         
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-                
-                async with session.get(source_url, headers=headers, timeout=30) as response:
-                    if response.status != 200:
-                        logger.debug(f"Source not available for {arxiv_id}: HTTP {response.status}")
-                        return None
-                    
-                    # The source can be a .tar.gz, .gz, or plain .tex file
-                    content = await response.read()
-                    
-                    # Try to process as tar.gz first (most common)
-                    try:
-                        with tarfile.open(fileobj=io.BytesIO(content), mode='r:gz') as tar:
-                            tex_content = []
-                            for member in tar.getmembers():
-                                if member.name.endswith('.tex'):
-                                    f = tar.extractfile(member)
-                                    if f:
-                                        tex_content.append(f.read().decode('utf-8', errors='ignore'))
-                            
-                            if tex_content:
-                                # Combine all .tex files
-                                combined = '\n\n'.join(tex_content)
-                                # Clean LaTeX to extract readable text
-                                text = self._clean_latex_to_text(combined)
-                                logger.info(f"Extracted text from LaTeX source for {arxiv_id} ({len(text)} chars)")
-                                return text
-                    except:
-                        pass
-                    
-                    # Try as gzipped single file
-                    try:
-                        content = gzip.decompress(content).decode('utf-8', errors='ignore')
-                        text = self._clean_latex_to_text(content)
-                        logger.info(f"Extracted text from gzipped LaTeX for {arxiv_id} ({len(text)} chars)")
-                        return text
-                    except:
-                        pass
-                    
-                    # Try as plain text/LaTeX
-                    try:
-                        content = content.decode('utf-8', errors='ignore')
-                        text = self._clean_latex_to_text(content)
-                        logger.info(f"Extracted text from plain LaTeX for {arxiv_id} ({len(text)} chars)")
-                        return text
-                    except:
-                        pass
-                    
-                    logger.debug(f"Could not process source format for {arxiv_id}")
+            await client.content_limiter.wait()
+            async with client.session.get(source_url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                if response.status != 200:
+                    logger.debug(f"Source not available for {arxiv_id}: HTTP {response.status}")
                     return None
+                
+                # The source can be a .tar.gz, .gz, or plain .tex file
+                content = await response.read()
+            
+            return await asyncio.to_thread(self._source_to_text, content, arxiv_id)
                     
         except Exception as e:
             logger.debug(f"Error fetching arXiv source for {arxiv_id}: {e}")
             return None
     
+    def _source_to_text(self, content: bytes, arxiv_id: str) -> Optional[str]:
+        """Extract readable text from an e-print download (.tar.gz, .gz or plain LaTeX)."""
+        # Try to process as tar.gz first (most common)
+        try:
+            with tarfile.open(fileobj=io.BytesIO(content), mode='r:gz') as tar:
+                tex_content = []
+                for member in tar.getmembers():
+                    if member.name.endswith('.tex'):
+                        f = tar.extractfile(member)
+                        if f:
+                            tex_content.append(f.read().decode('utf-8', errors='ignore'))
+                
+                if tex_content:
+                    # Combine all .tex files
+                    combined = '\n\n'.join(tex_content)
+                    # Clean LaTeX to extract readable text
+                    text = self._clean_latex_to_text(combined)
+                    logger.info(f"Extracted text from LaTeX source for {arxiv_id} ({len(text)} chars)")
+                    return text
+        except:
+            pass
+        
+        # Try as gzipped single file
+        try:
+            decompressed = gzip.decompress(content).decode('utf-8', errors='ignore')
+            text = self._clean_latex_to_text(decompressed)
+            logger.info(f"Extracted text from gzipped LaTeX for {arxiv_id} ({len(text)} chars)")
+            return text
+        except:
+            pass
+        
+        # Try as plain text/LaTeX
+        try:
+            decoded = content.decode('utf-8', errors='ignore')
+            text = self._clean_latex_to_text(decoded)
+            logger.info(f"Extracted text from plain LaTeX for {arxiv_id} ({len(text)} chars)")
+            return text
+        except:
+            pass
+        
+        logger.debug(f"Could not process source format for {arxiv_id}")
+        return None
+    
     def _clean_latex_to_text(self, latex_content: str) -> str:
         """
         Clean LaTeX content to extract readable text.
@@ -370,21 +543,18 @@ class ArXivFetcherTool:
             PDF content as bytes or None if failed
         """
         pdf_url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
+        client = _get_client()
         
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
+            await client.content_limiter.wait()
+            async with client.session.get(pdf_url, timeout=aiohttp.ClientTimeout(total=60)) as response:
+                if response.status != 200:
+                    logger.error(f"Failed to fetch arXiv PDF: HTTP {response.status}")
+                    return None
                 
-                async with session.get(pdf_url, headers=headers, timeout=60) as response:
-                    if response.status != 200:
-                        logger.error(f"Failed to fetch arXiv PDF: HTTP {response.status}")
-                        return None
-                    
-                    pdf_content = await response.read()
-                    logger.info(f"Successfully fetched PDF for arXiv paper {arxiv_id} ({len(pdf_content)} bytes)")
-                    return pdf_content
+                pdf_content = await response.read()
+                logger.info(f"Successfully fetched PDF for arXiv paper {arxiv_id} ({len(pdf_content)} bytes)")
+                return pdf_content
                     
         except asyncio.TimeoutError:
             logger.error(f"Timeout while fetching arXiv PDF for {arxiv_id}")
@@ -415,6 +585,52 @@ class ArXivFetcherTool:
             logger.error(f"Error extracting text from PDF: {e}", exc_info=True)
             return ""
     
+    # Full-text methods in order of preference (used to break ties)
+    FULL_TEXT_METHODS = ["ar5iv_html", "latex_source", "pdf"]
+    
+    async def _fetch_full_text(self, arxiv_id: str, cache_key: str) -> Tuple[Optional[str], str]:
+        """
+        Try ar5iv HTML, LaTeX source and PDF in parallel; the first one to yield text wins.
+        
+        Returns:
+            Tuple of (text or None, fetch method)
+        """
+        async def fetch_pdf_text() -> Optional[str]:
+            pdf_content = await self.fetch_arxiv_pdf(arxiv_id)
+            if not pdf_content:
+                return None
+            # Cache the PDF even if text extraction fails
+            try:
+                pdf_cache_path = CACHE_DIR / f"{cache_key}.pdf"
+                with open(pdf_cache_path, 'wb') as f:
+                    f.write(pdf_content)
+            except Exception as e:
+                logger.warning(f"Failed to cache PDF: {e}")
+            return await asyncio.to_thread(self.extract_text_from_pdf, pdf_content)
+        
+        attempts = {
+            asyncio.create_task(self.fetch_ar5iv_html(arxiv_id)): "ar5iv_html",
+            asyncio.create_task(self.fetch_arxiv_source(arxiv_id)): "latex_source",
+            asyncio.create_task(fetch_pdf_text()): "pdf",
+        }
+        pending = set(attempts)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda t: self.FULL_TEXT_METHODS.index(attempts[t])):
+                    if task.cancelled():
+                        continue
+                    if task.exception():
+                        logger.debug(f"{attempts[task]} failed for {arxiv_id}: {task.exception()}")
+                        continue
+                    text = task.result()
+                    if text:
+                        return text, attempts[task]
+            return None, "unknown"
+        finally:
+            for task in pending:
+                task.cancel()
+    
     async def execute(
         self,
         url: str,
@@ -443,21 +659,14 @@ class ArXivFetcherTool:
         
         # Check cache first
         cache_key = hashlib.sha256(f"arxiv_{arxiv_id}".encode()).hexdigest()
-        cache_content_path = CACHE_DIR / f"{cache_key}.pdf"
         cache_meta_path = CACHE_DIR / f"{cache_key}.meta.json"
         cache_text_path = CACHE_DIR / f"{cache_key}.txt"
         
-        # Try to load from cache
-        if cache_content_path.exists() and cache_meta_path.exists() and cache_text_path.exists():
+        # Try to load from cache (7 days for arXiv papers); the PDF is only
+        # kept when it was the fetch method, so it is not required here
+        if cache_meta_path.exists() and cache_text_path.exists():
             try:
-                # Check cache age (7 days for arXiv papers)
-                mod_time = datetime.datetime.fromtimestamp(
-                    os.path.getmtime(cache_content_path), 
-                    tz=datetime.timezone.utc
-                )
-                age = datetime.datetime.now(datetime.timezone.utc) - mod_time
-                
-                if age < datetime.timedelta(days=7):
+                if _cache_is_fresh(cache_text_path, CONTENT_CACHE_TTL):
                     logger.info(f"Cache hit for arXiv paper {arxiv_id}")
                     
                     with open(cache_meta_path, 'r', encoding='utf-8') as f:
@@ -490,46 +699,20 @@ class ArXivFetcherTool:
         
         # Fetch metadata and content
         try:
-            # Fetch metadata first
-            metadata = await self.fetch_arxiv_metadata(arxiv_id)
+            # Fetch metadata (batched with other concurrent lookups) while racing the full-text methods
+            metadata_task = asyncio.create_task(self.fetch_arxiv_metadata(arxiv_id))
+            try:
+                logger.info(f"Fetching ar5iv HTML, LaTeX source and PDF in parallel for {arxiv_id}...")
+                text, fetch_method = await self._fetch_full_text(arxiv_id, cache_key)
+                metadata = await metadata_task
+            finally:
+                metadata_task.cancel()
+            
             if not metadata:
                 return {"error": f"Failed to fetch metadata for arXiv paper {arxiv_id}"}
             
-            # Try different methods to get the paper content
-            text = None
-            fetch_method = "unknown"
-            
-            # Method 1: Try ar5iv HTML (best quality)
-            logger.info(f"Trying ar5iv HTML for {arxiv_id}...")
-            text = await self.fetch_ar5iv_html(arxiv_id)
             if text:
-                fetch_method = "ar5iv_html"
-                logger.info(f"Successfully fetched paper via ar5iv HTML")
-            
-            # Method 2: Try LaTeX source
-            if not text:
-                logger.info(f"Trying LaTeX source for {arxiv_id}...")
-                text = await self.fetch_arxiv_source(arxiv_id)
-                if text:
-                    fetch_method = "latex_source"
-                    logger.info(f"Successfully fetched paper via LaTeX source")
-            
-            # Method 3: Fallback to PDF
-            if not text:
-                logger.info(f"Falling back to PDF for {arxiv_id}...")
-                pdf_content = await self.fetch_arxiv_pdf(arxiv_id)
-                if pdf_content:
-                    text = self.extract_text_from_pdf(pdf_content)
-                    if text:
-                        fetch_method = "pdf"
-                        logger.info(f"Successfully fetched paper via PDF")
-                    # Cache the PDF even if text extraction fails
-                    try:
-                        pdf_cache_path = CACHE_DIR / f"{cache_key}.pdf"
-                        with open(pdf_cache_path, 'wb') as f:
-                            f.write(pdf_content)
-                    except Exception as e:
-                        logger.warning(f"Failed to cache PDF: {e}")
+                logger.info(f"Successfully fetched paper via {fetch_method}")
             
             if not text:
                 return {"error": f"Failed to extract text from arXiv paper {arxiv_id} using any method"}
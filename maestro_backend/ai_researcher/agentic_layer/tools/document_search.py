@@ -8,6 +8,9 @@ from pydantic import BaseModel, Field
 from ai_researcher.core_rag.retriever import Retriever
 from ai_researcher.core_rag.query_preparer import QueryPreparer # Import QueryPreparer
 from ai_researcher.core_rag.query_strategist import QueryStrategist # Import QueryStrategist
+from ai_researcher.agentic_layer.controller.utils.cancellation import run_cancellable
+from ai_researcher.agentic_layer.controller.utils.mission_trace import trace_span
+from ai_researcher.agentic_layer.controller.utils.status_checks import MissionStoppedException
 
 logger = logging.getLogger(__name__)
 
@@ -210,7 +213,8 @@ class DocumentSearchTool:
         sparse_weight: float = 0.5,
         use_reranker: bool = True,
         research_context: Optional[str] = None, # Add context params
-        agent_context: Optional[str] = None     # Add context params
+        agent_context: Optional[str] = None,    # Add context params
+        mission_id: Optional[str] = None        # Pausing/stopping this mission cancels the search
     ) -> List[Dict[str, Any]]:
         """
         Executes the document search using the Retriever, QueryStrategist, and QueryPreparer.
@@ -226,6 +230,7 @@ class DocumentSearchTool:
             use_reranker: Whether to apply final reranking to aggregated results.
             research_context: Optional overall research goal/context for strategy.
             agent_context: Optional agent task context for strategy.
+            mission_id: Optional mission whose pause/stop cancels retrieval and reranking.
 
         Returns:
             A list of search result dictionaries, potentially formatted for agent consumption.
@@ -313,7 +318,8 @@ class DocumentSearchTool:
                     filter_metadata=filter_metadata,
                     use_reranker=use_reranker, # Pass the flag from execute args
                     dense_weight=dense_weight,
-                    sparse_weight=sparse_weight
+                    sparse_weight=sparse_weight,
+                    mission_id=mission_id
                 ) for q in prepared_queries
             ]
             results_list = await asyncio.gather(*retrieval_tasks, return_exceptions=True)
@@ -354,12 +360,16 @@ class DocumentSearchTool:
                     # Rerank the aggregated list using the *original* query.
                     # Note: If initial retrieval was already reranked, this reranks again.
                     # The reranker now returns a list of tuples (score, item)
-                    reranked_tuples = await asyncio.to_thread(
-                        self.retriever.reranker.rerank, query, initial_aggregated_list, top_n=n_results
-                    )
+                    async with trace_span(mission_id, "rerank", "final_rerank", candidates=len(initial_aggregated_list)):
+                        reranked_tuples = await run_cancellable(mission_id, asyncio.to_thread(
+                            self.retriever.reranker.rerank, query, initial_aggregated_list, top_n=n_results
+                        ))
                     # Extract just the items from the tuples
                     final_results = [item for _, item in reranked_tuples]
                     logger.info(f"Returning {len(final_results)} final reranked results.")
+                except MissionStoppedException as e:
+                    logger.info(f"Document search for '{query}' cancelled during reranking: mission {e.status}.")
+                    return []
                 except Exception as rerank_e:
                     logger.error(f"Error during final reranking: {rerank_e}. Returning top N non-reranked results.")
                     # Fallback to top N non-reranked results
@@ -16,6 +16,8 @@ import json
 from ai_researcher import config # Import config to access cache settings
 from ai_researcher.core_rag.metadata_extractor import MetadataExtractor # Import the extractor
 from ai_researcher.dynamic_config import get_web_fetch_provider
+from ai_researcher.agentic_layer.controller.utils.cancellation import run_cancellable
+from ai_researcher.agentic_layer.controller.utils.status_checks import MissionStoppedException
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +71,23 @@ class WebPageFetcherTool:
 
 
     async def execute(
+        self,
+        url: str,
+        update_callback: Optional[Callable] = None,
+        log_queue: Optional[queue.Queue] = None,
+        mission_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetches a web page (see ``_fetch``), abandoning the fetch as soon as the
+        mission is paused or stopped.
+        """
+        try:
+            return await run_cancellable(mission_id, self._fetch(url, update_callback, log_queue, mission_id))
+        except MissionStoppedException as e:
+            logger.info(f"Fetch of {url} cancelled: mission {e.status}.")
+            return {"error": f"Fetch cancelled because the mission is {e.status}."}
+
+    async def _fetch(
         self,
          url: str,
          update_callback: Optional[Callable] = None, # Added callback
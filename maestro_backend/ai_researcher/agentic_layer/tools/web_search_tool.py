@@ -15,6 +15,8 @@ from ai_researcher.dynamic_config import (
     get_jina_api_key, get_search_depth,
     get_jina_read_full_content, get_jina_fetch_favicons, get_jina_bypass_cache
 )
+from ai_researcher.agentic_layer.controller.utils.cancellation import run_cancellable
+from ai_researcher.agentic_layer.controller.utils.status_checks import MissionStoppedException
 
 logger = logging.getLogger(__name__)
 
@@ -197,20 +199,28 @@ class WebSearchTool:
             
             return {"error": user_friendly_error}
 
-        # Rate limiting: acquire semaphore to limit concurrent requests
-        async with self._get_semaphore():
-            # Add delay between requests to avoid rate limits
-            current_time = time.time()
-            time_since_last = current_time - WebSearchTool._last_request_time
-            if time_since_last < WebSearchTool._min_request_interval:
-                await asyncio.sleep(WebSearchTool._min_request_interval - time_since_last)
-            WebSearchTool._last_request_time = time.time()
-        
-            # The rest of the execute method continues inside the semaphore context
-            return await self._execute_search(
-                query, max_results, from_date, to_date, include_domains, 
-                exclude_domains, depth, update_callback, log_queue, mission_id
-            )
+        async def rate_limited_search():
+            # Rate limiting: acquire semaphore to limit concurrent requests
+            async with self._get_semaphore():
+                # Add delay between requests to avoid rate limits
+                current_time = time.time()
+                time_since_last = current_time - WebSearchTool._last_request_time
+                if time_since_last < WebSearchTool._min_request_interval:
+                    await asyncio.sleep(WebSearchTool._min_request_interval - time_since_last)
+                WebSearchTool._last_request_time = time.time()
+            
+                # The rest of the execute method continues inside the semaphore context
+                return await self._execute_search(
+                    query, max_results, from_date, to_date, include_domains, 
+                    exclude_domains, depth, update_callback, log_queue, mission_id
+                )
+
+        # Pausing the mission abandons the search and frees its rate-limit slot
+        try:
+            return await run_cancellable(mission_id, rate_limited_search())
+        except MissionStoppedException as e:
+            logger.info(f"Web search for '{query}' cancelled: mission {e.status}.")
+            return {"error": f"Web search cancelled because the mission is {e.status}."}
     
     async def _execute_search(
         self,
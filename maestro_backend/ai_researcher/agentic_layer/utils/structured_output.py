@@ -0,0 +1,306 @@
+"""
+Shared structured (JSON) generation support for agents.
+
+Agents that ask the LLM for a Pydantic-shaped JSON object used to each run
+their own loop: call the model, regex out a JSON block, try ``json.loads``,
+apply an ad-hoc fix and, failing that, repeat the whole LLM call. Models
+without ``json_schema`` support were rediscovered on every request. This
+module backs ``BaseAgent._call_llm_structured`` with:
+
+- the model capability registry's record of whether ``json_schema``
+  response formats are accepted, so unsupported models go straight to
+  ``json_object``,
+- ``IncrementalJSONValidator``, which checks streamed output as it arrives so
+  a stream can be closed as soon as it stops being JSON or the object is
+  complete,
+- ``repair_json``, a local fix for truncated output, trailing commas, ``//``
+  comments and raw newlines in strings, tried before any re-query,
+- ``correction_prompt``, which tells the model what was wrong when a re-query
+  is unavoidable instead of repeating the identical request.
+"""
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from ai_researcher.agentic_layer.model_capabilities import capability_registry
+from ai_researcher.agentic_layer.utils.json_utils import (
+    parse_json_string_recursively,
+    parse_llm_json_response,
+    prepare_for_pydantic_validation,
+    extract_non_schema_fields
+)
+
+logger = logging.getLogger(__name__)
+
+
+def json_schema_supported(provider: Optional[str], model: Optional[str], base_url: Optional[str] = None) -> Optional[bool]:
+    """Whether ``model`` at ``base_url`` accepts ``json_schema`` response formats; None if not yet known."""
+    return capability_registry.get(provider, model, base_url).json_schema
+
+
+def record_json_schema_support(provider: Optional[str], model: Optional[str], supported: bool, base_url: Optional[str] = None) -> None:
+    capability_registry.update(provider, model, base_url, json_schema=supported)
+
+
+@dataclass
+class StructuredResult:
+    """Outcome of a structured LLM request."""
+    output: Optional[BaseModel] = None
+    # Keys in the response that are not fields of the model (e.g. scratchpad_update)
+    extra_fields: Dict[str, Any] = field(default_factory=dict)
+    # Token and cost totals across every attempt
+    model_call_details: Optional[Dict[str, Any]] = None
+    error: Optional[Any] = None
+    attempts: int = 0
+
+
+class JSONStreamDivergence(ValueError):
+    """Raised when streamed output can no longer become the expected JSON document."""
+
+
+class IncrementalJSONValidator:
+    """
+    Tracks the structure of a JSON document as it streams in.
+
+    Text before the root value (code fences, a short preamble) is skipped.
+    ``feed`` returns True once the root value is closed and raises
+    ``JSONStreamDivergence`` on a mismatched bracket, a character that cannot
+    appear outside a string, or no root value within ``max_preamble_chars``.
+    Bare tokens are only checked for their character set; full parsing is
+    left to ``parse_structured_output``.
+    """
+
+    _BARE_TOKEN_CHARS = frozenset(
+        "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.+-/,:"
+    )
+
+    def __init__(self, root_chars: str = "{", max_preamble_chars: int = 4000):
+        self.root_chars = root_chars
+        self.max_preamble_chars = max_preamble_chars
+        self._chunks: List[str] = []
+        self._offset = 0
+        self._stack: List[str] = []
+        self._quote: Optional[str] = None
+        self._escape = False
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+
+    @property
+    def complete(self) -> bool:
+        return self._end is not None
+
+    @property
+    def text(self) -> str:
+        """Everything received so far."""
+        return "".join(self._chunks)
+
+    @property
+    def json_text(self) -> str:
+        """The root value, from its opening bracket to its close (or the end of input)."""
+        if self._start is None:
+            return ""
+        return self.text[self._start:self._end]
+
+    def feed(self, chunk: str) -> bool:
+        if self.complete:
+            return True
+        self._chunks.append(chunk)
+        for ch in chunk:
+            position = self._offset
+            self._offset += 1
+            if self._start is None:
+                if ch in self.root_chars:
+                    self._start = position
+                    self._stack.append(ch)
+                elif position >= self.max_preamble_chars:
+                    raise JSONStreamDivergence(f"No JSON value started within {self.max_preamble_chars} characters")
+                continue
+            if self._quote:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == self._quote:
+                    self._quote = None
+                continue
+            if ch in "\"'":
+                self._quote = ch
+            elif ch in "{[":
+                self._stack.append(ch)
+            elif ch in "}]":
+                opener = "{" if ch == "}" else "["
+                if not self._stack or self._stack[-1] != opener:
+                    raise JSONStreamDivergence(f"Unexpected '{ch}' at offset {position}")
+                self._stack.pop()
+                if not self._stack:
+                    self._end = position + 1
+                    return True
+            elif not ch.isspace() and ch not in self._BARE_TOKEN_CHARS:
+                raise JSONStreamDivergence(f"Unexpected {ch!r} outside a string at offset {position}")
+        return False
+
+
+def _strip_trailing_comma(out: List[str]) -> None:
+    while out and (out[-1].isspace() or out[-1] == ","):
+        out.pop()
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort local repair of an LLM's JSON output.
+
+    Starts at the first ``{`` or ``[``, drops ``//`` comments, trailing
+    commas and anything after the root value, escapes raw newlines inside
+    strings, and closes strings and brackets left open by a truncated
+    response. The result may still be invalid; callers must parse it.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return text
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    escape = False
+    i = min(starts)
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            elif ch == "\n":
+                ch = "\\n"
+            out.append(ch)
+            i += 1
+            continue
+        if ch == "/" and text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = len(text) if newline == -1 else newline
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if not stack:
+                break
+            _strip_trailing_comma(out)
+            out.append(stack.pop())
+            i += 1
+            if not stack:
+                break
+            continue
+        out.append(ch)
+        i += 1
+
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+    _strip_trailing_comma(out)
+    if out and out[-1] == ":":
+        out.append("null")
+    while stack:
+        _strip_trailing_comma(out)
+        out.append(stack.pop())
+    return "".join(out)
+
+
+def _strip_code_fence(text: str) -> str:
+    stripped = text.strip()
+    if stripped.startswith("```"):
+        stripped = stripped.split("\n", 1)[1] if "\n" in stripped else ""
+        if stripped.rstrip().endswith("```"):
+            stripped = stripped.rstrip()[:-3]
+    return stripped.strip()
+
+
+def load_llm_json(raw: str) -> Any:
+    """
+    Parse JSON from an LLM response, repairing it locally if needed.
+
+    Raises ``json.JSONDecodeError`` when the text cannot be recovered.
+    """
+    candidate = _strip_code_fence(raw)
+    try:
+        return parse_json_string_recursively(json.loads(candidate))
+    except json.JSONDecodeError:
+        pass
+    repaired = repair_json(candidate)
+    try:
+        data = json.loads(repaired)
+        logger.info("Recovered LLM JSON output with local repair")
+        return parse_json_string_recursively(data)
+    except json.JSONDecodeError:
+        pass
+    # Slower fallbacks: single quotes, Python literals, JSON embedded in prose
+    return parse_llm_json_response(raw)
+
+
+def _model_field_names(output_model: Type[BaseModel]) -> set:
+    names = set()
+    for name, model_field in output_model.model_fields.items():
+        names.add(name)
+        if model_field.alias:
+            names.add(model_field.alias)
+    return names
+
+
+def parse_structured_output(
+    raw: str,
+    output_model: Type[BaseModel],
+    prepare: Optional[Callable[[Any], Any]] = None
+) -> Tuple[BaseModel, Dict[str, Any]]:
+    """
+    Parse and validate ``raw`` as ``output_model``.
+
+    ``prepare`` may reshape the decoded data before validation (for example
+    to wrap a bare list). Returns the model and any non-schema keys.
+    Raises ``json.JSONDecodeError``, ``ValueError`` or ``ValidationError``.
+    """
+    data = load_llm_json(raw)
+    if prepare:
+        data = prepare(data)
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+    extra_fields = extract_non_schema_fields(data, output_model)
+    prepared = prepare_for_pydantic_validation(data, output_model)
+    # Unknown keys are reported separately rather than failing strict models
+    field_names = _model_field_names(output_model)
+    prepared = {k: v for k, v in prepared.items() if k in field_names}
+    return output_model.model_validate(prepared), extra_fields
+
+
+def correction_prompt(error: Any) -> str:
+    """Instruction appended to a re-query explaining why the previous output was rejected."""
+    if isinstance(error, ValidationError):
+        detail = "; ".join(
+            f"{'.'.join(str(part) for part in e['loc']) or '(root)'}: {e['msg']}"
+            for e in error.errors()[:10]
+        )
+    else:
+        detail = str(error)
+    return (
+        "\n\nYour previous response could not be used: "
+        f"{detail[:1000]}\n"
+        "Respond again with only the corrected JSON object."
+    )
+
+
+def merge_call_details(total: Optional[Dict[str, Any]], details: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Accumulate token counts, cost and duration of another attempt into ``total``."""
+    if not details:
+        return total
+    if not total:
+        return dict(details)
+    merged = dict(details)
+    for key in ("prompt_tokens", "completion_tokens", "total_tokens", "cost", "duration_sec"):
+        if total.get(key) is not None or details.get(key) is not None:
+            merged[key] = (total.get(key) or 0) + (details.get(key) or 0)
+    return merged
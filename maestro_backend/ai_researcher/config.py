@@ -220,6 +220,7 @@ AGENT_ROLE_MODEL_TYPE = {
     "note_assignment": "fast", 
     "query_preparation": "intelligent", 
     "query_strategy": "fast",  # Router uses fast model
+    "outline_validation": "fast",  # YES/NO check of a single-section outline revision
     "verifier": "verifier",
     "default": "mid" 
 }
@@ -260,6 +261,7 @@ AGENT_ROLE_MAX_TOKENS = {
     "note_assignment": int(os.getenv("NOTE_ASSIGNMENT_MAX_TOKENS", 8192)), # Added role with higher limit
     "verifier": int(os.getenv("VERIFIER_MAX_TOKENS", 1000)), # Added verifier max tokens
     "query_strategy": int(os.getenv("QUERY_STRATEGY_MAX_TOKENS", 2000)), # Increased for thinking models that need reasoning tokens
+    "outline_validation": int(os.getenv("OUTLINE_VALIDATION_MAX_TOKENS", 500)), # One-word answer, with room for reasoning tokens
     "default": int(os.getenv("DEFAULT_MAX_TOKENS", 2048)) # Default max tokens if role not specified
 }
 
@@ -273,6 +275,7 @@ AGENT_ROLE_TEMPERATURE = {
     "writing_reflection": 0.4, # Focused for editing suggestions
     "note_assignment": 0.2, # Very focused for assignment logic
     "query_strategy": 0.1, # Very deterministic for simple routing decisions
+    "outline_validation": 0.1, # Very deterministic for a YES/NO check
     "messenger": 0.7, # More conversational for chat
     "query_preparation": 0.3, # Focused for query generation
     "verifier": 0.1 # Very focused for verification
@@ -345,6 +348,46 @@ WEB_SEARCH_COST_PER_CALL = float(os.getenv("WEB_SEARCH_COST_PER_CALL", 0.005)) #
 # --- Web Fetcher Cache Configuration ---
 WEB_CACHE_EXPIRATION_DAYS = int(os.getenv("WEB_CACHE_EXPIRATION_DAYS", 2)) # Days to keep cached web pages
 
+# --- Mission Context Cache Configuration ---
+# Max number of idle (completed/failed/stopped) mission contexts kept in memory.
+# Planning, running and paused missions are always pinned and never evicted.
+MISSION_CONTEXT_CACHE_SIZE = int(os.getenv("MISSION_CONTEXT_CACHE_SIZE", 100))
+
+# --- Mission Trace Configuration ---
+# Record timing spans (LLM queue/calls, tools, retrieval, DB writes) per mission
+# for GET /missions/{id}/trace. Spans beyond the cap are counted but not kept.
+MISSION_TRACE_ENABLED = os.getenv("MISSION_TRACE_ENABLED", "true").lower() == "true"
+MISSION_TRACE_MAX_SPANS = int(os.getenv("MISSION_TRACE_MAX_SPANS", 20000))
+MISSION_TRACE_FLUSH_INTERVAL = float(os.getenv("MISSION_TRACE_FLUSH_INTERVAL", 30.0)) # Seconds between trace writes while running
+
+# --- Research Prefetch Configuration ---
+# Opt-in and budget are research parameters (see dynamic_config.get_research_prefetch_*)
+RESEARCH_PREFETCH_TTL_SECONDS = float(os.getenv("RESEARCH_PREFETCH_TTL_SECONDS", 3600.0)) # How long prefetched search/fetch results stay usable
+
+# --- Writing Assistant Configuration ---
+# Start document retrieval concurrently with the writing router and cancel it
+# if the router does not choose it. Web search always waits for the router.
+# The LLM calls of a cancelled branch are still counted in the session stats.
+WRITING_SPECULATIVE_RETRIEVAL = os.getenv("WRITING_SPECULATIVE_RETRIEVAL", "true").lower() == "true"
+
+# --- Structured Output Configuration ---
+# LLM calls per structured (JSON) agent request: json_schema/json_object fallback
+# does not count, malformed output is repaired locally before a re-query.
+STRUCTURED_OUTPUT_MAX_ATTEMPTS = int(os.getenv("STRUCTURED_OUTPUT_MAX_ATTEMPTS", 3))
+# Stream structured responses, validating the JSON as it arrives and closing the
+# stream as soon as it diverges or the object is complete. Off by default because
+# streamed calls only report cost when the provider returns usage in the stream.
+STRUCTURED_OUTPUT_STREAMING = os.getenv("STRUCTURED_OUTPUT_STREAMING", "false").lower() == "true"
+
+# --- Model Capability Registry ---
+# Probed context windows, structured-output support and observed throughput/error
+# rates per (provider, model), persisted so restarts do not rediscover them.
+MODEL_CAPABILITIES_PATH = os.getenv("MODEL_CAPABILITIES_PATH", "data/model_capabilities.json")
+MODEL_CAPABILITY_TTL_HOURS = float(os.getenv("MODEL_CAPABILITY_TTL_HOURS", 24))
+# Opt-in: send requests to another configured model when the selected one is rate
+# limited on the caller's credentials or its context window is too small for the prompt.
+MODEL_SPILLOVER_ENABLED = os.getenv("MODEL_SPILLOVER_ENABLED", "false").lower() == "true"
+
 # --- Tool Keys Status ---
 # Settings now configured through user settings in the application
 # print("--- Tool Keys ---")
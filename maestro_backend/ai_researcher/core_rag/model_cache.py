@@ -13,6 +13,9 @@ class ModelCache:
     
     _instance = None
     _lock = threading.Lock()
+    # Separate locks so the embedder and reranker can load concurrently
+    _embedder_lock = threading.Lock()
+    _reranker_lock = threading.Lock()
     _embedder: Optional[TextEmbedder] = None
     _reranker: Optional[TextReranker] = None
     
@@ -26,7 +29,7 @@ class ModelCache:
     def get_embedder(self) -> TextEmbedder:
         """Get or create the singleton embedder instance."""
         if self._embedder is None:
-            with self._lock:
+            with self._embedder_lock:
                 if self._embedder is None:
                     print("Initializing singleton TextEmbedder...")
                     self._embedder = TextEmbedder()
@@ -35,7 +38,7 @@ class ModelCache:
     def get_reranker(self) -> TextReranker:
         """Get or create the singleton reranker instance."""
         if self._reranker is None:
-            with self._lock:
+            with self._reranker_lock:
                 if self._reranker is None:
                     print("Initializing singleton TextReranker...")
                     self._reranker = TextReranker()
@@ -43,7 +46,7 @@ class ModelCache:
     
     def clear_cache(self):
         """Clear cached models (useful for testing or memory management)."""
-        with self._lock:
+        with self._embedder_lock, self._reranker_lock:
             self._embedder = None
             self._reranker = None
             print("Model cache cleared")
@@ -4,6 +4,9 @@ from typing import List, Dict, Any, Optional
 from .embedder import TextEmbedder
 from .pgvector_store import PGVectorStore as VectorStore
 from .reranker import TextReranker # Optional reranker
+from ai_researcher.agentic_layer.controller.utils.cancellation import run_cancellable
+from ai_researcher.agentic_layer.controller.utils.mission_trace import trace_span
+from ai_researcher.agentic_layer.controller.utils.status_checks import MissionStoppedException
 
 class Retriever:
     """
@@ -33,7 +36,8 @@ class Retriever:
         filter_metadata: Optional[Dict[str, Any]] = None,
         use_reranker: bool = True, # Flag to control reranking per query
         dense_weight: float = 0.5, # Weight for initial vector store query
-        sparse_weight: float = 0.5  # Weight for initial vector store query
+        sparse_weight: float = 0.5, # Weight for initial vector store query
+        mission_id: Optional[str] = None # Abandon the retrieval when this mission is paused/stopped
     ) -> List[Dict[str, Any]]:
         """
         Retrieves relevant chunks for a given query.
@@ -45,17 +49,38 @@ class Retriever:
             use_reranker: Whether to use the reranker if available and enabled.
             dense_weight: Weight for dense embeddings in the initial hybrid search.
             sparse_weight: Weight for sparse embeddings in the initial hybrid search.
+            mission_id: Optional mission whose pause/stop cancels the retrieval.
 
         Returns:
             A list of retrieved chunk dictionaries, sorted by relevance.
+            Empty if the mission was paused or stopped meanwhile.
         """
+        try:
+            async with trace_span(mission_id, "retrieval", "retrieve", n_results=n_results):
+                return await run_cancellable(mission_id, self._retrieve(
+                    query_text, n_results, filter_metadata, use_reranker, dense_weight, sparse_weight
+                ))
+        except MissionStoppedException as e:
+            print(f"Retrieval for query '{query_text}' cancelled: mission {e.status}.")
+            return []
+
+    async def _retrieve(
+        self,
+        query_text: str,
+        n_results: int,
+        filter_metadata: Optional[Dict[str, Any]],
+        use_reranker: bool,
+        dense_weight: float,
+        sparse_weight: float
+    ) -> List[Dict[str, Any]]:
         print(f"\n--- Retrieving documents for query: '{query_text}' ---")
 
         # 1. Embed the query (using async method with semaphore)
         print("Embedding query...")
         try:
             # Use the new async embedding method that includes semaphore control
-            query_embeddings = await self.embedder.embed_query_async(query_text)
+            async with trace_span(None, "embed", "embed_query"):
+                query_embeddings = await self.embedder.embed_query_async(query_text)
             if not query_embeddings:
                 print("Error: Failed to embed query (returned None).")
                 return []
@@ -76,15 +101,16 @@ class Retriever:
         print(f"Querying vector store (in thread, fetching up to {initial_fetch_n} results)...")
         try:
             # Run the synchronous vector store query in a separate thread
-            initial_results = await asyncio.to_thread(
-                self.vector_store.query,
-                query_dense_embedding=query_dense,
-                query_sparse_embedding_dict=query_sparse,
-                n_results=initial_fetch_n,
-                filter_metadata=filter_metadata,
-                dense_weight=dense_weight,
-                sparse_weight=sparse_weight
-            )
+            async with trace_span(None, "vector_query", "query", n_results=initial_fetch_n):
+                initial_results = await asyncio.to_thread(
+                    self.vector_store.query,
+                    query_dense_embedding=query_dense,
+                    query_sparse_embedding_dict=query_sparse,
+                    n_results=initial_fetch_n,
+                    filter_metadata=filter_metadata,
+                    dense_weight=dense_weight,
+                    sparse_weight=sparse_weight
+                )
         except Exception as e:
             print(f"Error during vector store query thread execution: {e}")
             initial_results = [] # Ensure it's an empty list on error
@@ -122,9 +148,10 @@ class Retriever:
             try:
                 # Run the synchronous rerank method in a separate thread
                 # The reranker now returns a list of tuples (score, item)
-                reranked_tuples = await asyncio.to_thread(
-                    self.reranker.rerank, query_text, initial_results, top_n=n_results
-                )
+                async with trace_span(None, "rerank", "rerank", candidates=len(initial_results)):
+                    reranked_tuples = await asyncio.to_thread(
+                        self.reranker.rerank, query_text, initial_results, top_n=n_results
+                    )
                 # Extract just the items from the tuples
                 final_results = [item for _, item in reranked_tuples]
                 print(f"Returning {len(final_results)} reranked results.")
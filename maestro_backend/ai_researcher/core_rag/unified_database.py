@@ -8,13 +8,13 @@ import json
 from typing import Optional, Dict, Any, List, Tuple
 from pathlib import Path
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, func, literal_column
 import logging
 
 # Import using absolute imports without modifying sys.path
 from database.models import Document
 from database.database import get_db
-from database import crud
+from database import crud, document_search
 
 logger = logging.getLogger(__name__)
 
@@ -212,27 +212,15 @@ class UnifiedDocumentDatabase:
                 query = query.filter(Document.id.in_(doc_ids))
             
             if search:
-                # Search in title, filename, and extracted metadata
-                search_pattern = f"%{search}%"
-                # Try both column naming conventions
-                filters = [Document.original_filename.ilike(search_pattern)]
-                
-                if hasattr(Document, 'title'):
-                    filters.append(Document.title.ilike(search_pattern))
-                elif hasattr(Document, 'extracted_title'):
-                    filters.append(Document.extracted_title.ilike(search_pattern))
-                    
-                if hasattr(Document, 'authors'):
-                    filters.append(Document.authors.ilike(search_pattern))
-                elif hasattr(Document, 'extracted_authors'):
-                    filters.append(Document.extracted_authors.ilike(search_pattern))
-                    
-                if hasattr(Document, 'journal'):
-                    filters.append(Document.journal.ilike(search_pattern))
-                elif hasattr(Document, 'extracted_journal'):
-                    filters.append(Document.extracted_journal.ilike(search_pattern))
-                
-                query = query.filter(or_(*filters))
+                # Full-text match on the indexed search vector, plus trigram-indexed
+                # substring match on title and filename (see document_search)
+                search_pattern = document_search.like_pattern(search)
+                search_config = literal_column(f"'{document_search.SEARCH_CONFIG}'::regconfig")
+                query = query.filter(or_(
+                    Document.search_vector.op('@@')(func.websearch_to_tsquery(search_config, search)),
+                    func.lower(Document.metadata_['title'].astext).like(search_pattern),
+                    func.lower(Document.original_filename).like(search_pattern),
+                ))
             
             if author:
                 author_pattern = f"%{author}%"
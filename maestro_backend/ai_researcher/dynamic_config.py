@@ -68,6 +68,22 @@ def get_initial_research_max_depth(mission_id: Optional[str] = None) -> int:
 def get_initial_research_max_questions(mission_id: Optional[str] = None) -> int:
     return get_setting_with_fallback("initial_research_max_questions", 10, int, mission_id)
 
+def get_initial_question_similarity_threshold(mission_id: Optional[str] = None) -> float:
+    """Cosine similarity at which an exploration question counts as a duplicate (1.0 disables)."""
+    return get_setting_with_fallback("initial_question_similarity_threshold", 0.9, float, mission_id)
+
+def get_note_similarity_threshold(mission_id: Optional[str] = None) -> float:
+    """Cosine similarity at which a note from the same source counts as a duplicate (1.0 disables)."""
+    return get_setting_with_fallback("note_similarity_threshold", 0.92, float, mission_id)
+
+def get_research_prefetch_enabled(mission_id: Optional[str] = None) -> bool:
+    """Whether initial research is prefetched while the user reviews the questions."""
+    return get_setting_with_fallback("research_prefetch", False, bool, mission_id)
+
+def get_research_prefetch_budget(mission_id: Optional[str] = None) -> int:
+    """Query preparations, searches and page fetches a user may prefetch per hour."""
+    return get_setting_with_fallback("research_prefetch_budget", 40, int, mission_id)
+
 def get_structured_research_rounds(mission_id: Optional[str] = None) -> int:
     return get_setting_with_fallback("structured_research_rounds", 2, int, mission_id)
 
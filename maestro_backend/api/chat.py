@@ -386,7 +386,7 @@ async def approve_research_questions(
         if success:
             # CRITICAL: Update comprehensive_settings when mission is started via chat
             # This ensures settings panel shows actual settings being used
-            mission_context = agent_controller.context_manager.get_mission_context(request.mission_id)
+            mission_context = await agent_controller.context_manager.load_mission_context(request.mission_id)
             if mission_context and mission_context.metadata:
                 existing_metadata = mission_context.metadata.copy()
 
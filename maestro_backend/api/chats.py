@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import logging
@@ -8,6 +8,7 @@ from auth.dependencies import get_current_user_from_cookie, get_db
 from database.async_database import get_async_db_session
 from database.models import User
 from database import crud, async_crud
+from database.document_search import encode_cursor
 from api import schemas
 from ai_researcher.agentic_layer.schemas.thought import generate_uuid
 
@@ -51,6 +52,7 @@ async def get_user_chats(
     page_size: int = 20,
     chat_type: str = "research",
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; faster than page for deep pagination"),
     current_user: User = Depends(get_current_user_from_cookie),
     db: Session = Depends(get_db)
 ):
@@ -62,14 +64,18 @@ async def get_user_chats(
             skip = (page - 1) * page_size
             
             # Get chats with counts in a single optimized query
-            chats_with_counts = await async_crud.get_chats_with_counts(
-                db=async_db,
-                user_id=current_user.id,
-                chat_type=chat_type,
-                skip=skip,
-                limit=page_size,
-                search_query=search
-            )
+            try:
+                chats_with_counts = await async_crud.get_chats_with_counts(
+                    db=async_db,
+                    user_id=current_user.id,
+                    chat_type=chat_type,
+                    skip=skip,
+                    limit=page_size,
+                    search_query=search,
+                    cursor=cursor
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
             
             # Get total count for pagination
             total = await async_crud.count_user_chats_by_type(
@@ -97,15 +103,23 @@ async def get_user_chats(
                 )
                 chat_summaries.append(chat_summary)
             
+            next_cursor = None
+            if len(chats_with_counts) == page_size:
+                last_chat = chats_with_counts[-1]['chat']
+                next_cursor = encode_cursor(last_chat.created_at, last_chat.id)
+            
             return schemas.PaginatedChatsResponse(
                 items=chat_summaries,
                 total=total,
                 page=page,
                 page_size=page_size,
-                total_pages=total_pages
+                total_pages=total_pages,
+                next_cursor=next_cursor
             )
         finally:
             await async_db.close()
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting user chats: {e}")
         raise HTTPException(
@@ -274,25 +288,54 @@ async def add_message_to_chat(
 @router.get("/chats/{chat_id}/messages", response_model=List[schemas.Message])
 async def get_chat_messages(
     chat_id: str,
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page; faster than skip for long chats"),
+    include_sources: bool = Query(False, description="Include each message's sources; omitted by default to keep pages small"),
     current_user: User = Depends(get_current_user_from_cookie),
     db: Session = Depends(get_db)
 ):
-    """Get messages for a chat."""
+    """
+    Get messages for a chat, oldest first.
+
+    When a full page is returned the ``X-Next-Cursor`` response header holds
+    the cursor for the next one.
+    """
     try:
         async_db = await get_async_db_session()
         try:
-            messages = await async_crud.get_chat_messages(
-            db=async_db,
-            chat_id=chat_id,
-            user_id=current_user.id,
-            skip=skip,
-            limit=limit
-            )
-            return messages
+            try:
+                messages = await async_crud.get_chat_messages(
+                    db=async_db,
+                    chat_id=chat_id,
+                    user_id=current_user.id,
+                    skip=skip,
+                    limit=limit,
+                    cursor=cursor,
+                    include_sources=include_sources
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+            next_cursor = encode_cursor(messages[-1].created_at, messages[-1].id) if len(messages) == limit else None
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            # Built explicitly: touching the unloaded sources column would trigger a lazy load
+            return [
+                schemas.Message(
+                    id=message.id,
+                    chat_id=message.chat_id,
+                    content=message.content,
+                    role=message.role,
+                    sources=message.sources if include_sources else None,
+                    created_at=message.created_at
+                )
+                for message in messages
+            ]
         finally:
             await async_db.close()
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting messages for chat {chat_id}: {e}")
         raise HTTPException(
@@ -13,11 +13,14 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/stats", response_model=DashboardStats)
-async def get_dashboard_stats(
+def get_dashboard_stats(
     current_user: User = Depends(get_current_user_from_cookie),
     db: Session = Depends(get_db)
 ):
-    """Get dashboard statistics for the current user."""
+    """
+    Get dashboard statistics for the current user.
+    Declared sync so FastAPI runs the (cached, single-query) lookup in its threadpool.
+    """
     try:
         # Get stats from database
         stats_data = crud.get_dashboard_stats(db, current_user.id)
@@ -35,7 +38,7 @@ async def get_dashboard_stats(
             active_missions=stats_data["active_missions"]
         )
         
-        logger.info(f"Retrieved dashboard stats for user {current_user.id}: {stats_data}")
+        logger.debug(f"Retrieved dashboard stats for user {current_user.id}: {stats_data}")
         return dashboard_stats
         
     except Exception as e:
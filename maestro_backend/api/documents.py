@@ -26,6 +26,7 @@ async def get_all_documents(
     current_user: models.User = Depends(get_current_user_from_cookie),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; faster than page for deep pagination"),
     search: Optional[str] = Query(None, description="Search in title, authors, filename"),
     author: Optional[str] = Query(None, description="Filter by author"),
     year: Optional[int] = Query(None, description="Filter by publication year"),
@@ -41,16 +42,20 @@ async def get_all_documents(
     document_service = UnifiedDocumentService(db)
     
     # Get documents with metadata from the unified database
-    documents, total_count = document_service.get_documents_with_metadata(
-        user_id=current_user.id,
-        search=search,
-        author=author,
-        year=year,
-        journal=journal,
-        status_filter=status,
-        limit=limit,
-        offset=(page - 1) * limit
-    )
+    try:
+        documents, total_count, next_cursor = document_service.get_documents_with_metadata(
+            user_id=current_user.id,
+            search=search,
+            author=author,
+            year=year,
+            journal=journal,
+            status_filter=status,
+            limit=limit,
+            offset=(page - 1) * limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Convert documents to schema format
     validated_documents = []
@@ -87,7 +92,8 @@ async def get_all_documents(
         limit=limit,
         total_pages=total_pages,
         has_next=page < total_pages,
-        has_previous=page > 1
+        has_previous=page > 1,
+        next_cursor=next_cursor
     )
     
     logger.debug(f"API DEBUG: Filtered to {total_count} documents, returning page {page} with {len(validated_documents)} items")
@@ -175,7 +181,7 @@ async def upload_document(
         # Check if document already exists (by hash)
         existing = db.query(models.Document).filter(
             models.Document.user_id == current_user.id,
-            models.Document.metadata_.op('->>')('file_hash') == file_hash
+            models.Document.file_hash == file_hash
         ).first()
         
         if existing:
@@ -219,6 +225,7 @@ async def upload_document(
             filename=file.filename,
             original_filename=file.filename,
             metadata_=metadata,
+            file_hash=file_hash,
             processing_status="pending",
             file_size=len(file_content),
             file_path=file_path,
@@ -296,7 +303,7 @@ async def upload_document_to_group(
         # Check if document already exists (by hash)
         existing = db.query(models.Document).filter(
             models.Document.user_id == current_user.id,
-            models.Document.metadata_.op('->>')('file_hash') == file_hash
+            models.Document.file_hash == file_hash
         ).first()
         
         if existing:
@@ -396,6 +403,7 @@ async def upload_document_to_group(
             filename=file.filename,
             original_filename=file.filename,
             metadata_=metadata,
+            file_hash=file_hash,
             processing_status="pending",
             file_size=len(file_content),
             file_path=file_path,
@@ -444,6 +452,7 @@ async def get_documents_in_group(
     current_user: models.User = Depends(get_current_user_from_cookie),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; faster than page for deep pagination"),
     search: Optional[str] = Query(None, description="Search in title, authors, filename"),
     author: Optional[str] = Query(None, description="Filter by author"),
     year: Optional[int] = Query(None, description="Filter by publication year"),
@@ -457,17 +466,21 @@ async def get_documents_in_group(
     """
     # Initialize document service and get documents in group
     document_service = UnifiedDocumentService(db)
-    documents, total_count = document_service.get_documents_with_metadata(
-        user_id=current_user.id,
-        search=search,
-        author=author,
-        year=year,
-        journal=journal,
-        status_filter=status,
-        group_id=group_id,
-        limit=limit,
-        offset=(page - 1) * limit
-    )
+    try:
+        documents, total_count, next_cursor = document_service.get_documents_with_metadata(
+            user_id=current_user.id,
+            search=search,
+            author=author,
+            year=year,
+            journal=journal,
+            status_filter=status,
+            group_id=group_id,
+            limit=limit,
+            offset=(page - 1) * limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Convert documents to schema format
     validated_documents = []
@@ -505,7 +518,8 @@ async def get_documents_in_group(
         limit=limit,
         total_pages=total_pages,
         has_next=page < total_pages,
-        has_previous=page > 1
+        has_previous=page > 1,
+        next_cursor=next_cursor
     )
     
     logger.debug(f"API DEBUG: Group documents - Total: {total_count}, Page: {page}, Returning: {len(validated_documents)} documents")
@@ -0,0 +1,49 @@
+"""
+Status and download endpoints for document export jobs.
+
+Jobs are created by the draft and report export endpoints in
+``api/writing.py`` and ``api/missions.py``.
+"""
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from api import schemas
+from auth.dependencies import get_current_user_from_cookie
+from database.models import User
+from services.export_service import get_export_job, export_job_status
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/exports", tags=["exports"])
+
+
+@router.get("/{job_id}", response_model=schemas.ExportJobStatus)
+async def get_export_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user_from_cookie)
+):
+    """Get the status of an export job."""
+    job = get_export_job(job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return export_job_status(job)
+
+
+@router.get("/{job_id}/download")
+async def download_export(
+    job_id: str,
+    current_user: User = Depends(get_current_user_from_cookie)
+):
+    """Stream the rendered file of a completed export job."""
+    job = get_export_job(job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Export failed: {job.error}")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Export is still {job.status}")
+    if not job.path.exists():
+        raise HTTPException(status_code=410, detail="Exported file has expired; please export again")
+    return FileResponse(job.path, media_type=job.media_type, filename=job.download_name)
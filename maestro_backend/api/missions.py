@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request, Response, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request, Query, Body
 from pydantic import BaseModel, Field
-import pypandoc
+from fastapi.responses import FileResponse
 import io
 from typing import Dict, Optional, List, Any
 import logging
@@ -15,7 +15,8 @@ from sqlalchemy.orm import Session
 from api.schemas import (
     MissionResponse, MissionStatus, 
     MissionStats, MissionPlan, MissionReport, MissionLogs, MissionDraft,
-    MissionContextResponse, MissionSettings, MissionSettingsResponse, MissionSettingsUpdate
+    MissionContextResponse, MissionSettings, MissionSettingsResponse, MissionSettingsUpdate,
+    ExportRequest, ExportJobStatus
 )
 from api.utils import process_execution_log_entry_for_frontend
 from auth.dependencies import get_current_user_from_cookie
@@ -28,7 +29,9 @@ from ai_researcher.agentic_layer.schemas.notes import Note
 from ai_researcher.agentic_layer.agent_controller import AgentController
 from ai_researcher import config
 from ai_researcher.agentic_layer.controller.core_controller import MaybeSemaphore
+from ai_researcher.agentic_layer.controller.utils.mission_trace import analyze_trace, get_mission_trace
 from services.websocket_manager import websocket_manager
+from services.export_service import submit_export, render_export, export_job_status, UnsupportedExportFormat
 import json
 from ai_researcher.agentic_layer.model_dispatcher import ModelDispatcher
 from ai_researcher.agentic_layer.tool_registry import ToolRegistry
@@ -310,7 +313,15 @@ async def initialize_ai_components():
     try:
         # Initialize core components
         context_manager = AsyncContextManager()
-        await context_manager.async_init()  # Initialize async
+        
+        # Use cached model instances to avoid repeated initialization
+        from ai_researcher.core_rag.model_cache import model_cache
+        # Load the models in worker threads while active missions are restored
+        _, embedder, reranker = await asyncio.gather(
+            context_manager.async_init(),
+            asyncio.to_thread(model_cache.get_embedder),
+            asyncio.to_thread(model_cache.get_reranker)
+        )
         # Initialize ModelDispatcher with empty user settings for global instance
         # Individual missions will create their own dispatchers with user-specific settings
         model_dispatcher = ModelDispatcher({})
@@ -319,11 +330,7 @@ async def initialize_ai_components():
         # Initialize RAG components
         from ai_researcher.core_rag.embedder import TextEmbedder
         from ai_researcher.core_rag.pgvector_store import PGVectorStore as VectorStore
-        
-        # Use cached model instances to avoid repeated initialization
-        from ai_researcher.core_rag.model_cache import model_cache
-        embedder = model_cache.get_embedder()
-        reranker = model_cache.get_reranker()
+
         # PGVectorStore uses PostgreSQL database connection, no directory needed
         vector_store = VectorStore()
         retriever = Retriever(embedder=embedder, vector_store=vector_store)
@@ -615,27 +622,29 @@ async def get_mission_status(
 ):
     """Get the current status of a mission."""
     try:
-        mission_context = context_mgr.get_mission_context(mission_id)
-        if not mission_context:
+        # Status polling only needs the summary fields, so cold missions are not hydrated
+        mission_summary = await context_mgr.get_mission_summary(mission_id)
+        if not mission_summary:
             raise HTTPException(
                 status_code=404,
                 detail="Mission not found"
             )
         
         # Include tool_selection in the status response
-        tool_selection = mission_context.metadata.get("tool_selection") if mission_context.metadata else None
-        document_group_id = mission_context.metadata.get("document_group_id") if mission_context.metadata else None
-        generated_document_group_id = mission_context.metadata.get("generated_document_group_id") if mission_context.metadata else None
+        metadata = mission_summary["metadata"]
+        tool_selection = metadata.get("tool_selection") if metadata else None
+        document_group_id = metadata.get("document_group_id") if metadata else None
+        generated_document_group_id = metadata.get("generated_document_group_id") if metadata else None
 
         return MissionStatus(
             mission_id=mission_id,
-            status=mission_context.status,
-            updated_at=mission_context.updated_at,
-            error_info=mission_context.error_info,
+            status=mission_summary["status"],
+            updated_at=mission_summary["updated_at"],
+            error_info=mission_summary["error_info"],
             tool_selection=tool_selection,
             document_group_id=document_group_id,
             generated_document_group_id=generated_document_group_id,
-            metadata=mission_context.metadata  # Return full metadata for complete settings visibility
+            metadata=metadata  # Return full metadata for complete settings visibility
         )
     except HTTPException:
         raise
@@ -654,7 +663,7 @@ async def get_mission_phase_status(
 ):
     """Get current phase status and progress information for a mission."""
     try:
-        mission_context = context_mgr.get_mission_context(mission_id)
+        mission_context = await context_mgr.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -694,7 +703,7 @@ async def get_mission_stats(
 ):
     """Get mission statistics including cost and token usage from in-memory context."""
     try:
-        mission_context = context_mgr.get_mission_context(mission_id)
+        mission_context = await context_mgr.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -720,6 +729,54 @@ async def get_mission_stats(
             detail="Failed to get mission stats"
         )
 
+@router.get("/missions/{mission_id}/trace")
+async def get_mission_trace_report(
+    mission_id: str,
+    min_duration_ms: int = Query(0, ge=0, description="Leave shorter spans out of the waterfall"),
+    kinds: Optional[str] = Query(None, description="Comma-separated span kinds to show in the waterfall (e.g. llm,llm_queue,tool)"),
+    limit: int = Query(2000, ge=1, le=20000, description="Maximum number of waterfall rows"),
+    current_user: User = Depends(get_current_user_from_cookie)
+):
+    """
+    Get the performance trace of a mission: a waterfall of timed spans (LLM queueing
+    and calls, tools, retrieval, DB writes), totals per span kind, and the critical
+    path for the whole mission and per phase.
+    """
+    try:
+        async_db = await get_async_db_session()
+        try:
+            mission = await async_crud.get_mission(async_db, mission_id, user_id=current_user.id)
+            if not mission:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Mission not found"
+                )
+            stored = await async_crud.get_mission_traces(async_db, mission_id)
+        finally:
+            await async_db.close()
+
+        runs = {row.started_at: row.trace for row in stored}
+        live_trace = get_mission_trace(mission_id, create=False)
+        if live_trace is not None:
+            # The current run may have spans that were not written yet
+            runs[live_trace.started_at] = live_trace.snapshot()
+
+        report = analyze_trace(
+            sorted(runs.items(), key=lambda run: run[0]),
+            min_duration_ms=min_duration_ms,
+            kinds=[kind.strip() for kind in kinds.split(",") if kind.strip()] if kinds else None,
+            limit=limit
+        )
+        return {"mission_id": mission_id, **report}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get mission trace: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to get mission trace"
+        )
+
 @router.get("/missions/{mission_id}/complete-stats", response_model=MissionStats)
 async def get_complete_mission_stats(
     mission_id: str,
@@ -800,7 +857,7 @@ async def get_mission_plan(
 ):
     """Get the research plan for a mission."""
     try:
-        mission_context = context_mgr.get_mission_context(mission_id)
+        mission_context = await context_mgr.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -835,7 +892,7 @@ async def get_mission_notes(
 ):
     """Get notes for a given mission with pagination, transformed for frontend consumption."""
     try:
-        mission_context = context_mgr.get_mission_context(mission_id)
+        mission_context = await context_mgr.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -932,12 +989,14 @@ async def get_mission_logs(
         
         logger.info(f"Retrieved {len(db_logs)} logs from DB for mission {mission_id} (skip={skip}, limit={limit}, total={total_logs_count})")
         
+        # Replace document codes in every action on the page with one resolution pass
+        actions_with_filenames = await document_service.replace_document_codes_in_texts(
+            [db_log.action for db_log in db_logs]
+        )
+        
         # Process database logs
         logs = []
-        for db_log in db_logs:
-            # Replace document codes in the action text
-            action_with_filenames = await document_service.replace_document_codes_in_text(db_log.action)
-            
+        for db_log, action_with_filenames in zip(db_logs, actions_with_filenames):
             # Convert database log to frontend format with rich metadata
             log_entry = {
                 "timestamp": db_log.timestamp.isoformat() if hasattr(db_log.timestamp, 'isoformat') else str(db_log.timestamp),
@@ -1007,7 +1066,7 @@ async def get_mission_report(
 ):
     """Get the final research report for a completed mission."""
     try:
-        mission_context = context_mgr.get_mission_context(mission_id)
+        mission_context = await context_mgr.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -1048,17 +1107,28 @@ async def get_mission_reports(
     if not mission:
         raise HTTPException(status_code=404, detail="Mission not found")
     
-    # Get all report versions
-    reports = db.query(models.ResearchReport).filter(
-        models.ResearchReport.mission_id == mission_id
-    ).order_by(models.ResearchReport.version.desc()).all()
+    # Get version metadata only; content is loaded per version from /reports/{version}
+    from database import crud_research_reports
+    reports = crud_research_reports.get_research_report_summaries(db, mission_id)
     
     # Find current version
     current_report = next((r for r in reports if r.is_current), None)
     current_version = current_report.version if current_report else 1
     
     return {
-        "reports": reports,
+        "reports": [
+            {
+                "id": str(report.id),
+                "mission_id": str(report.mission_id),
+                "version": report.version,
+                "title": report.title,
+                "is_current": report.is_current,
+                "revision_notes": report.revision_notes,
+                "created_at": report.created_at,
+                "updated_at": report.updated_at
+            }
+            for report in reports
+        ],
         "current_version": current_version
     }
 
@@ -1093,7 +1163,18 @@ async def get_mission_report_version(
     if not report:
         raise HTTPException(status_code=404, detail="Report version not found")
     
-    return report
+    from database import crud_research_reports
+    return {
+        "id": str(report.id),
+        "mission_id": str(report.mission_id),
+        "version": report.version,
+        "title": report.title,
+        "content": crud_research_reports.get_research_report_content(db, report),
+        "is_current": report.is_current,
+        "revision_notes": report.revision_notes,
+        "created_at": report.created_at,
+        "updated_at": report.updated_at
+    }
 
 @router.put("/missions/{mission_id}/report")
 async def update_mission_report(
@@ -1106,7 +1187,7 @@ async def update_mission_report(
     """Update the mission report content without updating chat timestamp."""
     try:
         # Get mission context
-        mission_context = context_mgr.get_mission_context(mission_id)
+        mission_context = await context_mgr.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -1158,6 +1239,11 @@ async def update_mission_report(
             
             next_version = 1 if not existing_reports else existing_reports.version + 1
             
+            # The previous latest version becomes history; store it as a diff
+            if existing_reports:
+                from database.version_store import report_versions
+                report_versions.compact(db, existing_reports)
+            
             # Create new report version
             new_report = models.ResearchReport(
                 id=str(uuid.uuid4()),
@@ -1195,7 +1281,7 @@ async def resume_mission_execution(
     """Resume a stopped mission."""
     logger.warning(f"[RESUME ENDPOINT] Resume mission endpoint called for {mission_id} by user {current_user.username}")
     try:
-        mission_context = controller.context_manager.get_mission_context(mission_id)
+        mission_context = await controller.context_manager.load_mission_context(mission_id)
         if not mission_context:
             logger.error(f"Mission {mission_id} not found in context manager")
             raise HTTPException(
@@ -1417,7 +1503,7 @@ async def stop_mission_execution(
     """Stop a running mission."""
     logger.info(f"[ENDPOINT] Stop mission endpoint called for mission {mission_id} by user {current_user.username}")
     try:
-        mission_context = controller.context_manager.get_mission_context(mission_id)
+        mission_context = await controller.context_manager.load_mission_context(mission_id)
         logger.info(f"[ENDPOINT] Mission context found: {mission_context is not None}, status: {mission_context.status if mission_context else 'N/A'}")
         if not mission_context:
             raise HTTPException(
@@ -1426,10 +1512,10 @@ async def stop_mission_execution(
             )
 
         logger.info(f"[ENDPOINT] Calling controller.pause_mission for {mission_id}")
-        await controller.pause_mission(mission_id)
+        cancelled_work = await controller.pause_mission(mission_id)
         logger.info(f"[ENDPOINT] Successfully called pause_mission for {mission_id}")
         
-        return {"message": "Mission execution paused", "mission_id": mission_id}
+        return {"message": "Mission execution paused", "mission_id": mission_id, **cancelled_work}
     except HTTPException:
         raise
     except Exception as e:
@@ -1452,7 +1538,7 @@ async def resume_from_round(
     """Resume mission from a specific research round."""
     try:
         # First, try to get mission context from memory
-        mission_context = controller.context_manager.get_mission_context(mission_id)
+        mission_context = await controller.context_manager.load_mission_context(mission_id)
         
         # If not in memory, load from database
         if not mission_context:
@@ -1474,7 +1560,7 @@ async def resume_from_round(
                     # Parse the stored mission context
                     mission_context = MissionContext(**db_mission.mission_context)
                     # Add it to the context manager
-                    controller.context_manager._missions[mission_id] = mission_context
+                    mission_context = controller.context_manager.cache_mission_context(mission_context)
                     logger.info(f"Successfully restored mission {mission_id} from database")
                 else:
                     raise HTTPException(
@@ -1617,7 +1703,7 @@ async def revise_and_resume(
     """Revise mission outline based on user feedback and resume from specified round."""
     try:
         # Validate mission exists and user has access
-        mission_context = controller.context_manager.get_mission_context(mission_id)
+        mission_context = await controller.context_manager.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -1737,7 +1823,7 @@ async def get_outline_history(
     """Get the history of outlines for each successful research round."""
     try:
         # Get mission context
-        mission_context = controller.context_manager.get_mission_context(mission_id)
+        mission_context = await controller.context_manager.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -2050,7 +2136,7 @@ async def unified_resume(
     """Unified endpoint for resume/revise - handles both with optional feedback."""
     try:
         # Validate mission exists
-        mission_context = controller.context_manager.get_mission_context(mission_id)
+        mission_context = await controller.context_manager.load_mission_context(mission_id)
         if not mission_context:
             # Try to load from database
             chat = crud.get_chat(db, mission_id)
@@ -2061,7 +2147,7 @@ async def unified_resume(
                 )
             # Load mission context from database
             await controller.context_manager.load_mission_from_database(mission_id)
-            mission_context = controller.context_manager.get_mission_context(mission_id)
+            mission_context = await controller.context_manager.load_mission_context(mission_id)
             if not mission_context:
                 raise HTTPException(
                     status_code=404,
@@ -2129,7 +2215,9 @@ async def unified_resume(
             if mission_context.plan:
                 mission_context.plan.report_outline = new_outline
                 # Store the updated plan to persist it
-                await controller.context_manager.store_plan(mission_id, mission_context.plan)
+                await controller.context_manager.store_plan(
+                    mission_id, mission_context.plan, phase="user_edit", round_num=resume_request.round_num - 1
+                )
                 logger.info(f"Using specific outline with ID {resume_request.outline_id} for mission {mission_id}")
         
         # Update mission status to running
@@ -2208,7 +2296,7 @@ async def start_mission_execution(
     IMPORTANT: This now returns immediately and runs all heavy operations in background.
     """
     try:
-        mission_context = context_mgr.get_mission_context(mission_id)
+        mission_context = await context_mgr.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(status_code=404, detail="Mission not found")
         
@@ -2799,7 +2887,7 @@ async def get_mission_context_data(
 ):
     """Get the context data for a mission, including goals and scratchpads."""
     try:
-        mission_context = context_mgr.get_mission_context(mission_id)
+        mission_context = await context_mgr.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -2829,7 +2917,7 @@ async def get_mission_info(
 ):
     """Get complete mission information including tool_selection and document_group_id."""
     try:
-        mission_context = context_mgr.get_mission_context(mission_id)
+        mission_context = await context_mgr.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -2884,7 +2972,7 @@ async def get_mission_settings(
 ):
     """Get the settings for a mission, including effective settings after fallback."""
     try:
-        mission_context = context_mgr.get_mission_context(mission_id)
+        mission_context = await context_mgr.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -2943,7 +3031,7 @@ async def get_comprehensive_mission_settings(
 ):
     """Get comprehensive mission settings including all parameters used when creating the mission."""
     try:
-        mission_context = context_mgr.get_mission_context(mission_id)
+        mission_context = await context_mgr.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -3032,7 +3120,7 @@ async def update_mission_settings(
 ):
     """Update the settings for a mission."""
     try:
-        mission_context = context_mgr.get_mission_context(mission_id)
+        mission_context = await context_mgr.load_mission_context(mission_id)
         if not mission_context:
             raise HTTPException(
                 status_code=404,
@@ -3063,58 +3151,74 @@ class MarkdownContent(BaseModel):
     markdown_content: str
     filename: Optional[str] = None
 
+def _get_owned_mission(db: Session, mission_id: str, user_id: int):
+    mission = db.query(models.Mission).join(
+        models.Chat, models.Mission.chat_id == models.Chat.id
+    ).filter(
+        models.Mission.id == mission_id,
+        models.Chat.user_id == user_id
+    ).first()
+    if not mission:
+        raise HTTPException(status_code=404, detail="Mission not found")
+    return mission
+
 @router.post("/missions/{mission_id}/report/docx")
 async def download_report_as_docx(
     mission_id: str,
     content: MarkdownContent,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_from_cookie)
 ):
     """Converts Markdown content to a DOCX file and returns it for download."""
+    _get_owned_mission(db, mission_id, current_user.id)
+    
+    # Use custom filename if provided, otherwise fallback to mission ID
+    filename = content.filename if content.filename else f"research-draft-{mission_id[:8]}"
+    job = await render_export(current_user.id, content.markdown_content, "docx", filename)
+    if job.status != "completed":
+        logger.error(f"Failed to convert report to DOCX for mission {mission_id}: {job.error}")
+        raise HTTPException(status_code=500, detail=f"Failed to convert report to DOCX: {job.error}")
+    
+    logger.info(f"Successfully converted report to DOCX for mission {mission_id}")
+    return FileResponse(job.path, media_type=job.media_type, filename=job.download_name)
+
+@router.post("/missions/{mission_id}/report/export", response_model=ExportJobStatus, status_code=202)
+async def start_report_export(
+    mission_id: str,
+    export_request: ExportRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_from_cookie)
+):
+    """
+    Start exporting a research report (current version, a given version, or the
+    given Markdown) in the background. Poll GET /api/exports/{job_id} and download
+    from its download_url.
+    """
+    _get_owned_mission(db, mission_id, current_user.id)
+    
+    markdown_content = export_request.markdown_content
+    filename = export_request.filename
+    if markdown_content is None:
+        from database import crud_research_reports
+        query = db.query(models.ResearchReport).filter(models.ResearchReport.mission_id == mission_id)
+        if export_request.version is not None:
+            query = query.filter(models.ResearchReport.version == export_request.version)
+        else:
+            query = query.filter(models.ResearchReport.is_current == True)
+        report = query.first()
+        if not report:
+            raise HTTPException(status_code=404, detail="Report not found")
+        markdown_content = crud_research_reports.get_research_report_content(db, report)
+        filename = filename or report.title
+    
     try:
-        # Create a temporary file for the DOCX output
-        import tempfile
-        import os
-        
-        with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as temp_file:
-            temp_path = temp_file.name
-        
-        try:
-            # Convert markdown to DOCX using pypandoc with output file
-            pypandoc.convert_text(
-                content.markdown_content,
-                'docx',
-                format='md',
-                outputfile=temp_path,
-                extra_args=['--reference-doc=/app/reference.docx'] if os.path.exists('/app/reference.docx') else []
-            )
-            
-            # Read the generated file
-            with open(temp_path, 'rb') as docx_file:
-                docx_content = docx_file.read()
-            
-            # Use custom filename if provided, otherwise fallback to mission ID
-            filename = content.filename if content.filename else f"research-draft-{mission_id[:8]}"
-            
-            # Create response with proper headers
-            response = Response(
-                content=docx_content,
-                media_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                headers={
-                    'Content-Disposition': f'attachment; filename="{filename}.docx"'
-                }
-            )
-            
-            logger.info(f"Successfully converted report to DOCX for mission {mission_id}")
-            return response
-            
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-                
-    except Exception as e:
-        logger.error(f"Failed to convert report to DOCX for mission {mission_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to convert report to DOCX: {str(e)}")
+        job = submit_export(
+            current_user.id, markdown_content, export_request.format,
+            filename or f"research-draft-{mission_id[:8]}"
+        )
+    except UnsupportedExportFormat as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return export_job_status(job)
 
 @router.post("/missions/{mission_id}/create-document-group")
 async def create_document_group_from_mission(
@@ -3148,7 +3252,7 @@ async def create_document_group_from_mission(
         
         # Get mission context to extract notes
         context_manager = AsyncContextManager()
-        mission_context = context_manager.get_mission_context(mission_id)
+        mission_context = await context_manager.load_mission_context(mission_id)
         
         if not mission_context:
             raise HTTPException(status_code=404, detail="Mission context not found")
@@ -2,7 +2,7 @@
 API endpoints for research report versioning
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import datetime
@@ -20,7 +20,7 @@ class ResearchReportResponse(BaseModel):
     mission_id: str
     version: int
     title: Optional[str]
-    content: str
+    content: Optional[str] = None
     is_current: bool
     revision_notes: Optional[str]
     created_at: datetime
@@ -38,10 +38,16 @@ class SetCurrentVersionRequest(BaseModel):
 @router.get("/missions/{mission_id}/reports")
 async def get_mission_reports(
     mission_id: str,
+    include_content: bool = Query(False, description="Include each version's full content"),
     current_user: User = Depends(get_current_user_from_cookie),
     db: Session = Depends(get_db)
 ):
-    """Get all research report versions for a mission."""
+    """
+    Get all research report versions for a mission.
+    
+    Returns version metadata only unless include_content is set; fetch a
+    version's content from /missions/{mission_id}/reports/{version}.
+    """
     # Verify mission ownership
     mission = crud.get_mission(db, mission_id)
     if not mission:
@@ -53,7 +59,10 @@ async def get_mission_reports(
         raise HTTPException(status_code=403, detail="Access denied")
     
     # Get all report versions
-    reports = crud_research_reports.get_all_research_reports(db, mission_id)
+    if include_content:
+        reports = crud_research_reports.get_all_research_reports(db, mission_id)
+    else:
+        reports = crud_research_reports.get_research_report_summaries(db, mission_id)
     
     # Find current version
     current_version = 1
@@ -69,7 +78,7 @@ async def get_mission_reports(
                 mission_id=str(report.mission_id),
                 version=report.version,
                 title=report.title,
-                content=report.content,
+                content=crud_research_reports.get_research_report_content(db, report) if include_content else None,
                 is_current=report.is_current,
                 revision_notes=report.revision_notes,
                 created_at=report.created_at,
@@ -118,7 +127,7 @@ async def get_current_report(
         mission_id=str(report.mission_id),
         version=report.version,
         title=report.title,
-        content=report.content,
+        content=crud_research_reports.get_research_report_content(db, report),
         is_current=report.is_current,
         revision_notes=report.revision_notes,
         created_at=report.created_at,
@@ -151,7 +160,7 @@ async def get_report_by_version(
         mission_id=str(report.mission_id),
         version=report.version,
         title=report.title,
-        content=report.content,
+        content=crud_research_reports.get_research_report_content(db, report),
         is_current=report.is_current,
         revision_notes=report.revision_notes,
         created_at=report.created_at,
@@ -203,7 +212,7 @@ async def delete_report_version(
         raise HTTPException(status_code=403, detail="Access denied")
     
     # Don't allow deleting the only version
-    all_reports = crud_research_reports.get_all_research_reports(db, mission_id)
+    all_reports = crud_research_reports.get_research_report_summaries(db, mission_id)
     if len(all_reports) <= 1:
         raise HTTPException(status_code=400, detail="Cannot delete the only report version")
     
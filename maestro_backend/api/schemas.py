@@ -204,6 +204,7 @@ class PaginatedChatsResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for fetching the next page with keyset pagination")
 
     class Config:
         json_encoders = {
@@ -487,6 +488,7 @@ class PaginationInfo(BaseModel):
     total_pages: int
     has_next: bool
     has_previous: bool
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for fetching the next page with keyset pagination")
 
 class PaginatedDocumentResponse(BaseModel):
     documents: List[Document]
@@ -548,6 +550,7 @@ class Draft(DraftBase):
     id: str
     writing_session_id: str
     is_current: bool = True
+    revision: int = 0  # Save counter; pass as base_revision when patching
     created_at: datetime
     updated_at: datetime
 
@@ -596,8 +599,37 @@ class WritingSessionWithChat(BaseModel):
             datetime: lambda v: v.isoformat()
         }
 
+class DraftTextOperation(BaseModel):
+    """Replace [start, end) of the base text (UTF-16 code unit offsets) with text."""
+    start: int = Field(..., ge=0)
+    end: int = Field(..., ge=0)
+    text: str = ""
+
+class DraftPatchRequest(BaseModel):
+    base_revision: Optional[int] = Field(None, description="Draft revision the operations apply to; may be sent as an If-Match ETag instead")
+    operations: List[DraftTextOperation] = Field(default_factory=list, description="Sorted, non-overlapping operations against the base text")
+    title: Optional[str] = None
+
+class DraftPatchResponse(BaseModel):
+    id: str
+    revision: int
+    updated_at: datetime
+
+class DraftVersionSummary(BaseModel):
+    """Draft version metadata without content; content is loaded per version."""
+    id: str
+    writing_session_id: str
+    title: str
+    version: int = 1
+    is_current: bool = True
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class WritingSessionWithDrafts(WritingSession):
-    drafts: List[Draft] = []
+    drafts: List[DraftVersionSummary] = []
     current_draft: Optional[Draft] = None
 
 class DraftWithReferences(Draft):
@@ -772,3 +804,20 @@ class BulkOperationResponse(BaseModel):
     failed_count: int
     failed_items: List[Dict[str, Any]] = []
     message: str
+
+# Export Schemas
+class ExportRequest(BaseModel):
+    format: str = "docx"
+    filename: Optional[str] = None
+    # Export this Markdown instead of the stored draft/report (e.g. unsaved editor content)
+    markdown_content: Optional[str] = None
+    # Research reports only: export this version instead of the current one
+    version: Optional[int] = None
+
+class ExportJobStatus(BaseModel):
+    job_id: str
+    status: str
+    format: str
+    filename: str
+    error: Optional[str] = None
+    download_url: Optional[str] = None
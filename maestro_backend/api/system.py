@@ -78,11 +78,14 @@ async def get_system_status(current_user: User = Depends(get_current_user_from_c
 
 @router.post("/consistency-check")
 async def trigger_consistency_check(
+    full_sweep: bool = False,
     current_user: User = Depends(get_current_user_from_cookie),
     db: Session = Depends(get_db)
 ):
     """
     Manually trigger a system-wide consistency check.
+    Only documents changed since their last check are verified; pass
+    ``full_sweep=true`` to also re-check every document in the background.
     Only available to admin users.
     """
     # Check if user is admin
@@ -93,7 +96,7 @@ async def trigger_consistency_check(
         from services.simple_consistency_checker import run_consistency_check
         
         logger.info(f"Admin {current_user.username} triggered consistency check")
-        result = await run_consistency_check(db)
+        result = await run_consistency_check(db, full_sweep=full_sweep)
         
         return {
             "status": "success",
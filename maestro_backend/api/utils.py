@@ -85,9 +85,50 @@ def clean_tool_call_arguments(tool_calls: Optional[List[Dict[str, Any]]]) -> Opt
     
     return cleaned_tool_calls
 
+def _tool_call_texts(tool_calls: Optional[List[Dict[str, Any]]]):
+    """Yield every string in tool calls that may contain document codes."""
+    for tool_call in tool_calls or []:
+        if not isinstance(tool_call, dict):
+            continue
+        if isinstance(tool_call.get('arguments'), dict):
+            for value in tool_call['arguments'].values():
+                if isinstance(value, str):
+                    yield value
+        for key in ('result_summary', 'error'):
+            if isinstance(tool_call.get(key), str):
+                yield tool_call[key]
+
+def _replace_cached_codes_in_tool_calls(tool_calls: List[Any], resolver) -> List[Any]:
+    """Replace document codes in tool calls using mappings already prefetched into ``resolver``."""
+    processed_tool_calls = []
+    
+    for tool_call in tool_calls:
+        if not isinstance(tool_call, dict):
+            processed_tool_calls.append(tool_call)
+            continue
+            
+        processed_call = tool_call.copy()
+        
+        # Process arguments if present
+        if 'arguments' in processed_call and isinstance(processed_call['arguments'], dict):
+            processed_call['arguments'] = {
+                key: resolver.replace_cached(value) if isinstance(value, str) else value
+                for key, value in processed_call['arguments'].items()
+            }
+            
+        # Process result_summary and error if present
+        for key in ('result_summary', 'error'):
+            if key in processed_call and isinstance(processed_call[key], str):
+                processed_call[key] = resolver.replace_cached(processed_call[key])
+            
+        processed_tool_calls.append(processed_call)
+        
+    return processed_tool_calls
+
 async def replace_document_codes_in_tool_calls(tool_calls: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
     """
     Replace document codes with actual filenames in tool call arguments.
+    All codes across the tool calls are resolved in a single pass.
     
     Args:
         tool_calls: List of tool call dictionaries
@@ -99,45 +140,10 @@ async def replace_document_codes_in_tool_calls(tool_calls: Optional[List[Dict[st
         return tool_calls
     
     try:
-        from services.document_service import document_service
+        from services.document_code_resolver import document_code_resolver
         
-        processed_tool_calls = []
-        
-        for tool_call in tool_calls:
-            if not isinstance(tool_call, dict):
-                processed_tool_calls.append(tool_call)
-                continue
-                
-            processed_call = tool_call.copy()
-            
-            # Process arguments if present
-            if 'arguments' in processed_call and isinstance(processed_call['arguments'], dict):
-                processed_args = {}
-                for key, value in processed_call['arguments'].items():
-                    if isinstance(value, str):
-                        # Replace document codes in string values
-                        processed_value = await document_service.replace_document_codes_in_text(value)
-                        processed_args[key] = processed_value
-                    else:
-                        processed_args[key] = value
-                        
-                processed_call['arguments'] = processed_args
-                
-            # Process result_summary if present
-            if 'result_summary' in processed_call and isinstance(processed_call['result_summary'], str):
-                processed_call['result_summary'] = await document_service.replace_document_codes_in_text(
-                    processed_call['result_summary']
-                )
-                
-            # Process error if present
-            if 'error' in processed_call and isinstance(processed_call['error'], str):
-                processed_call['error'] = await document_service.replace_document_codes_in_text(
-                    processed_call['error']
-                )
-                
-            processed_tool_calls.append(processed_call)
-            
-        return processed_tool_calls
+        await document_code_resolver.prefetch(_tool_call_texts(tool_calls))
+        return _replace_cached_codes_in_tool_calls(tool_calls, document_code_resolver)
         
     except Exception as e:
         logger.warning(f"Failed to replace document codes in tool calls: {e}")
@@ -245,33 +251,26 @@ async def process_execution_log_entry_for_frontend(log_entry: Dict[str, Any]) ->
     if 'input_summary' in cleaned_entry and isinstance(cleaned_entry['input_summary'], str):
         cleaned_entry['input_summary'] = clean_input_summary_for_display(cleaned_entry['input_summary'])
     
-    # Then replace document codes with filenames
+    # Then replace document codes with filenames, resolving every code in the entry at once
     try:
-        from services.document_service import document_service
+        from services.document_code_resolver import document_code_resolver
         
-        # Replace document codes in action text
-        if 'action' in cleaned_entry and isinstance(cleaned_entry['action'], str):
-            cleaned_entry['action'] = await document_service.replace_document_codes_in_text(
-                cleaned_entry['action']
-            )
-            
-        # Replace document codes in input_summary
-        if 'input_summary' in cleaned_entry and isinstance(cleaned_entry['input_summary'], str):
-            cleaned_entry['input_summary'] = await document_service.replace_document_codes_in_text(
-                cleaned_entry['input_summary']
-            )
-            
-        # Replace document codes in output_summary  
-        if 'output_summary' in cleaned_entry and isinstance(cleaned_entry['output_summary'], str):
-            cleaned_entry['output_summary'] = await document_service.replace_document_codes_in_text(
-                cleaned_entry['output_summary']
-            )
+        text_fields = [
+            field for field in ('action', 'input_summary', 'output_summary')
+            if isinstance(cleaned_entry.get(field), str)
+        ]
+        tool_calls = cleaned_entry.get('tool_calls')
+        texts = [cleaned_entry[field] for field in text_fields]
+        texts.extend(_tool_call_texts(tool_calls))
+        await document_code_resolver.prefetch(texts)
+        
+        # Replace document codes in action text, input_summary and output_summary
+        for field in text_fields:
+            cleaned_entry[field] = document_code_resolver.replace_cached(cleaned_entry[field])
             
         # Replace document codes in tool calls
-        if 'tool_calls' in cleaned_entry:
-            cleaned_entry['tool_calls'] = await replace_document_codes_in_tool_calls(
-                cleaned_entry['tool_calls']
-            )
+        if tool_calls:
+            cleaned_entry['tool_calls'] = _replace_cached_codes_in_tool_calls(tool_calls, document_code_resolver)
             
     except Exception as e:
         logger.warning(f"Failed to replace document codes in log entry: {e}")
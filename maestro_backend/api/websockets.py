@@ -6,9 +6,11 @@ import json
 import asyncio
 import logging
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from auth.user_cache import get_user_snapshot
 from database import models
 from database.database import get_db
 from services.background_document_processor import background_processor
@@ -102,17 +104,11 @@ async def websocket_document_updates(websocket: WebSocket, user_id: str):
             return
         
         # Verify user exists in database and matches the user_id
-        from database.database import SessionLocal
-        db = SessionLocal()
-        try:
-            from database import crud
-            user = crud.get_user_by_username(db, username=username)
-            if user is None or str(user.id) != user_id:
-                logger.debug(f"WebSocket connection rejected: User mismatch. Expected {user_id}, got {user.id if user else None}")
-                await websocket.close(code=1008, reason="User not found or mismatch")
-                return
-        finally:
-            db.close()
+        user = await run_in_threadpool(get_user_snapshot, username)
+        if user is None or str(user.id) != user_id:
+            logger.debug(f"WebSocket connection rejected: User mismatch. Expected {user_id}, got {user.id if user else None}")
+            await websocket.close(code=1008, reason="User not found or mismatch")
+            return
         
         await websocket.accept()
         
@@ -199,18 +195,12 @@ async def websocket_research_updates(websocket: WebSocket):
             return
         
         # Verify user exists in database
-        from database.database import SessionLocal
-        db = SessionLocal()
-        try:
-            from database import crud
-            user = crud.get_user_by_username(db, username=username)
-            if user is None:
-                logger.debug(f"WebSocket connection rejected: User not found")
-                await websocket.close(code=1008, reason="User not found")
-                return
-            user_id = str(user.id)
-        finally:
-            db.close()
+        user = await run_in_threadpool(get_user_snapshot, username)
+        if user is None:
+            logger.debug(f"WebSocket connection rejected: User not found")
+            await websocket.close(code=1008, reason="User not found")
+            return
+        user_id = str(user.id)
             
         await websocket.accept()
         
@@ -473,6 +463,22 @@ async def send_scratchpad_update(mission_id: str, scratchpad_content: str, actio
 # Writing session connection manager
 writing_manager = ConnectionManager()
 
+def _user_owns_writing_session(session_id: str, user_id: int) -> bool:
+    """Check (blocking) that a writing session exists and belongs to the user."""
+    from database.database import SessionLocal
+    db = SessionLocal()
+    try:
+        # WritingSession -> Chat -> User relationship
+        writing_session = db.query(models.WritingSession.id).join(
+            models.Chat, models.WritingSession.chat_id == models.Chat.id
+        ).filter(
+            models.WritingSession.id == session_id,
+            models.Chat.user_id == user_id
+        ).first()
+        return writing_session is not None
+    finally:
+        db.close()
+
 @router.websocket("/ws/{session_id}")
 async def websocket_writing_updates(websocket: WebSocket, session_id: str):
     """
@@ -504,34 +510,18 @@ async def websocket_writing_updates(websocket: WebSocket, session_id: str):
             return
         
         # Verify user exists in database and owns the writing session
-        from database.database import SessionLocal
-        db = SessionLocal()
-        try:
-            from database import crud
-            user = crud.get_user_by_username(db, username=username)
-            if user is None:
-                logger.debug(f"WebSocket connection rejected: User not found for writing session {session_id}")
-                await websocket.close(code=1008, reason="User not found")
-                return
-            
-            # Check if writing session exists and belongs to user
-            # WritingSession -> Chat -> User relationship
-            writing_session = db.query(models.WritingSession).join(
-                models.Chat, models.WritingSession.chat_id == models.Chat.id
-            ).filter(
-                models.WritingSession.id == session_id,
-                models.Chat.user_id == user.id
-            ).first()
-            
-            if not writing_session:
-                logger.debug(f"WebSocket connection rejected: Writing session {session_id} not found or not owned by user {username}")
-                await websocket.close(code=1008, reason="Writing session not found or access denied")
-                return
-            
-            user_id = str(user.id)
-                
-        finally:
-            db.close()
+        user = await run_in_threadpool(get_user_snapshot, username)
+        if user is None:
+            logger.debug(f"WebSocket connection rejected: User not found for writing session {session_id}")
+            await websocket.close(code=1008, reason="User not found")
+            return
+        
+        if not await run_in_threadpool(_user_owns_writing_session, session_id, user.id):
+            logger.debug(f"WebSocket connection rejected: Writing session {session_id} not found or not owned by user {username}")
+            await websocket.close(code=1008, reason="Writing session not found or access denied")
+            return
+        
+        user_id = str(user.id)
         
         # Accept the connection ONLY after successful authentication
         await websocket.accept()
@@ -619,14 +609,24 @@ async def send_agent_status_update(session_id: str, status: str, details: str =
         "timestamp": time.time()
     })
 
-async def send_streaming_chunk_update(session_id: str, chunk: str):
-    """Send streaming content chunk to writing session WebSocket clients."""
-    await send_writing_update(session_id, {
+async def send_streaming_chunk_update(session_id: str, chunk: str, stream_id: Optional[str] = None, sequence: Optional[int] = None):
+    """
+    Send streaming content chunk to writing session WebSocket clients.
+
+    Chunks of an assistant reply carry the reply's ``stream_id`` (the chat
+    task id) and a ``sequence`` number; the ``draft_content_update``
+    "complete" frame with the same task id carries the final text.
+    """
+    update = {
         "type": "streaming_chunk",
         "session_id": session_id,
         "chunk": chunk,
         "timestamp": time.time()
-    })
+    }
+    if stream_id is not None:
+        update["stream_id"] = stream_id
+        update["sequence"] = sequence
+    await send_writing_update(session_id, update)
 
 async def send_draft_content_update(session_id: str, content: Dict, action: str = "update"):
     """Send draft content update to writing session WebSocket clients."""
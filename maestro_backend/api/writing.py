@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Header, Response
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import func
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import uuid
@@ -12,6 +13,10 @@ logger = logging.getLogger(__name__)
 
 from database.database import get_db
 from database import models, crud
+from database.dashboard_stats import invalidate_dashboard_stats
+from database.version_store import draft_versions, get_draft_content
+from database import draft_patches
+from sqlalchemy.exc import IntegrityError
 from api import schemas
 from auth.dependencies import get_current_user_from_cookie
 from services.document_service import DocumentService
@@ -25,6 +30,21 @@ from ai_researcher.dynamic_config import get_writing_mode_doc_results, get_writi
 router = APIRouter(prefix="/api/writing", tags=["writing"])
 
 
+def _draft_response(db: Session, draft: models.Draft) -> schemas.Draft:
+    """Build a Draft response with the draft's latest full text."""
+    return schemas.Draft(
+        id=draft.id,
+        writing_session_id=draft.writing_session_id,
+        title=draft.title,
+        content=get_draft_content(db, draft),
+        version=draft.version,
+        is_current=draft.is_current,
+        revision=draft.revision or 0,
+        created_at=draft.created_at,
+        updated_at=draft.updated_at
+    )
+
+
 @router.get("/sessions", response_model=List[schemas.WritingSessionWithChat])
 async def get_writing_sessions(
     db: Session = Depends(get_db),
@@ -92,6 +112,7 @@ async def create_writing_chat(
         db.add(db_chat)
         db.commit()
         db.refresh(db_chat)
+        invalidate_dashboard_stats(current_user.id)
         
         logger.info(f"Created new writing chat {chat_id} for user {current_user.username}")
         return db_chat
@@ -343,10 +364,8 @@ async def get_writing_session(
             detail="Writing session not found or access denied"
         )
     
-    # Get all drafts for this session
-    drafts = db.query(models.Draft).filter(
-        models.Draft.writing_session_id == session_id
-    ).order_by(models.Draft.created_at.desc()).all()
+    # Get version metadata for all drafts in this session (content is loaded per version)
+    drafts = draft_versions.metadata_query(db, session_id).all()
     
     # Get current draft
     current_draft = None
@@ -365,8 +384,8 @@ async def get_writing_session(
         settings=writing_session.settings,
         created_at=writing_session.created_at,
         updated_at=writing_session.updated_at,
-        drafts=[schemas.Draft.from_orm(draft) for draft in drafts],
-        current_draft=schemas.Draft.from_orm(current_draft) if current_draft else None
+        drafts=[schemas.DraftVersionSummary.from_orm(draft) for draft in drafts],
+        current_draft=_draft_response(db, current_draft) if current_draft else None
     )
     
     return response_data
@@ -413,6 +432,7 @@ async def get_writing_session_messages(
 @router.get("/sessions/{session_id}/draft", response_model=schemas.DraftWithReferences)
 async def get_current_draft(
     session_id: str,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user_from_cookie)
 ):
@@ -473,24 +493,32 @@ async def get_current_draft(
         id=current_draft.id,
         writing_session_id=current_draft.writing_session_id,
         title=current_draft.title,
-        content=current_draft.content,
+        content=get_draft_content(db, current_draft),
         version=current_draft.version,
         is_current=current_draft.is_current,
+        revision=current_draft.revision or 0,
         created_at=current_draft.created_at,
         updated_at=current_draft.updated_at,
         references=[schemas.Reference.from_orm(ref) for ref in references]
     )
     
+    response.headers["ETag"] = draft_patches.draft_etag(current_draft)
     return response_data
 
 @router.put("/sessions/{session_id}/draft", response_model=schemas.Draft)
 async def update_current_draft(
     session_id: str,
     draft_update: schemas.DraftUpdate,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user_from_cookie)
 ):
-    """Update the current draft for a writing session."""
+    """
+    Update the current draft for a writing session.
+    
+    A content update replaces the whole text. With an If-Match ETag it is
+    rejected with 409 if the draft changed since that revision.
+    """
     
     # Get writing session and verify access
     writing_session = db.query(models.WritingSession).join(
@@ -525,6 +553,30 @@ async def update_current_draft(
     
     # Update fields
     update_data = draft_update.dict(exclude_unset=True)
+    if 'content' in update_data:
+        base_revision = None
+        if if_match:
+            base_revision = draft_patches.parse_etag_revision(current_draft, if_match)
+            if base_revision is None:
+                raise HTTPException(
+                    status_code=status.HTTP_412_PRECONDITION_FAILED,
+                    detail="If-Match does not name the current draft"
+                )
+        try:
+            # Versions diffed against this draft must not see the edit
+            draft_versions.detach(db, current_draft)
+            current_draft.content_delta = None
+            current_draft.delta_base_version = None
+            draft_patches.replace_content(db, current_draft, update_data.pop('content') or "", base_revision)
+        except draft_patches.DraftRevisionConflict as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={
+                    "message": "Draft has been modified since the base revision",
+                    "current_revision": e.current_revision
+                }
+            )
     for field, value in update_data.items():
         setattr(current_draft, field, value)
     
@@ -535,7 +587,93 @@ async def update_current_draft(
     db.commit()
     db.refresh(current_draft)
     
-    return current_draft
+    return _draft_response(db, current_draft)
+
+@router.patch("/sessions/{session_id}/draft", response_model=schemas.DraftPatchResponse)
+async def patch_current_draft(
+    session_id: str,
+    patch: schemas.DraftPatchRequest,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_from_cookie)
+):
+    """
+    Apply ranged text operations to the current draft.
+    
+    The operations are stored as a small patch against base_revision (or the
+    revision in an If-Match ETag) instead of rewriting the whole document.
+    Returns 409 with the current revision if the draft changed since then.
+    """
+    
+    # Get writing session and verify access
+    writing_session = db.query(models.WritingSession).join(
+        models.Chat, models.WritingSession.chat_id == models.Chat.id
+    ).filter(
+        models.WritingSession.id == session_id,
+        models.Chat.user_id == current_user.id
+    ).first()
+    
+    if not writing_session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Writing session not found or access denied"
+        )
+    
+    current_draft = None
+    if writing_session.current_draft_id:
+        current_draft = db.query(models.Draft).filter(
+            models.Draft.id == writing_session.current_draft_id
+        ).first()
+    
+    if not current_draft:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Current draft not found"
+        )
+    
+    base_revision = patch.base_revision
+    if base_revision is None and if_match:
+        base_revision = draft_patches.parse_etag_revision(current_draft, if_match)
+    if base_revision is None:
+        raise HTTPException(
+            status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+            detail="base_revision or an If-Match ETag for the current draft is required"
+        )
+    
+    conflict_detail = {
+        "message": "Draft has been modified since the base revision",
+        "current_revision": current_draft.revision or 0
+    }
+    try:
+        draft_patches.apply_patch(
+            db, current_draft, base_revision,
+            [op.dict() for op in patch.operations]
+        )
+        if patch.title is not None:
+            current_draft.title = patch.title
+        current_draft.updated_at = datetime.utcnow()
+        db.commit()
+    except draft_patches.DraftRevisionConflict as e:
+        db.rollback()
+        conflict_detail["current_revision"] = e.current_revision
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict_detail)
+    except draft_patches.InvalidDraftPatch as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except IntegrityError:
+        # Defensive: the revision claim already serializes saves of one draft
+        db.rollback()
+        db.refresh(current_draft)
+        conflict_detail["current_revision"] = current_draft.revision or 0
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict_detail)
+    
+    response.headers["ETag"] = draft_patches.draft_etag(current_draft)
+    return schemas.DraftPatchResponse(
+        id=current_draft.id,
+        revision=current_draft.revision,
+        updated_at=current_draft.updated_at
+    )
 
 @router.post("/sessions/{session_id}/versions", response_model=schemas.Draft)
 async def create_draft_version(
@@ -566,9 +704,10 @@ async def create_draft_version(
             detail="No current draft found"
         )
     
+    # Lock the draft so no patch lands between folding and the version switch
     current_draft = db.query(models.Draft).filter(
         models.Draft.id == writing_session.current_draft_id
-    ).first()
+    ).with_for_update().first()
     
     if not current_draft:
         raise HTTPException(
@@ -578,13 +717,16 @@ async def create_draft_version(
     
     # Mark current draft as not current
     current_draft.is_current = False
+    current_content = get_draft_content(db, current_draft)
+    # History rows hold their full text (or a diff); fold any pending patches first
+    draft_patches.fold_patches(db, current_draft, current_content)
     
     # Create new version
     new_version = models.Draft(
         id=str(uuid.uuid4()),
         writing_session_id=session_id,
         title=current_draft.title,
-        content=current_draft.content,  # Copy the content string
+        content=current_content,  # Copy the content string
         version=current_draft.version + 1,
         is_current=True,
         created_at=datetime.utcnow(),
@@ -593,6 +735,9 @@ async def create_draft_version(
     
     db.add(new_version)
     
+    # The previous version is now history; store it as a diff against its predecessor
+    draft_versions.compact(db, current_draft)
+    
     # Update writing session to point to new version
     writing_session.current_draft_id = new_version.id
     writing_session.updated_at = datetime.utcnow()
@@ -602,6 +747,66 @@ async def create_draft_version(
     
     return new_version
 
+@router.get("/sessions/{session_id}/versions", response_model=List[schemas.DraftVersionSummary])
+async def get_draft_versions(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_from_cookie)
+):
+    """List the draft versions of a writing session without their content."""
+    
+    # Get writing session and verify access
+    writing_session = db.query(models.WritingSession).join(
+        models.Chat, models.WritingSession.chat_id == models.Chat.id
+    ).filter(
+        models.WritingSession.id == session_id,
+        models.Chat.user_id == current_user.id
+    ).first()
+    
+    if not writing_session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Writing session not found or access denied"
+        )
+    
+    return draft_versions.metadata_query(db, session_id).all()
+
+@router.get("/sessions/{session_id}/versions/{version}", response_model=schemas.Draft)
+async def get_draft_version(
+    session_id: str,
+    version: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_from_cookie)
+):
+    """Get a specific draft version, rebuilding its content from stored diffs if needed."""
+    
+    # Get writing session and verify access
+    writing_session = db.query(models.WritingSession).join(
+        models.Chat, models.WritingSession.chat_id == models.Chat.id
+    ).filter(
+        models.WritingSession.id == session_id,
+        models.Chat.user_id == current_user.id
+    ).first()
+    
+    if not writing_session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Writing session not found or access denied"
+        )
+    
+    draft = db.query(models.Draft).filter(
+        models.Draft.writing_session_id == session_id,
+        models.Draft.version == version
+    ).first()
+    
+    if not draft:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Draft version {version} not found"
+        )
+    
+    return _draft_response(db, draft)
+
 
 # Reference Management Endpoints
 
@@ -757,10 +962,8 @@ async def get_writing_session_by_chat(
             detail="No writing session found for this chat"
         )
     
-    # Get all drafts for this session
-    drafts = db.query(models.Draft).filter(
-        models.Draft.writing_session_id == writing_session.id
-    ).order_by(models.Draft.created_at.desc()).all()
+    # Get version metadata for all drafts in this session (content is loaded per version)
+    drafts = draft_versions.metadata_query(db, writing_session.id).all()
     
     # Get current draft
     current_draft = None
@@ -779,8 +982,8 @@ async def get_writing_session_by_chat(
         settings=writing_session.settings,
         created_at=writing_session.created_at,
         updated_at=writing_session.updated_at,
-        drafts=[schemas.Draft.from_orm(draft) for draft in drafts],
-        current_draft=schemas.Draft.from_orm(current_draft) if current_draft else None
+        drafts=[schemas.DraftVersionSummary.from_orm(draft) for draft in drafts],
+        current_draft=_draft_response(db, current_draft) if current_draft else None
     )
     
     return response_data
@@ -841,32 +1044,40 @@ async def enhanced_writing_chat_stream(
     session_id = writing_session.id
     
     # Check if this is a regeneration by looking for an existing user message with the same content
-    # that's recent (within last 10 messages) to avoid false positives
-    recent_messages = db.query(models.Message).filter(
-        models.Message.chat_id == draft.writing_session.chat_id
-    ).order_by(models.Message.created_at.desc()).limit(10).all()
+    # that's recent (within last 10 messages) to avoid false positives. The lookup goes through
+    # the (chat_id, content_hash) index instead of loading and comparing recent message bodies.
+    chat_id = draft.writing_session.chat_id
+    existing_user_message = db.query(models.Message).options(
+        load_only(models.Message.id, models.Message.content, models.Message.created_at)
+    ).filter(
+        models.Message.chat_id == chat_id,
+        models.Message.role == "user",
+        models.Message.content_hash == models.message_content_hash(request.message)
+    ).order_by(models.Message.created_at.desc()).first()
     
-    existing_user_message = None
-    for msg in recent_messages:
-        if msg.role == "user" and msg.content == request.message:
-            existing_user_message = msg
-            break
+    if existing_user_message and existing_user_message.content == request.message:
+        newer_messages = db.query(func.count(models.Message.id)).filter(
+            models.Message.chat_id == chat_id,
+            models.Message.created_at > existing_user_message.created_at
+        ).scalar()
+        if newer_messages >= 10:
+            existing_user_message = None
+    else:
+        existing_user_message = None
     
     if existing_user_message:
         # This is a regeneration - reuse the existing user message
         user_message = existing_user_message
-        logger.info(f"Detected regeneration - reusing existing user message {existing_user_message.id} for chat {draft.writing_session.chat_id}")
+        logger.info(f"Detected regeneration - reusing existing user message {existing_user_message.id} for chat {chat_id}")
         
         # Clean up any orphaned assistant messages after this user message
-        orphaned_messages = db.query(models.Message).filter(
-            models.Message.chat_id == draft.writing_session.chat_id,
+        orphaned_count = db.query(models.Message).filter(
+            models.Message.chat_id == chat_id,
             models.Message.created_at > existing_user_message.created_at
-        ).all()
+        ).delete(synchronize_session=False)
         
-        if orphaned_messages:
-            logger.info(f"Cleaning up {len(orphaned_messages)} orphaned messages for regeneration")
-            for msg in orphaned_messages:
-                db.delete(msg)
+        if orphaned_count:
+            logger.info(f"Cleaning up {orphaned_count} orphaned messages for regeneration")
             db.commit()
     else:
         # New message - save it
@@ -916,7 +1127,7 @@ async def process_writing_chat_in_background(
     """
     Process writing chat in background and send updates via WebSocket.
     """
-    from api.websockets import send_agent_status_update, send_draft_content_update
+    from api.websockets import send_agent_status_update, send_draft_content_update, send_streaming_chunk_update
     from database.database import SessionLocal
     
     db = SessionLocal()
@@ -1033,15 +1244,28 @@ async def process_writing_chat_in_background(
             except Exception as e:
                 logger.warning(f"Failed to send status update: {e}")
         
+        # Stream the reply as it is generated; the "complete" frame below with
+        # the same task id carries the final text and sources.
+        stream_sequence = 0
+
+        async def stream_callback(chunk: str):
+            """Send a piece of the assistant reply via WebSocket."""
+            nonlocal stream_sequence
+            try:
+                await send_streaming_chunk_update(session_id, chunk, stream_id=task_id, sequence=stream_sequence)
+                stream_sequence += 1
+            except Exception as e:
+                logger.warning(f"Failed to send streaming chunk: {e}")
+        
         # Don't send initial status - let the agent handle it
         
-        # Run the agent with status callback (not streaming callback)
         result = await agent.run(
             prompt=request.message,
-            draft_content=draft.content,
+            draft_content=get_draft_content(db, draft),
             chat_history=chat_history_messages,
             context_info=context_info,
-            status_callback=status_callback
+            status_callback=status_callback,
+            stream_callback=stream_callback
         )
         
         # Save the assistant response
@@ -1127,17 +1351,26 @@ async def update_session_settings(
     return writing_session
 
 
-# Word Document Export Endpoint
+# Document Export Endpoints
 from pydantic import BaseModel
-import pypandoc
-import tempfile
-import os
-from fastapi.responses import FileResponse, Response
+from fastapi.responses import FileResponse
+from services.export_service import submit_export, render_export, export_job_status, UnsupportedExportFormat
 
 class MarkdownContent(BaseModel):
     markdown_content: str
     filename: Optional[str] = None
 
+def _get_owned_writing_session(db: Session, session_id: str, user_id: int) -> models.WritingSession:
+    writing_session = db.query(models.WritingSession).join(
+        models.Chat, models.WritingSession.chat_id == models.Chat.id
+    ).filter(
+        models.WritingSession.id == session_id,
+        models.Chat.user_id == user_id
+    ).first()
+    if not writing_session:
+        raise HTTPException(status_code=404, detail="Writing session not found or access denied")
+    return writing_session
+
 @router.post("/sessions/{session_id}/draft/docx")
 async def export_draft_as_docx(
     session_id: str,
@@ -1146,59 +1379,43 @@ async def export_draft_as_docx(
     current_user: models.User = Depends(get_current_user_from_cookie)
 ):
     """Export a writing draft as a Word document."""
+    _get_owned_writing_session(db, session_id, current_user.id)
     
-    # Verify the user has access to this writing session
-    writing_session = db.query(models.WritingSession).join(
-        models.Chat, models.WritingSession.chat_id == models.Chat.id
-    ).filter(
-        models.WritingSession.id == session_id,
-        models.Chat.user_id == current_user.id
-    ).first()
-    
-    if not writing_session:
-        raise HTTPException(status_code=404, detail="Writing session not found or access denied")
-    
-    try:
-        # Create a temporary file for the DOCX output
-        with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as temp_file:
-            temp_path = temp_file.name
-        
-        try:
-            # Convert markdown to DOCX using pypandoc with output file
-            pypandoc.convert_text(
-                content.markdown_content,
-                'docx',
-                format='md',
-                outputfile=temp_path,
-                extra_args=['--reference-doc=/app/reference.docx'] if os.path.exists('/app/reference.docx') else []
-            )
-            
-            # Read the generated file
-            with open(temp_path, 'rb') as docx_file:
-                docx_content = docx_file.read()
-            
-            # Clean up the temp file
-            os.unlink(temp_path)
-            
-            # Return the file response as bytes
-            filename = f"{content.filename or 'document'}.docx"
-            return Response(
-                content=docx_content,
-                media_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                headers={
-                    'Content-Disposition': f'attachment; filename="{filename}"'
-                }
-            )
-            
-        except Exception as e:
-            # Clean up temp file on error
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-            raise e
-            
-    except Exception as e:
-        logger.error(f"Failed to convert markdown to DOCX: {str(e)}")
+    job = await render_export(current_user.id, content.markdown_content, "docx", content.filename or "document")
+    if job.status != "completed":
+        logger.error(f"Failed to convert markdown to DOCX: {job.error}")
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to generate Word document: {str(e)}"
+            detail=f"Failed to generate Word document: {job.error}"
         )
+    return FileResponse(job.path, media_type=job.media_type, filename=job.download_name)
+
+@router.post("/sessions/{session_id}/draft/export", response_model=schemas.ExportJobStatus, status_code=202)
+async def start_draft_export(
+    session_id: str,
+    export_request: schemas.ExportRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_from_cookie)
+):
+    """
+    Start exporting the session's draft (or the given Markdown) in the background.
+    Poll GET /api/exports/{job_id} and download from its download_url.
+    """
+    writing_session = _get_owned_writing_session(db, session_id, current_user.id)
+    
+    markdown_content = export_request.markdown_content
+    filename = export_request.filename
+    if markdown_content is None:
+        draft = db.query(models.Draft).filter(
+            models.Draft.id == writing_session.current_draft_id
+        ).first() if writing_session.current_draft_id else None
+        if not draft:
+            raise HTTPException(status_code=404, detail="Draft not found")
+        markdown_content = get_draft_content(db, draft)
+        filename = filename or draft.title
+    
+    try:
+        job = submit_export(current_user.id, markdown_content, export_request.format, filename or "document")
+    except UnsupportedExportFormat as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return export_job_status(job)
@@ -1,11 +1,13 @@
 from fastapi import Depends, HTTPException, WebSocket, status, Request, Header
 from fastapi.security import HTTPBearer
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from database import crud, models
+from database import models
 from database.database import get_db
 from auth import security
+from auth.user_cache import get_user_for_session, get_user_snapshot
 
 security_scheme = HTTPBearer(auto_error=False)
 
@@ -45,7 +47,7 @@ def get_current_user_from_cookie(request: Request, db: Session = Depends(get_db)
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = crud.get_user_by_username(db, username=username)
+    user = get_user_for_session(db, username)
     if user is None:
         print(f"User not found in database: {username}")
         raise HTTPException(
@@ -109,9 +111,10 @@ def get_current_admin_user(current_user: models.User = Depends(get_current_user_
         )
     return current_user
 
-async def get_current_user_from_cookie_ws(websocket: "WebSocket", db: Session):
+async def get_current_user_from_cookie_ws(websocket: "WebSocket", db: Optional[Session] = None):
     """
-    Extract user from JWT token stored in HttpOnly cookie for WebSocket connections
+    Extract user from JWT token stored in HttpOnly cookie for WebSocket connections.
+    The lookup runs off the event loop and returns a detached, cached snapshot.
     """
     try:
         # Get token from cookie
@@ -124,7 +127,6 @@ async def get_current_user_from_cookie_ws(websocket: "WebSocket", db: Session):
         if username is None:
             return None
         
-        user = crud.get_user_by_username(db, username=username)
-        return user
+        return await run_in_threadpool(get_user_snapshot, username)
     except Exception:
         return None
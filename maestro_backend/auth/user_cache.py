@@ -0,0 +1,173 @@
+"""
+Short-lived, size-bounded cache of authenticated users keyed by token subject.
+
+Every HTTP request resolves the user twice (once in the user-context
+middleware and once in the auth dependency) and every WebSocket resolves it
+on connect. The cache keeps a detached snapshot of the ``User`` row so those
+lookups skip the database for a few seconds; write paths that change a user
+call ``invalidate_user`` so settings, role and password changes take effect
+immediately in this process.
+"""
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from database.models import User
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+
+
+def _snapshot(user: User) -> User:
+    """Build a detached copy of ``user`` holding only its column attributes."""
+    values = {
+        attr.key: copy.deepcopy(getattr(user, attr.key))
+        for attr in sa_inspect(User).column_attrs
+    }
+    snapshot = User(**values)
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+class UserCache:
+    """
+    Thread-safe TTL + LRU cache of detached ``User`` snapshots.
+
+    Callers always get their own copy, so changing a returned user (as route
+    handlers do with ``current_user``) never alters the cached one.
+    """
+
+    def __init__(self, ttl_seconds: float = USER_CACHE_TTL_SECONDS, max_size: int = USER_CACHE_MAX_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._usernames_by_id: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, username: str) -> Optional[User]:
+        """Return a copy of the cached snapshot for ``username`` or None if absent or stale."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                self._drop(username)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+        return _snapshot(user)
+
+    def put(self, user: User) -> User:
+        """Store a snapshot of ``user`` and return a copy of it."""
+        snapshot = _snapshot(user)
+        if not self.enabled:
+            return snapshot
+        with self._lock:
+            self._drop(snapshot.username)
+            self._entries[snapshot.username] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._usernames_by_id[snapshot.id] = snapshot.username
+            while len(self._entries) > self.max_size:
+                oldest, _ = self._entries.popitem(last=False)
+                self._forget_id(oldest)
+        return _snapshot(snapshot)
+
+    def invalidate(self, username: Optional[str] = None, user_id: Optional[int] = None) -> None:
+        """Drop a user by username and/or id."""
+        with self._lock:
+            if user_id is not None:
+                # Admin routes pass ids through as path strings
+                try:
+                    user_id = int(user_id)
+                except (TypeError, ValueError):
+                    pass
+                by_id = self._usernames_by_id.get(user_id)
+                if by_id is not None:
+                    self._drop(by_id)
+            if username is not None:
+                self._drop(username)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._usernames_by_id.clear()
+
+    def _drop(self, username: str) -> None:
+        # Caller must hold the lock
+        if self._entries.pop(username, None) is not None:
+            self._forget_id(username)
+
+    def _forget_id(self, username: str) -> None:
+        # Caller must hold the lock
+        for user_id, cached_username in list(self._usernames_by_id.items()):
+            if cached_username == username:
+                del self._usernames_by_id[user_id]
+
+
+user_cache = UserCache()
+
+
+def get_user_snapshot(username: str) -> Optional[User]:
+    """
+    Resolve ``username`` to a detached ``User`` snapshot, opening a short-lived
+    session only on a cache miss. Blocking; call via a threadpool from async code.
+    """
+    cached = user_cache.get(username)
+    if cached is not None:
+        return cached
+
+    from database.database import SessionLocal
+    from database import crud
+
+    db = SessionLocal()
+    try:
+        user = crud.get_user_by_username(db, username=username)
+        if user is None:
+            return None
+        return user_cache.put(user)
+    finally:
+        db.close()
+
+
+def get_user_for_session(db: Session, username: str) -> Optional[User]:
+    """
+    Resolve ``username`` to a ``User`` attached to ``db``.
+
+    On a cache hit the snapshot is merged into the session without emitting
+    SQL, so route handlers can keep modifying and committing ``current_user``
+    exactly as they would with a freshly queried row.
+    """
+    cached = user_cache.get(username)
+    if cached is not None:
+        return db.merge(cached, load=False)
+
+    from database import crud
+
+    user = crud.get_user_by_username(db, username=username)
+    if user is not None:
+        user_cache.put(user)
+    return user
+
+
+def invalidate_user(username: Optional[str] = None, user_id: Optional[int] = None) -> None:
+    """Invalidate a cached user after a write that changes the users row."""
+    user_cache.invalidate(username=username, user_id=user_id)
@@ -17,7 +17,6 @@ from contextlib import redirect_stdout, redirect_stderr
 from io import StringIO
 import time
 import uuid
-from concurrent.futures import ProcessPoolExecutor, as_completed
 import threading
 import multiprocessing
 import pickle
@@ -86,6 +85,8 @@ with redirect_stdout(captured_output), redirect_stderr(captured_output):
     except ImportError:
         from ai_researcher.core_rag.pgvector_store import PGVectorStore as VectorStore
 
+from ingest_worker_pool import WarmWorkerPool, cpu_threads_per_worker
+
 app = typer.Typer(help="MAESTRO Direct Document Processing CLI")
 
 def get_db_session():
@@ -96,6 +97,16 @@ def get_db_session():
     finally:
         pass  # Don't close here, let caller handle it
 
+def _is_cpu_device(device: Optional[str]) -> bool:
+    """Whether ingest will run on CPU, either requested or because no GPU was detected."""
+    if device:
+        return device.startswith("cpu")
+    try:
+        from ai_researcher.hardware_detection import hardware_detector
+        return hardware_detector.detect_hardware()["device_type"] == "cpu"
+    except Exception:
+        return False
+
 def create_document_record(
     db: Session,
     doc_id: str,
@@ -118,7 +129,7 @@ def create_document_record(
         # Check if document already exists (by hash)
         existing = db.query(models.Document).filter(
             models.Document.user_id == user_id,
-            models.Document.metadata_.op('->>')('file_hash') == file_hash
+            models.Document.file_hash == file_hash
         ).first()
         
         if existing:
@@ -146,6 +157,7 @@ def create_document_record(
             filename=file_path.name,
             original_filename=file_path.name,
             metadata_=metadata,
+            file_hash=file_hash,
             processing_status="cli_processing",  # Use cli_processing to prevent background pickup
             file_size=len(file_content),
             file_path=saved_file_path,
@@ -170,42 +182,107 @@ def create_document_record(
         db.rollback()
         return False
 
+def _build_subprocess_processor(device: Optional[str], force_reembed: bool, user_settings: Optional[Dict[str, Any]]):
+    """
+    Loads the embedder and Marker models and builds a DocumentProcessor in the current process.
+    Runs once per warm worker (see ingest_worker_pool), or once per document in process_document_in_subprocess.
+    """
+    import sys
+    import os
+    from pathlib import Path
+    from contextlib import redirect_stdout, redirect_stderr
+    from io import StringIO
+    
+    # Suppress verbose output during imports
+    captured = StringIO()
+    with redirect_stdout(captured), redirect_stderr(captured):
+        # Add imports needed for processing
+        sys.path.insert(0, '/app')
+        from ai_researcher.core_rag.processor import DocumentProcessor
+        from ai_researcher.core_rag.embedder import TextEmbedder
+        from ai_researcher.core_rag.metadata_extractor import MetadataExtractor
+        try:
+            from ai_researcher.core_rag.vector_store_safe import SafeVectorStore as VectorStore
+        except ImportError:
+            from ai_researcher.core_rag.pgvector_store import PGVectorStore as VectorStore
+    
+    # Initialize components for this process
+    base_path = Path("/app/ai_researcher/data")
+    
+    print(f"[Process {os.getpid()}] Initializing components...")
+    
+    actual_device = device or 'cuda'
+    print(f"[Process {os.getpid()}] Using device: {actual_device}")
+    
+    # Initialize embedder with proper device
+    embedder = TextEmbedder(model_name="BAAI/bge-m3", device=actual_device)
+    vector_store = VectorStore()
+    
+    # Create metadata extractor with user settings
+    if user_settings:
+        metadata_extractor = MetadataExtractor.from_user_settings(user_settings)
+    else:
+        metadata_extractor = MetadataExtractor()
+    
+    # Initialize processor
+    processor = DocumentProcessor(
+        pdf_dir=base_path / "raw_pdfs",
+        markdown_dir=base_path / "processed" / "markdown",
+        metadata_dir=base_path / "processed" / "metadata",
+        db_path=None,
+        embedder=embedder,
+        vector_store=vector_store,
+        force_reembed=force_reembed,
+        device=actual_device
+    )
+    
+    # Replace processor's metadata extractor
+    processor.metadata_extractor = metadata_extractor
+    return processor
+
 def process_document_in_subprocess(args):
     """
     Process a document in a separate process.
     This function is designed to be pickleable and run in ProcessPoolExecutor.
     Each process gets its own memory space, avoiding Marker threading issues.
+    Loads the models for this document only; bulk ingests use the warm workers
+    in ingest_worker_pool with process_document_in_warm_worker instead.
     
     NOTE: Document record must already exist in PostgreSQL before calling this.
     """
-    import sys
-    import os
-    from pathlib import Path
-    from contextlib import redirect_stdout, redirect_stderr
-    from io import StringIO
     import traceback
     
     try:
-        # Suppress verbose output during imports
-        captured = StringIO()
-        with redirect_stdout(captured), redirect_stderr(captured):
-            # Add imports needed for processing
-            sys.path.insert(0, '/app')
-            from database.database import get_db
-            from database import crud, models
-            from ai_researcher.core_rag.processor import DocumentProcessor
-            from ai_researcher.core_rag.embedder import TextEmbedder
-            from ai_researcher.core_rag.metadata_extractor import MetadataExtractor
-            try:
-                from ai_researcher.core_rag.vector_store_safe import SafeVectorStore as VectorStore
-            except ImportError:
-                from ai_researcher.core_rag.pgvector_store import PGVectorStore as VectorStore
+        (saved_file_path_str, doc_id, user_id, index, total, 
+         force_reembed, device, user_settings) = args
     except Exception as e:
+        print(f"[Process {os.getpid()}] Failed to unpack arguments: {e}")
+        return (False, "unpack_error", str(e))
+    
+    try:
+        processor = _build_subprocess_processor(device, force_reembed, user_settings)
+    except ImportError as e:
         print(f"[Process {os.getpid()}] Failed to import modules: {e}")
         traceback.print_exc()
         return (False, "import_error", str(e))
+    except Exception as e:
+        error_msg = str(e)
+        print(f"[{index}/{total}] Error for {doc_id}: {error_msg[:200]}")
+        return (False, doc_id, error_msg[:200])
+    
+    return process_document_in_warm_worker(processor, args)
+
+def process_document_in_warm_worker(processor, args):
+    """
+    Process one document with an already initialized DocumentProcessor.
+    Used as the task function of the warm ingest workers.
     
-    # Unpack arguments
+    NOTE: Document record must already exist in PostgreSQL before calling this.
+    """
+    from database.database import get_db
+    from database import crud
+    
+    # Unpack arguments (force_reembed, device and user_settings were applied when the processor was built)
     try:
         (saved_file_path_str, doc_id, user_id, index, total, 
          force_reembed, device, user_settings) = args
@@ -217,41 +294,7 @@ def process_document_in_subprocess(args):
     # Convert back to Path object
     saved_file_path = Path(saved_file_path_str)
     
-    # Initialize components for this process
-    base_path = Path("/app/ai_researcher/data")
-    
     try:
-        # Initialize components
-        print(f"[Process {os.getpid()}] Initializing components for doc_id: {doc_id}...")
-        
-        actual_device = device or 'cuda'
-        print(f"[Process {os.getpid()}] Using device: {actual_device}")
-        
-        # Initialize embedder with proper device
-        embedder = TextEmbedder(model_name="BAAI/bge-m3", device=actual_device)
-        vector_store = VectorStore()
-        
-        # Create metadata extractor with user settings
-        if user_settings:
-            metadata_extractor = MetadataExtractor.from_user_settings(user_settings)
-        else:
-            metadata_extractor = MetadataExtractor()
-        
-        # Initialize processor
-        processor = DocumentProcessor(
-            pdf_dir=base_path / "raw_pdfs",
-            markdown_dir=base_path / "processed" / "markdown",
-            metadata_dir=base_path / "processed" / "metadata",
-            db_path=None,
-            embedder=embedder,
-            vector_store=vector_store,
-            force_reembed=force_reembed,
-            device=actual_device
-        )
-        
-        # Replace processor's metadata extractor
-        processor.metadata_extractor = metadata_extractor
-        
         # Get database session
         db = next(get_db())
         
@@ -558,6 +601,10 @@ def ingest(
     device: Optional[str] = typer.Option(None, "--device", help="Device to use (e.g., 'cuda:0', 'cpu')"),
     delete_after_success: bool = typer.Option(False, "--delete-after-success", help="Delete source files after success"),
     batch_size: int = typer.Option(2, "--batch-size", help="Number of documents to process in parallel"),
+    worker_rss_budget_mb: int = typer.Option(
+        int(os.getenv("CLI_INGEST_WORKER_RSS_MB", "0")), "--worker-rss-budget-mb",
+        help="Restart a parallel worker once its memory exceeds this many MB after a document (0 disables)"
+    ),
 ):
     """
     Directly process documents with live feedback.
@@ -645,13 +692,22 @@ def ingest(
             # Parallel processing
             typer.echo(f"Processing in parallel (batch size: {actual_batch_size})...")
             
-            try:
-                multiprocessing.set_start_method('spawn', force=True)
-            except RuntimeError:
-                pass
+            # Workers load the models once and then pull documents from a shared queue
+            cpu_threads = None
+            if _is_cpu_device(device):
+                cpu_threads = cpu_threads_per_worker(actual_batch_size)
+                typer.echo(f"CPU mode: pinning each worker to {cpu_threads} threads")
             
             global global_executor
-            global_executor = ProcessPoolExecutor(max_workers=actual_batch_size)
+            global_executor = WarmWorkerPool(
+                num_workers=actual_batch_size,
+                initializer=_build_subprocess_processor,
+                initargs=(device, force_reembed, user_settings),
+                task_fn=process_document_in_warm_worker,
+                rss_budget_mb=worker_rss_budget_mb,
+                cpu_threads=cpu_threads,
+                log=lambda message: typer.secho(message, fg=typer.colors.YELLOW)
+            )
             
             try:
                 executor = global_executor
@@ -669,25 +725,24 @@ def ingest(
                         process_args.append(args)
                         index += 1
                 
-                # Submit all tasks
-                futures = {executor.submit(process_document_in_subprocess, args): args[1] 
-                          for args in process_args}
-                
-                # Process completed tasks
-                for future in as_completed(futures):
-                    doc_id = futures[future]
-                    try:
-                        success, result_id, result_msg = future.result()
-                        
-                        if success:
-                            success_count += 1
-                            typer.secho(f"✓ {result_id}: {result_msg}", fg=typer.colors.GREEN)
-                        else:
-                            error_count += 1
-                            typer.secho(f"✗ {result_id}: {result_msg}", fg=typer.colors.RED)
-                    except Exception as e:
+                # Process tasks as they complete
+                for args, outcome in executor.imap_unordered(process_args):
+                    doc_id = args[1]
+                    if isinstance(outcome, Exception):
+                        error_count += 1
+                        typer.secho(f"✗ Error processing {doc_id}: {outcome}", fg=typer.colors.RED)
+                        continue
+                    
+                    success, result_id, result_msg = outcome
+                    if success:
+                        success_count += 1
+                        typer.secho(f"✓ {result_id}: {result_msg}", fg=typer.colors.GREEN)
+                    else:
                         error_count += 1
-                        typer.secho(f"✗ Error processing {doc_id}: {e}", fg=typer.colors.RED)
+                        typer.secho(f"✗ {result_id}: {result_msg}", fg=typer.colors.RED)
+                
+                if executor.recycled or executor.crashed:
+                    typer.echo(f"Workers restarted: {executor.recycled} over memory budget, {executor.crashed} crashed")
                 
             finally:
                 if global_executor:
@@ -118,7 +118,7 @@ def create_document_record(
         # Check if document already exists (by hash)
         existing = db.query(models.Document).filter(
             models.Document.user_id == user_id,
-            models.Document.metadata_.op('->>')('file_hash') == file_hash
+            models.Document.file_hash == file_hash
         ).first()
         
         if existing:
@@ -146,6 +146,7 @@ def create_document_record(
             filename=file_path.name,
             original_filename=file_path.name,
             metadata_=metadata,
+            file_hash=file_hash,
             processing_status="pending",  # Start with pending status
             file_size=len(file_content),
             file_path=saved_file_path,
@@ -7,10 +7,16 @@ import uuid
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, and_, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, delete, and_, or_, func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload, load_only
 from . import models
+from .document_search import decode_cursor
 from api import schemas
+from auth.user_cache import invalidate_user
+from database.dashboard_stats import (
+    build_dashboard_stats_query, dashboard_stats_cache, invalidate_dashboard_stats, row_to_stats
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +28,11 @@ def get_current_time() -> datetime:
 # MISSION OPERATIONS
 # ============================================================================
 
+async def _chat_owner_id(db: AsyncSession, chat_id: str) -> Optional[int]:
+    """Owner of a chat, for invalidating their dashboard stats after a mission write."""
+    result = await db.execute(select(models.Chat.user_id).where(models.Chat.id == chat_id))
+    return result.scalar_one_or_none()
+
 async def create_mission(
     db: AsyncSession,
     mission_id: str,
@@ -41,6 +52,7 @@ async def create_mission(
     )
     db.add(db_mission)
     await db.commit()
+    invalidate_dashboard_stats(await _chat_owner_id(db, chat_id))
     await db.refresh(db_mission)
     logger.info(f"Created mission {mission_id} in database")
     return db_mission
@@ -65,6 +77,36 @@ async def get_all_missions(db: AsyncSession) -> List[models.Mission]:
     result = await db.execute(select(models.Mission))
     return result.scalars().all()
 
+async def get_missions_by_status(db: AsyncSession, statuses: List[str]) -> List[models.Mission]:
+    """Get all missions whose status is in ``statuses`` asynchronously."""
+    result = await db.execute(
+        select(models.Mission).where(models.Mission.status.in_(statuses))
+    )
+    return result.scalars().all()
+
+async def get_mission_summary(db: AsyncSession, mission_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the lightweight fields of a mission without loading the full context.
+    Only the ``metadata`` sub-document is extracted from the JSONB column.
+    """
+    result = await db.execute(
+        select(
+            models.Mission.id,
+            models.Mission.user_request,
+            models.Mission.status,
+            models.Mission.error_info,
+            models.Mission.created_at,
+            models.Mission.updated_at,
+            models.Mission.mission_context["status"].astext.label("context_status"),
+            models.Mission.mission_context["updated_at"].astext.label("context_updated_at"),
+            models.Mission.mission_context["metadata"].label("metadata"),
+        ).where(models.Mission.id == mission_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    return dict(row._mapping)
+
 async def update_mission_status(
     db: AsyncSession,
     mission_id: str,
@@ -83,8 +125,11 @@ async def update_mission_status(
         .returning(models.Mission)
     )
     result = await db.execute(stmt)
+    mission = result.scalar_one_or_none()
+    owner_id = await _chat_owner_id(db, mission.chat_id) if mission else None
     await db.commit()
-    return result.scalar_one_or_none()
+    invalidate_dashboard_stats(owner_id)
+    return mission
 
 async def update_mission_context(
     db: AsyncSession,
@@ -138,6 +183,7 @@ async def delete_mission(
     stmt = delete(models.Mission).where(models.Mission.id == mission_id)
     result = await db.execute(stmt)
     await db.commit()
+    invalidate_dashboard_stats(user_id)
     return result.rowcount > 0
 
 # ============================================================================
@@ -286,6 +332,16 @@ async def delete_mission_execution_log(db: AsyncSession, log_id: str) -> bool:
     await db.commit()
     return result.rowcount > 0
 
+async def delete_mission_execution_logs_since(db: AsyncSession, mission_id: str, since: datetime) -> int:
+    """Delete a mission's execution logs with a timestamp at or after ``since``."""
+    stmt = delete(models.MissionExecutionLog).where(
+        models.MissionExecutionLog.mission_id == mission_id,
+        models.MissionExecutionLog.timestamp >= since
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount
+
 async def get_execution_logs_since_timestamp(
     db: AsyncSession,
     mission_id: str,
@@ -389,6 +445,133 @@ async def get_execution_logs(
     result = await db.execute(query)
     return result.scalars().all()
 
+# ============================================================================
+# OUTLINE SNAPSHOT OPERATIONS
+# ============================================================================
+
+
+# Phase of the snapshot taken as a research round starts; its created_at marks the round start
+ROUND_START_PHASE = "round_start"
+
+async def upsert_outline_snapshot(
+    db: AsyncSession,
+    mission_id: str,
+    round_num: int,
+    phase: str,
+    outline: List[Dict[str, Any]],
+    created_at: Optional[datetime] = None
+) -> None:
+    """
+    Record a mission's outline for ``round_num``/``phase``, replacing any earlier one for the same pair.
+    Pass ``created_at`` from the clock that stamps execution logs so round cutoffs line up with them.
+    """
+    snapshot = models.MissionOutlineSnapshot
+    next_version = select(func.coalesce(func.max(snapshot.version), 0) + 1).where(
+        snapshot.mission_id == mission_id
+    ).scalar_subquery()
+    stmt = pg_insert(snapshot).values(
+        id=uuid.uuid4(),
+        mission_id=mission_id,
+        round=round_num,
+        phase=phase,
+        version=next_version,
+        outline=outline,
+        created_at=created_at or get_current_time()
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_outline_snapshot_round_phase",
+        set_={
+            "outline": stmt.excluded.outline,
+            "version": stmt.excluded.version,
+            "created_at": stmt.excluded.created_at
+        }
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+async def get_outline_snapshot_before_round(
+    db: AsyncSession,
+    mission_id: str,
+    round_num: int
+) -> Optional[models.MissionOutlineSnapshot]:
+    """The latest outline snapshot written before research round ``round_num`` started."""
+    snapshot = models.MissionOutlineSnapshot
+    query = select(snapshot).where(
+        snapshot.mission_id == mission_id,
+        or_(
+            snapshot.round < round_num,
+            and_(snapshot.round == round_num, snapshot.phase == ROUND_START_PHASE)
+        )
+    ).order_by(snapshot.version.desc()).limit(1)
+    result = await db.execute(query)
+    return result.scalars().first()
+
+async def get_round_start_time(db: AsyncSession, mission_id: str, round_num: int) -> Optional[datetime]:
+    """When research round ``round_num`` started, from its round-start snapshot."""
+    snapshot = models.MissionOutlineSnapshot
+    query = select(snapshot.created_at).where(
+        snapshot.mission_id == mission_id,
+        snapshot.round == round_num,
+        snapshot.phase == ROUND_START_PHASE
+    )
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
+async def delete_outline_snapshots_from_round(db: AsyncSession, mission_id: str, round_num: int) -> int:
+    """Delete the outline snapshots of research round ``round_num`` and later rounds."""
+    stmt = delete(models.MissionOutlineSnapshot).where(
+        models.MissionOutlineSnapshot.mission_id == mission_id,
+        models.MissionOutlineSnapshot.round >= round_num
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount
+
+# ============================================================================
+# MISSION TRACE OPERATIONS
+# ============================================================================
+
+async def append_mission_trace(
+    db: AsyncSession,
+    mission_id: str,
+    started_at: datetime,
+    trace: Dict[str, Any]
+) -> None:
+    """
+    Write the trace of the mission run that started at ``started_at``.
+
+    ``trace`` carries only the spans recorded since the previous write: they
+    are appended to the stored ones, while the rest of the trace (phases,
+    duration, dropped count) replaces the stored values.
+    """
+    table = models.MissionTrace.__table__
+    stmt = pg_insert(models.MissionTrace).values(
+        id=uuid.uuid4(),
+        mission_id=mission_id,
+        started_at=started_at,
+        trace=trace,
+        updated_at=get_current_time()
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_mission_trace_run",
+        set_={
+            "trace": stmt.excluded.trace.op("||")(func.jsonb_build_object(
+                "spans", table.c.trace["spans"].op("||")(stmt.excluded.trace["spans"])
+            )),
+            "updated_at": stmt.excluded.updated_at
+        }
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+async def get_mission_traces(db: AsyncSession, mission_id: str) -> List[models.MissionTrace]:
+    """All stored runs of a mission's trace, oldest first."""
+    query = select(models.MissionTrace).where(
+        models.MissionTrace.mission_id == mission_id
+    ).order_by(models.MissionTrace.started_at)
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
 # ============================================================================
 # USER OPERATIONS
 # ============================================================================
@@ -422,6 +605,7 @@ async def update_user_settings(
     user.updated_at = get_current_time()
     await db.commit()
     await db.refresh(user)
+    invalidate_user(username=user.username, user_id=user.id)
     return user
 
 # ============================================================================
@@ -449,23 +633,54 @@ async def get_chat(
     )
     return result.scalar_one_or_none()
 
+async def chat_belongs_to_user(db: AsyncSession, chat_id: str, user_id: int) -> bool:
+    """Ownership check that, unlike ``get_chat``, loads no messages or missions."""
+    result = await db.execute(
+        select(models.Chat.id).where(
+            and_(
+                models.Chat.id == chat_id,
+                models.Chat.user_id == user_id
+            )
+        )
+    )
+    return result.scalar_one_or_none() is not None
+
 async def get_chat_messages(
     db: AsyncSession,
     chat_id: str,
     user_id: int,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    include_sources: bool = True
 ) -> List[models.Message]:
-    """Get messages for a chat asynchronously."""
+    """
+    Get messages for a chat asynchronously, oldest first.
+
+    ``cursor`` (see ``document_search.encode_cursor``) continues after the last
+    message of the previous page and takes precedence over ``skip``. With
+    ``include_sources=False`` the ``sources`` JSONB is not loaded and must not
+    be accessed on the returned rows. Raises ValueError for a malformed cursor.
+    """
     # First verify the chat belongs to the user
-    chat = await get_chat(db, chat_id, user_id)
-    if not chat:
+    if not await chat_belongs_to_user(db, chat_id, user_id):
         return []
     
+    query = select(models.Message).where(models.Message.chat_id == chat_id)
+    if not include_sources:
+        query = query.options(load_only(
+            models.Message.id, models.Message.chat_id, models.Message.content,
+            models.Message.role, models.Message.content_hash, models.Message.created_at
+        ))
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(models.Message.created_at, models.Message.id) > tuple_(cursor_created_at, cursor_id)
+        )
+        skip = 0
     result = await db.execute(
-        select(models.Message)
-        .where(models.Message.chat_id == chat_id)
-        .order_by(models.Message.created_at.asc())
+        query
+        .order_by(models.Message.created_at.asc(), models.Message.id.asc())
         .offset(skip)
         .limit(limit)
     )
@@ -575,6 +790,7 @@ async def update_user(db: AsyncSession, user_id: int, user_update: schemas.UserU
     user.updated_at = get_current_time()
     await db.commit()
     await db.refresh(user)
+    invalidate_user(username=user.username, user_id=user.id)
     return user
 
 async def delete_user(db: AsyncSession, user_id: int) -> Optional[models.User]:
@@ -585,6 +801,7 @@ async def delete_user(db: AsyncSession, user_id: int) -> Optional[models.User]:
     
     await db.delete(user)
     await db.commit()
+    invalidate_user(username=user.username, user_id=user_id)
     return user
 
 async def update_user_profile(db: AsyncSession, user_id: int, profile_update: schemas.UserProfileUpdate) -> Optional[models.User]:
@@ -601,6 +818,7 @@ async def update_user_profile(db: AsyncSession, user_id: int, profile_update: sc
     user.updated_at = get_current_time()
     await db.commit()
     await db.refresh(user)
+    invalidate_user(username=user.username, user_id=user.id)
     return user
 
 async def update_user_password(db: AsyncSession, user_id: int, new_password: str) -> Optional[models.User]:
@@ -619,6 +837,7 @@ async def update_user_password(db: AsyncSession, user_id: int, new_password: str
     db_user.updated_at = get_current_time()
     await db.commit()
     await db.refresh(db_user)
+    invalidate_user(username=db_user.username, user_id=db_user.id)
     return db_user
 
 async def update_user_appearance(db: AsyncSession, user_id: int, appearance_settings: schemas.AppearanceSettings) -> Optional[models.User]:
@@ -634,6 +853,7 @@ async def update_user_appearance(db: AsyncSession, user_id: int, appearance_sett
     user.updated_at = get_current_time()
     await db.commit()
     await db.refresh(user)
+    invalidate_user(username=user.username, user_id=user.id)
     return user
 
 # ============================================================================
@@ -654,6 +874,7 @@ async def create_chat(db: AsyncSession, chat_id: str, user_id: int, title: str,
     )
     db.add(db_chat)
     await db.commit()
+    invalidate_dashboard_stats(user_id)
     await db.refresh(db_chat, attribute_names=['messages', 'missions'])
     return db_chat
 
@@ -703,8 +924,7 @@ async def count_user_chats_by_type(db: AsyncSession, user_id: int, chat_type: st
 async def count_chat_messages(db: AsyncSession, chat_id: str, user_id: int) -> int:
     """Count messages for a specific chat."""
     # First verify the chat belongs to the user
-    chat = await get_chat(db, chat_id, user_id)
-    if not chat:
+    if not await chat_belongs_to_user(db, chat_id, user_id):
         return 0
     
     query = select(func.count(models.Message.id)).where(
@@ -716,8 +936,7 @@ async def count_chat_messages(db: AsyncSession, chat_id: str, user_id: int) -> i
 async def count_active_missions_for_chat(db: AsyncSession, chat_id: str, user_id: int) -> int:
     """Count active missions for a specific chat."""
     # First verify the chat belongs to the user
-    chat = await get_chat(db, chat_id, user_id)
-    if not chat:
+    if not await chat_belongs_to_user(db, chat_id, user_id):
         return 0
     
     query = select(func.count(models.Mission.id)).where(
@@ -729,10 +948,19 @@ async def count_active_missions_for_chat(db: AsyncSession, chat_id: str, user_id
     result = await db.execute(query)
     return result.scalar() or 0
 
-async def get_chats_with_counts(db: AsyncSession, user_id: int, chat_type: str, skip: int = 0, limit: int = 100, search_query: str = None) -> List[Dict]:
-    """Get chats with message and mission counts in a single query."""
+async def get_chats_with_counts(db: AsyncSession, user_id: int, chat_type: str, skip: int = 0, limit: int = 100, search_query: str = None, cursor: Optional[str] = None) -> List[Dict]:
+    """
+    Get chats with message and mission counts in a single query.
+
+    Only the columns shown in chat lists are loaded. ``cursor`` continues after
+    the last chat of the previous page and takes precedence over ``skip``.
+    Raises ValueError for a malformed cursor.
+    """
     # Main chat query
-    chat_query = select(models.Chat).where(
+    chat_query = select(models.Chat).options(load_only(
+        models.Chat.id, models.Chat.user_id, models.Chat.title,
+        models.Chat.created_at, models.Chat.updated_at
+    )).where(
         and_(models.Chat.user_id == user_id, models.Chat.chat_type == chat_type)
     )
     
@@ -741,8 +969,16 @@ async def get_chats_with_counts(db: AsyncSession, user_id: int, chat_type: str,
         search_pattern = f"%{search_query}%"
         chat_query = chat_query.where(models.Chat.title.ilike(search_pattern))
     
+    # A cursor seeks straight to the next page instead of walking OFFSET rows
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        chat_query = chat_query.where(
+            tuple_(models.Chat.created_at, models.Chat.id) < tuple_(cursor_created_at, cursor_id)
+        )
+        skip = 0
+    
     # Apply pagination - order by created_at for consistent chronological display
-    chat_query = chat_query.order_by(models.Chat.created_at.desc()).offset(skip).limit(limit)
+    chat_query = chat_query.order_by(models.Chat.created_at.desc(), models.Chat.id.desc()).offset(skip).limit(limit)
     
     # Execute query
     result = await db.execute(chat_query)
@@ -858,6 +1094,7 @@ async def delete_chat(db: AsyncSession, chat_id: str, user_id: int) -> bool:
         logger.info(f"Deleting chat {chat_id}")
         await db.delete(chat)
         await db.commit()
+        invalidate_dashboard_stats(user_id)
 
         logger.info(f"Successfully deleted chat {chat_id}")
         return True
@@ -1049,6 +1286,7 @@ async def create_document(db: AsyncSession, doc_id: str, user_id: int,
     )
     db.add(db_document)
     await db.commit()
+    invalidate_dashboard_stats(user_id)
     await db.refresh(db_document)
     return db_document
 
@@ -1078,6 +1316,7 @@ async def delete_document(db: AsyncSession, doc_id: str, user_id: int) -> bool:
     # Delete the document
     await db.delete(document)
     await db.commit()
+    invalidate_dashboard_stats(user_id)
     return True
 
 async def delete_document_simple(db: AsyncSession, doc_id: str, user_id: int) -> bool:
@@ -1087,6 +1326,7 @@ async def delete_document_simple(db: AsyncSession, doc_id: str, user_id: int) ->
         try:
             await db.delete(db_document)
             await db.commit()
+            invalidate_dashboard_stats(user_id)
             logger.info(f"Deleted document {doc_id} from main database (async mode)")
             return True
         except Exception as e:
@@ -1114,6 +1354,7 @@ async def update_document_status(db: AsyncSession, doc_id: str, user_id: int, st
     
     document.updated_at = get_current_time()
     await db.commit()
+    invalidate_dashboard_stats(user_id)
     await db.refresh(document)
     return document
 
@@ -1144,6 +1385,7 @@ async def create_document_group(db: AsyncSession, group_id: str, user_id: int,
     )
     db.add(db_group)
     await db.commit()
+    invalidate_dashboard_stats(user_id)
     await db.refresh(db_group)
     return db_group
 
@@ -1184,6 +1426,7 @@ async def delete_document_group(db: AsyncSession, group_id: str, user_id: int) -
     
     await db.delete(group)
     await db.commit()
+    invalidate_dashboard_stats(user_id)
     return True
 
 async def add_document_to_group(db: AsyncSession, group_id: str, doc_id: str, user_id: int) -> Optional[models.DocumentGroup]:
@@ -1299,75 +1542,22 @@ async def clear_writing_session_stats(db: AsyncSession, session_id: str) -> Opti
 # ============================================================================
 
 async def get_dashboard_stats(db: AsyncSession, user_id: int) -> Dict[str, Any]:
-    """Get dashboard statistics for a user asynchronously."""
-    # Get total chats
-    result = await db.execute(
-        select(models.Chat).where(models.Chat.user_id == user_id)
-    )
-    total_chats = len(result.scalars().all())
-    
-    # Get research sessions
-    result = await db.execute(
-        select(models.Chat).where(
-            and_(models.Chat.user_id == user_id, models.Chat.chat_type == "research")
-        )
-    )
-    research_sessions = len(result.scalars().all())
-    
-    # Get writing sessions
-    result = await db.execute(
-        select(models.Chat).where(
-            and_(models.Chat.user_id == user_id, models.Chat.chat_type == "writing")
-        )
-    )
-    writing_sessions = len(result.scalars().all())
-    
-    # Get total documents
-    result = await db.execute(
-        select(models.Document).where(models.Document.user_id == user_id)
-    )
-    total_documents = len(result.scalars().all())
-    
-    # Get total document groups
-    result = await db.execute(
-        select(models.DocumentGroup).where(models.DocumentGroup.user_id == user_id)
-    )
-    total_document_groups = len(result.scalars().all())
-    
-    # Get total missions
-    result = await db.execute(
-        select(models.Mission).join(models.Chat).where(models.Chat.user_id == user_id)
-    )
-    total_missions = len(result.scalars().all())
-    
-    # Get completed missions
-    result = await db.execute(
-        select(models.Mission).join(models.Chat).where(
-            and_(models.Chat.user_id == user_id, models.Mission.status == "completed")
-        )
-    )
-    completed_missions = len(result.scalars().all())
-    
-    # Get active missions
-    result = await db.execute(
-        select(models.Mission).join(models.Chat).where(
-            and_(
-                models.Chat.user_id == user_id,
-                models.Mission.status.in_(["pending", "running", "planning"])
-            )
-        )
-    )
-    active_missions = len(result.scalars().all())
+    """Get dashboard statistics for a user asynchronously (single aggregated query, cached)."""
+    stats = dashboard_stats_cache.get(user_id)
+    if stats is None:
+        result = await db.execute(build_dashboard_stats_query(user_id))
+        stats = row_to_stats(result.one())
+        dashboard_stats_cache.put(user_id, stats)
     
     return {
-        "total_chats": total_chats,
-        "research_sessions": research_sessions,
-        "writing_sessions": writing_sessions,
-        "total_documents": total_documents,
-        "total_document_groups": total_document_groups,
-        "total_missions": total_missions,
-        "completed_missions": completed_missions,
-        "active_missions": active_missions
+        "total_chats": stats["total_chats"],
+        "research_sessions": stats["research_sessions"],
+        "writing_sessions": stats["writing_sessions"],
+        "total_documents": stats["total_documents"],
+        "total_document_groups": stats["total_document_groups"],
+        "total_missions": stats["total_missions"],
+        "completed_missions": stats["completed_missions"],
+        "active_missions": stats["active_missions"]
     }
 
 # ============================================================================
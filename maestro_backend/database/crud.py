@@ -3,6 +3,11 @@ from sqlalchemy import and_, or_, text
 from database.models import User, Chat, Message, Mission, Document, DocumentGroup, WritingSessionStats, SystemSetting, MissionExecutionLog
 from api import schemas
 from auth.security import get_password_hash
+from auth.user_cache import invalidate_user
+from database.dashboard_stats import (
+    build_dashboard_stats_query, dashboard_stats_cache, format_recent_activity,
+    invalidate_dashboard_stats, row_to_stats
+)
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from ai_researcher.config import SERVER_TIMEZONE
@@ -59,6 +64,7 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> O
         db_user.updated_at = get_current_time()
         db.commit()
         db.refresh(db_user)
+        invalidate_user(username=db_user.username, user_id=db_user.id)
     return db_user
 
 def delete_user(db: Session, user_id: int) -> Optional[User]:
@@ -67,6 +73,7 @@ def delete_user(db: Session, user_id: int) -> Optional[User]:
     if db_user:
         db.delete(db_user)
         db.commit()
+        invalidate_user(username=db_user.username, user_id=user_id)
     return db_user
 
 def update_user_settings(db: Session, user_id: int, settings: Dict[str, Any]) -> Optional[User]:
@@ -77,6 +84,7 @@ def update_user_settings(db: Session, user_id: int, settings: Dict[str, Any]) ->
         db_user.updated_at = get_current_time()
         db.commit()
         db.refresh(db_user)
+        invalidate_user(username=db_user.username, user_id=db_user.id)
         return db_user
     return None
 
@@ -90,6 +98,7 @@ def update_user_profile(db: Session, user_id: int, profile_update: schemas.UserP
         db_user.updated_at = get_current_time()
         db.commit()
         db.refresh(db_user)
+        invalidate_user(username=db_user.username, user_id=db_user.id)
         return db_user
     return None
 
@@ -102,6 +111,7 @@ def update_user_appearance(db: Session, user_id: int, appearance_settings: schem
         db_user.updated_at = get_current_time()
         db.commit()
         db.refresh(db_user)
+        invalidate_user(username=db_user.username, user_id=db_user.id)
         return db_user
     return None
 
@@ -121,6 +131,7 @@ def create_chat(db: Session, chat_id: str, user_id: int, title: str, document_gr
     db.add(db_chat)
     db.commit()
     db.refresh(db_chat)
+    invalidate_dashboard_stats(user_id)
     return db_chat
 
 def get_chat(db: Session, chat_id: str, user_id: int) -> Optional[Chat]:
@@ -237,6 +248,7 @@ def delete_chat(db: Session, chat_id: str, user_id: int) -> bool:
         # Then delete the chat (which will cascade delete messages and missions due to foreign key constraints)
         db.delete(db_chat)
         db.commit()
+        invalidate_dashboard_stats(user_id)
         logger.info(f"Deleted chat {chat_id} with all associated data")
         return True
     return False
@@ -406,6 +418,7 @@ def create_mission(db: Session, mission_id: str, chat_id: str, user_request: str
     db.add(db_mission)
     db.commit()
     db.refresh(db_mission)
+    invalidate_dashboard_stats(db_mission.chat.user_id if db_mission.chat else None)
     return db_mission
 
 def get_mission(db: Session, mission_id: str, user_id: int) -> Optional[Mission]:
@@ -450,6 +463,7 @@ def update_mission_status(db: Session, mission_id: str, status: str,
         db_mission.updated_at = get_current_time()
         db.commit()
         db.refresh(db_mission)
+        invalidate_dashboard_stats(db_mission.chat.user_id if db_mission.chat else None)
     return db_mission
 
 def update_mission_context(db: Session, mission_id: str, 
@@ -491,6 +505,7 @@ def delete_mission(db: Session, mission_id: str, user_id: int) -> bool:
         # Then delete the mission itself
         db.delete(db_mission)
         db.commit()
+        invalidate_dashboard_stats(user_id)
         logger.info(f"Deleted mission {mission_id}")
         return True
     return False
@@ -515,6 +530,7 @@ def create_document(db: Session, doc_id: str, user_id: int, original_filename: s
     db.add(db_document)
     db.commit()
     db.refresh(db_document)
+    invalidate_dashboard_stats(user_id)
     return db_document
 
 def get_document(db: Session, doc_id: str, user_id: int) -> Optional[Document]:
@@ -544,6 +560,7 @@ async def delete_document_async(db: Session, doc_id: str, user_id: int) -> bool:
         
         success = await delete_document_atomically(db, doc_id, user_id)
         
+        invalidate_dashboard_stats(user_id)
         if success:
             logger.info(f"Document {doc_id} successfully deleted from all systems")
         else:
@@ -578,6 +595,7 @@ def delete_document_simple_sync(db: Session, doc_id: str, user_id: int) -> bool:
         try:
             db.delete(db_document)
             db.commit()
+            invalidate_dashboard_stats(user_id)
             logger.info(f"Deleted document {doc_id} from main database (sync mode)")
             return True
         except Exception as e:
@@ -600,6 +618,7 @@ def create_document_group(db: Session, group_id: str, user_id: int, name: str, d
     db.add(db_group)
     db.commit()
     db.refresh(db_group)
+    invalidate_dashboard_stats(user_id)
     return db_group
 
 def get_document_group(db: Session, group_id: str, user_id: int) -> Optional[DocumentGroup]:
@@ -652,6 +671,7 @@ def delete_document_group(db: Session, group_id: str, user_id: int) -> bool:
     # Safe to delete - either no missions reference it, or all are completed/stopped/failed
     db.delete(db_group)
     db.commit()
+    invalidate_dashboard_stats(user_id)
     return True
 
 def add_document_to_group(db: Session, group_id: str, doc_id: str, user_id: int) -> Optional[DocumentGroup]:
@@ -736,6 +756,7 @@ def update_document_status(db: Session, doc_id: str, user_id: int, status: str,
         document.updated_at = get_current_time()
         db.commit()
         db.refresh(document)
+        invalidate_dashboard_stats(user_id)
         return document
     return None
 
@@ -805,117 +826,29 @@ def clear_writing_session_stats(db: Session, session_id: str) -> Optional[Writin
 
 # Dashboard Stats CRUD operations
 def get_dashboard_stats(db: Session, user_id: int) -> Dict[str, Any]:
-    """Get dashboard statistics for a user."""
-    from database.models import WritingSession
-    
-    logger.info(f"Getting dashboard stats for user_id: {user_id}")
-    
-    # Get total chats
-    total_chats = db.query(Chat).filter(Chat.user_id == user_id).count()
-    logger.info(f"Total chats for user {user_id}: {total_chats}")
-    
-    # Get research sessions (chats with type 'research')
-    research_sessions = db.query(Chat).filter(
-        and_(Chat.user_id == user_id, Chat.chat_type == "research")
-    ).count()
-    logger.info(f"Research sessions for user {user_id}: {research_sessions}")
-    
-    # Get writing sessions (chats with type 'writing') - Fixed to count writing chats, not WritingSession records
-    writing_sessions = db.query(Chat).filter(
-        and_(Chat.user_id == user_id, Chat.chat_type == "writing")
-    ).count()
-    logger.info(f"Writing sessions for user {user_id}: {writing_sessions}")
-    
-    # Get total documents (only count successfully processed documents)
-    total_documents = db.query(Document).filter(
-        and_(Document.user_id == user_id, Document.processing_status == 'completed')
-    ).count()
-    logger.info(f"Total completed documents for user {user_id}: {total_documents}")
-    
-    # Debug: Let's also check what users exist in the database
-    all_users = db.query(User.id, User.username).all()
-    logger.info(f"All users in database: {[(u.id, u.username) for u in all_users]}")
-    
-    # Debug: Check what documents exist and their user_ids
-    all_docs = db.query(Document.id, Document.user_id, Document.original_filename).limit(5).all()
-    logger.info(f"Sample documents: {[(d.id, d.user_id, d.original_filename) for d in all_docs]}")
-    
-    # Debug: Check what chats exist and their user_ids
-    all_chats = db.query(Chat.id, Chat.user_id, Chat.title, Chat.chat_type).limit(5).all()
-    logger.info(f"Sample chats: {[(c.id, c.user_id, c.title, c.chat_type) for c in all_chats]}")
-    
-    # Get total writing session records (the actual WritingSession table)
-    total_writing_session_records = db.query(WritingSession).join(Chat).filter(
-        Chat.user_id == user_id
-    ).count()
-    logger.info(f"Total WritingSession records for user {user_id}: {total_writing_session_records}")
-    
-    # Get total missions
-    total_missions = db.query(Mission).join(Chat).filter(
-        Chat.user_id == user_id
-    ).count()
-    logger.info(f"Total missions for user {user_id}: {total_missions}")
-    
-    # Get completed missions
-    completed_missions = db.query(Mission).join(Chat).filter(
-        and_(Chat.user_id == user_id, Mission.status == "completed")
-    ).count()
-    logger.info(f"Completed missions for user {user_id}: {completed_missions}")
-    
-    # Get active missions (pending or running)
-    active_missions = db.query(Mission).join(Chat).filter(
-        and_(
-            Chat.user_id == user_id,
-            or_(Mission.status == "pending", Mission.status == "running")
-        )
-    ).count()
-    logger.info(f"Active missions for user {user_id}: {active_missions}")
-    
-    # Get recent activity (most recent chat update)
-    recent_activity = None
-    latest_chat = db.query(Chat).filter(Chat.user_id == user_id).order_by(
-        Chat.updated_at.desc()
-    ).first()
-    
-    if latest_chat:
-        now = get_current_time()
-        # Ensure both datetimes have timezone info for comparison
-        chat_updated_at = latest_chat.updated_at
-        if chat_updated_at.tzinfo is None:
-            # If the stored datetime is naive, assume it's in the server timezone
-            chat_updated_at = chat_updated_at.replace(tzinfo=SERVER_TIMEZONE)
-        elif now.tzinfo is None:
-            # If current time is naive, add server timezone
-            now = now.replace(tzinfo=SERVER_TIMEZONE)
-        
-        time_diff = now - chat_updated_at
-        
-        if time_diff.days > 0:
-            recent_activity = f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
-        elif time_diff.seconds > 3600:
-            hours = time_diff.seconds // 3600
-            recent_activity = f"{hours} hour{'s' if hours > 1 else ''} ago"
-        elif time_diff.seconds > 60:
-            minutes = time_diff.seconds // 60
-            recent_activity = f"{minutes} minute{'s' if minutes > 1 else ''} ago"
-        else:
-            recent_activity = "Just now"
-    else:
-        recent_activity = "No recent activity"
+    """
+    Get dashboard statistics for a user.
+    All counters come from one aggregated query and are cached briefly per user.
+    """
+    stats = dashboard_stats_cache.get(user_id)
+    if stats is None:
+        row = db.execute(build_dashboard_stats_query(user_id)).one()
+        stats = row_to_stats(row)
+        dashboard_stats_cache.put(user_id, stats)
     
     stats_result = {
-        "total_chats": total_chats,
-        "total_documents": total_documents,
-        "total_writing_sessions": writing_sessions,  # Fixed to use writing chats count
-        "total_missions": total_missions,
-        "recent_activity": recent_activity,
-        "research_sessions": research_sessions,
-        "writing_sessions": writing_sessions,  # Fixed to use writing chats count
-        "completed_missions": completed_missions,
-        "active_missions": active_missions
+        "total_chats": stats["total_chats"],
+        "total_documents": stats["total_documents"],
+        "total_writing_sessions": stats["writing_sessions"],  # Counts writing chats, not WritingSession records
+        "total_missions": stats["total_missions"],
+        "recent_activity": format_recent_activity(stats["last_activity_at"], get_current_time()),
+        "research_sessions": stats["research_sessions"],
+        "writing_sessions": stats["writing_sessions"],
+        "completed_missions": stats["completed_missions"],
+        "active_missions": stats["active_missions"]
     }
     
-    logger.info(f"Dashboard stats result for user {user_id}: {stats_result}")
+    logger.debug(f"Dashboard stats result for user {user_id}: {stats_result}")
     return stats_result
 
 def update_user_password(db: Session, user_id: int, new_password: str):
@@ -928,6 +861,7 @@ def update_user_password(db: Session, user_id: int, new_password: str):
     db_user.updated_at = get_current_time()
     db.commit()
     db.refresh(db_user)
+    invalidate_user(username=db_user.username, user_id=db_user.id)
     return db_user
 
 # System Settings CRUD
@@ -6,6 +6,7 @@ from typing import Optional, List
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, desc
 from database.models import ResearchReport, Mission
+from database.version_store import report_versions
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -40,6 +41,10 @@ def create_research_report(
         
         next_version = (latest_report.version + 1) if latest_report else 1
         
+        # The previous latest version becomes history; store it as a diff
+        if latest_report and (make_current or not latest_report.is_current):
+            report_versions.compact(db, latest_report)
+        
         # If making this current, unset current flag on other versions
         if make_current:
             db.query(ResearchReport).filter(
@@ -137,6 +142,36 @@ def get_all_research_reports(
         ResearchReport.mission_id == mission_id
     ).order_by(desc(ResearchReport.version)).all()
 
+def get_research_report_summaries(
+    db: Session,
+    mission_id: str
+) -> List[ResearchReport]:
+    """
+    Get all versions of research reports for a mission without their content.
+    
+    Args:
+        db: Database session
+        mission_id: ID of the mission
+    
+    Returns:
+        List of ResearchReport objects ordered by version (newest first), with
+        content left unloaded; use get_research_report_content for a version's text
+    """
+    return report_versions.metadata_query(db, mission_id).all()
+
+def get_research_report_content(db: Session, report: ResearchReport) -> str:
+    """
+    Get the full content of a research report version.
+    
+    Args:
+        db: Database session
+        report: The report version
+    
+    Returns:
+        The Markdown content, rebuilt from stored diffs if necessary
+    """
+    return report_versions.load_content(db, report)
+
 def set_current_research_report(
     db: Session,
     mission_id: str,
@@ -171,6 +206,7 @@ def set_current_research_report(
         ).first()
         
         if report:
+            report_versions.materialize(db, report)
             report.is_current = True
             
             # Update mission's current report version
@@ -218,7 +254,11 @@ def update_research_report_content(
         ).first()
         
         if report:
+            # Versions diffed against this one must not see the edit
+            report_versions.detach(db, report)
             report.content = content
+            report.content_delta = None
+            report.delta_base_version = None
             if title is not None:
                 report.title = title
             report.updated_at = datetime.utcnow()
@@ -269,11 +309,14 @@ def delete_research_report_version(
                 ).order_by(desc(ResearchReport.version)).first()
                 
                 if prev_report:
+                    report_versions.materialize(db, prev_report)
                     prev_report.is_current = True
                     mission = db.query(Mission).filter(Mission.id == mission_id).first()
                     if mission:
                         mission.current_report_version = prev_report.version
             
+            # Versions diffed against this one need their full text first
+            report_versions.detach(db, report)
             db.delete(report)
             db.commit()
             logger.info(f"Deleted research report version {version} for mission {mission_id}")
@@ -0,0 +1,157 @@
+"""
+Dashboard statistics: a single aggregated query plus a short-TTL per-user cache.
+
+Both the sync and async CRUD layers build the same statement here, so the
+dashboard costs one round-trip instead of one COUNT(*) per tile. Write paths
+that change the counted rows call ``invalidate_dashboard_stats``.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+
+from database.models import Chat, Document, DocumentGroup, Mission
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_STATS_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_STATS_CACHE_TTL_SECONDS", "15"))
+
+ACTIVE_MISSION_STATUSES = ("pending", "planning", "running")
+
+
+def build_dashboard_stats_query(user_id: int):
+    """Build one SELECT returning every dashboard counter for ``user_id``."""
+    chat_stats = (
+        select(
+            func.count().label("total_chats"),
+            func.count().filter(Chat.chat_type == "research").label("research_sessions"),
+            func.count().filter(Chat.chat_type == "writing").label("writing_sessions"),
+            func.max(Chat.updated_at).label("last_activity_at"),
+        )
+        .where(Chat.user_id == user_id)
+        .subquery()
+    )
+    mission_stats = (
+        select(
+            func.count().label("total_missions"),
+            func.count().filter(Mission.status == "completed").label("completed_missions"),
+            func.count().filter(Mission.status.in_(ACTIVE_MISSION_STATUSES)).label("active_missions"),
+        )
+        .select_from(Mission)
+        .join(Chat, Mission.chat_id == Chat.id)
+        .where(Chat.user_id == user_id)
+        .subquery()
+    )
+    document_stats = (
+        select(
+            func.count().filter(Document.processing_status == "completed").label("total_documents"),
+        )
+        .where(Document.user_id == user_id)
+        .subquery()
+    )
+    total_document_groups = (
+        select(func.count())
+        .select_from(DocumentGroup)
+        .where(DocumentGroup.user_id == user_id)
+        .scalar_subquery()
+        .label("total_document_groups")
+    )
+    return select(
+        chat_stats.c.total_chats,
+        chat_stats.c.research_sessions,
+        chat_stats.c.writing_sessions,
+        chat_stats.c.last_activity_at,
+        mission_stats.c.total_missions,
+        mission_stats.c.completed_missions,
+        mission_stats.c.active_missions,
+        document_stats.c.total_documents,
+        total_document_groups,
+    )
+
+
+def format_recent_activity(last_activity_at: Optional[datetime], now: datetime) -> str:
+    """Render the most recent chat update as a relative time string."""
+    if last_activity_at is None:
+        return "No recent activity"
+
+    # Ensure both datetimes have timezone info for comparison
+    if last_activity_at.tzinfo is None:
+        # If the stored datetime is naive, assume it's in the server timezone
+        last_activity_at = last_activity_at.replace(tzinfo=now.tzinfo)
+
+    time_diff = now - last_activity_at
+    if time_diff.days > 0:
+        return f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
+    if time_diff.seconds > 3600:
+        hours = time_diff.seconds // 3600
+        return f"{hours} hour{'s' if hours > 1 else ''} ago"
+    if time_diff.seconds > 60:
+        minutes = time_diff.seconds // 60
+        return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
+    return "Just now"
+
+
+def row_to_stats(row) -> Dict[str, Any]:
+    """Convert the aggregated row into the raw counters dict that gets cached."""
+    mapping = row._mapping
+    return {
+        "total_chats": mapping["total_chats"] or 0,
+        "research_sessions": mapping["research_sessions"] or 0,
+        "writing_sessions": mapping["writing_sessions"] or 0,
+        "last_activity_at": mapping["last_activity_at"],
+        "total_missions": mapping["total_missions"] or 0,
+        "completed_missions": mapping["completed_missions"] or 0,
+        "active_missions": mapping["active_missions"] or 0,
+        "total_documents": mapping["total_documents"] or 0,
+        "total_document_groups": mapping["total_document_groups"] or 0,
+    }
+
+
+class DashboardStatsCache:
+    """Per-user TTL cache of raw dashboard counters."""
+
+    def __init__(self, ttl_seconds: float = DASHBOARD_STATS_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, stats = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            return dict(stats)
+
+    def put(self, user_id: int, stats: Dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            # Opportunistically drop expired entries so the dict stays small
+            now = time.monotonic()
+            for key in [k for k, (expires_at, _) in self._entries.items() if expires_at < now]:
+                del self._entries[key]
+            self._entries[user_id] = (now + self.ttl_seconds, dict(stats))
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop one user's entry."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+dashboard_stats_cache = DashboardStatsCache()
+
+
+def invalidate_dashboard_stats(user_id: Optional[int]) -> None:
+    """Invalidate a user's cached dashboard stats after a write that changes their counters."""
+    if user_id is not None:
+        dashboard_stats_cache.invalidate(user_id)
@@ -0,0 +1,88 @@
+"""
+Indexed document-library search and keyset pagination helpers.
+
+Library search used to be a chain of ``LOWER(...) LIKE '%term%'`` predicates
+over the documents table and its JSONB metadata, which always scans every
+row of a user's library. ``init-db/10-document-search-indexes.sql`` adds:
+
+- ``documents.search_vector``: a generated, weighted ``tsvector`` over title,
+  filename, authors, journal, keywords and abstract with a GIN index,
+- ``pg_trgm`` GIN indexes on the lowered title, filename, author and journal
+  expressions so substring and fuzzy matches stay index-backed,
+- an indexed ``documents.file_hash`` column for upload de-duplication,
+- a ``(user_id, created_at DESC, id DESC)`` index for keyset pagination,
+  with ``created_at`` made ``NOT NULL`` (``17-documents-created-at-not-null.sql``)
+  so no row falls outside the cursor comparison.
+
+The SQL fragments below are written against those exact expressions; keep
+them in sync with the migration or the planner will fall back to scans.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+# Text search configuration used both by the generated column and by queries.
+# 'simple' avoids language-specific stemming, which mangles author names.
+SEARCH_CONFIG = "simple"
+
+# Free-text search: full-text match, trigram-backed substring match on the
+# short fields, and fuzzy (word-similarity) match on title and authors.
+SEARCH_CONDITION = f"""
+    AND (
+        d.search_vector @@ websearch_to_tsquery('{SEARCH_CONFIG}', :search_query) OR
+        LOWER(d.metadata_->>'title') LIKE :search OR
+        LOWER(d.original_filename) LIKE :search OR
+        LOWER(d.filename) LIKE :search OR
+        LOWER(d.metadata_->>'authors') LIKE :search OR
+        LOWER(d.metadata_->>'journal_or_source') LIKE :search OR
+        :search_query <% LOWER(d.metadata_->>'title') OR
+        :search_query <% LOWER(d.metadata_->>'authors')
+    )
+"""
+
+AUTHOR_CONDITION = """
+    AND (
+        LOWER(d.metadata_->>'authors') LIKE :author OR
+        :author_query <% LOWER(d.metadata_->>'authors')
+    )
+"""
+
+JOURNAL_CONDITION = " AND LOWER(d.metadata_->>'journal_or_source') LIKE :journal"
+
+# Keyset pagination: rows strictly after the cursor in (created_at, id) DESC order.
+CURSOR_CONDITION = " AND (d.created_at, d.id) < (:cursor_created_at, CAST(:cursor_id AS uuid))"
+
+KEYSET_ORDER_BY = " ORDER BY d.created_at DESC, d.id DESC"
+
+
+def like_pattern(value: str) -> str:
+    """Build a lowercase substring pattern, escaping LIKE wildcards in ``value``."""
+    escaped = value.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def search_params(search: str) -> Dict[str, Any]:
+    return {"search": like_pattern(search), "search_query": search.lower()}
+
+
+def author_params(author: str) -> Dict[str, Any]:
+    return {"author": like_pattern(author), "author_query": author.lower()}
+
+
+def encode_cursor(created_at: Optional[datetime], doc_id: Any) -> Optional[str]:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    if created_at is None or doc_id is None:
+        return None
+    payload = json.dumps({"c": created_at.isoformat(), "i": str(doc_id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor from ``encode_cursor``. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return datetime.fromisoformat(payload["c"]), str(payload["i"])
+    except Exception as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor}") from e
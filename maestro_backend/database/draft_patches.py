@@ -0,0 +1,193 @@
+"""
+Incremental, optimistically-concurrent saves for writing-session drafts.
+
+The editor autosaves every few seconds. Replacing ``drafts.content`` on each
+save uploads and rewrites the whole document (and its WAL) for a one-word
+edit. Instead a save is a list of ranged text operations against a known
+draft revision:
+
+- the operations are appended as one small ``draft_patches`` row and the
+  draft's ``revision`` counter is bumped; ``content`` is not rewritten, so
+  Postgres keeps the existing TOASTed value,
+- every ``DRAFT_PATCH_COMPACT_EVERY`` saves, and whenever the draft stops
+  being current, the pending patches are folded into ``content`` and deleted,
+- a save whose base revision is not the draft's current revision is rejected
+  with ``DraftRevisionConflict``. The revision is claimed with a conditional
+  ``UPDATE ... WHERE revision = :base``, which also locks the draft row, so of
+  two concurrent saves against the same base exactly one wins even when it
+  compacts (and so deletes) the patch rows the unique ``(draft_id, revision)``
+  constraint would otherwise have compared.
+
+Offsets are UTF-16 code units, matching JavaScript string indices in the
+browser editor.
+"""
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from database.models import Draft, DraftPatch
+
+logger = logging.getLogger(__name__)
+
+DRAFT_PATCH_COMPACT_EVERY = int(os.getenv("DRAFT_PATCH_COMPACT_EVERY", "50"))
+
+
+class DraftRevisionConflict(Exception):
+    """Raised when a patch's base revision is not the draft's current revision."""
+
+    def __init__(self, current_revision: int):
+        super().__init__(f"Draft has been modified; current revision is {current_revision}")
+        self.current_revision = current_revision
+
+
+class InvalidDraftPatch(ValueError):
+    """Raised when patch operations are malformed or out of range."""
+
+
+def draft_etag(draft: Draft) -> str:
+    """Strong ETag identifying a draft revision."""
+    return f'"{draft.id}:{draft.revision or 0}"'
+
+
+def parse_etag_revision(draft: Draft, etag: str) -> Optional[int]:
+    """Return the revision named by an ``If-Match`` value for ``draft``, or None if it names another draft."""
+    value = etag.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    value = value.strip('"')
+    draft_id, _, revision = value.rpartition(":")
+    if draft_id != str(draft.id):
+        return None
+    try:
+        return int(revision)
+    except ValueError:
+        return None
+
+
+def apply_operations(content: str, operations: List[Dict[str, Any]]) -> str:
+    """
+    Apply ranged replacements to ``content``.
+
+    Each operation replaces ``[start, end)`` of the *base* text with ``text``.
+    Operations must be sorted by ``start`` and must not overlap.
+    """
+    if not operations:
+        return content
+    units = content.encode("utf-16-le")
+    length = len(units) // 2
+    parts = []
+    position = 0
+    for op in operations:
+        try:
+            start, end, text = int(op["start"]), int(op["end"]), op.get("text") or ""
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidDraftPatch(f"Malformed operation {op!r}") from e
+        if not isinstance(text, str):
+            raise InvalidDraftPatch(f"Operation text must be a string: {op!r}")
+        if start < position or end < start or end > length:
+            raise InvalidDraftPatch(
+                f"Operation range [{start}, {end}) is out of order or outside the document (length {length})"
+            )
+        parts.append(units[position * 2:start * 2])
+        parts.append(text.encode("utf-16-le"))
+        position = end
+    parts.append(units[position * 2:])
+    try:
+        return b"".join(parts).decode("utf-16-le")
+    except UnicodeDecodeError as e:
+        raise InvalidDraftPatch("Operation splits a surrogate pair") from e
+
+
+def claim_revision(db: Session, draft: Draft, base_revision: Optional[int] = None) -> int:
+    """
+    Bump the draft's revision in the database and return the new revision.
+
+    With ``base_revision`` the bump only happens while that is still the
+    current revision of a current draft; otherwise ``DraftRevisionConflict``
+    is raised. The updated row stays locked until the caller commits, so
+    concurrent saves of the same draft are serialized.
+    """
+    stmt = update(Draft).where(Draft.id == draft.id)
+    if base_revision is not None:
+        stmt = stmt.where(Draft.revision == base_revision, Draft.is_current.is_(True))
+    new_revision = db.execute(
+        stmt.values(revision=Draft.revision + 1).returning(Draft.revision)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if new_revision is None:
+        current = db.query(Draft.revision).filter(Draft.id == draft.id).scalar()
+        raise DraftRevisionConflict(current or 0)
+    set_committed_value(draft, "revision", new_revision)
+    return new_revision
+
+
+def has_pending_patches(draft: Draft) -> bool:
+    return (draft.revision or 0) > (draft.compacted_revision or 0)
+
+
+def _pending_patches(db: Session, draft: Draft) -> List[DraftPatch]:
+    return db.query(DraftPatch).filter(
+        DraftPatch.draft_id == draft.id,
+        DraftPatch.revision > (draft.compacted_revision or 0)
+    ).order_by(DraftPatch.revision).all()
+
+
+def current_content(db: Session, draft: Draft) -> str:
+    """The draft's text at its latest revision: compacted content plus pending patches."""
+    content = draft.content or ""
+    if not has_pending_patches(draft):
+        return content
+    for patch in _pending_patches(db, draft):
+        content = apply_operations(content, patch.operations)
+    return content
+
+
+def fold_patches(db: Session, draft: Draft, content: Optional[str] = None) -> None:
+    """Write the latest text into ``draft.content`` and drop the folded patches."""
+    if not has_pending_patches(draft):
+        return
+    draft.content = content if content is not None else current_content(db, draft)
+    draft.compacted_revision = draft.revision
+    db.query(DraftPatch).filter(DraftPatch.draft_id == draft.id).delete(synchronize_session=False)
+    logger.debug(f"Compacted draft {draft.id} at revision {draft.revision}")
+
+
+def apply_patch(
+    db: Session,
+    draft: Draft,
+    base_revision: int,
+    operations: List[Dict[str, Any]],
+) -> str:
+    """
+    Record ``operations`` against ``base_revision`` of ``draft``.
+
+    Returns the new text. Raises ``DraftRevisionConflict`` if the draft moved
+    past ``base_revision``, including when a concurrent save claimed it first.
+    The caller commits.
+    """
+    if (draft.revision or 0) != base_revision:
+        raise DraftRevisionConflict(draft.revision or 0)
+    # Validate before claiming; the row lock is then held only for the writes
+    new_content = apply_operations(current_content(db, draft), operations)
+    claim_revision(db, draft, base_revision)
+    db.add(DraftPatch(draft_id=draft.id, revision=draft.revision, operations=operations))
+    if draft.revision - (draft.compacted_revision or 0) >= DRAFT_PATCH_COMPACT_EVERY:
+        db.flush()
+        fold_patches(db, draft, new_content)
+    return new_content
+
+
+def replace_content(db: Session, draft: Draft, content: str, base_revision: Optional[int] = None) -> None:
+    """
+    Full-content save: replace the text, bump the revision and drop pending patches.
+    With ``base_revision`` the save is rejected like a patch if the draft moved on.
+    """
+    claim_revision(db, draft, base_revision)
+    # Patches committed before the claim are superseded by the new text
+    db.query(DraftPatch).filter(DraftPatch.draft_id == draft.id).delete(synchronize_session=False)
+    draft.content = content
+    draft.compacted_revision = draft.revision
@@ -10,11 +10,12 @@ The application uses a unified architecture:
 For detailed architecture documentation, see: docs/DATABASE_ARCHITECTURE.md
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Table, Boolean, Numeric, BigInteger
-from sqlalchemy.orm import relationship, backref
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Table, Boolean, Numeric, BigInteger, Computed, LargeBinary
+from sqlalchemy.orm import relationship, backref, deferred, validates
 from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 import sqlalchemy
+import hashlib
 import uuid
 from database.database import Base
 from database.uuid_type import StringUUID
@@ -65,7 +66,7 @@ class Chat(Base):
     title = Column(String, nullable=False)
     chat_type = Column(String, nullable=False, default="research", index=True)  # 'research' or 'writing'
     settings = Column(JSONB, nullable=True)  # Store chat-specific settings (web search, doc group, etc.)
-    created_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # Keyset pagination key
     updated_at = Column(DateTime(timezone=True))
     
     # Relationships
@@ -82,11 +83,22 @@ class Message(Base):
     content = Column(Text, nullable=False)
     role = Column(String, nullable=False)  # 'user' or 'assistant'
     sources = Column(JSONB, nullable=True)  # Store sources as JSONB for assistant messages
-    created_at = Column(DateTime(timezone=True))
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of content, for regeneration lookups
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # Keyset pagination key
     
     # Relationships
     chat = relationship("Chat", back_populates="messages")
 
+    @validates("content")
+    def _set_content_hash(self, key, content):
+        self.content_hash = message_content_hash(content)
+        return content
+
+
+def message_content_hash(content: str) -> str:
+    """Hex SHA-256 of a message body, as stored in ``Message.content_hash``."""
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
 class Mission(Base):
     __tablename__ = "missions"
 
@@ -137,6 +149,57 @@ class MissionExecutionLog(Base):
     # Relationships
     mission = relationship("Mission", back_populates="execution_logs")
 
+class MissionOutlineSnapshot(Base):
+    """
+    The report outline of a mission as of a research round and phase.
+    Written by AsyncContextManager.store_plan; used to resume a mission from a round.
+    """
+    __tablename__ = "mission_outline_snapshots"
+
+    id = Column(StringUUID, primary_key=True, default=uuid.uuid4)
+    mission_id = Column(StringUUID, ForeignKey("missions.id", ondelete="CASCADE"), nullable=False)
+    round = Column(Integer, nullable=False)  # 0 = initial planning, N = research round N
+    phase = Column(String, nullable=False)  # planning, round_start, notes, revision, user_edit, plan
+    version = Column(Integer, nullable=False)  # Increases with every snapshot written for the mission
+    outline = Column(JSONB, nullable=False)  # List of ReportSection dicts
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    mission = relationship("Mission", backref=backref("outline_snapshots", cascade="all, delete-orphan", passive_deletes=True))
+
+    __table_args__ = (
+        # One snapshot per round and phase (later writes replace it); also the lookup index
+        sqlalchemy.UniqueConstraint('mission_id', 'round', 'phase', name='uq_outline_snapshot_round_phase'),
+    )
+
+class MissionTrace(Base):
+    """
+    Timing spans of one run of a mission (a start or resume in one process).
+    Written by AsyncContextManager; read by GET /missions/{id}/trace.
+    """
+    __tablename__ = "mission_traces"
+
+    id = Column(StringUUID, primary_key=True, default=uuid.uuid4)
+    mission_id = Column(StringUUID, ForeignKey("missions.id", ondelete="CASCADE"), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    trace = Column(JSONB, nullable=False)  # See ai_researcher/agentic_layer/controller/utils/mission_trace.py
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    mission = relationship("Mission", backref=backref("traces", cascade="all, delete-orphan", passive_deletes=True))
+
+    __table_args__ = (
+        # Each flush of a run appends its new spans to this row; also the lookup index
+        sqlalchemy.UniqueConstraint('mission_id', 'started_at', name='uq_mission_trace_run'),
+    )
+
+# Weighted full-text search document over the library metadata. Must match the
+# generated column in init-db/10-document-search-indexes.sql.
+DOCUMENT_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(metadata_->>'title', '') || ' ' || coalesce(original_filename, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(metadata_->>'authors', '')), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(metadata_->>'journal_or_source', '') || ' ' || coalesce(metadata_->>'keywords', '')), 'C') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(metadata_->>'abstract', '')), 'D')"
+)
+
 class Document(Base):
     """
     Document model represents uploaded documents in the system.
@@ -160,7 +223,7 @@ class Document(Base):
     filename = Column(String, nullable=False)  # Primary field matching PostgreSQL schema
     original_filename = Column(String, nullable=True)  # For backward compatibility
     metadata_ = Column(JSONB, nullable=True)  # Document metadata stored as JSONB
-    created_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # Keyset pagination key
     updated_at = Column(DateTime(timezone=True))
     
     # Enhanced document management fields
@@ -168,6 +231,9 @@ class Document(Base):
     upload_progress = Column(Integer, default=0)  # 0-100
     processing_error = Column(Text, nullable=True)  # Error messages during processing
     file_size = Column(BigInteger, nullable=True)  # File size in bytes
+    file_hash = Column(String(64), nullable=True)  # SHA-256 of the uploaded file, used for de-duplication
+    # Generated by the database; deferred so normal document loads don't fetch it
+    search_vector = deferred(Column(TSVECTOR, Computed(DOCUMENT_SEARCH_VECTOR_SQL, persisted=True)))
     
     # Additional fields from database schema
     file_path = Column(String(255), nullable=True)  # Path to the original PDF file
@@ -192,6 +258,36 @@ class Document(Base):
             kwargs['original_filename'] = kwargs['filename']
         super().__init__(**kwargs)
 
+class DocumentConsistency(Base):
+    """
+    Last consistency check of a document. A trigger on ``documents`` marks the row
+    dirty when the document's status, chunk count or files change (see
+    init-db/16-document-consistency.sql); services/consistency_tracker.py re-checks
+    dirty rows only. No foreign key, so deletions stay visible until processed.
+    """
+    __tablename__ = "document_consistency"
+
+    doc_id = Column(StringUUID, primary_key=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    status = Column(String(50), nullable=True)  # Processing status at the last check
+    # Server defaults too: the trigger inserts rows without going through the model
+    issues = Column(JSONB, nullable=False, default=list, server_default=sqlalchemy.text("'[]'::jsonb"))
+    dirty = Column(Boolean, nullable=False, default=True, server_default=sqlalchemy.text("true"))
+    deleted = Column(Boolean, nullable=False, default=False, server_default=sqlalchemy.text("false"))
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+    checked_at = Column(DateTime(timezone=True), nullable=True)  # NULL until first checked (not counted)
+
+class DocumentConsistencySummary(Base):
+    """Per-user consistency counters, adjusted as documents are re-checked."""
+    __tablename__ = "document_consistency_summary"
+
+    user_id = Column(Integer, primary_key=True)
+    total_documents = Column(Integer, nullable=False, default=0, server_default=sqlalchemy.text("0"))
+    consistent_documents = Column(Integer, nullable=False, default=0, server_default=sqlalchemy.text("0"))
+    total_issues = Column(Integer, nullable=False, default=0, server_default=sqlalchemy.text("0"))
+    by_status = Column(JSONB, nullable=False, default=dict, server_default=sqlalchemy.text("'{}'::jsonb"))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class DocumentGroup(Base):
     __tablename__ = "document_groups"
 
@@ -251,15 +347,41 @@ class Draft(Base):
     id = Column(StringUUID, primary_key=True, default=uuid.uuid4, index=True)
     writing_session_id = Column(StringUUID, ForeignKey("writing_sessions.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
-    content = Column(Text, nullable=False)  # Store content as a single Markdown text block
+    content = Column(Text, nullable=True)  # Store content as a single Markdown text block; NULL when delta-encoded
     version = Column(Integer, default=1)  # Version number for draft history
     is_current = Column(Boolean, default=True)  # Whether this is the current active draft
+    # Older versions are stored as compressed diffs; see database/version_store.py
+    content_delta = deferred(Column(LargeBinary, nullable=True))
+    delta_base_version = Column(Integer, nullable=True)
+    # Save counter for optimistic concurrency; saves after compacted_revision are
+    # pending DraftPatch rows not yet folded into content (see database/draft_patches.py)
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
+    compacted_revision = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True))
     updated_at = Column(DateTime(timezone=True))
 
     # Relationships
     writing_session = relationship("WritingSession", back_populates="drafts")
     references = relationship("Reference", back_populates="draft", cascade="all, delete-orphan")
+    patches = relationship("DraftPatch", back_populates="draft", cascade="all, delete-orphan",
+                           order_by="DraftPatch.revision")
+
+class DraftPatch(Base):
+    """A ranged-text edit saved against a draft revision, pending compaction into Draft.content."""
+    __tablename__ = "draft_patches"
+
+    id = Column(StringUUID, primary_key=True, default=uuid.uuid4)
+    draft_id = Column(StringUUID, ForeignKey("drafts.id", ondelete="CASCADE"), nullable=False)
+    revision = Column(Integer, nullable=False)  # Draft revision this patch produces
+    operations = Column(JSONB, nullable=False)  # [{"start": int, "end": int, "text": str}, ...]
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    draft = relationship("Draft", back_populates="patches")
+
+    __table_args__ = (
+        # Two saves against the same base revision cannot both succeed
+        sqlalchemy.UniqueConstraint('draft_id', 'revision', name='uq_draft_patch_revision'),
+    )
 
 class Reference(Base):
     __tablename__ = "draft_references"
@@ -325,9 +447,12 @@ class ResearchReport(Base):
     mission_id = Column(StringUUID, ForeignKey("missions.id"), nullable=False, index=True)
     version = Column(Integer, nullable=False, default=1)
     title = Column(String, nullable=True)
-    content = Column(Text, nullable=False)
+    content = Column(Text, nullable=True)  # NULL when the version is delta-encoded
     is_current = Column(Boolean, default=True, index=True)
     revision_notes = Column(Text, nullable=True)  # Notes about what was revised
+    # Older versions are stored as compressed diffs; see database/version_store.py
+    content_delta = deferred(Column(LargeBinary, nullable=True))
+    delta_base_version = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
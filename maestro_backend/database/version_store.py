@@ -0,0 +1,185 @@
+"""
+Delta-encoded storage for versioned Markdown documents.
+
+Writing-session drafts and research reports keep one row per version. Storing
+the full Markdown in every row makes long-lived sessions with hundreds of
+autosaved versions the largest tables in the database, even though
+consecutive versions usually differ by a few lines.
+
+Versions are stored as a chain of forward deltas:
+
+- the current version, and every ``VERSION_SNAPSHOT_INTERVAL``-th link in a
+  chain, keeps its full text in ``content``;
+- when a version becomes history (a newer version is created) it is
+  re-encoded as a zlib-compressed line diff against the version before it,
+  in ``content_delta``, with ``delta_base_version`` naming that base and
+  ``content`` set to NULL.
+
+Any version is rebuilt by walking back to the nearest full row and replaying
+at most ``VERSION_SNAPSHOT_INTERVAL`` deltas. Rows written before this module
+existed are simply full snapshots.
+"""
+import difflib
+import json
+import logging
+import os
+import zlib
+from typing import List, Optional, Tuple
+
+from sqlalchemy import desc
+from sqlalchemy.orm import Session, load_only, undefer
+
+from database import draft_patches
+from database.models import Draft, ResearchReport
+
+logger = logging.getLogger(__name__)
+
+VERSION_SNAPSHOT_INTERVAL = int(os.getenv("VERSION_SNAPSHOT_INTERVAL", "10"))
+
+
+def encode_delta(base: str, target: str) -> bytes:
+    """Encode ``target`` as a compressed line diff against ``base``."""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            # replace and insert both emit the new lines; delete emits nothing
+            ops.append("".join(target_lines[j1:j2]))
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"))
+
+
+def apply_delta(base: str, delta: bytes) -> str:
+    """Rebuild the text encoded by ``encode_delta(base, ...)``."""
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(zlib.decompress(delta).decode("utf-8")):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.append("".join(base_lines[op[0]:op[1]]))
+    return "".join(parts)
+
+
+class VersionChain:
+    """Delta-encoded version chain for one table keyed by a parent id and a version number."""
+
+    def __init__(self, model, parent_attr: str, snapshot_interval: int = VERSION_SNAPSHOT_INTERVAL):
+        self.model = model
+        self.parent_column = getattr(model, parent_attr)
+        self.parent_attr = parent_attr
+        self.snapshot_interval = snapshot_interval
+
+    def _parent_id(self, row):
+        return getattr(row, self.parent_attr)
+
+    def metadata_query(self, db: Session, parent_id: str):
+        """Query the versions of ``parent_id`` without loading any content, newest first."""
+        model = self.model
+        columns = [
+            getattr(model, attr) for attr in
+            ("id", self.parent_attr, "version", "title", "is_current", "created_at", "updated_at",
+             "revision_notes", "delta_base_version")
+            if hasattr(model, attr)
+        ]
+        return db.query(model).options(load_only(*columns)).filter(
+            self.parent_column == parent_id
+        ).order_by(desc(model.version))
+
+    def _load_chain(self, db: Session, row) -> Tuple[str, int]:
+        """Return ``(content, depth)`` for ``row``, where depth counts deltas applied."""
+        pending: List = []
+        current = row
+        # Rows on the chain are fetched one version at a time; the chain is
+        # bounded by the snapshot interval so this is a handful of PK lookups.
+        while current.delta_base_version is not None:
+            pending.append(current)
+            base = db.query(self.model).options(undefer(self.model.content_delta)).filter(
+                self.parent_column == self._parent_id(current),
+                self.model.version == current.delta_base_version
+            ).first()
+            if base is None:
+                raise ValueError(
+                    f"{self.model.__name__} version {current.version} references missing base "
+                    f"version {current.delta_base_version}"
+                )
+            current = base
+        content = current.content or ""
+        for delta_row in reversed(pending):
+            content = apply_delta(content, delta_row.content_delta)
+        return content, len(pending)
+
+    def load_content(self, db: Session, row) -> str:
+        """Return the full text of ``row``, rebuilding it from deltas if needed."""
+        if row.delta_base_version is None:
+            return row.content or ""
+        content, _ = self._load_chain(db, row)
+        return content
+
+    def materialize(self, db: Session, row) -> None:
+        """Store ``row``'s full text in place (e.g. before it becomes current or is edited)."""
+        if row.delta_base_version is None:
+            return
+        row.content = self.load_content(db, row)
+        row.content_delta = None
+        row.delta_base_version = None
+
+    def detach(self, db: Session, row) -> None:
+        """Materialize versions stored as deltas against ``row`` before it is edited or deleted."""
+        dependents = db.query(self.model).filter(
+            self.parent_column == self._parent_id(row),
+            self.model.delta_base_version == row.version
+        ).all()
+        for dependent in dependents:
+            self.materialize(db, dependent)
+
+    def compact(self, db: Session, row) -> None:
+        """
+        Re-encode ``row`` as a delta against the version before it.
+
+        Call when ``row`` becomes immutable history. Keeps the full text when
+        there is no earlier version, when the chain has reached the snapshot
+        interval, or when the delta would not be smaller.
+        """
+        if row.delta_base_version is not None or row.content is None or self.snapshot_interval <= 1:
+            return
+        base = db.query(self.model).filter(
+            self.parent_column == self._parent_id(row),
+            self.model.version < row.version
+        ).order_by(desc(self.model.version)).first()
+        if base is None:
+            return
+        try:
+            base_content, depth = self._load_chain(db, base)
+        except ValueError as e:
+            logger.warning(f"Keeping full snapshot for {self.model.__name__} {row.id}: {e}")
+            return
+        if depth + 1 >= self.snapshot_interval:
+            return
+        delta = encode_delta(base_content, row.content)
+        if len(delta) >= len(row.content.encode("utf-8")):
+            return
+        row.content_delta = delta
+        row.delta_base_version = base.version
+        row.content = None
+
+
+draft_versions = VersionChain(Draft, "writing_session_id")
+report_versions = VersionChain(ResearchReport, "mission_id")
+
+
+def get_draft_content(db: Session, draft: Optional[Draft]) -> str:
+    """Full Markdown for a draft row, whether stored in full, as a delta, or with pending patches."""
+    if draft is None:
+        return ""
+    if draft_patches.has_pending_patches(draft):
+        return draft_patches.current_content(db, draft)
+    return draft_versions.load_content(db, draft)
+
+
+def get_report_content(db: Session, report: Optional[ResearchReport]) -> str:
+    """Full Markdown for a research report row, whether stored in full or as a delta."""
+    return report_versions.load_content(db, report) if report is not None else ""
@@ -0,0 +1,263 @@
+"""
+Long-lived worker processes with warm models for CLI ingest.
+
+The CLI used to submit every document to a ``ProcessPoolExecutor`` whose task
+built a new ``DocumentProcessor`` (Marker models plus the BGE-M3 embedder) for
+that single document, so small-file imports spent most of their time loading
+models. This pool instead:
+
+- starts ``num_workers`` spawned processes that run ``initializer`` once
+  (loading the models) and then process documents until the queue is empty,
+- hands out work through one shared queue, so an idle worker always takes the
+  next document instead of waiting behind a slow one (no per-worker batches),
+- recycles a worker whose resident memory grows past ``rss_budget_mb`` after a
+  document, and replaces a worker that dies mid-document; the document it was
+  processing is reported as failed,
+- pins each worker to ``cpu_threads`` torch/BLAS threads in CPU-only mode so
+  N workers do not each try to use every core.
+"""
+import multiprocessing
+import os
+from multiprocessing import connection
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+# Environment variables read by the BLAS/OpenMP runtimes when torch is imported
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# How long the parent waits on worker pipes before re-checking
+_POLL_INTERVAL_SECONDS = 1.0
+
+# Values of a worker's shared ``current`` slot other than a task index
+_LOADING = -2
+_IDLE = -1
+
+
+def cpu_threads_per_worker(num_workers: int) -> int:
+    """Splits the machine's cores evenly between CPU-only workers."""
+    return max(1, (os.cpu_count() or 1) // max(1, num_workers))
+
+
+def _rss_mb() -> float:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+def _pin_threads(cpu_threads: Optional[int]):
+    if not cpu_threads:
+        return
+    try:
+        import torch
+        torch.set_num_threads(cpu_threads)
+    except Exception:
+        pass
+
+
+def _worker_main(worker_id: int, current, task_queue, conn, initializer: Callable[..., Any],
+                 initargs: Tuple, task_fn: Callable[[Any, Any], Any],
+                 rss_budget_mb: float, cpu_threads: Optional[int]):
+    try:
+        state = initializer(*initargs)
+        # Model constructors set their own thread counts, so pin after loading them
+        _pin_threads(cpu_threads)
+    except Exception as e:
+        conn.send(("init_failed", str(e)))
+        return
+    current.value = _IDLE
+
+    while True:
+        item = task_queue.get()
+        if item is None:
+            conn.send(("exit", None))
+            return
+        index, args = item
+        # Shared memory rather than a message, so the parent still knows after a hard crash
+        current.value = index
+        try:
+            result = task_fn(state, args)
+        except Exception as e:
+            result = e if _is_picklable(e) else RuntimeError(str(e))
+        conn.send(("done", (index, result)))
+        current.value = _IDLE
+
+        rss = _rss_mb()
+        if rss_budget_mb and rss > rss_budget_mb:
+            conn.send(("recycle", round(rss)))
+            return
+
+
+def _is_picklable(value: Any) -> bool:
+    import pickle
+    try:
+        pickle.dumps(value)
+        return True
+    except Exception:
+        return False
+
+
+class WarmWorkerPool:
+    def __init__(
+        self,
+        num_workers: int,
+        initializer: Callable[..., Any],
+        initargs: Tuple = (),
+        task_fn: Callable[[Any, Any], Any] = None,
+        rss_budget_mb: float = 0,
+        cpu_threads: Optional[int] = None,
+        log: Callable[[str], None] = print
+    ):
+        self.num_workers = max(1, num_workers)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.task_fn = task_fn
+        self.rss_budget_mb = rss_budget_mb
+        self.cpu_threads = cpu_threads
+        self.log = log
+        self.recycled = 0
+        self.crashed = 0
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._task_queue = None
+        self._workers: Dict[int, Any] = {}
+        # Each worker reports on its own pipe, so a killed worker cannot leave a shared lock held
+        self._connections: Dict[int, Any] = {}
+        # worker_id -> shared slot holding the task index being processed (or _LOADING/_IDLE)
+        self._current: Dict[int, Any] = {}
+        self._next_worker_id = 0
+        self._init_error: Optional[str] = None
+
+    def _spawn(self):
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        current = self._ctx.Value("i", _LOADING, lock=False)
+        reader, writer = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, current, self._task_queue, writer, self.initializer, self.initargs,
+                  self.task_fn, self.rss_budget_mb, self.cpu_threads),
+            daemon=True
+        )
+        if self.cpu_threads:
+            # Spawned children inherit the environment, and the BLAS runtimes read it on import
+            previous = {name: os.environ.get(name) for name in _THREAD_ENV_VARS}
+            os.environ.update({name: str(self.cpu_threads) for name in _THREAD_ENV_VARS})
+            try:
+                process.start()
+            finally:
+                for name, value in previous.items():
+                    if value is None:
+                        os.environ.pop(name, None)
+                    else:
+                        os.environ[name] = value
+        else:
+            process.start()
+        # Only the worker holds the write end, so the reader sees EOF when it exits
+        writer.close()
+        self._workers[worker_id] = process
+        self._connections[worker_id] = reader
+        self._current[worker_id] = current
+
+    def _retire(self, worker_id: int):
+        process = self._workers.pop(worker_id, None)
+        self._current.pop(worker_id, None)
+        reader = self._connections.pop(worker_id, None)
+        if reader is not None:
+            reader.close()
+        if process is not None:
+            process.join(timeout=5)
+
+    def imap_unordered(self, tasks: Iterable[Any]) -> Iterator[Tuple[Any, Any]]:
+        """
+        Processes ``tasks`` and yields ``(task, result)`` as each one finishes.
+        ``result`` is an exception if the task raised or its worker died.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return
+        self._task_queue = self._ctx.Queue()
+        for index, task in enumerate(tasks):
+            self._task_queue.put((index, task))
+        # One sentinel per worker slot; a replacement worker consumes the one its predecessor left
+        for _ in range(self.num_workers):
+            self._task_queue.put(None)
+        for _ in range(min(self.num_workers, len(tasks))):
+            self._spawn()
+
+        remaining = set(range(len(tasks)))
+        while remaining:
+            readers = {reader: worker_id for worker_id, reader in self._connections.items()}
+            for reader in connection.wait(list(readers), timeout=_POLL_INTERVAL_SECONDS):
+                worker_id = readers[reader]
+                try:
+                    message = reader.recv()
+                except (EOFError, OSError):
+                    yield from self._worker_died(worker_id, tasks, remaining)
+                    continue
+                yield from self._handle(worker_id, message, tasks, remaining)
+
+    def _handle(self, worker_id, message, tasks, remaining) -> Iterator[Tuple[Any, Any]]:
+        kind, payload = message
+        if kind == "done":
+            index, result = payload
+            if index in remaining:
+                remaining.discard(index)
+                yield tasks[index], result
+        elif kind == "recycle":
+            self.recycled += 1
+            self.log(f"Worker {worker_id} reached {payload} MB (budget {self.rss_budget_mb:.0f} MB), restarting it")
+            self._retire(worker_id)
+            if remaining:
+                self._spawn()
+        elif kind == "init_failed":
+            self._init_error = payload
+            self.log(f"Worker {worker_id} failed to load models: {payload}")
+            self._retire(worker_id)
+            yield from self._fail_if_no_workers(tasks, remaining)
+        elif kind == "exit":
+            self._retire(worker_id)
+
+    def _worker_died(self, worker_id, tasks, remaining) -> Iterator[Tuple[Any, Any]]:
+        """Handles a worker whose pipe closed without a final message (killed or crashed)."""
+        index = self._current[worker_id].value
+        process = self._workers[worker_id]
+        self._retire(worker_id)
+        self.crashed += 1
+        self.log(f"Worker {worker_id} exited unexpectedly (exit code {process.exitcode})")
+        if index == _LOADING:
+            # Died while loading models; a replacement would most likely die the same way
+            self._init_error = self._init_error or f"exit code {process.exitcode}"
+        elif index in remaining:
+            remaining.discard(index)
+            yield tasks[index], RuntimeError(f"Worker process died (exit code {process.exitcode})")
+        if remaining and self._init_error is None:
+            self._spawn()
+        yield from self._fail_if_no_workers(tasks, remaining)
+
+    def _fail_if_no_workers(self, tasks, remaining) -> Iterator[Tuple[Any, Any]]:
+        if self._workers or not remaining:
+            return
+        # Nothing can process the rest; fail it instead of respawning forever
+        for index in sorted(remaining):
+            yield tasks[index], RuntimeError(f"Worker initialization failed: {self._init_error}")
+        remaining.clear()
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        """Stops the workers; ``cancel_futures`` terminates them instead of letting them finish."""
+        for process in list(self._workers.values()):
+            if cancel_futures or not wait:
+                process.terminate()
+        if wait:
+            for process in list(self._workers.values()):
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+        for reader in self._connections.values():
+            reader.close()
+        self._workers.clear()
+        self._connections.clear()
+        self._current.clear()
+        if self._task_queue is not None:
+            self._task_queue.cancel_join_thread()
+            self._task_queue.close()
@@ -0,0 +1,5 @@
+-- Index the 8-character document id prefix used in markdown paths and log text
+-- so code -> filename resolution does not scan the whole documents table.
+-- This migration is idempotent and can be run multiple times safely
+
+CREATE INDEX IF NOT EXISTS idx_documents_short_id ON documents ((LEFT(id::text, 8)));
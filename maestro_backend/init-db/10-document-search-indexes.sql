@@ -0,0 +1,38 @@
+-- Indexed search, de-duplication and keyset pagination for the document library
+-- Library search previously ran unindexed LIKE '%term%' scans over documents and
+-- its JSONB metadata, and upload de-duplication filtered on metadata_->>'file_hash'.
+-- Expressions here must match database/document_search.py and the Document model.
+-- This migration is idempotent and can be run multiple times safely
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Weighted full-text search vector over title/filename, authors, journal/keywords and abstract
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple'::regconfig, coalesce(metadata_->>'title', '') || ' ' || coalesce(original_filename, '')), 'A') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(metadata_->>'authors', '')), 'B') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(metadata_->>'journal_or_source', '') || ' ' || coalesce(metadata_->>'keywords', '')), 'C') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(metadata_->>'abstract', '')), 'D')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_documents_search_vector ON documents USING gin (search_vector);
+
+-- Trigram indexes for substring (LIKE '%term%') and fuzzy (<%) matching
+CREATE INDEX IF NOT EXISTS idx_documents_title_trgm ON documents USING gin ((LOWER(metadata_->>'title')) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_documents_authors_trgm ON documents USING gin ((LOWER(metadata_->>'authors')) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_documents_journal_trgm ON documents USING gin ((LOWER(metadata_->>'journal_or_source')) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_documents_original_filename_trgm ON documents USING gin ((LOWER(original_filename)) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_documents_filename_trgm ON documents USING gin ((LOWER(filename)) gin_trgm_ops);
+
+-- Dedicated file hash column for upload de-duplication, backfilled from metadata
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS file_hash VARCHAR(64);
+
+UPDATE documents
+SET file_hash = metadata_->>'file_hash'
+WHERE file_hash IS NULL AND metadata_->>'file_hash' IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_documents_user_file_hash ON documents (user_id, file_hash);
+
+-- Keyset pagination over a user's library and over group membership
+CREATE INDEX IF NOT EXISTS idx_documents_user_created_id ON documents (user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_document_group_association_group ON document_group_association (document_group_id, document_id);
@@ -0,0 +1,15 @@
+-- Delta-encoded storage for draft and research report versions
+-- Historical versions keep a compressed diff against an earlier version instead
+-- of a full copy; see database/version_store.py. Existing rows stay as full snapshots.
+-- This migration is idempotent and can be run multiple times safely
+
+ALTER TABLE drafts ADD COLUMN IF NOT EXISTS content_delta BYTEA;
+ALTER TABLE drafts ADD COLUMN IF NOT EXISTS delta_base_version INTEGER;
+ALTER TABLE drafts ALTER COLUMN content DROP NOT NULL;
+
+ALTER TABLE research_reports ADD COLUMN IF NOT EXISTS content_delta BYTEA;
+ALTER TABLE research_reports ADD COLUMN IF NOT EXISTS delta_base_version INTEGER;
+ALTER TABLE research_reports ALTER COLUMN content DROP NOT NULL;
+
+-- Version lookups while rebuilding a delta chain
+CREATE INDEX IF NOT EXISTS idx_drafts_session_version ON drafts (writing_session_id, version);
@@ -0,0 +1,15 @@
+-- Incremental draft saves: ranged-text patches against a draft revision
+-- Patches are folded into drafts.content periodically; see database/draft_patches.py
+-- This migration is idempotent and can be run multiple times safely
+
+ALTER TABLE drafts ADD COLUMN IF NOT EXISTS revision INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE drafts ADD COLUMN IF NOT EXISTS compacted_revision INTEGER NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS draft_patches (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    draft_id UUID NOT NULL REFERENCES drafts(id) ON DELETE CASCADE,
+    revision INTEGER NOT NULL,
+    operations JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_draft_patch_revision UNIQUE (draft_id, revision)
+);
@@ -0,0 +1,28 @@
+-- Keyset pagination and regeneration lookups for chat messages and chat lists
+-- Message and chat listings paged with OFFSET, and regeneration detection compared
+-- full message bodies. Expressions here must match the Message model and database/async_crud.py.
+-- This migration is idempotent and can be run multiple times safely
+
+-- SHA-256 of the message text, maintained by the Message model
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+
+UPDATE messages
+SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+WHERE content_hash IS NULL;
+
+-- Keyset pagination over a chat's messages and over a user's chats.
+-- The cursor compares (created_at, id), so a NULL created_at would drop the row from every page
+UPDATE chats SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL;
+ALTER TABLE chats ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE chats ALTER COLUMN created_at SET NOT NULL;
+
+-- Undated messages go to the start of their chat
+UPDATE messages m SET created_at = c.created_at FROM chats c WHERE m.chat_id = c.id AND m.created_at IS NULL;
+ALTER TABLE messages ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE messages ALTER COLUMN created_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_messages_chat_created_id ON messages (chat_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_chats_user_type_created_id ON chats (user_id, chat_type, created_at DESC, id DESC);
+
+-- Regeneration detection: find an earlier user message with the same text
+CREATE INDEX IF NOT EXISTS idx_messages_chat_content_hash ON messages (chat_id, content_hash);
@@ -0,0 +1,18 @@
+-- Versioned outline snapshots for resuming a mission from a research round
+-- Resume used to scan up to 1,000 execution logs and their full_output JSON for the last outline,
+-- and to find a round's start time by matching log messages. See database/async_crud.py.
+-- This migration is idempotent and can be run multiple times safely
+
+CREATE TABLE IF NOT EXISTS mission_outline_snapshots (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    mission_id UUID NOT NULL REFERENCES missions(id) ON DELETE CASCADE,
+    round INTEGER NOT NULL,
+    phase VARCHAR NOT NULL,
+    version INTEGER NOT NULL,
+    outline JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_outline_snapshot_round_phase UNIQUE (mission_id, round, phase)
+);
+
+-- Deleting everything logged after a round started
+CREATE INDEX IF NOT EXISTS idx_mission_execution_logs_mission_timestamp ON mission_execution_logs (mission_id, timestamp);
@@ -0,0 +1,14 @@
+-- Per-mission performance traces (LLM queueing and calls, tools, retrieval, DB writes)
+-- Only LLM call durations used to be logged, which could not show where a mission's wall-clock
+-- time went. One row per run of a mission; spans are stored compactly as JSON arrays.
+-- See ai_researcher/agentic_layer/controller/utils/mission_trace.py and database/async_crud.py.
+-- This migration is idempotent and can be run multiple times safely
+
+CREATE TABLE IF NOT EXISTS mission_traces (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    mission_id UUID NOT NULL REFERENCES missions(id) ON DELETE CASCADE,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    trace JSONB NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_mission_trace_run UNIQUE (mission_id, started_at)
+);
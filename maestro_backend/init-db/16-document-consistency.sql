@@ -0,0 +1,64 @@
+-- Incremental document consistency tracking
+-- Consistency checks used to stat every document's files and count its chunks on each run.
+-- Documents now get a tracking row that a trigger marks dirty whenever their processing
+-- status, chunk count or file paths change (or the document is deleted); checks verify only
+-- dirty rows and keep per-user summary counters. See services/consistency_tracker.py.
+-- This migration is idempotent and can be run multiple times safely
+
+CREATE TABLE IF NOT EXISTS document_consistency (
+    doc_id UUID PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    status VARCHAR(50), -- processing status at the last check
+    issues JSONB NOT NULL DEFAULT '[]'::jsonb,
+    dirty BOOLEAN NOT NULL DEFAULT TRUE,
+    deleted BOOLEAN NOT NULL DEFAULT FALSE,
+    changed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    checked_at TIMESTAMP WITH TIME ZONE
+);
+
+-- The table may have been created from the model first; the trigger relies on these defaults
+ALTER TABLE document_consistency ALTER COLUMN issues SET DEFAULT '[]'::jsonb;
+ALTER TABLE document_consistency ALTER COLUMN dirty SET DEFAULT TRUE;
+ALTER TABLE document_consistency ALTER COLUMN deleted SET DEFAULT FALSE;
+
+CREATE INDEX IF NOT EXISTS idx_document_consistency_dirty ON document_consistency (changed_at) WHERE dirty;
+CREATE INDEX IF NOT EXISTS idx_document_consistency_user ON document_consistency (user_id);
+
+CREATE TABLE IF NOT EXISTS document_consistency_summary (
+    user_id INTEGER PRIMARY KEY,
+    total_documents INTEGER NOT NULL DEFAULT 0,
+    consistent_documents INTEGER NOT NULL DEFAULT 0,
+    total_issues INTEGER NOT NULL DEFAULT 0,
+    by_status JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION mark_document_consistency_dirty() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE document_consistency
+        SET dirty = TRUE, deleted = TRUE, changed_at = clock_timestamp()
+        WHERE doc_id = OLD.id;
+        RETURN OLD;
+    END IF;
+
+    IF TG_OP = 'UPDATE'
+        AND NEW.processing_status IS NOT DISTINCT FROM OLD.processing_status
+        AND NEW.chunk_count IS NOT DISTINCT FROM OLD.chunk_count
+        AND NEW.file_path IS NOT DISTINCT FROM OLD.file_path
+        AND NEW.markdown_path IS NOT DISTINCT FROM OLD.markdown_path THEN
+        RETURN NEW;
+    END IF;
+
+    INSERT INTO document_consistency (doc_id, user_id, issues, dirty, deleted, changed_at)
+    VALUES (NEW.id, NEW.user_id, '[]'::jsonb, TRUE, FALSE, clock_timestamp())
+    ON CONFLICT (doc_id) DO UPDATE
+    SET dirty = TRUE, deleted = FALSE, changed_at = EXCLUDED.changed_at;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS documents_consistency_dirty ON documents;
+CREATE TRIGGER documents_consistency_dirty
+    AFTER INSERT OR DELETE OR UPDATE OF processing_status, chunk_count, file_path, markdown_path ON documents
+    FOR EACH ROW EXECUTE FUNCTION mark_document_consistency_dirty();
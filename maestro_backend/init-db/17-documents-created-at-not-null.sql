@@ -0,0 +1,12 @@
+-- Make documents.created_at NOT NULL for keyset pagination
+-- Library listings page with a (created_at, id) cursor (see 10-document-search-indexes.sql);
+-- a row with a NULL created_at fails the cursor comparison and ends the cursor chain, so it
+-- was missing from every page. Existing NULLs are backfilled from updated_at.
+-- This migration is idempotent and can be run multiple times safely
+
+UPDATE documents
+SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP)
+WHERE created_at IS NULL;
+
+ALTER TABLE documents ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE documents ALTER COLUMN created_at SET NOT NULL;
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import logging
 import os
 from concurrent.futures import ThreadPoolExecutor
@@ -7,8 +8,9 @@ import asyncio
 
 from database.database import SessionLocal, test_connection, init_db
 from database import crud
-from api import auth, missions, system, chat, chats, documents, websockets, settings, writing, dashboard, admin, research_reports
+from api import auth, missions, system, chat, chats, documents, websockets, settings, writing, dashboard, admin, research_reports, exports
 from middleware import user_context_middleware
+from startup import StartupGraph, StartupStep
 
 # Configure reduced logging to minimize console noise
 from logging_config import setup_logging
@@ -101,112 +103,106 @@ app.include_router(writing.router, tags=["writing"])
 app.include_router(websockets.router, tags=["websockets"])
 app.include_router(admin.router)
 app.include_router(research_reports.router, tags=["research_reports"])
+app.include_router(exports.router, tags=["exports"])
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database, AI components and create first user on startup."""
-    # Only log at ERROR level or higher based on LOG_LEVEL setting
-    
-    # Store the main event loop reference for WebSocket updates from background threads
-    from ai_researcher.agentic_layer.context_manager import set_main_event_loop
-    set_main_event_loop()
+def _init_database():
+    """Checks the connection, creates tables and, for PostgreSQL, the required extensions."""
+    if not test_connection():
+        raise Exception("Database connection failed")
     
-    # Initialize database connection and tables
-    try:
-        # Test database connection
-        if not test_connection():
-            logger.error("Failed to connect to database")
-            raise Exception("Database connection failed")
-        
-        # Initialize database tables
-        init_db()
-        logger.info("Database initialized successfully")
-        
-        # For PostgreSQL, ensure required extensions are available
-        if os.getenv("DATABASE_URL", "").startswith("postgresql"):
-            from database.init_postgres import ensure_extensions
-            ensure_extensions()
-            
-    except Exception as e:
-        logger.error(f"Database initialization failed: {e}", exc_info=True)
-        # Continue anyway, as tables might already exist
-    
-    # Create a configurable thread pool
-    # Increased default from 10 to 20 to handle concurrent web fetches better
-    max_workers = int(os.getenv("MAX_WORKER_THREADS", "20"))
-    app.state.thread_pool = ThreadPoolExecutor(max_workers=max_workers)
-    logger.info(f"Initialized thread pool with {max_workers} workers")
+    # Initialize database tables
+    init_db()
+    logger.info("Database initialized successfully")
     
-    # Create first user for development if no users exist
+    # For PostgreSQL, ensure required extensions are available
+    if os.getenv("DATABASE_URL", "").startswith("postgresql"):
+        from database.init_postgres import ensure_extensions
+        ensure_extensions()
+
+
+def _ensure_first_user():
+    """Create first user for development if no users exist."""
     db = SessionLocal()
     try:
         users = crud.get_users(db)
         if not users:
             from setup_first_user import create_first_user
             create_first_user()
-    except Exception as e:
-        logger.error(f"Error during initial user check: {e}", exc_info=True)
     finally:
         db.close()
+
+
+def _remove_file(path: str):
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        logger.warning(f"Failed to remove {path}: {e}")
+
+
+def _cleanup_dangling_cli_documents():
+    """Deletes documents left in cli_processing by an interrupted CLI ingest, in bulk."""
+    from database.models import Document, DocumentChunk, DocumentProcessingJob, document_group_association
+    logger.info("Checking for dangling CLI documents...")
     
-    # Clean up dangling CLI-ingested documents
     db = SessionLocal()
     try:
-        from database.models import Document, document_group_association
-        logger.info("Checking for dangling CLI documents...")
-        
-        # Find and clean up documents with cli_processing status
-        cli_documents = db.query(Document).filter(
+        cli_documents = db.query(Document.id, Document.file_path).filter(
             Document.processing_status == "cli_processing"
         ).all()
-        
-        if cli_documents:
-            logger.info(f"Found {len(cli_documents)} dangling CLI documents, cleaning up...")
-            deleted_count = 0
-            
-            for doc in cli_documents:
-                try:
-                    # Delete associated files
-                    if doc.file_path and os.path.exists(doc.file_path):
-                        os.remove(doc.file_path)
-                    
-                    markdown_path = f"/app/data/markdown_files/{doc.id}.md"
-                    if os.path.exists(markdown_path):
-                        os.remove(markdown_path)
-                    
-                    # Remove from document groups
-                    db.execute(
-                        document_group_association.delete().where(
-                            document_group_association.c.document_id == doc.id
-                        )
-                    )
-                    
-                    # Delete document record
-                    db.delete(doc)
-                    deleted_count += 1
-                except Exception as e:
-                    logger.warning(f"Failed to clean up document {doc.id}: {e}")
-            
-            db.commit()
-            logger.info(f"Cleaned up {deleted_count} dangling CLI documents")
-        else:
+        if not cli_documents:
             logger.debug("No dangling CLI documents found")
-            
-    except Exception as e:
-        logger.error(f"Failed to run CLI document cleanup: {e}", exc_info=True)
-        # Don't fail startup if cleanup fails
+            return
+        
+        logger.info(f"Found {len(cli_documents)} dangling CLI documents, cleaning up...")
+        doc_ids = [doc.id for doc in cli_documents]
+        db.execute(
+            document_group_association.delete().where(
+                document_group_association.c.document_id.in_(doc_ids)
+            )
+        )
+        db.query(DocumentProcessingJob).filter(DocumentProcessingJob.document_id.in_(doc_ids)).delete(synchronize_session=False)
+        db.query(DocumentChunk).filter(DocumentChunk.doc_id.in_(doc_ids)).delete(synchronize_session=False)
+        db.query(Document).filter(Document.id.in_(doc_ids)).delete(synchronize_session=False)
+        db.commit()
     finally:
         db.close()
     
-    # Initialize AI research components
-    try:
-        from api.missions import initialize_ai_components
-        success = await initialize_ai_components()
-        if not success:
-            logger.error("Failed to initialize AI research components")
-    except Exception as e:
-        logger.error(f"Error during AI component initialization: {e}", exc_info=True)
-    
+    # Delete associated files once the records are gone
+    paths = [doc.file_path for doc in cli_documents if doc.file_path]
+    paths += [f"/app/data/markdown_files/{doc.id}.md" for doc in cli_documents]
+    list(app.state.thread_pool.map(_remove_file, paths))
+    logger.info(f"Cleaned up {len(cli_documents)} dangling CLI documents")
+
+
+async def _initialize_ai_components():
+    from api.missions import initialize_ai_components
+    return await initialize_ai_components()
+
+
+async def _start_consistency_tracker():
+    from services.consistency_tracker import consistency_tracker
+    consistency_tracker.start()
+
+
+def _build_startup_graph() -> StartupGraph:
+    return StartupGraph([
+        StartupStep("database", lambda: asyncio.to_thread(_init_database)),
+        StartupStep("first_user", lambda: asyncio.to_thread(_ensure_first_user), depends_on=("database",)),
+        StartupStep("ai_components", _initialize_ai_components, depends_on=("database",)),
+        # Housekeeping waits for warm-up so it does not compete with it
+        StartupStep(
+            "cli_document_cleanup", lambda: asyncio.to_thread(_cleanup_dangling_cli_documents),
+            depends_on=("database", "ai_components"), required=False
+        ),
+        StartupStep(
+            "consistency_tracker", _start_consistency_tracker,
+            depends_on=("database", "ai_components"), required=False
+        ),
+    ])
+
+
+def _print_startup_banner():
     # Print startup completion message directly to stdout (visible at any log level)
     # Get the external accessible port from environment (what nginx exposes)
     maestro_port = os.getenv("MAESTRO_PORT", "80")
@@ -226,6 +222,39 @@ async def startup_event():
     print("Ready to handle requests")
     print("="*60 + "\n", flush=True)
 
+
+async def _announce_when_ready(startup: StartupGraph):
+    await startup.wait()
+    if startup.is_ready():
+        _print_startup_banner()
+    else:
+        logger.error(f"MAESTRO backend started with failed subsystems: {startup.report()}")
+
+
+@app.on_event("startup")
+async def startup_event():
+    """
+    Starts the startup graph. Only the database step is awaited before the server
+    accepts connections; the first user, AI components and housekeeping follow in
+    the background and are reported by /health/ready.
+    """
+    # Store the main event loop reference for WebSocket updates from background threads
+    from ai_researcher.agentic_layer.context_manager import set_main_event_loop
+    set_main_event_loop()
+    
+    # Create a configurable thread pool
+    # Increased default from 10 to 20 to handle concurrent web fetches better
+    max_workers = int(os.getenv("MAX_WORKER_THREADS", "20"))
+    app.state.thread_pool = ThreadPoolExecutor(max_workers=max_workers)
+    logger.info(f"Initialized thread pool with {max_workers} workers")
+    
+    startup = _build_startup_graph()
+    app.state.startup = startup
+    startup.start()
+    # Continue even if the database step fails, as tables might already exist
+    await startup.wait(["database"])
+    app.state.startup_announcer = asyncio.create_task(_announce_when_ready(startup))
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources on shutdown."""
@@ -233,6 +262,18 @@ async def shutdown_event():
     if hasattr(app.state, "thread_pool"):
         app.state.thread_pool.shutdown(wait=True)
     
+    from services.export_service import shutdown_export_pool
+    shutdown_export_pool()
+    
+    from services.consistency_tracker import consistency_tracker
+    consistency_tracker.stop()
+    
+    try:
+        from ai_researcher.agentic_layer.tools.arxiv_fetcher_tool import close_arxiv_client
+        await close_arxiv_client()
+    except Exception:
+        pass
+    
     # No need to stop monitoring since we only run once at startup
     pass
 
@@ -247,3 +288,17 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/health/live")
+def liveness_check():
+    """The process is up and serving requests (subsystems may still be warming up)."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness_check():
+    """Ready once every required startup step has finished; reports each subsystem's state."""
+    startup = getattr(app.state, "startup", None)
+    if startup is None:
+        return JSONResponse(status_code=503, content={"status": "starting", "subsystems": {}})
+    report = startup.report()
+    return JSONResponse(status_code=200 if report["status"] == "ready" else 503, content=report)
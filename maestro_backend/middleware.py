@@ -1,12 +1,9 @@
-from fastapi import Request, Depends
-from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
 import logging
 
-from database.database import get_db
-from database import crud
 from auth import security
+from auth.user_cache import get_user_snapshot
 from ai_researcher.user_context import set_current_user
 
 logger = logging.getLogger(__name__)
@@ -31,16 +28,12 @@ async def user_context_middleware(request: Request, call_next):
         if token:
             username = security.verify_token(token)
             if username:
-                # Get database session
-                db = next(get_db())
-                try:
-                    user = crud.get_user_by_username(db, username=username)
-                    if user:
-                        # Set user in context for dynamic config access
-                        set_current_user(user)
-                        logger.debug(f"Set current user context: {username}")
-                finally:
-                    db.close()
+                # Resolve off the event loop; usually served from the user cache
+                user = await run_in_threadpool(get_user_snapshot, username)
+                if user:
+                    # Set user in context for dynamic config access
+                    set_current_user(user)
+                    logger.debug(f"Set current user context: {username}")
     except Exception as e:
         logger.debug(f"Error setting user context in middleware: {e}")
         # Don't fail the request if context setting fails
@@ -0,0 +1,310 @@
+"""
+Incremental document consistency tracking.
+
+Consistency checks used to walk every document on each run, statting its files
+on disk and counting its chunks with one query (and session) per document, and
+recomputed the per-user summaries from scratch, so a large library made every
+check slow and I/O heavy. Consistency is now tracked incrementally:
+
+- a trigger on ``documents`` (init-db/16-document-consistency.sql) records
+  every state transition of the processing pipeline (status, chunk count, file
+  paths, deletion) by marking the document's ``document_consistency`` row dirty,
+- ``check_changed`` verifies only dirty documents, in batches, and adjusts the
+  per-user counters in ``document_consistency_summary`` by the difference
+  between the old and new result, so summaries are read rather than recomputed,
+- a full sweep (``DOCUMENT_CONSISTENCY_FULL_SWEEP_HOURS``) re-verifies every
+  document in id order, one batch at a time with a pause in between; its cursor
+  is saved after each batch, so a restart resumes it instead of starting over,
+- the background loop (``DOCUMENT_CONSISTENCY_CHECK_INTERVAL_MINUTES``) runs
+  the incremental check and, when due, the sweep. It only records results;
+  cleanup stays with the explicit consistency endpoints.
+
+Dirty rows are claimed with ``FOR UPDATE SKIP LOCKED``, so several workers can
+run checks at once, and a transition recorded while a row is being checked
+waits for the check to commit and marks the row dirty again.
+"""
+import asyncio
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from database.models import (
+    Document, DocumentChunk, DocumentConsistency, DocumentConsistencySummary, SystemSetting
+)
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the background loop (checks then only run from the consistency endpoints)
+DOCUMENT_CONSISTENCY_CHECK_INTERVAL_MINUTES = float(os.getenv("DOCUMENT_CONSISTENCY_CHECK_INTERVAL_MINUTES", "15"))
+DOCUMENT_CONSISTENCY_FULL_SWEEP_HOURS = float(os.getenv("DOCUMENT_CONSISTENCY_FULL_SWEEP_HOURS", "168"))
+DOCUMENT_CONSISTENCY_BATCH_SIZE = int(os.getenv("DOCUMENT_CONSISTENCY_BATCH_SIZE", "200"))
+# Pause between full-sweep batches
+DOCUMENT_CONSISTENCY_SWEEP_DELAY_SECONDS = float(os.getenv("DOCUMENT_CONSISTENCY_SWEEP_DELAY_SECONDS", "2"))
+
+CHECKPOINT_KEY = "document_consistency_checkpoint"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ConsistencyTracker:
+    def __init__(self, checker=None):
+        self._checker = checker
+        self._loop_task: Optional[asyncio.Task] = None
+        self._sweep_task: Optional[asyncio.Task] = None
+
+    @property
+    def checker(self):
+        if self._checker is None:
+            from services.simple_consistency_checker import simple_checker
+            self._checker = simple_checker
+        return self._checker
+
+    # --- Checkpoint ---
+
+    def get_checkpoint(self, db: Session) -> Dict[str, Any]:
+        setting = db.query(SystemSetting).filter(SystemSetting.key == CHECKPOINT_KEY).first()
+        return dict(setting.value or {}) if setting else {}
+
+    def _save_checkpoint(self, db: Session, updates: Dict[str, Any]):
+        setting = db.query(SystemSetting).filter(SystemSetting.key == CHECKPOINT_KEY).with_for_update().first()
+        if setting is None:
+            setting = SystemSetting(key=CHECKPOINT_KEY, value={})
+            db.add(setting)
+        setting.value = {**(setting.value or {}), **updates}
+
+    def sweep_due(self, db: Session) -> bool:
+        checkpoint = self.get_checkpoint(db)
+        if checkpoint.get("sweep_requested") or checkpoint.get("sweep_cursor"):
+            return True
+        finished = checkpoint.get("last_sweep_finished_at")
+        if not finished:
+            return True
+        return _now() - datetime.fromisoformat(finished) >= timedelta(hours=DOCUMENT_CONSISTENCY_FULL_SWEEP_HOURS)
+
+    def request_full_sweep(self, db: Session):
+        self._save_checkpoint(db, {"sweep_requested": True})
+        db.commit()
+
+    # --- Checking ---
+
+    def _check_claimed(self, db: Session, rows: List[DocumentConsistency]) -> int:
+        """Re-checks locked tracking rows and applies the counter deltas; commits."""
+        if not rows:
+            return 0
+        docs = {
+            str(doc.id): doc for doc in db.query(
+                Document.id, Document.user_id, Document.processing_status, Document.file_path
+            ).filter(Document.id.in_([row.doc_id for row in rows]))
+        }
+        live = [docs[str(row.doc_id)] for row in rows if not row.deleted and str(row.doc_id) in docs]
+        results = self.checker.check_documents(db, live)
+
+        deltas: Dict[int, Dict[str, Any]] = {}
+
+        def delta(user_id: int) -> Dict[str, Any]:
+            return deltas.setdefault(user_id, {"total": 0, "consistent": 0, "issues": 0, "by_status": Counter()})
+
+        checked_at = _now()
+        for row in rows:
+            if row.checked_at is not None:
+                d = delta(row.user_id)
+                d["total"] -= 1
+                d["consistent"] -= 0 if row.issues else 1
+                d["issues"] -= len(row.issues or [])
+                d["by_status"][row.status] -= 1
+            doc = docs.get(str(row.doc_id))
+            if row.deleted or doc is None:
+                db.delete(row)
+                continue
+            status, issues = doc.processing_status, results.get(str(row.doc_id), [])
+            d = delta(doc.user_id)
+            d["total"] += 1
+            d["consistent"] += 0 if issues else 1
+            d["issues"] += len(issues)
+            d["by_status"][status] += 1
+            row.user_id = doc.user_id
+            row.status = status
+            row.issues = issues
+            row.checked_at = checked_at
+            row.dirty = False
+
+        if deltas:
+            db.execute(
+                pg_insert(DocumentConsistencySummary)
+                .values([{"user_id": user_id} for user_id in deltas])
+                .on_conflict_do_nothing(index_elements=["user_id"])
+            )
+            summaries = db.query(DocumentConsistencySummary).filter(
+                DocumentConsistencySummary.user_id.in_(list(deltas))
+            ).with_for_update().all()
+            for summary in summaries:
+                d = deltas[summary.user_id]
+                summary.total_documents += d["total"]
+                summary.consistent_documents += d["consistent"]
+                summary.total_issues += d["issues"]
+                by_status = Counter(summary.by_status or {})
+                by_status.update(d["by_status"])
+                summary.by_status = {status: count for status, count in by_status.items() if count > 0}
+        db.commit()
+        return len(rows)
+
+    def check_changed(self, db: Session, user_id: Optional[int] = None, max_batches: Optional[int] = None) -> int:
+        """
+        Verifies documents changed since they were last checked. With ``user_id``,
+        that user's documents that were never checked are included as well.
+        Returns the number of documents processed.
+        """
+        if user_id is not None:
+            db.execute(
+                pg_insert(DocumentConsistency)
+                .from_select(
+                    ["doc_id", "user_id"],
+                    select(Document.id, Document.user_id)
+                    .outerjoin(DocumentConsistency, DocumentConsistency.doc_id == Document.id)
+                    .where(Document.user_id == user_id, DocumentConsistency.doc_id.is_(None))
+                )
+                .on_conflict_do_nothing(index_elements=["doc_id"])
+            )
+            db.commit()
+
+        processed = batches = 0
+        while max_batches is None or batches < max_batches:
+            query = db.query(DocumentConsistency).filter(DocumentConsistency.dirty.is_(True))
+            if user_id is not None:
+                query = query.filter(DocumentConsistency.user_id == user_id)
+            rows = query.order_by(DocumentConsistency.changed_at).limit(
+                DOCUMENT_CONSISTENCY_BATCH_SIZE
+            ).with_for_update(skip_locked=True).all()
+            if not rows:
+                break
+            processed += self._check_claimed(db, rows)
+            batches += 1
+        if processed:
+            logger.info(f"Consistency: re-checked {processed} changed documents")
+        if user_id is None:
+            self._save_checkpoint(db, {"last_incremental_at": _now().isoformat()})
+            db.commit()
+        return processed
+
+    def sweep_step(self, db: Session) -> bool:
+        """Checks the next batch of the full sweep. Returns True when the sweep is finished."""
+        checkpoint = self.get_checkpoint(db)
+        cursor = checkpoint.get("sweep_cursor")
+        if not cursor:
+            self._save_checkpoint(db, {"sweep_started_at": _now().isoformat(), "sweep_requested": False})
+
+        query = db.query(Document.id, Document.user_id).order_by(Document.id)
+        if cursor:
+            query = query.filter(Document.id > cursor)
+        batch = query.limit(DOCUMENT_CONSISTENCY_BATCH_SIZE).all()
+
+        if batch:
+            db.execute(
+                pg_insert(DocumentConsistency)
+                .values([{"doc_id": doc.id, "user_id": doc.user_id} for doc in batch])
+                .on_conflict_do_nothing(index_elements=["doc_id"])
+            )
+            rows = db.query(DocumentConsistency).filter(
+                DocumentConsistency.doc_id.in_([doc.id for doc in batch])
+            ).with_for_update().all()
+            self._check_claimed(db, rows)
+            self._save_checkpoint(db, {"sweep_cursor": str(batch[-1].id)})
+            db.commit()
+            if len(batch) == DOCUMENT_CONSISTENCY_BATCH_SIZE:
+                return False
+
+        # Tracking rows of documents deleted without the trigger (e.g. before it existed)
+        db.query(DocumentConsistency).filter(
+            DocumentConsistency.deleted.is_(False),
+            ~select(Document.id).where(Document.id == DocumentConsistency.doc_id).exists()
+        ).update({"dirty": True, "deleted": True}, synchronize_session=False)
+        orphaned_chunks = db.query(func.count(DocumentChunk.id)).filter(
+            ~select(Document.id).where(Document.id == DocumentChunk.doc_id).exists()
+        ).scalar() or 0
+        if orphaned_chunks:
+            logger.warning(f"Found {orphaned_chunks} orphaned chunks in PostgreSQL without matching document")
+        self._save_checkpoint(db, {
+            "sweep_cursor": None,
+            "last_sweep_finished_at": _now().isoformat(),
+            "orphaned_chunks": orphaned_chunks,
+        })
+        db.commit()
+        logger.info("Consistency: full sweep finished")
+        return True
+
+    # --- Background work ---
+
+    def _in_session(self, fn, *args, **kwargs):
+        from database.database import SessionLocal
+        db = SessionLocal()
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    async def run_full_sweep(self):
+        """Runs (or resumes) the full sweep batch by batch, pausing between batches."""
+        while not await asyncio.to_thread(self._in_session, self.sweep_step):
+            await asyncio.sleep(DOCUMENT_CONSISTENCY_SWEEP_DELAY_SECONDS)
+
+    def start_full_sweep(self) -> bool:
+        """Starts the full sweep in the background unless one is already running."""
+        if self._sweep_task is not None and not self._sweep_task.done():
+            return False
+        self._sweep_task = asyncio.create_task(self.run_full_sweep(), name="document_consistency_sweep")
+        return True
+
+    async def _run_loop(self):
+        interval = DOCUMENT_CONSISTENCY_CHECK_INTERVAL_MINUTES * 60
+        while True:
+            try:
+                await asyncio.to_thread(self._in_session, self.check_changed)
+                if await asyncio.to_thread(self._in_session, self.sweep_due):
+                    self.start_full_sweep()
+                    await self._sweep_task
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in document consistency tracking: {e}", exc_info=True)
+            await asyncio.sleep(interval)
+
+    def start(self) -> bool:
+        if DOCUMENT_CONSISTENCY_CHECK_INTERVAL_MINUTES <= 0:
+            logger.info("Background document consistency tracking is disabled")
+            return False
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._run_loop(), name="document_consistency_tracker")
+        return True
+
+    def stop(self):
+        for task in (self._loop_task, self._sweep_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self._loop_task = self._sweep_task = None
+
+    def get_status(self, db: Session) -> Dict[str, Any]:
+        checkpoint = self.get_checkpoint(db)
+        return {
+            "background_enabled": DOCUMENT_CONSISTENCY_CHECK_INTERVAL_MINUTES > 0,
+            "sweep_in_progress": bool(checkpoint.get("sweep_cursor")) or (
+                self._sweep_task is not None and not self._sweep_task.done()
+            ),
+            "sweep_started_at": checkpoint.get("sweep_started_at"),
+            "last_sweep_finished_at": checkpoint.get("last_sweep_finished_at"),
+            "last_incremental_at": checkpoint.get("last_incremental_at"),
+            "pending_documents": db.query(func.count(DocumentConsistency.doc_id)).filter(
+                DocumentConsistency.dirty.is_(True)
+            ).scalar() or 0,
+        }
+
+
+# Global instance
+consistency_tracker = ConsistencyTracker()
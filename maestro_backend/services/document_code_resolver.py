@@ -0,0 +1,236 @@
+"""
+Batched, cached resolution of document codes to human-readable filenames.
+
+Execution logs, notes and tool calls reference documents by full UUID, chunk
+ID (``<uuid>_<n>``), markdown path (``/markdown/<8 hex>.md``) or bare 8-char
+prefix. Rendering a page of logs used to run three regex passes and one DB
+query per string. The resolver instead:
+
+- scans any number of strings with a single compiled alternation regex,
+- resolves every unseen code with one query per page (full UUIDs hit the
+  primary key, short codes hit the ``LEFT(id::text, 8)`` expression index
+  from ``init-db/09-document-short-id-index.sql``),
+- keeps a process-wide LRU of code -> filename, with short-lived negative
+  entries so unknown hex strings are not re-queried on every poll.
+
+Found entries are never invalidated: document ids are UUIDs and a document's
+filename is not changed after upload, so a cached mapping cannot go stale.
+A deleted document keeps resolving to its old name until the LRU evicts it,
+which is what older logs that mention it should show. Only misses expire
+(``DOCUMENT_CODE_NEGATIVE_TTL_SECONDS``), so a newly uploaded document is
+picked up without any invalidation.
+"""
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_CODE_CACHE_SIZE = int(os.getenv("DOCUMENT_CODE_CACHE_SIZE", "20000"))
+DOCUMENT_CODE_NEGATIVE_TTL_SECONDS = float(os.getenv("DOCUMENT_CODE_NEGATIVE_TTL_SECONDS", "60"))
+
+_HEX = "[a-f0-9]"
+_UUID = rf"{_HEX}{{8}}-{_HEX}{{4}}-{_HEX}{{4}}-{_HEX}{{4}}-{_HEX}{{12}}"
+
+# One pass finds every kind of reference; the named group tells them apart.
+DOCUMENT_CODE_PATTERN = re.compile(
+    rf"(?P<path>(?:/processed)?/markdown/(?P<path_code>{_HEX}{{8}})\.md)"
+    rf"|(?P<uuid>\b(?P<uuid_code>{_UUID})(?:_\d+|\b))"
+    rf"|(?P<short>\b(?P<short_code>{_HEX}{{8}})\b(?!-{_HEX}))",
+    re.IGNORECASE,
+)
+
+_MISSING = object()
+
+
+def _display_name(filename: str) -> str:
+    # Remove .pdf extension if present for cleaner display
+    return filename[:-4] if filename.endswith(".pdf") else filename
+
+
+def _short_code_in_document_context(code: str, text_value: str) -> bool:
+    # Bare 8-char hex strings are common; only treat them as document codes when
+    # the same text also uses them like a document reference.
+    return f"{code}.md" in text_value or f"/{code}" in text_value or f"{code}_" in text_value
+
+
+class DocumentCodeResolver:
+    """Process-wide LRU-backed resolver of document codes to filenames."""
+
+    def __init__(self, max_size: int = DOCUMENT_CODE_CACHE_SIZE,
+                 negative_ttl_seconds: float = DOCUMENT_CODE_NEGATIVE_TTL_SECONDS):
+        self.max_size = max_size
+        self.negative_ttl_seconds = negative_ttl_seconds
+        # code (lowercase full UUID or 8-char prefix) -> filename, or expiry time for misses
+        self._cache: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- Extraction -------------------------------------------------------
+
+    def extract_codes(self, text_value: str) -> List[str]:
+        """Return the distinct document codes referenced in ``text_value``."""
+        return list(self._extract(text_value))
+
+    def _extract(self, text_value: str) -> Set[str]:
+        codes: Set[str] = set()
+        if not text_value:
+            return codes
+        for match in DOCUMENT_CODE_PATTERN.finditer(text_value):
+            if match.group("path_code"):
+                codes.add(match.group("path_code"))
+            elif match.group("uuid_code"):
+                codes.add(match.group("uuid_code"))
+            else:
+                code = match.group("short_code")
+                if _short_code_in_document_context(code, text_value):
+                    codes.add(code)
+        return codes
+
+    # --- Cache ------------------------------------------------------------
+
+    def _lookup(self, code: str):
+        """Return the cached filename, None for a known miss, or _MISSING."""
+        key = code.lower()
+        with self._lock:
+            value = self._cache.get(key, _MISSING)
+            if value is _MISSING:
+                return _MISSING
+            if isinstance(value, float):
+                if value < time.monotonic():
+                    del self._cache[key]
+                    return _MISSING
+                return None
+            self._cache.move_to_end(key)
+            return value
+
+    def _store(self, found: Dict[str, str], missing: Iterable[str]) -> None:
+        expires_at = time.monotonic() + self.negative_ttl_seconds
+        with self._lock:
+            for code, filename in found.items():
+                self._cache[code.lower()] = filename
+                self._cache.move_to_end(code.lower())
+            if self.negative_ttl_seconds > 0:
+                for code in missing:
+                    self._cache[code.lower()] = expires_at
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    # --- Resolution -------------------------------------------------------
+
+    async def resolve(self, codes: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Resolve codes to filenames, querying the database once for all cache misses.
+        Unknown codes map to None.
+        """
+        codes = list(codes)
+        result: Dict[str, Optional[str]] = {}
+        unresolved: Set[str] = set()
+        for code in codes:
+            cached = self._lookup(code)
+            if cached is _MISSING:
+                unresolved.add(code.lower())
+            else:
+                result[code] = cached
+
+        if unresolved:
+            try:
+                found = await asyncio.to_thread(self._query_filenames, unresolved)
+            except Exception as e:
+                logger.error(f"Error mapping document codes to filenames: {e}")
+                found = None
+            if found is not None:
+                self._store(found, unresolved - set(found))
+            else:
+                found = {}
+            for code in codes:
+                if code not in result:
+                    result[code] = found.get(code.lower())
+        return result
+
+    @staticmethod
+    def _query_filenames(codes: Set[str]) -> Dict[str, str]:
+        """Blocking lookup of full UUIDs and 8-char prefixes in one round-trip."""
+        from database.database import SessionLocal
+
+        full_uuids = [code for code in codes if len(code) == 36]
+        short_codes = [code for code in codes if len(code) == 8]
+        if not full_uuids and not short_codes:
+            return {}
+
+        found: Dict[str, str] = {}
+        db = SessionLocal()
+        try:
+            # Both predicates are index-backed: the primary key and the
+            # LEFT(id::text, 8) expression index.
+            query = text("""
+                SELECT id::text AS doc_id, LEFT(id::text, 8) AS short_id, filename
+                FROM documents
+                WHERE id = ANY(CAST(:uuids AS uuid[]))
+                UNION ALL
+                SELECT id::text AS doc_id, LEFT(id::text, 8) AS short_id, filename
+                FROM documents
+                WHERE LEFT(id::text, 8) = ANY(:codes)
+            """)
+            rows = db.execute(query, {"uuids": full_uuids, "codes": short_codes})
+            for row in rows:
+                # Map both the short code and full UUID to filename
+                found[row.doc_id] = row.filename
+                found[row.short_id] = row.filename
+        finally:
+            db.close()
+        logger.debug(f"Resolved {len(found)} document codes from database")
+        return found
+
+    async def mapping_with_fallback(self, codes: List[str]) -> Dict[str, str]:
+        """Resolve codes, using the code itself for anything not found (legacy contract)."""
+        resolved = await self.resolve(codes)
+        return {code: (resolved.get(code) or code) for code in codes}
+
+    async def prefetch(self, texts: Iterable[Optional[str]]) -> None:
+        """Warm the cache for every code in ``texts`` with at most one query."""
+        codes: Set[str] = set()
+        for text_value in texts:
+            if isinstance(text_value, str):
+                codes |= self._extract(text_value)
+        if codes:
+            await self.resolve(codes)
+
+    # --- Replacement ------------------------------------------------------
+
+    def replace_cached(self, text_value: str) -> str:
+        """
+        Replace document codes in ``text_value`` using only cached mappings.
+        Call ``prefetch`` for the page first; codes not in the cache are left as-is.
+        """
+        if not text_value:
+            return text_value
+
+        def substitute(match: "re.Match") -> str:
+            code = match.group("path_code") or match.group("uuid_code") or match.group("short_code")
+            if match.group("short_code") and not _short_code_in_document_context(code, text_value):
+                return match.group(0)
+            filename = self._lookup(code)
+            if filename is _MISSING or not filename:
+                return match.group(0)
+            return _display_name(filename)
+
+        return DOCUMENT_CODE_PATTERN.sub(substitute, text_value)
+
+    async def replace_in_texts(self, texts: List[Optional[str]]) -> List[Optional[str]]:
+        """Replace document codes in many strings with a single resolution pass."""
+        await self.prefetch(texts)
+        return [self.replace_cached(t) if isinstance(t, str) else t for t in texts]
+
+
+document_code_resolver = DocumentCodeResolver()
@@ -12,12 +12,13 @@ Much simpler and more reliable than the previous multi-database approach.
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from database.database import get_db
 from services.document_service_v2 import UnifiedDocumentService
+from services.consistency_tracker import consistency_tracker
 
 logger = logging.getLogger(__name__)
 
@@ -68,11 +69,15 @@ class SimplifiedConsistencyMonitor:
         Much simpler than before - just check flags.
         """
         logger.info("Starting periodic consistency check")
+        previous_check = self.last_check
         self.last_check = datetime.utcnow()
         
         db = next(get_db())
         try:
-            issues = await self._check_all_documents(db)
+            # Re-verify documents whose state changed since they were last checked
+            await asyncio.to_thread(consistency_tracker.check_changed, db)
+            
+            issues = await self._check_all_documents(db, since=previous_check)
             
             if issues['total_issues'] > 0:
                 logger.warning(f"Found {issues['total_issues']} consistency issues")
@@ -85,9 +90,14 @@ class SimplifiedConsistencyMonitor:
         finally:
             db.close()
     
-    async def _check_all_documents(self, db: Session) -> Dict[str, Any]:
+    async def _check_all_documents(self, db: Session, since: Optional[datetime] = None) -> Dict[str, Any]:
         """
         Check all documents for consistency issues.
+        With ``since`` (the previous check), the incomplete-completed check only
+        looks at documents that changed or aged past their grace period since
+        then; everything older was already logged by an earlier check. Stuck and
+        failed documents are always selected in full, since they are acted on
+        and a failed cleanup must be retried on the next check.
         Returns detailed issue report.
         """
         
@@ -127,6 +137,7 @@ class SimplifiedConsistencyMonitor:
             FROM documents
             WHERE processing_status = 'completed'
             AND created_at < :grace_period
+            AND (created_at >= :window_start OR updated_at >= :window_start)
             AND (
                 has_ai_metadata = FALSE OR
                 has_vector_embeddings = FALSE OR
@@ -136,7 +147,10 @@ class SimplifiedConsistencyMonitor:
         
         # Give 30 minutes grace period for recent documents
         grace_period = datetime.utcnow() - timedelta(minutes=30)
-        incomplete_docs = db.execute(incomplete_query, {'grace_period': grace_period})
+        incomplete_docs = db.execute(incomplete_query, {
+            'grace_period': grace_period,
+            'window_start': since - timedelta(minutes=30) if since else datetime.min
+        })
         
         for doc in incomplete_docs:
             missing = []
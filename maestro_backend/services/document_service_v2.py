@@ -18,6 +18,7 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy import text, and_, or_
 
+from database import document_search
 from services.document_saga import DocumentSagaBuilder, ProcessingStage
 from ai_researcher.core_rag.pgvector_store import PGVectorStore as VectorStoreManager
 
@@ -53,11 +54,16 @@ class UnifiedDocumentService:
         status_filter: Optional[str] = None,
         group_id: Optional[str] = None,
         limit: int = 20,
-        offset: int = 0
-    ) -> Tuple[List[Dict], int]:
+        offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], int, Optional[str]]:
         """
         Get documents with full metadata from unified database.
         Fast queries without touching vector store.
+        
+        Pass ``cursor`` (the ``next_cursor`` of the previous page) for keyset
+        pagination; ``offset`` is ignored when a cursor is given. Returns
+        ``(documents, total_count, next_cursor)``.
         """
         
         # Build base query - using actual column names from the database
@@ -86,28 +92,16 @@ class UnifiedDocumentService:
         
         params = {'user_id': user_id}
         
-        # Add filters using JSONB operators
+        # Add filters; these match the indexed expressions in init-db/10-document-search-indexes.sql
         if search:
-            search_condition = """
-                AND (
-                    LOWER(d.metadata_->>'title') LIKE :search OR
-                    LOWER(d.original_filename) LIKE :search OR
-                    LOWER(d.filename) LIKE :search OR
-                    LOWER(d.metadata_->>'authors')::text LIKE :search OR
-                    LOWER(d.metadata_->>'abstract') LIKE :search OR
-                    LOWER(d.metadata_->>'keywords')::text LIKE :search OR
-                    LOWER(d.metadata_->>'journal_or_source') LIKE :search
-                )
-            """
-            query += search_condition
-            count_query += search_condition
-            params['search'] = f"%{search.lower()}%"
+            query += document_search.SEARCH_CONDITION
+            count_query += document_search.SEARCH_CONDITION
+            params.update(document_search.search_params(search))
         
         if author:
-            author_condition = " AND LOWER(d.metadata_->>'authors') LIKE :author"
-            query += author_condition
-            count_query += author_condition
-            params['author'] = f"%{author.lower()}%"
+            query += document_search.AUTHOR_CONDITION
+            count_query += document_search.AUTHOR_CONDITION
+            params.update(document_search.author_params(author))
         
         if year:
             year_condition = " AND (d.metadata_->>'publication_year')::int = :year"
@@ -116,10 +110,9 @@ class UnifiedDocumentService:
             params['year'] = year
         
         if journal:
-            journal_condition = " AND LOWER(d.metadata_->>'journal_or_source') LIKE :journal"
-            query += journal_condition
-            count_query += journal_condition
-            params['journal'] = f"%{journal.lower()}%"
+            query += document_search.JOURNAL_CONDITION
+            count_query += document_search.JOURNAL_CONDITION
+            params['journal'] = document_search.like_pattern(journal)
         
         if status_filter:
             status_condition = " AND d.processing_status = :status"
@@ -137,16 +130,29 @@ class UnifiedDocumentService:
             count_query = count_query.replace("FROM documents d", f"FROM documents d {group_join}")
             params['group_id'] = group_id
         
-        # Add ordering and pagination
-        query += " ORDER BY d.created_at DESC LIMIT :limit OFFSET :offset"
+        count_params = dict(params)
+        
+        # Add ordering and pagination; a cursor seeks straight to the next page
+        # instead of making the database walk and discard OFFSET rows
+        if cursor:
+            cursor_created_at, cursor_id = document_search.decode_cursor(cursor)
+            query += document_search.CURSOR_CONDITION
+            params['cursor_created_at'] = cursor_created_at
+            params['cursor_id'] = cursor_id
+            offset = 0
+        query += document_search.KEYSET_ORDER_BY + " LIMIT :limit OFFSET :offset"
         params['limit'] = limit
         params['offset'] = offset
         
         # Execute queries
-        result = self.db.execute(text(query), params)
+        rows = self.db.execute(text(query), params).fetchall()
         documents = []
         
-        for row in result:
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = document_search.encode_cursor(rows[-1].created_at, rows[-1].id)
+        
+        for row in rows:
             # Extract metadata from JSONB field
             metadata = row.metadata_ or {}
             
@@ -188,10 +194,10 @@ class UnifiedDocumentService:
             documents.append(doc)
         
         # Get total count
-        count_result = self.db.execute(text(count_query), {k: v for k, v in params.items() if k not in ['limit', 'offset']})
+        count_result = self.db.execute(text(count_query), count_params)
         total_count = count_result.scalar()
         
-        return documents, total_count
+        return documents, total_count, next_cursor
     
     def semantic_search(
         self,
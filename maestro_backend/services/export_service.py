@@ -0,0 +1,221 @@
+"""
+Markdown export pipeline for writing drafts and research reports.
+
+Exports used to run pandoc synchronously inside the request handler, writing
+through a temporary file and reading it back into memory, which blocked the
+event loop for the whole conversion. Here:
+
+- conversions run on a small dedicated thread pool (``EXPORT_MAX_WORKERS``),
+  so large documents never block the event loop and concurrent exports are
+  bounded,
+- the rendered file is written straight into an on-disk cache keyed by
+  (content hash, format, reference document) and streamed from there, so
+  re-exporting an unchanged draft or report is instant,
+- identical exports that are already running share one conversion,
+- ``submit_export`` returns an ``ExportJob`` that can be polled by id; the
+  blocking ``render_export`` is a convenience for the legacy download routes.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+EXPORT_MAX_WORKERS = int(os.getenv("EXPORT_MAX_WORKERS", "2"))
+EXPORT_CACHE_DIR = Path(os.getenv("EXPORT_CACHE_DIR", "data/export_cache"))
+EXPORT_CACHE_MAX_FILES = int(os.getenv("EXPORT_CACHE_MAX_FILES", "500"))
+# How long finished job records stay queryable
+EXPORT_JOB_TTL_SECONDS = int(os.getenv("EXPORT_JOB_TTL_SECONDS", "3600"))
+
+REFERENCE_DOCX = "/app/reference.docx"
+
+EXPORT_FORMATS = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+
+
+class UnsupportedExportFormat(ValueError):
+    """Raised for an export format not listed in ``EXPORT_FORMATS``."""
+
+
+@dataclass
+class ExportJob:
+    id: str
+    user_id: int
+    format: str
+    filename: str
+    cache_key: str
+    status: str = "queued"  # queued, running, completed, failed
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def media_type(self) -> str:
+        return EXPORT_FORMATS[self.format]
+
+    @property
+    def path(self) -> Path:
+        return _cache_path(self.cache_key, self.format)
+
+    @property
+    def download_name(self) -> str:
+        return f"{self.filename}.{self.format}"
+
+
+_executor = ThreadPoolExecutor(max_workers=EXPORT_MAX_WORKERS, thread_name_prefix="export")
+_jobs: Dict[str, ExportJob] = {}
+_jobs_lock = threading.Lock()
+# cache_key -> asyncio future of the running conversion
+_in_flight: Dict[str, asyncio.Future] = {}
+
+
+def _reference_fingerprint(fmt: str) -> str:
+    """Identify the reference document so replacing it invalidates cached exports."""
+    if fmt != "docx" or not os.path.exists(REFERENCE_DOCX):
+        return "none"
+    stat = os.stat(REFERENCE_DOCX)
+    return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def export_cache_key(markdown_content: str, fmt: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(markdown_content.encode("utf-8"))
+    digest.update(f"\0{fmt}\0{_reference_fingerprint(fmt)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _cache_path(cache_key: str, fmt: str) -> Path:
+    return EXPORT_CACHE_DIR / f"{cache_key}.{fmt}"
+
+
+def _convert(markdown_content: str, fmt: str, output_path: Path) -> None:
+    """Render ``markdown_content`` to ``output_path`` (runs on the export pool)."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(f".{output_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        if fmt == "docx":
+            import pypandoc
+            pypandoc.convert_text(
+                markdown_content,
+                "docx",
+                format="md",
+                outputfile=str(temp_path),
+                extra_args=[f"--reference-doc={REFERENCE_DOCX}"] if os.path.exists(REFERENCE_DOCX) else []
+            )
+        else:
+            from ai_researcher.ui.file_converters import markdown_to_pdf
+            temp_path.write_bytes(markdown_to_pdf(markdown_content))
+        # Publish atomically so readers never see a partial file
+        os.replace(temp_path, output_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+    _prune_cache()
+
+
+def _prune_cache() -> None:
+    """Keep at most ``EXPORT_CACHE_MAX_FILES`` rendered files, dropping the least recently used."""
+    try:
+        files = [p for p in EXPORT_CACHE_DIR.iterdir() if p.is_file() and not p.name.startswith(".")]
+        if len(files) <= EXPORT_CACHE_MAX_FILES:
+            return
+        files.sort(key=lambda p: p.stat().st_atime)
+        for stale in files[:len(files) - EXPORT_CACHE_MAX_FILES]:
+            stale.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Failed to prune export cache: {e}")
+
+
+def _forget_expired_jobs() -> None:
+    cutoff = time.time() - EXPORT_JOB_TTL_SECONDS
+    with _jobs_lock:
+        for job_id in [j.id for j in _jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del _jobs[job_id]
+
+
+async def _run_job(job: ExportJob, markdown_content: str) -> None:
+    future = _in_flight.get(job.cache_key)
+    if future is None:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(_executor, _convert, markdown_content, job.format, job.path)
+        _in_flight[job.cache_key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(job.cache_key, None))
+    job.status = "running"
+    try:
+        await asyncio.shield(future)
+        job.status = "completed"
+        logger.info(f"Export {job.id} rendered {job.download_name}")
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+        logger.error(f"Export {job.id} failed: {e}", exc_info=True)
+    finally:
+        job.finished_at = time.time()
+
+
+def submit_export(user_id: int, markdown_content: str, fmt: str, filename: str) -> ExportJob:
+    """
+    Start rendering ``markdown_content`` and return its job.
+
+    Returns an already-completed job when the same content was exported to
+    the same format before.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise UnsupportedExportFormat(f"Unsupported export format: {fmt}")
+    _forget_expired_jobs()
+    cache_key = export_cache_key(markdown_content, fmt)
+    job = ExportJob(id=str(uuid.uuid4()), user_id=user_id, format=fmt, filename=filename, cache_key=cache_key)
+    with _jobs_lock:
+        _jobs[job.id] = job
+
+    if job.path.exists() and cache_key not in _in_flight:
+        os.utime(job.path)  # mark as recently used for pruning
+        job.status = "completed"
+        job.finished_at = time.time()
+        logger.info(f"Export cache hit for {job.download_name}")
+    else:
+        job.task = asyncio.create_task(_run_job(job, markdown_content))
+    return job
+
+
+async def render_export(user_id: int, markdown_content: str, fmt: str, filename: str) -> ExportJob:
+    """Submit an export and wait until it has finished (successfully or not)."""
+    job = submit_export(user_id, markdown_content, fmt, filename)
+    if job.task is not None:
+        await asyncio.shield(job.task)
+    return job
+
+
+def get_export_job(job_id: str, user_id: int) -> Optional[ExportJob]:
+    """Return the job if it exists and belongs to ``user_id``."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None or job.user_id != user_id:
+        return None
+    return job
+
+
+def export_job_status(job: ExportJob) -> Dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "format": job.format,
+        "filename": job.download_name,
+        "error": job.error,
+        "download_url": f"/api/exports/{job.id}/download" if job.status == "completed" else None,
+    }
+
+
+def shutdown_export_pool() -> None:
+    _executor.shutdown(wait=False, cancel_futures=True)
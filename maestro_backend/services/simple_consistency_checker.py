@@ -3,6 +3,9 @@ Simple Document Consistency Checker
 
 A lightweight consistency checker that avoids complex dependencies and circular imports.
 Designed to be called manually or periodically without crashing the system.
+
+User and system summaries read the results and counters kept by
+services/consistency_tracker.py, which only re-checks documents that changed.
 """
 
 import os
@@ -28,9 +31,11 @@ class SimpleConsistencyChecker:
         self.vector_store_dir = Path("/app/ai_researcher/data/vector_store")
         self.processed_dir = Path("/app/ai_researcher/data/processed")
         
-    def check_document_files(self, doc_id: str) -> Dict[str, bool]:
+    def check_document_files(self, doc_id: str, file_path: Optional[str] = None) -> Dict[str, bool]:
         """
         Check if physical files exist for a document.
+        The recorded file path is checked first; the PDF directory is only
+        listed when the document has none or it is missing.
         """
         results = {
             'pdf_exists': False,
@@ -40,7 +45,9 @@ class SimpleConsistencyChecker:
         
         try:
             # Check for PDF files
-            if self.pdf_dir.exists():
+            if file_path and os.path.isfile(file_path):
+                results['pdf_exists'] = True
+            elif self.pdf_dir.exists():
                 for pdf_file in self.pdf_dir.glob(f"{doc_id}*"):
                     if pdf_file.is_file():
                         results['pdf_exists'] = True
@@ -63,7 +70,18 @@ class SimpleConsistencyChecker:
             
         return results
     
-    def check_vector_store(self, doc_id: str) -> Dict[str, Any]:
+    def count_chunks(self, db: Session, doc_ids: List[str]) -> Dict[str, int]:
+        """Count PostgreSQL document_chunks rows for several documents in one query."""
+        if not doc_ids:
+            return {}
+        from sqlalchemy import func
+        from database.models import DocumentChunk
+        rows = db.query(DocumentChunk.doc_id, func.count(DocumentChunk.id)).filter(
+            DocumentChunk.doc_id.in_(doc_ids)
+        ).group_by(DocumentChunk.doc_id).all()
+        return {str(doc_id): count for doc_id, count in rows}
+    
+    def check_vector_store(self, doc_id: str, db: Optional[Session] = None) -> Dict[str, Any]:
         """
         Check if document exists in PostgreSQL document_chunks table.
         Returns detailed information about chunks found.
@@ -77,23 +95,22 @@ class SimpleConsistencyChecker:
         }
         
         try:
-            # Check PostgreSQL for chunks
-            from database.database import get_db
-            from database.models import DocumentChunk
-            
-            db = next(get_db())
+            own_session = db is None
+            if own_session:
+                from database.database import get_db
+                db = next(get_db())
             try:
-                # Count chunks for this document
-                chunk_count = db.query(DocumentChunk).filter_by(doc_id=doc_id).count()
+                chunk_count = self.count_chunks(db, [doc_id]).get(str(doc_id), 0)
                 result['chunks_with_doc_id'] = chunk_count
                 result['chunk_count'] = chunk_count
                 result['has_chunks'] = chunk_count > 0
                 
-                # Orphaned chunks would be checked separately (not per document)
+                # Orphaned chunks are checked by the full sweep (not per document)
                 result['chunks_without_doc_id'] = 0
                 
             finally:
-                db.close()
+                if own_session:
+                    db.close()
             
             return result
             
@@ -102,6 +119,42 @@ class SimpleConsistencyChecker:
             result['error'] = str(e)
             return result
     
+    def find_issues(self, status: str, file_status: Dict[str, bool], has_chunks: bool) -> List[str]:
+        """Consistency rules for a document in the main database."""
+        issues = []
+        if status == 'completed':
+            # Completed documents should have some processed data
+            if not (file_status['markdown_exists'] or file_status['metadata_exists']):
+                issues.append("Marked as completed but missing processed files")
+            
+            # Completed documents MUST have chunks in vector store
+            if not has_chunks:
+                issues.append(f"Completed document has NO chunks in vector store (unusable for search)")
+                
+        elif status == 'failed':
+            # Failed documents should only have PDF, not processed files
+            if file_status['markdown_exists'] or file_status['metadata_exists']:
+                issues.append("Failed document has orphaned processed files")
+                
+        elif status in ['queued', 'processing']:
+            # Processing documents should have PDF
+            if not file_status['pdf_exists']:
+                issues.append("Processing document missing PDF file")
+        return issues
+    
+    def check_documents(self, db: Session, docs: List[Any]) -> Dict[str, List[str]]:
+        """
+        Check a batch of documents (rows with id, processing_status and file_path).
+        Chunks are counted with a single query. Returns issues by document id.
+        """
+        chunk_counts = self.count_chunks(db, [doc.id for doc in docs])
+        results = {}
+        for doc in docs:
+            doc_id = str(doc.id)
+            file_status = self.check_document_files(doc_id, doc.file_path)
+            results[doc_id] = self.find_issues(doc.processing_status, file_status, chunk_counts.get(doc_id, 0) > 0)
+        return results
+    
     def get_document_consistency_report(
         self, 
         db: Session, 
@@ -137,37 +190,16 @@ class SimpleConsistencyChecker:
                 report['status'] = result.processing_status
                 
                 # Check files
-                file_status = self.check_document_files(doc_id)
+                file_status = self.check_document_files(doc_id, result.file_path)
                 report['exists_in']['files'] = file_status
                 
                 # Proper vector store check
-                vector_status = self.check_vector_store(doc_id)
+                vector_status = self.check_vector_store(doc_id, db)
                 report['exists_in']['vector_store'] = vector_status
                 report['exists_in']['vector_store_likely'] = vector_status['has_chunks']
                 
-                # Report orphaned chunks as an issue
-                if vector_status.get('chunks_without_doc_id', 0) > 0:
-                    report['issues'].append(f"Found {vector_status['chunks_without_doc_id']} orphaned chunks without doc_id in vector store")
-                
                 # Identify issues based on status
-                if report['status'] == 'completed':
-                    # Completed documents should have some processed data
-                    if not (file_status['markdown_exists'] or file_status['metadata_exists']):
-                        report['issues'].append("Marked as completed but missing processed files")
-                    
-                    # Completed documents MUST have chunks in vector store
-                    if not vector_status['has_chunks']:
-                        report['issues'].append(f"Completed document has NO chunks in vector store (unusable for search)")
-                        
-                elif report['status'] == 'failed':
-                    # Failed documents should only have PDF, not processed files
-                    if file_status['markdown_exists'] or file_status['metadata_exists']:
-                        report['issues'].append("Failed document has orphaned processed files")
-                        
-                elif report['status'] in ['queued', 'processing']:
-                    # Processing documents should have PDF
-                    if not file_status['pdf_exists']:
-                        report['issues'].append("Processing document missing PDF file")
+                report['issues'].extend(self.find_issues(report['status'], file_status, vector_status['has_chunks']))
             else:
                 # Document not in main DB - check for orphaned files
                 file_status = self.check_document_files(doc_id)
@@ -185,6 +217,8 @@ class SimpleConsistencyChecker:
     def check_user_documents(self, db: Session, user_id: int) -> Dict[str, Any]:
         """
         Check consistency for all documents of a user.
+        Only documents changed since their last check (or never checked) are
+        verified; the rest is read from the stored results and counters.
         """
         summary = {
             'user_id': user_id,
@@ -196,38 +230,36 @@ class SimpleConsistencyChecker:
         }
         
         try:
-            # Get all user documents
-            query = """
-                SELECT id, original_filename, processing_status 
-                FROM documents 
-                WHERE user_id = :user_id
-                ORDER BY created_at DESC
-            """
-            results = db.execute(text(query), {'user_id': user_id}).fetchall()
+            from services.consistency_tracker import consistency_tracker
+            consistency_tracker.check_changed(db, user_id=user_id)
             
-            summary['total_documents'] = len(results)
+            counters = db.execute(text("""
+                SELECT total_documents, consistent_documents, total_issues, by_status
+                FROM document_consistency_summary
+                WHERE user_id = :user_id
+            """), {'user_id': user_id}).first()
+            if counters:
+                summary['total_documents'] = counters.total_documents
+                summary['consistent_documents'] = counters.consistent_documents
+                summary['total_issues'] = counters.total_issues
+                summary['by_status'] = dict(counters.by_status or {})
             
-            for row in results:
-                doc_id = row.id
-                filename = row.original_filename
-                status = row.processing_status
-                
-                # Count by status
-                summary['by_status'][status] = summary['by_status'].get(status, 0) + 1
-                
-                # Check consistency
-                report = self.get_document_consistency_report(db, doc_id, user_id)
-                
-                if report['is_consistent']:
-                    summary['consistent_documents'] += 1
-                else:
-                    summary['inconsistent_documents'].append({
-                        'doc_id': doc_id,
-                        'filename': filename,
-                        'status': status,
-                        'issues': report['issues']
-                    })
-                    summary['total_issues'] += len(report['issues'])
+            query = """
+                SELECT c.doc_id, d.original_filename, c.status, c.issues
+                FROM document_consistency c
+                JOIN documents d ON d.id = c.doc_id
+                WHERE c.user_id = :user_id
+                AND c.checked_at IS NOT NULL
+                AND jsonb_array_length(c.issues) > 0
+                ORDER BY d.created_at DESC
+            """
+            for row in db.execute(text(query), {'user_id': user_id}).fetchall():
+                summary['inconsistent_documents'].append({
+                    'doc_id': str(row.doc_id),
+                    'filename': row.original_filename,
+                    'status': row.status,
+                    'issues': row.issues
+                })
                     
         except Exception as e:
             logger.error(f"Error checking documents for user {user_id}: {e}")
@@ -329,7 +361,9 @@ class SimpleConsistencyChecker:
     
     def get_system_summary(self, db: Session) -> Dict[str, Any]:
         """
-        Get a system-wide consistency summary.
+        Get a system-wide consistency summary from the stored per-user counters,
+        after re-checking documents that changed since their last check.
+        Orphaned chunks are counted by the periodic full sweep.
         """
         summary = {
             'total_users': 0,
@@ -342,64 +376,37 @@ class SimpleConsistencyChecker:
         }
         
         try:
-            # Get all users with documents
+            from services.consistency_tracker import consistency_tracker
+            summary['documents_rechecked'] = consistency_tracker.check_changed(db)
+            
             query = """
-                SELECT DISTINCT u.id, u.username, COUNT(d.id) as doc_count
-                FROM users u
-                JOIN documents d ON u.id = d.user_id
-                GROUP BY u.id, u.username
-                ORDER BY doc_count DESC
+                SELECT s.user_id, u.username, s.total_documents, s.consistent_documents, s.total_issues
+                FROM document_consistency_summary s
+                LEFT JOIN users u ON u.id = s.user_id
+                WHERE s.total_documents > 0
+                ORDER BY s.total_documents DESC
             """
-            
             users = db.execute(text(query)).fetchall()
             summary['total_users'] = len(users)
+            summary['users_checked'] = len(users)
             
-            # Count total documents
-            total_docs_result = db.execute(text("SELECT COUNT(*) FROM documents")).scalar()
-            summary['total_documents'] = total_docs_result or 0
-            
-            # Check each user's documents
             for user_row in users:
-                user_id = user_row.id
-                username = user_row.username
-                doc_count = user_row.doc_count
-                
-                user_check = self.check_user_documents(db, user_id)
-                summary['users_checked'] += 1
-                
-                if user_check['total_issues'] > 0:
+                summary['total_documents'] += user_row.total_documents
+                if user_row.total_issues > 0:
                     summary['users_with_issues'].append({
-                        'user_id': user_id,
-                        'username': username,
-                        'document_count': doc_count,
-                        'issues_count': user_check['total_issues'],
-                        'inconsistent_documents': len(user_check['inconsistent_documents'])
+                        'user_id': user_row.user_id,
+                        'username': user_row.username,
+                        'document_count': user_row.total_documents,
+                        'issues_count': user_row.total_issues,
+                        'inconsistent_documents': user_row.total_documents - user_row.consistent_documents
                     })
-                    summary['total_consistency_issues'] += user_check['total_issues']
+                    summary['total_consistency_issues'] += user_row.total_issues
             
-            # Check for system-wide orphaned chunks in PostgreSQL
-            try:
-                from database.database import get_db
-                from database.models import DocumentChunk, Document
-                
-                db = next(get_db())
-                try:
-                    # Find chunks where doc_id doesn't exist in documents table
-                    orphaned_query = db.query(DocumentChunk).outerjoin(
-                        Document, DocumentChunk.doc_id == Document.id
-                    ).filter(Document.id == None)
-                    
-                    orphaned_count = orphaned_query.count()
-                    
-                    summary['orphaned_chunks_without_doc_id'] = orphaned_count
-                    if orphaned_count > 0:
-                        summary['total_consistency_issues'] += 1
-                        logger.warning(f"Found {orphaned_count} orphaned chunks in PostgreSQL without matching document")
-                finally:
-                    db.close()
-                    
-            except Exception as e:
-                logger.error(f"Could not check for orphaned chunks: {e}")
+            checkpoint = consistency_tracker.get_checkpoint(db)
+            summary['orphaned_chunks_without_doc_id'] = checkpoint.get('orphaned_chunks', 0)
+            if summary['orphaned_chunks_without_doc_id'] > 0:
+                summary['total_consistency_issues'] += 1
+            summary['tracking'] = consistency_tracker.get_status(db)
                     
         except Exception as e:
             logger.error(f"Error getting system summary: {e}")
@@ -412,14 +419,20 @@ class SimpleConsistencyChecker:
 simple_checker = SimpleConsistencyChecker()
 
 
-async def run_consistency_check(db: Session) -> Dict[str, Any]:
+async def run_consistency_check(db: Session, full_sweep: bool = False) -> Dict[str, Any]:
     """
-    Run a full consistency check across the system.
-    This is the main entry point for consistency checking.
+    Run a consistency check across the system.
+    This is the main entry point for consistency checking. ``full_sweep`` also
+    starts a background re-check of every document (see consistency_tracker).
     """
     logger.info("Starting simple consistency check")
     
     try:
+        if full_sweep:
+            from services.consistency_tracker import consistency_tracker
+            consistency_tracker.request_full_sweep(db)
+            consistency_tracker.start_full_sweep()
+        
         # Get system summary
         summary = simple_checker.get_system_summary(db)
         
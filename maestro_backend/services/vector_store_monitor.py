@@ -53,23 +53,44 @@ class VectorStoreMonitor:
         self.size_history = []
         self.max_history_entries = 48  # Keep 24 hours at 30-minute intervals
         
+        # File listing shared by the checks of one check_health() run
+        self._scan_cache: Optional[list] = None
+        
         logger.info(f"Vector Store Monitor initialized")
         logger.info(f"  Path: {self.vector_store_path}")
         logger.info(f"  Max size: {self.max_size_gb}GB")
         logger.info(f"  Check interval: {check_interval_minutes} minutes")
         logger.info(f"  Auto cleanup: {auto_cleanup}")
     
+    def _scan_files(self, path: Path) -> list:
+        """
+        List (path, stat) for every file under path in a single walk.
+        During check_health() the vector store listing is taken once and
+        shared by the size, statistics and corruption checks.
+        """
+        if path == self.vector_store_path and self._scan_cache is not None:
+            return self._scan_cache
+        
+        files = []
+        pending = [str(path)]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending.append(entry.path)
+                            elif entry.is_file():
+                                files.append((Path(entry.path), entry.stat()))
+                        except OSError:
+                            pass
+            except OSError:
+                pass
+        return files
+    
     def get_directory_size(self, path: Path) -> float:
         """Get total size of directory in GB."""
-        total_size = 0
-        if path.exists():
-            for item in path.rglob("*"):
-                if item.is_file():
-                    try:
-                        total_size += item.stat().st_size
-                    except:
-                        pass
-        return total_size / (1024 ** 3)
+        return sum(st.st_size for _, st in self._scan_files(path)) / (1024 ** 3)
     
     def get_file_statistics(self) -> Dict[str, Any]:
         """Get detailed file statistics."""
@@ -84,21 +105,17 @@ class VectorStoreMonitor:
             return stats
         
         files = []
-        for item in self.vector_store_path.rglob("*"):
-            if item.is_file():
-                try:
-                    size = item.stat().st_size
-                    files.append((item, size))
-                    stats["total_files"] += 1
-                    
-                    # Track by extension
-                    ext = item.suffix or "no_extension"
-                    if ext not in stats["file_types"]:
-                        stats["file_types"][ext] = {"count": 0, "size": 0}
-                    stats["file_types"][ext]["count"] += 1
-                    stats["file_types"][ext]["size"] += size
-                except:
-                    pass
+        for item, st in self._scan_files(self.vector_store_path):
+            size = st.st_size
+            files.append((item, size))
+            stats["total_files"] += 1
+            
+            # Track by extension
+            ext = item.suffix or "no_extension"
+            if ext not in stats["file_types"]:
+                stats["file_types"][ext] = {"count": 0, "size": 0}
+            stats["file_types"][ext]["count"] += 1
+            stats["file_types"][ext]["size"] += size
         
         # Sort by size and get largest files
         files.sort(key=lambda x: x[1], reverse=True)
@@ -125,29 +142,32 @@ class VectorStoreMonitor:
         Returns (is_corrupted, issues_found)
         """
         issues = []
+        files = self._scan_files(self.vector_store_path)
         
         # Check for abnormally large link_lists.bin files (ChromaDB HNSW index)
-        for link_file in self.vector_store_path.rglob("link_lists.bin"):
-            size_gb = link_file.stat().st_size / (1024 ** 3)
+        for link_file, st in files:
+            if link_file.name != "link_lists.bin":
+                continue
+            size_gb = st.st_size / (1024 ** 3)
             if size_gb > 10:  # link_lists.bin should never be > 10GB for reasonable datasets
                 issues.append(f"Abnormally large link_lists.bin: {size_gb:.2f}GB at {link_file}")
         
         # Check for lock files that might indicate crashed operations
-        lock_files = list(self.vector_store_path.rglob("*.lock"))
-        if lock_files:
-            for lock_file in lock_files:
-                # Check if lock file is old (> 1 hour)
-                age_hours = (time.time() - lock_file.stat().st_mtime) / 3600
-                if age_hours > 1:
-                    issues.append(f"Stale lock file (age: {age_hours:.1f}h): {lock_file}")
+        for lock_file, st in files:
+            if lock_file.suffix != ".lock":
+                continue
+            # Check if lock file is old (> 1 hour)
+            age_hours = (time.time() - st.st_mtime) / 3600
+            if age_hours > 1:
+                issues.append(f"Stale lock file (age: {age_hours:.1f}h): {lock_file}")
         
         # Check for incomplete write operations (journal files)
-        journal_files = list(self.vector_store_path.rglob("*-journal"))
-        if journal_files:
-            for journal in journal_files:
-                age_hours = (time.time() - journal.stat().st_mtime) / 3600
-                if age_hours > 0.5:  # Journal files shouldn't persist > 30 min
-                    issues.append(f"Persistent journal file (age: {age_hours:.1f}h): {journal}")
+        for journal, st in files:
+            if not journal.name.endswith("-journal"):
+                continue
+            age_hours = (time.time() - st.st_mtime) / 3600
+            if age_hours > 0.5:  # Journal files shouldn't persist > 30 min
+                issues.append(f"Persistent journal file (age: {age_hours:.1f}h): {journal}")
         
         # Check file count vs expected patterns
         stats = self.get_file_statistics()
@@ -189,6 +209,14 @@ class VectorStoreMonitor:
             "stats": {}
         }
         
+        # Walk the store once for all of the checks below
+        self._scan_cache = self._scan_files(self.vector_store_path)
+        try:
+            return self._check_health(health_report)
+        finally:
+            self._scan_cache = None
+    
+    def _check_health(self, health_report: Dict[str, Any]) -> Dict[str, Any]:
         # Get current size
         health_report["size_gb"] = self.get_directory_size(self.vector_store_path)
         
@@ -0,0 +1,109 @@
+"""
+Application startup as a dependency graph of steps.
+
+Startup used to run every step serially before the app served traffic:
+database checks, first-user creation, CLI document cleanup and AI component
+initialization (model loading plus every active mission), so rolling restarts
+waited minutes per pod. Steps now declare what they depend on:
+
+- independent steps run concurrently as soon as their dependencies finish;
+  a failed dependency is logged but does not stop its dependents, matching
+  the old "continue anyway" behaviour,
+- the startup event only waits for the steps the server cannot serve without
+  (the database schema); the rest warm up in the background,
+- optional steps (housekeeping) do not count towards readiness,
+- the state of every step is exposed through ``/health/ready``.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StartupStep:
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+    # Readiness waits for required steps only
+    required: bool = True
+
+
+class StartupGraph:
+    def __init__(self, steps: List[StartupStep]):
+        self.steps: Dict[str, StartupStep] = {step.name: step for step in steps}
+        for step in steps:
+            unknown = [dep for dep in step.depends_on if dep not in self.steps]
+            if unknown:
+                raise ValueError(f"Startup step '{step.name}' depends on unknown steps: {unknown}")
+        self.status: Dict[str, str] = {name: "pending" for name in self.steps}
+        self.errors: Dict[str, str] = {}
+        self.durations: Dict[str, float] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self):
+        """Schedules every step; each one waits for its dependencies before running."""
+        for name in self.steps:
+            self._schedule(name)
+
+    def _schedule(self, name: str) -> asyncio.Task:
+        task = self._tasks.get(name)
+        if task is None:
+            dependencies = [self._schedule(dep) for dep in self.steps[name].depends_on]
+            task = asyncio.create_task(self._run_step(name, dependencies), name=f"startup:{name}")
+            self._tasks[name] = task
+        return task
+
+    async def _run_step(self, name: str, dependencies: List[asyncio.Task]):
+        if dependencies:
+            await asyncio.gather(*dependencies, return_exceptions=True)
+        failed = [dep for dep in self.steps[name].depends_on if self.status[dep] == "failed"]
+        if failed:
+            logger.warning(f"Startup step '{name}' is running although {failed} failed")
+
+        self.status[name] = "running"
+        started = time.monotonic()
+        try:
+            result = await self.steps[name].run()
+            if result is False:
+                raise RuntimeError("step reported failure")
+            self.status[name] = "ready"
+        except Exception as e:
+            self.status[name] = "failed"
+            self.errors[name] = str(e)
+            logger.error(f"Startup step '{name}' failed: {e}", exc_info=True)
+        finally:
+            self.durations[name] = round(time.monotonic() - started, 2)
+            logger.info(f"Startup step '{name}' {self.status[name]} after {self.durations[name]}s")
+
+    async def wait(self, names: Optional[Iterable[str]] = None):
+        """Waits for the given steps (all required steps by default) to finish."""
+        if names is None:
+            names = [name for name, step in self.steps.items() if step.required]
+        tasks = [self._tasks[name] for name in names if name in self._tasks]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def is_ready(self) -> bool:
+        return all(self.status[name] == "ready" for name, step in self.steps.items() if step.required)
+
+    def report(self) -> Dict[str, Any]:
+        subsystems = {}
+        for name, step in self.steps.items():
+            entry: Dict[str, Any] = {"status": self.status[name], "required": step.required}
+            if name in self.durations:
+                entry["duration_sec"] = self.durations[name]
+            if name in self.errors:
+                entry["error"] = self.errors[name]
+            subsystems[name] = entry
+
+        if self.is_ready():
+            overall = "ready"
+        elif any(self.status[name] == "failed" for name, step in self.steps.items() if step.required):
+            overall = "degraded"
+        else:
+            overall = "starting"
+        return {"status": overall, "subsystems": subsystems}
@@ -39,6 +39,7 @@ export interface PaginatedChatsResponse {
   page: number
   page_size: number
   total_pages: number
+  next_cursor?: string | null
 }
 
 export interface Mission {
@@ -110,11 +111,28 @@ export const addMessageToChat = async (chatId: string, data: CreateMessageReques
   return response.data
 }
 
-export const getChatMessages = async (chatId: string, skip = 0, limit = 100): Promise<Message[]> => {
+export interface ChatMessagesPage {
+  messages: Message[]
+  nextCursor: string | null
+}
+
+// Sources are omitted unless includeSources is set; pass the returned
+// nextCursor back in to fetch the following page.
+export const getChatMessages = async (
+  chatId: string,
+  { cursor, limit = 100, includeSources = false }: { cursor?: string; limit?: number; includeSources?: boolean } = {}
+): Promise<ChatMessagesPage> => {
   const response = await apiClient.get(`/api/chats/${chatId}/messages`, {
-    params: { skip, limit }
+    params: {
+      limit,
+      include_sources: includeSources,
+      ...(cursor && { cursor })
+    }
   })
-  return response.data
+  return {
+    messages: response.data,
+    nextCursor: response.headers['x-next-cursor'] ?? null
+  }
 }
 
 export const getChatMissions = async (chatId: string): Promise<Mission[]> => {
@@ -31,7 +31,7 @@ interface ReportVersion {
   id: string
   version: number
   title?: string
-  content: string
+  content?: string
   is_current: boolean
   revision_notes?: string
   created_at: string
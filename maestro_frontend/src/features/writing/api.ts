@@ -28,11 +28,24 @@ export interface Draft {
   title: string
   writing_session_id: string
   content: string
+  revision?: number
   references: Reference[]
   created_at: string
   updated_at: string
 }
 
+export interface DraftTextOperation {
+  start: number;
+  end: number;
+  text: string;
+}
+
+export interface DraftPatchResponse {
+  id: string;
+  revision: number;
+  updated_at: string;
+}
+
 export interface Reference {
   id: string;
   title: string;
@@ -194,6 +207,120 @@ export const updateSessionDraft = async (sessionId: string, draftData: Partial<D
   return response.data;
 };
 
+export const patchSessionDraft = async (
+  sessionId: string,
+  baseRevision: number,
+  operations: DraftTextOperation[],
+  title?: string
+): Promise<DraftPatchResponse> => {
+  const response = await apiClient.patch(`/api/writing/sessions/${sessionId}/draft`, {
+    base_revision: baseRevision,
+    operations,
+    title,
+  });
+  return response.data;
+};
+
+// Single ranged replacement turning previous into next (common prefix/suffix trimmed)
+export const diffDraftContent = (previous: string, next: string): DraftTextOperation[] => {
+  if (previous === next) return [];
+  let start = 0;
+  const maxPrefix = Math.min(previous.length, next.length);
+  while (start < maxPrefix && previous.charCodeAt(start) === next.charCodeAt(start)) start++;
+  let previousEnd = previous.length;
+  let nextEnd = next.length;
+  while (previousEnd > start && nextEnd > start && previous.charCodeAt(previousEnd - 1) === next.charCodeAt(nextEnd - 1)) {
+    previousEnd--;
+    nextEnd--;
+  }
+  // Never split a surrogate pair
+  if (start > 0 && (previous.charCodeAt(start - 1) & 0xfc00) === 0xd800) start--;
+  if (previousEnd < previous.length && (previous.charCodeAt(previousEnd) & 0xfc00) === 0xdc00) {
+    previousEnd++;
+    nextEnd++;
+  }
+  return [{ start, end: previousEnd, text: next.slice(start, nextEnd) }];
+};
+
+export interface DraftSaveResult {
+  revision?: number;
+  // Saved text; differs from the edited text when the edit was rebased onto a concurrent save
+  content: string;
+}
+
+// Raised when a concurrent save changed the same part of the draft as the local edit
+export class DraftConflictError extends Error {
+  constructor(public serverDraft: Draft) {
+    super('The draft was changed elsewhere while you were editing it');
+    this.name = 'DraftConflictError';
+  }
+}
+
+// Move the local edit (base -> local) onto the concurrently saved text (base -> server);
+// null when both changed overlapping ranges
+export const rebaseDraftEdit = (base: string, local: string, server: string): DraftTextOperation[] | null => {
+  const ours = diffDraftContent(base, local);
+  const theirs = diffDraftContent(base, server);
+  if (ours.length === 0) return [];
+  if (theirs.length === 0) return ours;
+  const [o] = ours;
+  const [t] = theirs;
+  if (t.end <= o.start && !(t.start === t.end && t.start === o.start)) {
+    const shift = t.text.length - (t.end - t.start);
+    return [{ start: o.start + shift, end: o.end + shift, text: o.text }];
+  }
+  if (o.end <= t.start && !(o.start === o.end && o.start === t.start)) return ours;
+  return null;
+};
+
+const applyDraftOperations = (content: string, operations: DraftTextOperation[]): string => {
+  let result = content;
+  for (const op of [...operations].reverse()) {
+    result = result.slice(0, op.start) + op.text + result.slice(op.end);
+  }
+  return result;
+};
+
+const MAX_DRAFT_SAVE_ATTEMPTS = 3;
+
+// Save only the edited range against the draft revision. If another save got in first, the
+// edit is rebased onto the latest draft and retried; overlapping edits raise DraftConflictError
+export const saveSessionDraftContent = async (
+  sessionId: string,
+  draft: Draft,
+  content: string,
+  title?: string
+): Promise<DraftSaveResult> => {
+  if (draft.revision === undefined) {
+    const saved = await updateSessionDraft(sessionId, { title, content });
+    return { revision: saved.revision, content };
+  }
+  let revision = draft.revision;
+  let base = draft.content || '';
+  let target = content;
+  let operations = diffDraftContent(base, target);
+  for (let attempt = 1; ; attempt++) {
+    try {
+      const result = await patchSessionDraft(sessionId, revision, operations, title);
+      return { revision: result.revision, content: target };
+    } catch (error: any) {
+      const status = error?.response?.status;
+      if ((status !== 409 && status !== 400) || attempt >= MAX_DRAFT_SAVE_ATTEMPTS) throw error;
+      const server = await getSessionDraft(sessionId);
+      const serverContent = server.content || '';
+      // 400: our copy of the base text was out of step, but nobody else saved; diff against the server copy
+      const rebased = server.revision === revision
+        ? diffDraftContent(serverContent, target)
+        : rebaseDraftEdit(base, target, serverContent);
+      if (rebased === null) throw new DraftConflictError(server);
+      revision = server.revision ?? 0;
+      base = serverContent;
+      target = applyDraftOperations(serverContent, rebased);
+      operations = rebased;
+    }
+  }
+};
+
 // Task response for streaming endpoint
 export interface WritingTaskResponse {
   task_id: string;
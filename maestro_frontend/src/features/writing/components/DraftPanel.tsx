@@ -104,24 +104,35 @@ export const DraftPanel: React.FC = () => {
     setIsSaving(true);
     
     try {
-      await writingApi.updateSessionDraft(currentSession.id, {
-        title: title || currentDraft.title,
-        content: content,
-      });
+      const saved = await writingApi.saveSessionDraftContent(
+        currentSession.id,
+        currentDraft,
+        content,
+        title || currentDraft.title
+      );
       
       setLastSaved(new Date());
       setHasUnsavedChanges(false);
       
       // Update the store optimistically without triggering editor re-render
-      setCurrentDraft({ ...currentDraft, content, title: title || currentDraft.title });
+      // (a rebased save carries the concurrent changes, so the editor reloads then)
+      setCurrentDraft({ ...currentDraft, content: saved.content, title: title || currentDraft.title, revision: saved.revision });
       
       // console.log('Draft saved successfully');
     } catch (error) {
+      if (error instanceof writingApi.DraftConflictError) {
+        // Keep the local text unsaved; the user decides whether to overwrite or reload
+        addToast({
+          type: 'warning',
+          title: 'Draft Changed Elsewhere',
+          message: 'This part of the draft was edited in another window. Your changes were not saved; copy them and reload the draft to continue.'
+        });
+      }
       console.error('Failed to save draft:', error);
     } finally {
       setIsSaving(false);
     }
-  }, [currentDraft, currentSession, isSaving, setCurrentDraft]);
+  }, [currentDraft, currentSession, isSaving, setCurrentDraft, addToast]);
 
   // Title editing functions
   const handleStartEditingTitle = useCallback(() => {
@@ -5,7 +5,7 @@
 import { unifiedWebSocketService } from '../../../services/unifiedWebSocketService'
 
 export interface WritingUpdate {
-  type: 'agent_status' | 'draft_content_update' | 'connection_established' | 'pong' | 'chat_title_update' | 'stats_update' | 'heartbeat' | 'connection_lost' | string; // Allow any string for compatibility
+  type: 'agent_status' | 'draft_content_update' | 'connection_established' | 'pong' | 'chat_title_update' | 'stats_update' | 'streaming_chunk' | 'heartbeat' | 'connection_lost' | string; // Allow any string for compatibility
   session_id?: string;
   status?: string;
   details?: string;
@@ -14,6 +14,9 @@ export interface WritingUpdate {
   timestamp?: number;
   chat_id?: string;
   title?: string;
+  chunk?: string;
+  stream_id?: string;
+  sequence?: number;
 }
 
 interface StatusCallback {
@@ -63,6 +63,7 @@ interface WritingState {
   setCurrentSession: (session: WritingSession | null) => void
   setCurrentDraft: (draft: Draft | null) => void
   addMessage: (message: WritingMessageWithSources) => void
+  upsertMessage: (messageId: string, update: (existing?: WritingMessageWithSources) => WritingMessageWithSources) => void
   clearMessages: () => void
   setSessionLoading: (sessionId: string, loading: boolean) => void
   getSessionLoading: (sessionId: string) => boolean
@@ -167,6 +168,27 @@ export const useWritingStore = create<WritingState>((set, get) => ({
     }))
   },
 
+  // Create or update a message in place (used for streamed assistant replies)
+  upsertMessage: (messageId, update) => {
+    const state = get()
+    const chatId = state.activeChat?.id || state.currentSession?.chat_id
+    if (!chatId) return
+    
+    set((state: WritingState) => {
+      const messages = state.messagesByChat[chatId] || []
+      const index = messages.findIndex((m: WritingMessageWithSources) => m.id === messageId)
+      const updated = index === -1
+        ? [...messages, update(undefined)]
+        : messages.map((m: WritingMessageWithSources, i: number) => (i === index ? update(m) : m))
+      return {
+        messagesByChat: {
+          ...state.messagesByChat,
+          [chatId]: updated
+        }
+      }
+    })
+  },
+
   clearMessages: async () => {
     const state = get()
     const chatId = state.activeChat?.id || state.currentSession?.chat_id
@@ -548,7 +570,7 @@ export const useWritingStore = create<WritingState>((set, get) => ({
       }))
       
       // Load chat messages
-      const messagesResponse = await apiClient.get(`/api/chats/${chatId}/messages`)
+      const messagesResponse = await apiClient.get(`/api/chats/${chatId}/messages`, { params: { include_sources: true } })
       const convertedMessages: WritingMessageWithSources[] = messagesResponse.data.map((msg: any) => ({
         id: msg.id,
         role: msg.role,
@@ -647,7 +669,7 @@ export const useWritingStore = create<WritingState>((set, get) => ({
           if (chatId) {
             // Use the correct chat messages endpoint instead of the non-existent writing endpoint
             const { apiClient } = await import('../../config/api')
-            const messagesResponse = await apiClient.get(`/api/chats/${chatId}/messages`)
+            const messagesResponse = await apiClient.get(`/api/chats/${chatId}/messages`, { params: { include_sources: true } })
             // Convert API messages to proper format with timezone-aware timestamps
             const convertedMessages: WritingMessageWithSources[] = messagesResponse.data.map((msg: any) => ({
               id: msg.id,
@@ -686,17 +708,20 @@ export const useWritingStore = create<WritingState>((set, get) => ({
 
     try {
       // console.log('Saving draft changes from store...')
-      await writingApi.updateSessionDraft(state.currentSession.id, {
-        title: title || state.currentDraft.title,
-        content: content,
-      })
+      const saved = await writingApi.saveSessionDraftContent(
+        state.currentSession.id,
+        state.currentDraft,
+        content,
+        title || state.currentDraft.title
+      )
       
       // Update the store optimistically
       set({
         currentDraft: { 
           ...state.currentDraft, 
-          content, 
-          title: title || state.currentDraft.title 
+          content: saved.content, 
+          title: title || state.currentDraft.title,
+          revision: saved.revision
         }
       })
       
@@ -873,7 +898,7 @@ export const useWritingStore = create<WritingState>((set, get) => ({
           const chatId = state.currentSession?.chat_id || state.activeChat?.id
           if (chatId) {
             const { apiClient } = await import('../../config/api')
-            const messagesResponse = await apiClient.get(`/api/chats/${chatId}/messages`)
+            const messagesResponse = await apiClient.get(`/api/chats/${chatId}/messages`, { params: { include_sources: true } })
             const messages = messagesResponse.data
             
             // Check if we have a new assistant message after our user message
@@ -1063,7 +1088,7 @@ export const useWritingStore = create<WritingState>((set, get) => ({
           const chatId = state.currentSession?.chat_id || state.activeChat?.id
           if (chatId) {
             const { apiClient } = await import('../../config/api')
-            const messagesResponse = await apiClient.get(`/api/chats/${chatId}/messages`)
+            const messagesResponse = await apiClient.get(`/api/chats/${chatId}/messages`, { params: { include_sources: true } })
             const messages = messagesResponse.data
             
             // Check if we have a new assistant message
@@ -1249,18 +1274,43 @@ export const useWritingStore = create<WritingState>((set, get) => ({
             break
             
             
+          case 'streaming_chunk':
+            // Partial assistant reply; the 'complete' draft_content_update with
+            // the same task id replaces it with the final text and sources
+            if (message.stream_id && message.chunk) {
+              state.upsertMessage(message.stream_id, (existing) => ({
+                id: message.stream_id as string,
+                role: 'assistant',
+                content: (existing?.content || '') + message.chunk,
+                timestamp: existing?.timestamp || ensureDate(new Date()),
+                sources: existing?.sources || []
+              }))
+            }
+            break
+            
           case 'draft_content_update':
             // Check if this is a complete response message
             if (message.action === 'complete' && message.data) {
-              // Add the complete response as a new message
-              const assistantMessage: WritingMessageWithSources = {
-                id: generateUUID(),
-                role: 'assistant',
-                content: message.data.message || '',
-                timestamp: ensureDate(new Date()),
-                sources: message.data.sources || []
+              // Add the complete response, replacing the streamed message if there was one
+              const streamId = message.data.task_id
+              const finalContent = message.data.message || ''
+              const finalSources = message.data.sources || []
+              if (streamId && state.getCurrentMessages().some((m: WritingMessageWithSources) => m.id === streamId)) {
+                state.upsertMessage(streamId, (existing) => ({
+                  ...(existing as WritingMessageWithSources),
+                  content: finalContent,
+                  sources: finalSources
+                }))
+              } else {
+                const assistantMessage: WritingMessageWithSources = {
+                  id: generateUUID(),
+                  role: 'assistant',
+                  content: finalContent,
+                  timestamp: ensureDate(new Date()),
+                  sources: finalSources
+                }
+                state.addMessage(assistantMessage)
               }
-              state.addMessage(assistantMessage)
               
               // Clear loading states
               const loadingId = state.currentSession?.id || state.activeChat?.id
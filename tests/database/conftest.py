@@ -0,0 +1,76 @@
+"""
+Fixtures for tests that need PostgreSQL (row locks, triggers, JSONB).
+
+Set TEST_DATABASE_URL to an empty, disposable database to run them; they are
+skipped otherwise. The schema is built the way the backend builds it: the
+models' tables first, then the init-db migrations.
+"""
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "maestro_backend"))
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # database.database creates its engine from DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+pytest.importorskip("sqlalchemy")
+
+
+@pytest.fixture(scope="session")
+def engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from database.database import Base, engine
+    from database import models  # noqa: F401  (registers the tables)
+    from database.init_postgres import run_sql_migrations
+
+    from sqlalchemy import text
+
+    def reset_schema():
+        # drop_all cannot order the chats/missions/document_groups foreign key cycle
+        with engine.begin() as conn:
+            conn.execute(text("DROP SCHEMA public CASCADE"))
+            conn.execute(text("CREATE SCHEMA public"))
+
+    reset_schema()
+    Base.metadata.create_all(engine)
+    run_sql_migrations()
+    yield engine
+    reset_schema()
+
+
+@pytest.fixture
+def session_factory(engine):
+    from sqlalchemy import text
+    from database.database import Base, SessionLocal
+
+    yield SessionLocal
+    with engine.begin() as conn:
+        tables = ", ".join(f'"{name}"' for name in Base.metadata.tables)
+        conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def user(db):
+    from database.models import User
+
+    now = datetime.utcnow()
+    user = User(username="tester", email="tester@example.com", hashed_password="x",
+                created_at=now, updated_at=now)
+    db.add(user)
+    db.commit()
+    return user
@@ -0,0 +1,114 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from database.models import Document, DocumentConsistency, DocumentConsistencySummary
+from services import consistency_tracker as tracker_module
+from services.consistency_tracker import ConsistencyTracker
+
+
+class FakeChecker:
+    """Reports the issues set per document id; every other document is consistent."""
+
+    def __init__(self):
+        self.issues = {}
+        self.checked = []
+
+    def check_documents(self, db, documents):
+        self.checked += [str(doc.id) for doc in documents]
+        return {str(doc.id): self.issues[str(doc.id)] for doc in documents if str(doc.id) in self.issues}
+
+
+@pytest.fixture
+def checker():
+    return FakeChecker()
+
+
+@pytest.fixture
+def tracker(checker):
+    return ConsistencyTracker(checker=checker)
+
+
+def _add_document(db, user, status="completed"):
+    now = datetime.utcnow()
+    doc = Document(id=str(uuid.uuid4()), user_id=user.id, filename="paper.pdf", processing_status=status,
+                   created_at=now, updated_at=now)
+    db.add(doc)
+    db.commit()
+    return doc
+
+
+def _tracking(db, doc_id):
+    db.expire_all()
+    return db.query(DocumentConsistency).filter(DocumentConsistency.doc_id == doc_id).one_or_none()
+
+
+def _summary(db, user):
+    db.expire_all()
+    summary = db.query(DocumentConsistencySummary).filter(DocumentConsistencySummary.user_id == user.id).one()
+    return summary.total_documents, summary.consistent_documents, summary.total_issues, summary.by_status
+
+
+def test_trigger_marks_only_pipeline_changes_dirty(db, user, tracker):
+    doc = _add_document(db, user)
+    assert _tracking(db, doc.id).dirty
+
+    tracker.check_changed(db)
+    assert not _tracking(db, doc.id).dirty
+
+    doc.metadata_ = {"title": "Renamed"}
+    db.commit()
+    assert not _tracking(db, doc.id).dirty
+
+    doc.chunk_count = 12
+    db.commit()
+    assert _tracking(db, doc.id).dirty
+
+    doc_id = doc.id
+    db.delete(doc)
+    db.commit()
+    row = _tracking(db, doc_id)
+    assert row.dirty and row.deleted
+
+
+def test_counters_follow_rechecks_and_deletions(db, user, tracker, checker):
+    clean = _add_document(db, user)
+    broken = _add_document(db, user, status="failed")
+    checker.issues[str(broken.id)] = ["missing file", "no chunks"]
+
+    assert tracker.check_changed(db) == 2
+    assert _summary(db, user) == (2, 1, 2, {"completed": 1, "failed": 1})
+
+    # Reprocessing fixes the document: only it is re-checked and the counters move by the difference
+    del checker.issues[str(broken.id)]
+    checker.checked.clear()
+    broken.processing_status = "completed"
+    db.commit()
+    assert tracker.check_changed(db) == 1
+    assert checker.checked == [str(broken.id)]
+    assert _summary(db, user) == (2, 2, 0, {"completed": 2})
+
+    clean_id = clean.id
+    db.delete(clean)
+    db.commit()
+    tracker.check_changed(db)
+    assert _tracking(db, clean_id) is None
+    assert _summary(db, user) == (1, 1, 0, {"completed": 1})
+
+
+def test_full_sweep_resumes_from_its_cursor(db, user, tracker, checker, monkeypatch):
+    monkeypatch.setattr(tracker_module, "DOCUMENT_CONSISTENCY_BATCH_SIZE", 2)
+    docs = [_add_document(db, user) for _ in range(3)]
+    # Documents from before the trigger have no tracking row
+    db.query(DocumentConsistency).delete()
+    db.commit()
+
+    assert tracker.sweep_step(db) is False
+    assert tracker.get_checkpoint(db)["sweep_cursor"]
+    assert tracker.sweep_step(db) is True
+
+    assert sorted(checker.checked) == sorted(str(doc.id) for doc in docs)
+    checkpoint = tracker.get_checkpoint(db)
+    assert checkpoint["sweep_cursor"] is None and checkpoint["last_sweep_finished_at"]
+    assert _summary(db, user)[:2] == (3, 3)
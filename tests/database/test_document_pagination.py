@@ -0,0 +1,79 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from database.models import Document
+
+MIGRATION = os.path.join(os.path.dirname(__file__), "..", "..", "maestro_backend", "init-db",
+                         "17-documents-created-at-not-null.sql")
+
+
+def _add_documents(db, user, created):
+    docs = [Document(id=str(uuid.uuid4()), user_id=user.id, filename=f"doc-{i}.pdf", created_at=created_at,
+                     updated_at=created_at)
+            for i, created_at in enumerate(created)]
+    db.add_all(docs)
+    db.commit()
+    return [doc.id for doc in docs]
+
+
+def _all_pages(db, user, limit):
+    from services.document_service_v2 import UnifiedDocumentService
+
+    service = UnifiedDocumentService(db)
+    seen, cursor = [], None
+    while True:
+        documents, total, cursor = service.get_documents_with_metadata(user.id, limit=limit, cursor=cursor)
+        seen += [doc["id"] for doc in documents]
+        if cursor is None:
+            return seen, total
+
+
+def test_cursor_pages_cover_every_document(db, user):
+    start = datetime(2024, 1, 1)
+    # Two documents share a timestamp; the id breaks the tie
+    created = [start, start + timedelta(minutes=1), start + timedelta(minutes=1), start + timedelta(minutes=2),
+               start + timedelta(minutes=3)]
+    ids = _add_documents(db, user, created)
+
+    seen, total = _all_pages(db, user, limit=2)
+
+    assert total == 5
+    assert sorted(seen) == sorted(ids)
+    assert seen[0] == ids[4] and seen[-1] == ids[0]
+
+
+def test_created_at_is_required_and_defaulted(db, user):
+    doc_id = str(uuid.uuid4())
+    db.execute(text("INSERT INTO documents (id, user_id, filename, processing_status) "
+                    "VALUES (:id, :user_id, 'no-date.pdf', 'pending')"),
+               {"id": doc_id, "user_id": user.id})
+    db.commit()
+    assert db.query(Document).filter(Document.id == doc_id).one().created_at is not None
+
+    with pytest.raises(IntegrityError):
+        db.execute(text("INSERT INTO documents (id, user_id, filename, processing_status, created_at) "
+                        "VALUES (:id, :user_id, 'null-date.pdf', 'pending', NULL)"),
+                   {"id": str(uuid.uuid4()), "user_id": user.id})
+    db.rollback()
+
+
+def test_migration_backfills_missing_created_at(engine, db, user):
+    ids = _add_documents(db, user, [datetime(2024, 1, 1), datetime(2024, 1, 2)])
+    db.commit()  # Reading the ids opened a transaction that would block the ALTER
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE documents ALTER COLUMN created_at DROP NOT NULL"))
+        conn.execute(text("UPDATE documents SET created_at = NULL WHERE id = :id"), {"id": ids[0]})
+    with open(MIGRATION) as f:
+        migration = f.read()
+    with engine.begin() as conn:
+        conn.execute(text(migration))
+
+    db.expire_all()
+    assert db.query(Document).filter(Document.id == ids[0]).one().created_at is not None
+    seen, _ = _all_pages(db, user, limit=1)
+    assert sorted(seen) == sorted(ids)
@@ -0,0 +1,149 @@
+import threading
+import uuid
+from datetime import datetime
+
+import pytest
+
+from database import draft_patches
+from database.models import Chat, Draft, DraftPatch, WritingSession
+
+
+@pytest.fixture
+def draft_id(db, user):
+    now = datetime.utcnow()
+    chat = Chat(id=str(uuid.uuid4()), user_id=user.id, title="Writing", chat_type="writing",
+                created_at=now, updated_at=now)
+    session = WritingSession(id=str(uuid.uuid4()), chat_id=chat.id, created_at=now, updated_at=now)
+    draft = Draft(id=str(uuid.uuid4()), writing_session_id=session.id, title="Draft",
+                  content="hello world", created_at=now, updated_at=now)
+    session.current_draft_id = draft.id
+    db.add_all([chat, session, draft])
+    db.commit()
+    return draft.id
+
+
+@pytest.fixture
+def compact_every_two(monkeypatch):
+    monkeypatch.setattr(draft_patches, "DRAFT_PATCH_COMPACT_EVERY", 2)
+
+
+def _save(session_factory, draft_id, base_revision, operations):
+    db = session_factory()
+    try:
+        draft = db.query(Draft).filter(Draft.id == draft_id).one()
+        draft_patches.apply_patch(db, draft, base_revision, operations)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _content(session_factory, draft_id):
+    db = session_factory()
+    try:
+        draft = db.query(Draft).filter(Draft.id == draft_id).one()
+        return draft.revision, draft_patches.current_content(db, draft)
+    finally:
+        db.close()
+
+
+def test_apply_operations_uses_utf16_offsets():
+    assert draft_patches.apply_operations("a😀b", [{"start": 3, "end": 4, "text": "c"}]) == "a😀c"
+    with pytest.raises(draft_patches.InvalidDraftPatch):
+        draft_patches.apply_operations("a😀b", [{"start": 2, "end": 2, "text": "x"}])
+
+
+def test_patches_accumulate_and_compact(session_factory, draft_id, compact_every_two):
+    _save(session_factory, draft_id, 0, [{"start": 5, "end": 5, "text": ","}])
+    assert _content(session_factory, draft_id) == (1, "hello, world")
+
+    _save(session_factory, draft_id, 1, [{"start": 12, "end": 12, "text": "!"}])
+    db = session_factory()
+    try:
+        draft = db.query(Draft).filter(Draft.id == draft_id).one()
+        assert (draft.revision, draft.compacted_revision, draft.content) == (2, 2, "hello, world!")
+        assert db.query(DraftPatch).filter(DraftPatch.draft_id == draft_id).count() == 0
+    finally:
+        db.close()
+
+
+def test_stale_save_at_compaction_boundary_conflicts(session_factory, draft_id, compact_every_two):
+    _save(session_factory, draft_id, 0, [{"start": 0, "end": 5, "text": "HELLO"}])
+
+    # Both writers loaded revision 1; the winner's save compacts and deletes its patch row
+    first, second = session_factory(), session_factory()
+    try:
+        first_draft = first.query(Draft).filter(Draft.id == draft_id).one()
+        second_draft = second.query(Draft).filter(Draft.id == draft_id).one()
+
+        draft_patches.apply_patch(first, first_draft, 1, [{"start": 11, "end": 11, "text": "!"}])
+        first.commit()
+
+        with pytest.raises(draft_patches.DraftRevisionConflict) as conflict:
+            draft_patches.apply_patch(second, second_draft, 1, [{"start": 11, "end": 11, "text": "?"}])
+        second.rollback()
+        assert conflict.value.current_revision == 2
+    finally:
+        first.close()
+        second.close()
+
+    assert _content(session_factory, draft_id) == (2, "HELLO world!")
+
+
+def test_concurrent_saves_at_compaction_boundary(session_factory, draft_id, compact_every_two):
+    _save(session_factory, draft_id, 0, [{"start": 0, "end": 5, "text": "HELLO"}])
+
+    first, second = session_factory(), session_factory()
+    outcome = {}
+
+    def second_save():
+        try:
+            draft = second.query(Draft).filter(Draft.id == draft_id).one()
+            loaded.set()
+            draft_patches.apply_patch(second, draft, 1, [{"start": 11, "end": 11, "text": "?"}])
+            second.commit()
+            outcome["result"] = "saved"
+        except draft_patches.DraftRevisionConflict as e:
+            second.rollback()
+            outcome["result"] = e.current_revision
+
+    loaded = threading.Event()
+    try:
+        # The first save claims the revision and compacts, but has not committed yet
+        first_draft = first.query(Draft).filter(Draft.id == draft_id).one()
+        draft_patches.apply_patch(first, first_draft, 1, [{"start": 11, "end": 11, "text": "!"}])
+
+        worker = threading.Thread(target=second_save)
+        worker.start()
+        assert loaded.wait(5)
+        # The second save blocks on the draft row until the first commits
+        worker.join(0.5)
+        assert worker.is_alive()
+
+        first.commit()
+        worker.join(5)
+        assert not worker.is_alive()
+    finally:
+        first.close()
+        second.close()
+
+    assert outcome["result"] == 2
+    assert _content(session_factory, draft_id) == (2, "HELLO world!")
+
+
+def test_full_save_with_stale_base_conflicts(session_factory, draft_id):
+    _save(session_factory, draft_id, 0, [{"start": 0, "end": 5, "text": "HELLO"}])
+
+    db = session_factory()
+    try:
+        draft = db.query(Draft).filter(Draft.id == draft_id).one()
+        with pytest.raises(draft_patches.DraftRevisionConflict):
+            draft_patches.replace_content(db, draft, "overwritten", base_revision=0)
+        db.rollback()
+
+        draft = db.query(Draft).filter(Draft.id == draft_id).one()
+        draft_patches.replace_content(db, draft, "replaced", base_revision=1)
+        db.commit()
+    finally:
+        db.close()
+
+    assert _content(session_factory, draft_id) == (2, "replaced")
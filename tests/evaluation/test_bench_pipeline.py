@@ -0,0 +1,24 @@
+"""Smoke test for the offline benchmark script.
+
+The script imports the whole backend at module level, so ``--help`` is enough to
+catch import-order problems such as the api.schemas circular import.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# database.crud pulls in the document processor, which needs torch
+pytest.importorskip("torch")
+
+SCRIPT = Path(__file__).resolve().parents[2] / "evaluation" / "scripts" / "bench_pipeline.py"
+
+
+def test_help_runs():
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT), "--help"],
+        capture_output=True, text=True, timeout=600,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "--scenarios" in result.stdout